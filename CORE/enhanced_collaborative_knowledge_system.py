@@ -25,6 +25,7 @@ sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 try:
     from src.services.agent_cell_phone import AgentCellPhone, MsgTag
+    from src.core.job_scheduler import get_scheduler
 except ImportError as e:
     print(f"Import error: {e}")
     print("Make sure you're running from the project root directory")
@@ -523,87 +524,72 @@ class EnhancedCollaborativeKnowledgeManager:
         }
     
     def _start_campaign_monitor(self):
-        """Start campaign monitoring for completion and election triggers"""
+        """Start campaign monitoring for completion and election triggers (shared scheduler job)"""
         def monitor_campaigns():
-            while True:
-                try:
-                    # Check campaign completion status
-                    completion_status = self.captaincy_system.check_campaign_completion()
-                    current_state = self.captaincy_system.get_current_state()
+            # Check campaign completion status
+            completion_status = self.captaincy_system.check_campaign_completion()
+            current_state = self.captaincy_system.get_current_state()
+                
+            if completion_status["action"] == "handoff":
+                # Campaign fully complete - trigger captain handoff
+                self.logger.info(f"🎯 Campaign fully completed: {current_state['campaign_title']}")
+                self.logger.info(f"🎯 Captain {current_state['current_captain']} handoff triggered")
                     
-                    if completion_status["action"] == "handoff":
-                        # Campaign fully complete - trigger captain handoff
-                        self.logger.info(f"🎯 Campaign fully completed: {current_state['campaign_title']}")
-                        self.logger.info(f"🎯 Captain {current_state['current_captain']} handoff triggered")
-                        
-                        # Notify all agents of campaign completion and handoff
-                        self._notify_campaign_handoff(
-                            current_state['current_captain'], 
-                            completion_status['completion_percentage']
-                        )
-                        
-                        # Complete the campaign and start new election
-                        self.captaincy_system._complete_campaign()
-                        self.captaincy_system.start_election_phase()
-                        self._notify_campaign_election_start()
-                        
-                        # Create campaign completion knowledge
-                        self._create_campaign_completion_knowledge(current_state)
-                        
-                    elif completion_status["action"] == "start_new":
-                        # Campaign ready for new election - allow new campaign to start
-                        if self.captaincy_system.current_term == CaptaincyTerm.CAMPAIGN_TERM:
-                            self.logger.info(f"🎯 Campaign ready for new election: {current_state['campaign_title']}")
-                            self.logger.info(f"🎯 Current completion: {completion_status['completion_percentage']:.1%}")
-                            
-                            # Notify agents that new campaign can start
-                            self._notify_campaign_ready_for_new_election(
-                                current_state['current_captain'],
-                                completion_status['completion_percentage']
-                            )
+                # Notify all agents of campaign completion and handoff
+                self._notify_campaign_handoff(
+                    current_state['current_captain'], 
+                    completion_status['completion_percentage']
+                )
                     
-                    time.sleep(1800)  # Check every 30 minutes
+                # Complete the campaign and start new election
+                self.captaincy_system._complete_campaign()
+                self.captaincy_system.start_election_phase()
+                self._notify_campaign_election_start()
                     
-                except Exception as e:
-                    self.logger.error(f"Campaign monitoring error: {e}")
-                    time.sleep(300)
+                # Create campaign completion knowledge
+                self._create_campaign_completion_knowledge(current_state)
+                    
+            elif completion_status["action"] == "start_new":
+                # Campaign ready for new election - allow new campaign to start
+                if self.captaincy_system.current_term == CaptaincyTerm.CAMPAIGN_TERM:
+                    self.logger.info(f"🎯 Campaign ready for new election: {current_state['campaign_title']}")
+                    self.logger.info(f"🎯 Current completion: {completion_status['completion_percentage']:.1%}")
+                        
+                    # Notify agents that new campaign can start
+                    self._notify_campaign_ready_for_new_election(
+                        current_state['current_captain'],
+                        completion_status['completion_percentage']
+                    )
         
-        campaign_thread = threading.Thread(target=monitor_campaigns, daemon=True)
-        campaign_thread.start()
+        # Check every 30 minutes, 5 minutes after an error
+        get_scheduler().add_job("campaign_monitor", monitor_campaigns, interval=1800, error_interval=300)
     
     def _start_automated_campaign_workflow(self):
-        """Start automated campaign workflow management"""
+        """Start automated campaign workflow management (shared scheduler job)"""
         def manage_campaign_workflow():
-            while True:
-                try:
-                    # Check current workflow state and take appropriate actions
-                    if self.campaign_workflow_state == "idle":
-                        # Check if we should start collecting proposals
-                        if self.captaincy_system.current_term == CaptaincyTerm.ELECTION_PHASE:
-                            self._automated_start_campaign_collection()
-                    
-                    elif self.campaign_workflow_state == "collecting_proposals":
-                        # Check if deadline reached or all agents submitted
-                        if self._check_campaign_submission_deadline():
-                            self._automated_close_submissions_and_start_voting()
-                    
-                    elif self.campaign_workflow_state == "voting":
-                        # Check if voting deadline reached
-                        if self._check_voting_deadline():
-                            self._automated_close_voting_and_select_captain()
-                    
-                    elif self.campaign_workflow_state == "execution":
-                        # Monitor campaign execution
-                        self._automated_monitor_campaign_execution()
-                    
-                    time.sleep(300)  # Check every 5 minutes
-                    
-                except Exception as e:
-                    self.logger.error(f"Automated campaign workflow error: {e}")
-                    time.sleep(60)
+            # Check current workflow state and take appropriate actions
+            if self.campaign_workflow_state == "idle":
+                # Check if we should start collecting proposals
+                if self.captaincy_system.current_term == CaptaincyTerm.ELECTION_PHASE:
+                    self._automated_start_campaign_collection()
+                
+            elif self.campaign_workflow_state == "collecting_proposals":
+                # Check if deadline reached or all agents submitted
+                if self._check_campaign_submission_deadline():
+                    self._automated_close_submissions_and_start_voting()
+                
+            elif self.campaign_workflow_state == "voting":
+                # Check if voting deadline reached
+                if self._check_voting_deadline():
+                    self._automated_close_voting_and_select_captain()
+                
+            elif self.campaign_workflow_state == "execution":
+                # Monitor campaign execution
+                self._automated_monitor_campaign_execution()
         
-        workflow_thread = threading.Thread(target=manage_campaign_workflow, daemon=True)
-        workflow_thread.start()
+        # Check every 5 minutes, 1 minute after an error
+        get_scheduler().add_job("campaign_workflow", manage_campaign_workflow,
+                                interval=300, error_interval=60, priority=1)
     
     def _automated_start_campaign_collection(self):
         """Automatically start collecting campaign proposals from all agents"""
@@ -1344,30 +1330,23 @@ Let's execute this campaign successfully!"""
         return categories
     
     def _start_coordination_monitor(self):
-        """Start background coordination monitoring"""
+        """Start background coordination monitoring (shared scheduler job)"""
         def monitor_coordination():
-            while True:
-                try:
-                    # Check campaign status
-                    campaign_status = self.get_campaign_status()
-                    
-                    # Log current status
-                    self.logger.info(f"Current term: {campaign_status['current_term']}")
-                    if campaign_status.get('current_captain'):
-                        self.logger.info(f"Current captain: {campaign_status['current_captain']}")
-                        self.logger.info(f"Campaign: {campaign_status.get('campaign_title', 'N/A')}")
-                        self.logger.info(f"Campaign progress: {campaign_status.get('campaign_progress', 0):.1%}")
-                    else:
-                        self.logger.info("No active captain - election phase")
-                    
-                    time.sleep(300)  # Check every 5 minutes
-                    
-                except Exception as e:
-                    self.logger.error(f"Coordination monitoring error: {e}")
-                    time.sleep(60)
+            # Check campaign status
+            campaign_status = self.get_campaign_status()
+                
+            # Log current status
+            self.logger.info(f"Current term: {campaign_status['current_term']}")
+            if campaign_status.get('current_captain'):
+                self.logger.info(f"Current captain: {campaign_status['current_captain']}")
+                self.logger.info(f"Campaign: {campaign_status.get('campaign_title', 'N/A')}")
+                self.logger.info(f"Campaign progress: {campaign_status.get('campaign_progress', 0):.1%}")
+            else:
+                self.logger.info("No active captain - election phase")
         
-        monitor_thread = threading.Thread(target=monitor_coordination, daemon=True)
-        monitor_thread.start()
+        # Check every 5 minutes, 1 minute after an error
+        get_scheduler().add_job("coordination_monitor", monitor_coordination,
+                                interval=300, error_interval=60, priority=-1)
     
     def _load_knowledge_base(self):
         """Load existing knowledge base from disk"""
@@ -24,6 +24,10 @@ sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 try:
     from src.services.agent_cell_phone import AgentCellPhone, MsgTag
+    from src.core.activity_timeline import ActivityTimeline, ActivityWatcher, StallThresholds, get_timeline
+    from src.core.fleet_analytics import FleetActivityMatrix, FleetReport
+    from src.core.mitigation_executor import MitigationExecutor, MitigationStep, get_executor
+    from src.core.stall_predictor import Sample, StallFeatures, load_model, tag_code
 except ImportError as e:
     print(f"Import error: {e}")
     print("Make sure you're running from the project root directory")
@@ -100,8 +104,9 @@ class StallDetectionEngine:
             "onboarding_grace_period": config.get("onboarding_grace_period", 600) # 10 minutes
         }
     
-    def detect_stall_level(self, agent_state: AgentState, current_time: datetime) -> StallLevel:
-        """Detect stall level based on agent state and timing"""
+    def detect_stall_level(self, agent_state: AgentState, current_time: datetime,
+                           fleet_row: Optional[Dict[str, Any]] = None) -> StallLevel:
+        """Detect stall level based on agent state and timing (fleet_row: FleetReport.row for the agent)"""
         time_since_message = (current_time - agent_state.last_message_sent).total_seconds()
         time_since_response = (current_time - agent_state.last_response_received).total_seconds()
         
@@ -112,6 +117,9 @@ class StallDetectionEngine:
         
         # Determine stall level based on response time
         if time_since_response <= self.thresholds["normal_response_time"]:
+            # Fleet analytics flags agents far quieter than their own history or the fleet
+            if fleet_row and fleet_row.get("anomaly"):
+                return StallLevel.WARNING
             return StallLevel.NONE
         elif time_since_response <= self.thresholds["warn_threshold"]:
             return StallLevel.WARNING
@@ -149,10 +157,22 @@ class StallDetectionEngine:
 class StallMitigationEngine:
     """Stall mitigation engine with multiple strategies"""
     
-    def __init__(self, agent_cellphone: AgentCellPhone, config: Dict[str, Any]):
+    # Executor kinds decide cooldown and which request supersedes which
+    STRATEGY_KINDS = {
+        MitigationStrategy.GENTLE_NUDGE: "nudge",
+        MitigationStrategy.ESCALATION: "escalation",
+        MitigationStrategy.COLLABORATIVE_INTERVENTION: "escalation",
+        MitigationStrategy.RESCUE_OPERATION: "rescue",
+        MitigationStrategy.EMERGENCY_OVERRIDE: "emergency",
+    }
+    
+    def __init__(self, agent_cellphone: AgentCellPhone, config: Dict[str, Any],
+                 executor: Optional[MitigationExecutor] = None):
         self.acp = agent_cellphone
         self.config = config
         self.logger = logging.getLogger(__name__)
+        # Shared with the monitor, captain and runner so they don't rescue the same agent at once
+        self.executor = executor or get_executor()
         
         # Mitigation strategies and their implementations
         self.mitigation_strategies = {
@@ -193,14 +213,20 @@ class StallMitigationEngine:
             # Select mitigation strategy based on stall level
             strategy = self._select_mitigation_strategy(stall_level, agent_state)
             
-            # Execute the strategy
-            success = self.mitigation_strategies[strategy](agent_id, stall_level, agent_state)
+            # Execute the strategy through the shared executor
+            action = self.mitigation_strategies[strategy]
+            decision = self.executor.request(
+                agent_id,
+                self.STRATEGY_KINDS.get(strategy, "nudge"),
+                [MitigationStep(strategy.value, lambda: action(agent_id, stall_level, agent_state))],
+                source="unified_stall_detection",
+            )
             
-            if success:
-                self.logger.info(f"✅ Mitigation strategy {strategy} executed successfully for {agent_id}")
+            if decision.accepted or decision.status == "merged":
+                self.logger.info(f"✅ Mitigation strategy {strategy} {decision.status} for {agent_id}")
                 return True
             else:
-                self.logger.warning(f"⚠️ Mitigation strategy {strategy} failed for {agent_id}")
+                self.logger.info(f"⏳ Mitigation strategy {strategy} skipped for {agent_id} (cooldown {decision.retry_after:.0f}s)")
                 return False
                 
         except Exception as e:
@@ -340,11 +366,17 @@ class StallMitigationEngine:
 class ResponseMonitor:
     """Monitors agent responses to detect activity"""
     
-    def __init__(self, agent_cellphone: AgentCellPhone):
+    # Timeline sources that count as an agent answering (heartbeats only prove the sender is alive)
+    RESPONSE_SOURCES = ("reply", "state", "commit")
+    
+    def __init__(self, agent_cellphone: AgentCellPhone, timeline: Optional[ActivityTimeline] = None,
+                 workspace_root: Optional[str] = None):
         self.acp = agent_cellphone
         self.logger = logging.getLogger(__name__)
         self.response_history = {}
         self.monitoring_active = False
+        self.timeline = timeline or get_timeline()
+        self.watcher = ActivityWatcher(self.timeline, workspace_root=workspace_root)
     
     def start_monitoring(self):
         """Start response monitoring"""
@@ -356,11 +388,16 @@ class ResponseMonitor:
         self.monitoring_active = False
         self.logger.info("🛑 Response monitoring stopped")
     
+    def last_response(self, agent_id: str) -> Optional[datetime]:
+        """Latest reply/state/commit activity seen for the agent"""
+        self.watcher.poll([agent_id])
+        ts = self.timeline.last_activity(agent_id, self.RESPONSE_SOURCES)
+        return datetime.fromtimestamp(ts) if ts else None
+    
     def has_agent_responded(self, agent_id: str, since_time: datetime) -> bool:
         """Check if agent has responded since a given time"""
-        # This would integrate with actual agent cellphone response detection
-        # For now, we'll simulate response detection
-        return False
+        last = self.last_response(agent_id)
+        return last is not None and last >= since_time
     
     def record_response(self, agent_id: str, response_time: datetime):
         """Record agent response"""
@@ -368,6 +405,7 @@ class ResponseMonitor:
             self.response_history[agent_id] = []
         
         self.response_history[agent_id].append(response_time)
+        self.timeline.record(agent_id, response_time.timestamp(), "reply")
         self.logger.info(f"📝 Response recorded for {agent_id} at {response_time}")
 
 class UnifiedStallDetectionSystem:
@@ -386,7 +424,13 @@ class UnifiedStallDetectionSystem:
         # Initialize components
         self.detection_engine = StallDetectionEngine(self.config)
         self.mitigation_engine = StallMitigationEngine(self.acp, self.config)
-        self.response_monitor = ResponseMonitor(self.acp)
+        self.response_monitor = ResponseMonitor(self.acp, workspace_root=self.config.get("workspace_root", "agent_workspaces"))
+        self.fleet = FleetActivityMatrix().attach(self.response_monitor.timeline)
+        self.fleet_report: Optional[FleetReport] = None
+        
+        # Optional stall model (scripts/stall_model.py train) for nudges ahead of the thresholds
+        self.stall_model = load_model(self.config.get("stall_model", "runtime/agent_monitors/agent5/stall_model.json"))
+        self.stall_features = StallFeatures()
         
         # Agent tracking
         self.agents = ["Agent-1", "Agent-2", "Agent-3", "Agent-4", "Agent-5"]
@@ -450,6 +494,7 @@ class UnifiedStallDetectionSystem:
             "rescue_cooldown": 300,           # 5 minutes
             "check_interval": 30,             # 30 seconds
             "onboarding_grace_period": 600,   # 10 minutes
+            "workspace_root": "agent_workspaces",
             "auto_mitigation": True,
             "collaborative_rescue": True,
             "emergency_override": True
@@ -474,6 +519,7 @@ class UnifiedStallDetectionSystem:
             )
             
             self.stall_history[agent] = []
+            self.fleet.add_agent(agent)
         
         self.logger.info(f"✅ Initialized {len(self.agents)} agent states")
     
@@ -504,6 +550,13 @@ class UnifiedStallDetectionSystem:
             try:
                 current_time = datetime.now()
                 
+                # One vectorized pass over the whole fleet per check
+                self.fleet_report = self.fleet.analyze(StallThresholds(
+                    active_sec=self.detection_engine.thresholds["normal_response_time"],
+                    warn_sec=self.detection_engine.thresholds["warn_threshold"],
+                    stall_sec=self.detection_engine.thresholds["critical_threshold"],
+                ))
+                
                 # Check each agent for stalls
                 for agent_id, agent_state in self.agent_states.items():
                     self._check_agent_stall(agent_id, agent_state, current_time)
@@ -518,12 +571,23 @@ class UnifiedStallDetectionSystem:
     def _check_agent_stall(self, agent_id: str, agent_state: AgentState, current_time: datetime):
         """Check individual agent for stall conditions"""
         try:
+            # Fold in replies/state writes from the shared activity timeline
+            seen = self.response_monitor.last_response(agent_id)
+            if seen and seen > agent_state.last_response_received:
+                agent_state.last_response_received = seen
+                agent_state.response_count += 1
+            
             # Detect stall level
-            stall_level = self.detection_engine.detect_stall_level(agent_state, current_time)
+            fleet_row = self.fleet_report.row(agent_id) if self.fleet_report else None
+            stall_level = self.detection_engine.detect_stall_level(agent_state, current_time, fleet_row)
             
             # Update agent state
             self._update_agent_state(agent_id, agent_state, stall_level, current_time)
             
+            # Score with the stall model while the thresholds still say "fine"
+            if stall_level == StallLevel.NONE and self.stall_model:
+                self._predict_stall(agent_id, agent_state, current_time, fleet_row)
+            
             # Execute mitigation if needed
             if stall_level != StallLevel.NONE:
                 if self.detection_engine.should_mitigate(agent_state, stall_level):
@@ -535,6 +599,27 @@ class UnifiedStallDetectionSystem:
         except Exception as e:
             self.logger.error(f"Error checking agent {agent_id}: {e}")
     
+    def _predict_stall(self, agent_id: str, agent_state: AgentState, current_time: datetime,
+                       fleet_row: Optional[Dict[str, Any]]):
+        """Nudge an agent the stall model expects to stall within its horizon"""
+        last_msg = self.acp.last_message_to(agent_id)
+        features = self.stall_features.update(agent_id, Sample(
+            ts=current_time.timestamp(),
+            age_sec=(current_time - agent_state.last_response_received).total_seconds(),
+            events_last_hour=(fleet_row or {}).get("rate_now") or 0.0,
+            last_tag=tag_code(last_msg.tag if last_msg else None),
+        ))
+        risk = self.stall_model.score(features)
+        if risk < self.stall_model.threshold:
+            return
+        decision = self.mitigation_engine.executor.request(
+            agent_id, "nudge",
+            [MitigationStep("predicted_nudge", lambda: self.acp.nudge_agent(agent_id, "subtle"))],
+            source="unified_stall_detection",
+        )
+        if decision.accepted:
+            self.logger.info(f"🔮 Predictive nudge for {agent_id} (risk {risk:.2f})")
+    
     def _update_agent_state(self, agent_id: str, agent_state: AgentState, stall_level: StallLevel, current_time: datetime):
         """Update agent state based on stall detection"""
         if stall_level != StallLevel.NONE:
@@ -618,7 +703,8 @@ class UnifiedStallDetectionSystem:
             "agents_monitored": len(self.agents),
             "total_stall_events": total_stalls,
             "active_stalls": active_stalls,
-            "system_health": "healthy" if active_stalls == 0 else "degraded" if active_stalls < 3 else "critical"
+            "system_health": "healthy" if active_stalls == 0 else "degraded" if active_stalls < 3 else "critical",
+            "fleet_anomalies": self.fleet_report.flagged() if self.fleet_report else []
         }
 
 def main():
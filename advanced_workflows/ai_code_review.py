@@ -22,6 +22,7 @@ class AICodeReviewWorkflow:
         self.project_path = Path(project_path)
         self.review_focus = review_focus
         self.workflow_engine = WorkflowEngine("ai_code_review")
+        self.workflow_engine.workflow_data.update(project_path=str(self.project_path), review_focus=review_focus)
         self.code_files = []
         self.review_results = {}
         
@@ -198,6 +199,8 @@ def main():
     parser.add_argument("--review-focus", default="general", 
                        choices=["general", "security", "performance", "quality", "architecture"],
                        help="Focus area for the review")
+    parser.add_argument("--resume", action="store_true",
+                       help="Continue the last run from its checkpoint instead of starting over")
     parser.add_argument("--export-report", help="Path to export the review report")
     
     args = parser.parse_args()
@@ -216,7 +219,8 @@ def main():
         )
         
         # Start the review
-        review_workflow.start_review()
+        if not (args.resume and review_workflow.workflow_engine.resume()):
+            review_workflow.start_review()
         
         # Get summary
         summary = review_workflow.get_review_summary()
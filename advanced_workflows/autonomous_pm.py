@@ -24,6 +24,7 @@ class AutonomousPMWorkflow:
         self.max_iterations = max_iterations
         self.adaptation_threshold = adaptation_threshold
         self.workflow_engine = WorkflowEngine("autonomous_pm")
+        self.workflow_engine.workflow_data.update(goal=goal)
         self.project_metrics = {}
         self.adaptation_history = []
         
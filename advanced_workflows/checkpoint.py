@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Workflow Checkpoints - incremental, resumable workflow state
+- every finished step appends one record (status + the workflow_data keys it
+  wrote) to ``journal.ndjson``; cost is O(step output), not O(workflow)
+- every ``snapshot_every`` records the state is compacted into
+  ``snapshot-<seq>.json`` and the journal starts over
+- ``load()`` = newest snapshot + journal replay (falls back to the legacy
+  ``<epoch>.json`` full snapshots)
+- retention keeps the newest ``keep_snapshots`` snapshots and drops anything
+  older than ``max_age_days`` (the newest snapshot is always kept)
+"""
+
+import json
+import os
+import sys
+import time
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.utils import atomic_write  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+JOURNAL = "journal.ndjson"
+SNAPSHOT_PREFIX = "snapshot-"
+
+
+class WorkflowCheckpoint:
+    """Append-only step log plus periodic compacted snapshots for one workflow"""
+
+    def __init__(self, directory: Path, snapshot_every: int = 25, keep_snapshots: int = 3,
+                 max_age_days: float = 14.0):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.snapshot_every = max(1, snapshot_every)
+        self.keep_snapshots = max(1, keep_snapshots)
+        self.max_age_days = max_age_days
+        self.journal_path = self.directory / JOURNAL
+        self._journal = None
+        self._since_snapshot = 0
+        self._seq = self._last_seq()
+
+    # ---------- writing ----------
+    def _append(self, record: Dict[str, Any]) -> None:
+        self._seq += 1
+        record = {"seq": self._seq, "ts": time.time(), **record}
+        if self._journal is None:
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal.write(json.dumps(record, default=str) + "\n")
+        self._journal.flush()
+        self._since_snapshot += 1
+
+    def record_step(self, step_id: str, status: str, data: Optional[Dict[str, Any]] = None) -> None:
+        """Log a finished step and the workflow_data entries it produced"""
+        self._append({"kind": "step", "step": step_id, "status": status, "data": data or {}})
+
+    def record_state(self, state: str) -> None:
+        self._append({"kind": "state", "state": state})
+
+    @property
+    def due(self) -> bool:
+        """True once enough records piled up to be worth compacting"""
+        return self._since_snapshot >= self.snapshot_every
+
+    def snapshot(self, state: Dict[str, Any]) -> Path:
+        """Compact ``state`` into a snapshot, restart the journal and apply retention"""
+        self._seq += 1
+        path = self.directory / f"{SNAPSHOT_PREFIX}{self._seq:08d}.json"
+        atomic_write(path, json.dumps({**state, "seq": self._seq, "saved_at": time.time()}, indent=2, default=str))
+        # Records up to this seq are inside the snapshot; a crash before the
+        # truncation is harmless because load() skips them by seq
+        self.close()
+        atomic_write(self.journal_path, "")
+        self._since_snapshot = 0
+        self.prune()
+        return path
+
+    def close(self) -> None:
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    # ---------- reading ----------
+    def _snapshots(self) -> List[Path]:
+        """Snapshot files, newest first"""
+        return sorted(self.directory.glob(f"{SNAPSHOT_PREFIX}*.json"), reverse=True)
+
+    def _legacy(self) -> List[Path]:
+        """Old ``<epoch>.json`` full snapshots, newest first"""
+        return sorted((p for p in self.directory.glob("*.json") if p.stem.isdigit()),
+                      key=lambda p: int(p.stem), reverse=True)
+
+    def _journal_records(self) -> List[Dict[str, Any]]:
+        records = []
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # A torn final line from a crash mid-write
+                        logger.warning(f"Skipping malformed journal line in {self.journal_path}")
+        except OSError:
+            pass
+        return records
+
+    def _last_seq(self) -> int:
+        seqs = [int(p.stem[len(SNAPSHOT_PREFIX):]) for p in self._snapshots()[:1]]
+        seqs += [r.get("seq", 0) for r in self._journal_records()[-1:]]
+        return max(seqs, default=0)
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Newest snapshot with the journal replayed on top; None when nothing was saved"""
+        state: Optional[Dict[str, Any]] = None
+        for path in self._snapshots() + self._legacy():
+            try:
+                state = json.loads(path.read_text(encoding="utf-8"))
+                break
+            except (OSError, ValueError) as e:
+                logger.warning(f"Unreadable checkpoint {path}: {e}")
+        records = self._journal_records()
+        if state is None and not records:
+            return None
+
+        state = state or {}
+        base_seq = state.get("seq", 0)
+        completed = set(state.get("completed_steps", []))
+        failed = set(state.get("failed_steps", []))
+        data = dict(state.get("workflow_data", {}))
+        for record in records:
+            if record.get("seq", 0) <= base_seq:
+                continue
+            if record.get("kind") == "step":
+                step_id = record["step"]
+                if record.get("status") == "completed":
+                    completed.add(step_id)
+                    failed.discard(step_id)
+                else:
+                    failed.add(step_id)
+                    completed.discard(step_id)
+                data.update(record.get("data") or {})
+            elif record.get("kind") == "state":
+                state["state"] = record["state"]
+        state.update(completed_steps=sorted(completed), failed_steps=sorted(failed), workflow_data=data)
+        return state
+
+    # ---------- retention ----------
+    def prune(self, now: Optional[float] = None) -> int:
+        """Delete snapshots beyond ``keep_snapshots`` or older than ``max_age_days``"""
+        now = time.time() if now is None else now
+        candidates = self._snapshots() + self._legacy()
+        removed = 0
+        for i, path in enumerate(candidates):
+            if i == 0:
+                continue
+            try:
+                expired = now - path.stat().st_mtime > self.max_age_days * 86400
+                if i >= self.keep_snapshots or expired:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
@@ -24,6 +24,7 @@ class MultiAgentDevWorkflow:
         self.agents = agents
         self.coordination_strategy = coordination_strategy
         self.workflow_engine = WorkflowEngine("multi_agent_dev")
+        self.workflow_engine.workflow_data.update(task_description=task_description)
         self.task_breakdown = {}
         self.development_results = {}
         
@@ -232,6 +233,8 @@ def main():
     parser.add_argument("--strategy", default="parallel",
                        choices=["parallel", "sequential"],
                        help="Coordination strategy for agents")
+    parser.add_argument("--resume", action="store_true",
+                       help="Continue the last run from its checkpoint instead of starting over")
     parser.add_argument("--export-report", help="Path to export the development report")
     
     args = parser.parse_args()
@@ -250,7 +253,8 @@ def main():
         )
         
         # Start the development
-        dev_workflow.start_development()
+        if not (args.resume and dev_workflow.workflow_engine.resume()):
+            dev_workflow.start_development()
         
         # Get summary
         summary = dev_workflow.get_development_summary()
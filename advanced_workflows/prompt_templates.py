@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Prompt Templates - compiled step prompts with bounded upstream context
+- templates are parsed once; unknown fields stay as literal ``{name}``
+  placeholders and unbalanced braces are treated as plain text instead of
+  raising like ``str.format``
+- a step's context is assembled only from the upstream outputs it needs
+  (its dependencies unless ``context_from`` says otherwise), shared fairly
+  within a character budget, with a pluggable summarize hook and head/tail
+  truncation as the fallback
+- rendered prompts are cached in a bounded LRU keyed by their inputs
+"""
+
+from collections import ChainMap, OrderedDict
+from string import Formatter
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+CONTEXT_FIELD = "context"
+TRUNCATION_MARK = "\n[...]\n"
+
+# summarize(text, limit) -> shorter text; results longer than limit are truncated
+Summarizer = Callable[[str, int], str]
+
+_formatter = Formatter()
+
+
+def truncate(text: str, limit: int) -> str:
+    """Keep the head and the tail of ``text`` within ``limit`` characters"""
+    if len(text) <= limit:
+        return text
+    if limit <= len(TRUNCATION_MARK):
+        return text[:limit]
+    keep = limit - len(TRUNCATION_MARK)
+    head = keep * 2 // 3
+    return text[:head] + TRUNCATION_MARK + text[len(text) - (keep - head):]
+
+
+class CompiledTemplate:
+    """A prompt template parsed once into literal and field segments"""
+
+    __slots__ = ("source", "parts", "fields")
+
+    def __init__(self, source: str):
+        self.source = source
+        try:
+            self.parts = list(_formatter.parse(source))
+        except ValueError:
+            # Unbalanced braces (e.g. a goal containing "{") - use the text as is
+            self.parts = [(source, None, None, None)]
+        self.fields = tuple(dict.fromkeys(f for _, f, _, _ in self.parts if f))
+
+    def render(self, values: Mapping[str, Any]) -> str:
+        out: List[str] = []
+        for literal, field, spec, conversion in self.parts:
+            out.append(literal)
+            if field is None:
+                continue
+            try:
+                value, _ = _formatter.get_field(field, (), values)
+                value = _formatter.convert_field(value, conversion)
+                out.append(format(value, spec or ""))
+            except (KeyError, IndexError, AttributeError, ValueError, TypeError):
+                # Leave the placeholder visible rather than failing the step
+                out.append("{" + field + "}")
+        return "".join(out)
+
+
+class PromptCompiler:
+    """Compiles templates and renders step prompts with bounded context"""
+
+    def __init__(self, context_chars: int = 2000, cache_size: int = 256,
+                 summarize: Optional[Summarizer] = None):
+        self.context_chars = context_chars
+        self.cache_size = cache_size
+        self.summarize = summarize
+        self._compiled: "OrderedDict[str, CompiledTemplate]" = OrderedDict()
+        self._rendered: "OrderedDict[tuple, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, source: str) -> CompiledTemplate:
+        template = self._compiled.get(source)
+        if template is None:
+            template = self._compiled[source] = CompiledTemplate(source)
+            if len(self._compiled) > self.cache_size:
+                self._compiled.popitem(last=False)
+        else:
+            self._compiled.move_to_end(source)
+        return template
+
+    def _fit(self, text: str, limit: int) -> str:
+        if len(text) <= limit:
+            return text
+        if self.summarize is not None:
+            text = self.summarize(text, limit)
+        return truncate(text, limit)
+
+    def assemble_context(self, sources: Sequence[Tuple[str, str]], budget: Optional[int] = None) -> str:
+        """Join ``(label, text)`` sources into one block of at most ``budget`` characters.
+
+        Short outputs are kept whole and what they leave unused goes to the
+        longer ones (water-filling), so one verbose step cannot crowd out the rest.
+        Sources whose header no longer fits are dropped, later ones first.
+        """
+        budget = self.context_chars if budget is None else budget
+        # "[label]\n" headers and the blank lines between sources count too
+        remaining = budget
+        kept: List[Tuple[str, str]] = []
+        for label, text in sources:
+            if not text:
+                continue
+            overhead = len(label) + 3 + (2 if kept else 0)
+            if overhead >= remaining:
+                break
+            kept.append((label, text))
+            remaining -= overhead
+        sources = kept
+        if not sources:
+            return ""
+        fitted: Dict[str, str] = {}
+        by_length = sorted(sources, key=lambda s: len(s[1]))
+        for i, (label, text) in enumerate(by_length):
+            share = max(0, remaining // (len(by_length) - i))
+            fitted[label] = self._fit(text, share)
+            remaining -= len(fitted[label])
+        return "\n\n".join(f"[{label}]\n{fitted[label]}" for label, _ in sources)
+
+    def render(self, key: str, template: CompiledTemplate, values: Mapping[str, Any],
+               sources: Sequence[Tuple[str, str]] = (), budget: Optional[int] = None) -> str:
+        """Render ``template``; context goes into ``{context}`` or is appended after the prompt"""
+        fingerprint = (
+            key,
+            template.source,
+            budget,
+            tuple((f, str(values.get(f.split(".")[0].split("[")[0])))
+                  for f in template.fields if f != CONTEXT_FIELD),
+            tuple((label, len(text), hash(text)) for label, text in sources),
+        )
+        cached = self._rendered.get(fingerprint)
+        if cached is not None:
+            self.hits += 1
+            self._rendered.move_to_end(fingerprint)
+            return cached
+        self.misses += 1
+
+        context = self.assemble_context(sources, budget)
+        if CONTEXT_FIELD in template.fields:
+            prompt = template.render(ChainMap({CONTEXT_FIELD: context}, values))
+        else:
+            prompt = template.render(values)
+            if context:
+                prompt += "\n\nContext from earlier steps:\n" + context
+        self._rendered[fingerprint] = prompt
+        if len(self._rendered) > self.cache_size:
+            self._rendered.popitem(last=False)
+        return prompt
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Response Router - one ingestion path for captured AI replies
+- scans the workflow inbox once per interval for every engine in the process
+- each reply file is parsed exactly once (tracked by name, not by mtime)
+- replies are indexed by agent and correlation id and handed to waiting steps
+  as asyncio futures; replies nobody waits for yet are buffered
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+REF_RX = re.compile(r"\[ref:\s*([^\]\s]+)\s*\]")
+
+
+@dataclass
+class AIResponse:
+    """Captured AI response from cursor capture system"""
+    agent: str
+    text: str
+    timestamp: float
+    message_id: str
+    role: str = "assistant"
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    correlation_id: Optional[str] = None
+    received: float = 0.0
+
+
+def parse_envelope(data: Dict[str, Any]) -> AIResponse:
+    """Build an AIResponse from an inbox envelope (capture or enhanced-capture format)"""
+    payload = data.get("payload") or {}
+    text = payload.get("text") or payload.get("raw") or payload.get("summary") or ""
+    ref = REF_RX.search(text)
+    correlation_id = (
+        data.get("correlation_id")
+        or payload.get("correlation_id")
+        or (ref.group(1) if ref else None)
+    )
+    return AIResponse(
+        agent=data.get("agent") or data.get("from") or "unknown",
+        text=text,
+        timestamp=data.get("ts", time.time()),
+        message_id=payload.get("message_id", ""),
+        role=payload.get("role", "assistant"),
+        metadata=data,
+        correlation_id=correlation_id,
+    )
+
+
+@dataclass
+class _Waiter:
+    future: asyncio.Future
+    loop: asyncio.AbstractEventLoop
+    agent: str
+    correlation_id: Optional[str]
+    since: float
+
+
+class ResponseRouter:
+    """Shared reply router for one inbox directory"""
+
+    def __init__(self, inbox: Path, poll_interval: float = 0.25, buffer_size: int = 256):
+        self.inbox = Path(inbox)
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        self._seen: Set[str] = set()
+        self._waiters: List[_Waiter] = []
+        self._buffer: Dict[str, Deque[AIResponse]] = {}
+        self._buffer_size = buffer_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Replies already in the inbox belong to earlier runs
+        self._seen.update(self._listing())
+
+    # ---------- waiting ----------
+    def expect(self, agent: str, correlation_id: Optional[str] = None,
+               since: float = 0.0) -> asyncio.Future:
+        """Future resolving with the next reply from ``agent`` received after ``since``.
+
+        A reply carrying a correlation id only resolves the waiter with that id;
+        replies without one go to the agent's oldest waiter.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            response = self._claim_buffered(agent, correlation_id, since)
+            if response is None:
+                self._waiters.append(_Waiter(future, loop, agent, correlation_id, since))
+        if response is not None:
+            future.set_result(response)
+        else:
+            future.add_done_callback(self._forget)
+            self.start()
+        return future
+
+    def _forget(self, future: asyncio.Future) -> None:
+        with self._lock:
+            self._waiters = [w for w in self._waiters if w.future is not future]
+
+    def _claim_buffered(self, agent: str, correlation_id: Optional[str], since: float) -> Optional[AIResponse]:
+        buffered = self._buffer.get(agent)
+        if not buffered:
+            return None
+        for response in buffered:
+            if response.received >= since and response.correlation_id in (None, correlation_id):
+                buffered.remove(response)
+                return response
+        return None
+
+    # ---------- ingestion ----------
+    def publish(self, response: AIResponse) -> None:
+        """Hand a reply to its waiter, or buffer it until one arrives"""
+        if not response.received:
+            response.received = time.time()
+        with self._lock:
+            waiter = self._match(response)
+            if waiter is None:
+                queue = self._buffer.setdefault(response.agent, deque(maxlen=self._buffer_size))
+                queue.append(response)
+                return
+            self._waiters.remove(waiter)
+        try:
+            waiter.loop.call_soon_threadsafe(self._resolve, waiter.future, response)
+        except RuntimeError:
+            # The waiter's event loop is gone; give the reply to someone else
+            self.publish(response)
+
+    def _match(self, response: AIResponse) -> Optional[_Waiter]:
+        for waiter in self._waiters:
+            if waiter.agent != response.agent or waiter.future.done() or response.received < waiter.since:
+                continue
+            if response.correlation_id in (None, waiter.correlation_id):
+                return waiter
+        return None
+
+    def _resolve(self, future: asyncio.Future, response: AIResponse) -> None:
+        if future.done():
+            # The waiter timed out or was cancelled in the meantime
+            self.publish(response)
+        else:
+            future.set_result(response)
+
+    def _listing(self) -> List[str]:
+        try:
+            with os.scandir(self.inbox) as entries:
+                return [e.name for e in entries if e.name.endswith(".json")]
+        except OSError:
+            return []
+
+    def poll(self) -> int:
+        """Ingest reply files not seen before; returns how many were routed"""
+        with self._poll_lock:
+            names = self._listing()
+            fresh = sorted(n for n in names if n not in self._seen)
+            # Forget names that left the inbox so the seen set stays bounded
+            self._seen.intersection_update(names)
+            self._seen.update(fresh)
+        routed = 0
+        for name in fresh:
+            try:
+                with open(self.inbox / name, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"Error reading response file {name}: {e}")
+                continue
+            self.publish(parse_envelope(data))
+            routed += 1
+        return routed
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Response router poll failed: {e}")
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"response-router:{self.inbox}", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+
+_routers: Dict[str, ResponseRouter] = {}
+_routers_lock = threading.Lock()
+
+
+def get_router(inbox: Path) -> ResponseRouter:
+    """Process-wide router for ``inbox``; every engine reading it shares one scan"""
+    key = os.path.abspath(str(inbox))
+    with _routers_lock:
+        router = _routers.get(key)
+        if router is None:
+            router = _routers[key] = ResponseRouter(Path(key))
+        return router
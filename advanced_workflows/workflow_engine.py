@@ -8,13 +8,24 @@ import json
 import os
 import time
 import asyncio
+import heapq
 from pathlib import Path
-from typing import Dict, List, Callable, Any, Optional
+from collections import deque
+from typing import Deque, Dict, List, Callable, Any, Optional
 from dataclasses import dataclass, field
 from enum import Enum
 from urllib import request, error
 import logging
 
+try:
+    from .checkpoint import WorkflowCheckpoint
+    from .prompt_templates import PromptCompiler, Summarizer
+    from .response_router import AIResponse, ResponseRouter, get_router
+except ImportError:  # run as a script
+    from checkpoint import WorkflowCheckpoint
+    from prompt_templates import PromptCompiler, Summarizer
+    from response_router import AIResponse, ResponseRouter, get_router
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -43,21 +54,14 @@ class WorkflowStep:
     max_retries: int = 3
     dependencies: List[str] = field(default_factory=list)
     completion_criteria: Dict[str, Any] = field(default_factory=dict)
+    # Upstream steps whose outputs feed this prompt (None = the dependencies)
+    context_from: Optional[List[str]] = None
+    context_chars: Optional[int] = None
     
     def is_ready(self, completed_steps: set) -> bool:
         """Check if step dependencies are satisfied"""
         return all(dep in completed_steps for dep in self.dependencies)
 
-@dataclass
-class AIResponse:
-    """Captured AI response from cursor capture system"""
-    agent: str
-    text: str
-    timestamp: float
-    message_id: str
-    role: str = "assistant"
-    metadata: Dict[str, Any] = field(default_factory=dict)
-
 class WorkflowEngine:
     """Main workflow orchestration engine"""
 
@@ -68,6 +72,13 @@ class WorkflowEngine:
         devlog_webhook: str | None = None,
         devlog_username: str = "Agent Devlog",
         devlog_embed: bool = False,
+        max_concurrency: Optional[int] = None,
+        per_agent_limit: int = 1,
+        response_router: Optional[ResponseRouter] = None,
+        snapshot_every: int = 25,
+        keep_snapshots: int = 3,
+        context_chars: int = 2000,
+        summarize: Optional[Summarizer] = None,
     ):
         self.workflow_name = workflow_name
         self.agent_system_path = Path(agent_system_path)
@@ -77,9 +88,20 @@ class WorkflowEngine:
         self.failed_steps: set = set()
         self.state = WorkflowState.INITIALIZED
         self.start_time = time.time()
-        self.ai_responses: List[AIResponse] = []
+        self.ai_responses: Deque[AIResponse] = deque(maxlen=256)
         self.workflow_data: Dict[str, Any] = {}
 
+        # Prompts: compiled once, upstream context bounded to context_chars per step
+        self.prompts = PromptCompiler(context_chars=context_chars, summarize=summarize)
+
+        # DAG scheduling: steps run as soon as their dependencies complete,
+        # bounded overall and per agent (one outstanding prompt per Cursor window)
+        self.max_concurrency = max_concurrency
+        self.per_agent_limit = max(1, per_agent_limit)
+        self.step_states: Dict[str, WorkflowState] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
         # Devlog configuration
         self.devlog_webhook = devlog_webhook or os.environ.get("DISCORD_WEBHOOK_URL")
         self.devlog_username = devlog_username or os.environ.get(
@@ -87,13 +109,16 @@ class WorkflowEngine:
         )
         self.devlog_use_embed = bool(devlog_embed)
 
-        # Response monitoring
+        # Response monitoring: one shared router per inbox delivers replies to waiting steps
         self.response_monitor_path = self.agent_system_path / "Agent-5" / "inbox"
-        self.last_response_check = time.time()
+        self.router = response_router or get_router(self.response_monitor_path)
+        self._step_started: Dict[str, float] = {}
 
-        # Workflow persistence
+        # Workflow persistence: append-only step journal, compacted into snapshots
         self.workflow_state_path = Path(f"workflow_states/{workflow_name}")
-        self.workflow_state_path.mkdir(parents=True, exist_ok=True)
+        self.checkpoint = WorkflowCheckpoint(
+            self.workflow_state_path, snapshot_every=snapshot_every, keep_snapshots=keep_snapshots
+        )
 
         logger.info(f"Workflow Engine initialized: {workflow_name}")
 
@@ -230,7 +255,8 @@ class WorkflowEngine:
             
         self.state = WorkflowState.RUNNING
         logger.info(f"Starting workflow: {self.workflow_name}")
-        self.save_state()
+        # A fresh baseline snapshot: resume() continues from here
+        self.save_state(compact=True)
 
         # Start execution loop
         try:
@@ -238,129 +264,251 @@ class WorkflowEngine:
         finally:
             self._send_devlog_summary()
 
+    def _build_graph(self):
+        """Dependency counters, dependents and critical-path ranks for the pending steps"""
+        steps: Dict[str, WorkflowStep] = {}
+        for step in self.steps:
+            if step.id in steps:
+                logger.warning(f"Duplicate step id {step.id}: keeping the first definition")
+                continue
+            steps[step.id] = step
+
+        dependents: Dict[str, List[str]] = {sid: [] for sid in steps}
+        pending: Dict[str, int] = {}
+        for sid, step in steps.items():
+            if sid in self.completed_steps or sid in self.failed_steps:
+                continue
+            deps = set(step.dependencies) - self.completed_steps
+            unknown = deps - steps.keys()
+            if unknown:
+                logger.error(f"Step {sid} depends on unknown steps: {', '.join(sorted(unknown))}")
+                self.failed_steps.add(sid)
+                continue
+            pending[sid] = len(deps)
+            for dep in deps:
+                dependents[dep].append(sid)
+
+        # Kahn's order; anything it never reaches sits on a cycle
+        counts = dict(pending)
+        order = [sid for sid, n in counts.items() if n == 0]
+        for sid in order:
+            for child in dependents[sid]:
+                if child in counts:
+                    counts[child] -= 1
+                    if counts[child] == 0:
+                        order.append(child)
+        for sid in pending.keys() - set(order):
+            logger.error(f"Step {sid} is part of a dependency cycle")
+            self.failed_steps.add(sid)
+        # Steps that already failed (e.g. restored from a checkpoint) block their dependents
+        for sid in list(self.failed_steps):
+            self._fail_dependents(sid, dependents)
+
+        # Rank = longest chain of steps still to run after this one; ready
+        # steps on the critical path are launched first
+        rank: Dict[str, int] = {}
+        for sid in reversed(order):
+            rank[sid] = 1 + max((rank[c] for c in dependents[sid] if c in rank), default=0)
+        return steps, dependents, {sid: pending[sid] for sid in order}, rank
+
+    def _fail_dependents(self, step_id: str, dependents: Dict[str, List[str]]) -> None:
+        """Mark everything downstream of a failed step as failed"""
+        stack = list(dependents.get(step_id, []))
+        while stack:
+            sid = stack.pop()
+            if sid in self.failed_steps or sid in self.completed_steps:
+                continue
+            logger.warning(f"Skipping step {sid}: dependency {step_id} failed")
+            self.failed_steps.add(sid)
+            stack.extend(dependents.get(sid, []))
+
     async def _execute_workflow(self) -> None:
-        """Main workflow execution loop"""
+        """DAG scheduler: run every ready step concurrently within the agent limits"""
+        self._loop = asyncio.get_running_loop()
+        steps, dependents, pending, rank = self._build_graph()
+        index = {step.id: i for i, step in enumerate(self.steps)}
+        ready: Dict[str, List[tuple]] = {}  # agent -> heap of (-rank, index, step id)
+        in_flight: Dict[str, int] = {}
+
+        def push(sid: str) -> None:
+            heapq.heappush(ready.setdefault(steps[sid].agent_target, []), (-rank[sid], index[sid], sid))
+
+        for sid, count in pending.items():
+            if count == 0:
+                push(sid)
+
         try:
-            while self.state == WorkflowState.RUNNING:
-                # Check for completed steps
-                await self._check_step_completion()
-                
-                # Find next executable step
-                next_step = self._find_next_step()
-                if next_step:
-                    await self._execute_step(next_step)
-                elif self.completed_steps == set(step.id for step in self.steps):
-                    # All steps completed
-                    self.state = WorkflowState.COMPLETED
-                    logger.info(f"Workflow completed: {self.workflow_name}")
+            while True:
+                if self.state == WorkflowState.FAILED:  # stop() was called
+                    for task in self._tasks.values():
+                        task.cancel()
+                    await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+                    break
+
+                if self.state == WorkflowState.RUNNING:
+                    self._launch_ready(steps, ready, in_flight)
+
+                if not self._tasks:
+                    if self.state == WorkflowState.PAUSED:
+                        await asyncio.sleep(1.0)
+                        continue
                     break
-                else:
-                    # Waiting for dependencies
-                    self.state = WorkflowState.WAITING_FOR_AI
-                    await asyncio.sleep(5)
-                    
+
+                done, _ = await asyncio.wait(
+                    self._tasks.values(), timeout=1.0, return_when=asyncio.FIRST_COMPLETED
+                )
+                for sid in [sid for sid, task in self._tasks.items() if task in done]:
+                    del self._tasks[sid]
+                    in_flight[steps[sid].agent_target] -= 1
+                    if sid in self.completed_steps:
+                        for child in dependents[sid]:
+                            if child in pending:
+                                pending[child] -= 1
+                                if pending[child] == 0 and child not in self.failed_steps:
+                                    push(child)
+                    else:
+                        self._fail_dependents(sid, dependents)
+
+            if self.state == WorkflowState.RUNNING:
+                self.state = WorkflowState.FAILED if self.failed_steps else WorkflowState.COMPLETED
+                logger.info(f"Workflow {self.state.value}: {self.workflow_name}")
+                self.save_state(compact=True)
+
         except Exception as e:
             logger.error(f"Workflow execution failed: {e}")
             self.state = WorkflowState.FAILED
             self.save_state()
             raise
+        finally:
+            for task in self._tasks.values():
+                task.cancel()
+            self._tasks.clear()
+            self._loop = None
+
+    def _launch_ready(self, steps: Dict[str, WorkflowStep], ready: Dict[str, List[tuple]],
+                      in_flight: Dict[str, int]) -> None:
+        """Start ready steps, highest rank first, while agent and global slots are free"""
+        while self.max_concurrency is None or len(self._tasks) < self.max_concurrency:
+            heads = [
+                (heap[0], agent) for agent, heap in ready.items()
+                if heap and in_flight.get(agent, 0) < self.per_agent_limit
+            ]
+            if not heads:
+                return
+            _, agent = min(heads)
+            sid = heapq.heappop(ready[agent])[2]
+            in_flight[agent] = in_flight.get(agent, 0) + 1
+            self._tasks[sid] = asyncio.create_task(self._run_step(steps[sid]), name=sid)
+
+    async def _run_step(self, step: WorkflowStep) -> None:
+        """Execute one step under its timeout; timeouts and cancellation fail the step"""
+        try:
+            await asyncio.wait_for(self._execute_step(step), timeout=step.timeout_seconds)
+            return
+        except asyncio.TimeoutError:
+            logger.warning(f"Step timed out after {step.timeout_seconds}s: {step.name}")
+        except asyncio.CancelledError:
+            logger.warning(f"Step cancelled: {step.name}")
+        self._finish_step(step, WorkflowState.FAILED)
+
+    def cancel_step(self, step_id: str) -> bool:
+        """Cancel a running step (thread-safe); its dependents are skipped"""
+        task = self._tasks.get(step_id)
+        if task is None or self._loop is None:
+            return False
+        self._loop.call_soon_threadsafe(task.cancel)
+        return True
 
     async def _execute_step(self, step: WorkflowStep) -> None:
         """Execute a single workflow step"""
         logger.info(f"Executing step: {step.name}")
         self.current_step = step
-        self.state = WorkflowState.RUNNING
+        self._step_started[step.id] = time.time()
+        self.step_states[step.id] = WorkflowState.RUNNING
         
         try:
             # Send prompt to agent
             await self._send_prompt_to_agent(step)
             
             # Wait for AI response
-            self.state = WorkflowState.WAITING_FOR_AI
+            self.step_states[step.id] = WorkflowState.WAITING_FOR_AI
             response = await self._wait_for_ai_response(step)
             
             if response:
-                # Process response
-                self.state = WorkflowState.PROCESSING_RESPONSE
+                # Process response; only the entries it writes go to the journal
+                self.step_states[step.id] = WorkflowState.PROCESSING_RESPONSE
+                before = dict(self.workflow_data)
                 await self._process_ai_response(step, response)
+                written = {k: v for k, v in self.workflow_data.items() if before.get(k) is not v}
                 
                 # Mark step as completed
-                self.completed_steps.add(step.id)
+                self._finish_step(step, WorkflowState.COMPLETED, written)
                 logger.info(f"Step completed: {step.name}")
                 
             else:
                 # Step failed
-                self.failed_steps.add(step.id)
+                self._finish_step(step, WorkflowState.FAILED)
                 logger.error(f"Step failed: {step.name}")
                 
         except Exception as e:
             logger.error(f"Error executing step {step.name}: {e}")
-            self.failed_steps.add(step.id)
+            self._finish_step(step, WorkflowState.FAILED)
             
         finally:
-            self.current_step = None
-            self.save_state()
+            if self.current_step is step:
+                self.current_step = None
+
+    def _finish_step(self, step: WorkflowStep, status: WorkflowState,
+                     written: Optional[Dict[str, Any]] = None) -> None:
+        """Record a step's outcome in memory and in the checkpoint journal"""
+        if status == WorkflowState.COMPLETED:
+            self.completed_steps.add(step.id)
+        else:
+            self.failed_steps.add(step.id)
+        self.step_states[step.id] = status
+        self.checkpoint.record_step(step.id, status.value, written)
+        if self.checkpoint.due:
+            self.save_state(compact=True)
+
+    def correlation_id(self, step: WorkflowStep) -> str:
+        """Reference agents echo back so replies reach the right step"""
+        return f"{self.workflow_name}:{step.id}"
+
+    def render_prompt(self, step: WorkflowStep) -> str:
+        """Step prompt with workflow inputs filled in and only the upstream outputs it needs"""
+        template = self.prompts.compile(step.prompt_template)
+        needs = step.dependencies if step.context_from is None else step.context_from
+        sources = []
+        for sid in needs:
+            output = self.workflow_data.get(f"response_{sid}")
+            if output and output.get("text"):
+                sources.append((sid, output["text"]))
+        return self.prompts.render(step.id, template, self.workflow_data, sources, step.context_chars)
 
     async def _send_prompt_to_agent(self, step: WorkflowStep) -> None:
         """Send prompt to target agent"""
         # This would integrate with the existing AgentCellPhone system
         # For now, we'll simulate the prompt sending
-        prompt = step.prompt_template.format(**self.workflow_data)
+        prompt = self.render_prompt(step) + f" [ref: {self.correlation_id(step)}]"
         logger.info(f"Sending prompt to {step.agent_target}: {prompt[:100]}...")
         
         # TODO: Integrate with AgentCellPhone.send() method
         # await self.agent_system.send(step.agent_target, prompt)
 
     async def _wait_for_ai_response(self, step: WorkflowStep) -> Optional[AIResponse]:
-        """Wait for AI response from cursor capture system"""
-        start_time = time.time()
-        
-        while time.time() - start_time < step.timeout_seconds:
-            # Check for new responses
-            new_responses = await self._check_for_new_responses()
-            
-            for response in new_responses:
-                if response.agent == step.agent_target:
-                    # Found response from target agent
-                    self.ai_responses.append(response)
-                    return response
-            
-            await asyncio.sleep(1)
-        
-        logger.warning(f"Timeout waiting for response from {step.agent_target}")
-        return None
-
-    async def _check_for_new_responses(self) -> List[AIResponse]:
-        """Check for new AI responses from cursor capture system"""
-        new_responses = []
-        
-        if not self.response_monitor_path.exists():
-            return new_responses
-            
-        # Check for new response files
-        for response_file in self.response_monitor_path.glob("*.json"):
-            if response_file.stat().st_mtime > self.last_response_check:
-                try:
-                    with open(response_file, 'r') as f:
-                        data = json.load(f)
-                    
-                    # Convert to AIResponse object
-                    response = AIResponse(
-                        agent=data.get("agent", "unknown"),
-                        text=data.get("payload", {}).get("text", ""),
-                        timestamp=data.get("ts", time.time()),
-                        message_id=data.get("payload", {}).get("message_id", ""),
-                        role=data.get("payload", {}).get("role", "assistant"),
-                        metadata=data
-                    )
-                    
-                    new_responses.append(response)
-                    
-                except Exception as e:
-                    logger.error(f"Error reading response file {response_file}: {e}")
-        
-        self.last_response_check = time.time()
-        return new_responses
+        """Wait for the router to deliver this step's reply"""
+        future = self.router.expect(
+            step.agent_target,
+            correlation_id=self.correlation_id(step),
+            since=self._step_started.get(step.id, 0.0),
+        )
+        try:
+            response = await asyncio.wait_for(future, timeout=step.timeout_seconds)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timeout waiting for response from {step.agent_target}")
+            return None
+        self.ai_responses.append(response)
+        return response
 
     async def _process_ai_response(self, step: WorkflowStep, response: AIResponse) -> None:
         """Process AI response and update workflow data"""
@@ -399,32 +547,43 @@ class WorkflowEngine:
             "metadata": response.metadata
         }
 
-    def _find_next_step(self) -> Optional[WorkflowStep]:
-        """Find the next executable step"""
-        for step in self.steps:
-            if (step.id not in self.completed_steps and 
-                step.id not in self.failed_steps and 
-                step.is_ready(self.completed_steps)):
-                return step
-        return None
-
-    def save_state(self) -> None:
-        """Save workflow state to disk"""
-        state_data = {
+    def _state_snapshot(self) -> Dict[str, Any]:
+        return {
             "workflow_name": self.workflow_name,
             "state": self.state.value,
-            "completed_steps": list(self.completed_steps),
-            "failed_steps": list(self.failed_steps),
+            "completed_steps": sorted(self.completed_steps),
+            "failed_steps": sorted(self.failed_steps),
             "workflow_data": self.workflow_data,
             "start_time": self.start_time,
             "current_time": time.time()
         }
-        
-        state_file = self.workflow_state_path / f"{int(time.time())}.json"
-        with open(state_file, 'w') as f:
-            json.dump(state_data, f, indent=2, default=str)
-        
-        logger.info(f"Workflow state saved: {state_file}")
+
+    def save_state(self, compact: bool = False) -> None:
+        """Checkpoint the workflow state (a journal record, or a full snapshot when compacting)"""
+        if compact:
+            state_file = self.checkpoint.snapshot(self._state_snapshot())
+            logger.info(f"Workflow state saved: {state_file}")
+        else:
+            self.checkpoint.record_state(self.state.value)
+
+    def restore(self, workflow_name: Optional[str] = None) -> bool:
+        """Rebuild completed/failed steps and workflow data from the latest checkpoint"""
+        name = workflow_name or self.workflow_name
+        checkpoint = self.checkpoint
+        if name != self.workflow_name:
+            checkpoint = WorkflowCheckpoint(Path(f"workflow_states/{name}"))
+        state = checkpoint.load()
+        if state is None:
+            logger.warning(f"No checkpoint found for workflow: {name}")
+            return False
+        self.completed_steps = set(state.get("completed_steps", []))
+        self.failed_steps = set(state.get("failed_steps", []))
+        self.workflow_data.update(state.get("workflow_data", {}))
+        self.start_time = state.get("start_time", self.start_time)
+        logger.info(
+            f"Restored workflow {name}: {len(self.completed_steps)} completed, {len(self.failed_steps)} failed"
+        )
+        return True
 
     def get_progress(self) -> Dict[str, Any]:
         """Get workflow progress information"""
@@ -443,6 +602,7 @@ class WorkflowEngine:
                 "percentage": (completed_count / total_steps * 100) if total_steps > 0 else 0
             },
             "current_step": self.current_step.name if self.current_step else None,
+            "running_steps": sorted(self._tasks),
             "workflow_data": self.workflow_data,
             "execution_time": time.time() - self.start_time
         }
@@ -483,16 +643,29 @@ class WorkflowEngine:
             logger.info(f"Workflow paused: {self.workflow_name}")
             self.save_state()
 
-    def resume(self) -> None:
-        """Resume workflow execution"""
+    def resume(self, workflow_name: Optional[str] = None, retry_failed: bool = True) -> bool:
+        """Resume a paused run, or continue a crashed run from its checkpoint.
+
+        Completed steps are not re-run; failed steps are retried unless
+        ``retry_failed`` is False, in which case their dependents are skipped.
+        """
         if self.state == WorkflowState.PAUSED:
             self.state = WorkflowState.RUNNING
             logger.info(f"Workflow resumed: {self.workflow_name}")
             self.save_state()
+            return True
+        if not self.restore(workflow_name):
+            return False
+        if retry_failed:
+            self.failed_steps.clear()
+        self.start()
+        return True
 
     def stop(self) -> None:
-        """Stop workflow execution"""
+        """Stop workflow execution, cancelling any steps in flight"""
         self.state = WorkflowState.FAILED
+        for step_id in list(self._tasks):
+            self.cancel_step(step_id)
         logger.info(f"Workflow stopped: {self.workflow_name}")
         self.save_state()
 
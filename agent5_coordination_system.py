@@ -31,7 +31,7 @@ try:
     from src.collaborative_tasks.collaborative_orchestrator import CollaborativeOrchestrator
     from src.collaborative.task_manager.collaborative_task_manager import CollaborativeTaskManager
     from src.collaborative.knowledge_base.collaborative_knowledge_manager import CollaborativeKnowledgeManager
-    from src.collaborative.communication_hub.communication_hub import CommunicationHub
+    from src.collaborative.communication_hub.communication_hub import CollaborativeCommunicationHub
     from src.collaborative.synergy_optimizer.synergy_optimizer import SynergyOptimizer
 except ImportError as e:
     print(f"Import error: {e}")
@@ -60,8 +60,10 @@ class Agent5CoordinationSystem:
         self.orchestrator = CollaborativeOrchestrator(self.base_path)
         self.task_manager = CollaborativeTaskManager(self.base_path)
         self.knowledge_manager = CollaborativeKnowledgeManager(self.base_path / "knowledge_base")
-        self.communication_hub = CommunicationHub()
+        self.communication_hub = CollaborativeCommunicationHub()
         self.synergy_optimizer = SynergyOptimizer()
+        # Hub messages and knowledge-manager tasks are the synergy engine's interaction events
+        self.synergy_optimizer.connect(self.communication_hub, self.knowledge_manager)
         
         # Coordination state
         self.coordination_round = 0
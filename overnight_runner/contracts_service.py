@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""In-memory contracts service shared by the runner and the listener.
+
+``contracts.json`` is loaded once and indexed by assignee and ``task_id``.
+The file is re-read only when its mtime changes (checked at most every
+``watch_interval_sec``), inbound ``task_id`` updates are patched in memory,
+and writes are debounced into a single atomic flush.  If the file changed
+on disk inside the debounce window, the flush reloads it and re-applies the
+pending patches instead of overwriting the external edit.  Every change bumps
+``version`` so rendered prompts can be memoized per
+``(agent, tag, version)``.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def latest_overnight_dir(comm_root: str | Path) -> Optional[Path]:
+    """Return the newest ``overnight_*`` folder under ``comm_root``."""
+    root = Path(comm_root)
+    try:
+        candidates = sorted(p for p in root.iterdir() if p.is_dir() and p.name.startswith("overnight_"))
+    except OSError:
+        return None
+    return candidates[-1] if candidates else None
+
+
+def locate_contracts_file(comm_root: str | Path, agent: str, include_fsm_subdir: bool = False) -> Optional[Path]:
+    """Find ``<latest overnight>/<agent>/[FSM_CONTRACTS/]contracts.json`` if it exists."""
+    latest = latest_overnight_dir(comm_root)
+    if latest is None:
+        return None
+    candidates = []
+    if include_fsm_subdir:
+        candidates.append(latest / agent / "FSM_CONTRACTS" / "contracts.json")
+    candidates.append(latest / agent / "contracts.json")
+    for cand in candidates:
+        if cand.exists():
+            return cand
+    return None
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+class ContractsService:
+    """Indexed view of one ``contracts.json`` with debounced write-back."""
+
+    def __init__(
+        self,
+        path: str | Path | None,
+        flush_debounce_sec: float = 2.0,
+        watch_interval_sec: float = 5.0,
+        renderer: Optional[Callable[[str, Any, List[dict]], str]] = None,
+    ) -> None:
+        self.path = Path(path) if path else None
+        self.flush_debounce_sec = max(0.0, float(flush_debounce_sec))
+        self.watch_interval_sec = max(0.0, float(watch_interval_sec))
+        self.renderer = renderer
+        self.version = 0
+        self._items: List[dict] = []
+        self._by_agent: Dict[str, List[dict]] = {}
+        self._by_task: Dict[str, dict] = {}
+        self._mtime: Optional[int] = None
+        self._last_check = 0.0
+        self._dirty = False
+        self._patches: List[Tuple[Dict[str, Any], str]] = []  # (update, stamp) not yet written
+        self._timer: Optional[threading.Timer] = None
+        self._render_cache: Dict[Tuple[str, str, int], str] = {}
+        self._lock = threading.RLock()
+        self.stats: Dict[str, int] = {"loads": 0, "flushes": 0, "patches": 0, "render_hits": 0, "render_misses": 0,
+                                     "merges": 0}
+        self.reload()
+
+    # ------------------------------------------------------------------ loading
+    def _stat(self) -> Optional[int]:
+        if self.path is None:
+            return None
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def reload(self) -> bool:
+        """(Re)load the file; returns True when the in-memory view changed."""
+        with self._lock:
+            mtime = self._stat()
+            items: List[dict] = []
+            if mtime is not None:
+                try:
+                    loaded = json.loads(self.path.read_text(encoding="utf-8"))  # type: ignore[union-attr]
+                    items = [c for c in loaded if isinstance(c, dict)] if isinstance(loaded, list) else []
+                except Exception:
+                    items = []
+            self._mtime = mtime
+            self._last_check = time.monotonic()
+            self.stats["loads"] += 1
+            self._set_items(items)
+            return True
+
+    def maybe_reload(self, force: bool = False) -> bool:
+        """Reload if the file changed on disk since the last load or flush."""
+        with self._lock:
+            if self._dirty:
+                # Local patches win until flushed
+                return False
+            now = time.monotonic()
+            if not force and now - self._last_check < self.watch_interval_sec:
+                return False
+            self._last_check = now
+            if self._stat() == self._mtime:
+                return False
+            return self.reload()
+
+    def _set_items(self, items: List[dict]) -> None:
+        self._items = items
+        self._reindex()
+
+    def _reindex(self) -> None:
+        by_agent: Dict[str, List[dict]] = {}
+        by_task: Dict[str, dict] = {}
+        for c in self._items:
+            assignee = c.get("assignee") or ""
+            if assignee:
+                by_agent.setdefault(assignee, []).append(c)
+            task_id = c.get("task_id")
+            if task_id and task_id not in by_task:
+                by_task[str(task_id)] = c
+        self._by_agent = by_agent
+        self._by_task = by_task
+        self.version += 1
+        self._render_cache.clear()
+
+    # ------------------------------------------------------------------ queries
+    def __bool__(self) -> bool:
+        return bool(self._by_agent)
+
+    def by_assignee(self) -> Dict[str, List[dict]]:
+        with self._lock:
+            return {k: list(v) for k, v in self._by_agent.items()}
+
+    def contracts_for(self, agent: str) -> List[dict]:
+        with self._lock:
+            return list(self._by_agent.get(agent) or self._by_agent.get(f"Agent-{agent}") or [])
+
+    def get(self, task_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._by_task.get(str(task_id))
+
+    def render(self, agent: str, tag: Any) -> str:
+        """Render the tailored prompt for ``agent``/``tag``, memoized per contracts version."""
+        if self.renderer is None:
+            raise ValueError("ContractsService was created without a renderer")
+        with self._lock:
+            key = (agent, str(getattr(tag, "name", tag)), self.version)
+            cached = self._render_cache.get(key)
+            if cached is not None:
+                self.stats["render_hits"] += 1
+                return cached
+            self.stats["render_misses"] += 1
+            text = self.renderer(agent, tag, self.contracts_for(agent))
+            self._render_cache[key] = text
+            return text
+
+    # ------------------------------------------------------------------ patches
+    def apply_update(self, data: Dict[str, Any]) -> Optional[dict]:
+        """Patch the contract named by ``data['task_id']`` (or append a new entry).
+
+        Returns the patched contract; the write-back is debounced.
+        """
+        task_id = data.get("task_id")
+        if not task_id or self.path is None:
+            return None
+        with self._lock:
+            stamp = _now()
+            c = self._patch(data, stamp)
+            self._patches.append((dict(data), stamp))
+            self.stats["patches"] += 1
+            self._reindex()
+            self._mark_dirty()
+            return c
+
+    def _patch(self, data: Dict[str, Any], stamp: str) -> dict:
+        c = self._by_task.get(str(data["task_id"]))
+        if c is not None:
+            if "state" in data:
+                c["state"] = data["state"]
+            if "evidence" in data:
+                existing = c.get("evidence") or []
+                new_ev = data["evidence"] if isinstance(data["evidence"], list) else [data["evidence"]]
+                c["evidence"] = existing + new_ev
+            c["updated"] = stamp
+        else:
+            c = {k: v for k, v in data.items() if k in ("task_id", "state", "summary", "evidence", "repo_path")}
+            c["updated"] = stamp
+            self._items.append(c)
+            self._by_task[str(data["task_id"])] = c
+        return c
+
+    def _mark_dirty(self) -> None:
+        self._dirty = True
+        if self.flush_debounce_sec <= 0:
+            self.flush()
+            return
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_debounce_sec, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> bool:
+        """Write pending patches atomically; returns True if a write happened."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty or self.path is None:
+                return False
+            if self._stat() != self._mtime:
+                # Edited on disk since our last load: keep that edit, replay our patches on top
+                self.reload()
+                for data, stamp in self._patches:
+                    self._patch(data, stamp)
+                self._reindex()
+                self.stats["merges"] += 1
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_name(self.path.name + ".tmp")
+                tmp.write_text(json.dumps(self._items, ensure_ascii=False, indent=2), encoding="utf-8")
+                os.replace(tmp, self.path)
+            except OSError:
+                return False
+            self._dirty = False
+            self._patches = []
+            self._mtime = self._stat()
+            self.stats["flushes"] += 1
+            return True
+
+    def close(self) -> None:
+        self.flush()
@@ -19,6 +19,7 @@ sys.path.insert(0, str(_THIS.parents[1]))
 sys.path.insert(0, str(_THIS.parents[1] / 'src'))
 
 from src.core.config import get_owner_path, get_repos_root, get_communications_root  # type: ignore
+from src.core.tracing import extract, get_tracer, inject  # type: ignore
 
 
 # Use configurable paths instead of hardcoded ones
@@ -178,22 +179,23 @@ def handle_fsm_request(payload: Dict[str, Any]) -> Dict[str, Any]:
         if not available:
             break
         fp, data = available.pop(0)
-        data["owner"] = agent
-        data["state"] = "assigned"
-        fp.write_text(json.dumps(data, indent=2), encoding="utf-8")
-        message = {
-            "type": "task",
-            "from": payload.get("from"),
-            "to": agent,
-            "task_id": data.get("task_id"),
-            "repo": data.get("repo"),
-            "intent": data.get("intent"),
-            "timestamp": datetime.now().isoformat(),
-        }
-        inbox_dir = INBOX_ROOT / agent / "inbox"
-        inbox_dir.mkdir(parents=True, exist_ok=True)
-        msg_fp = inbox_dir / f"task_{data.get('task_id')}.json"
-        msg_fp.write_text(json.dumps(message, indent=2), encoding="utf-8")
+        with get_tracer().span("fsm.assign", task_id=data.get("task_id"), agent=agent):
+            data["owner"] = agent
+            data["state"] = "assigned"
+            fp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+            message = inject({
+                "type": "task",
+                "from": payload.get("from"),
+                "to": agent,
+                "task_id": data.get("task_id"),
+                "repo": data.get("repo"),
+                "intent": data.get("intent"),
+                "timestamp": datetime.now().isoformat(),
+            })
+            inbox_dir = INBOX_ROOT / agent / "inbox"
+            inbox_dir.mkdir(parents=True, exist_ok=True)
+            msg_fp = inbox_dir / f"task_{data.get('task_id')}.json"
+            msg_fp.write_text(json.dumps(message, indent=2), encoding="utf-8")
         assigned += 1
 
     return {"ok": True, "count": assigned}
@@ -204,7 +206,11 @@ def handle_fsm_update(update: Dict[str, Any]) -> Dict[str, Any]:
     task_id = update.get("task_id")
     if not task_id:
         return {"ok": False, "error": "task_id required"}
+    with get_tracer().span("fsm.update", task_id=task_id, parent=extract(update), state=update.get("state")):
+        return _apply_fsm_update(task_id, update)
+
 
+def _apply_fsm_update(task_id: str, update: Dict[str, Any]) -> Dict[str, Any]:
     TASKS_DIR.mkdir(parents=True, exist_ok=True)
     fp = TASKS_DIR / f"{task_id}.json"
     data: Dict[str, Any] = {}
@@ -217,14 +223,14 @@ def handle_fsm_update(update: Dict[str, Any]) -> Dict[str, Any]:
 
     captain = update.get("captain")
     if captain:
-        verify_msg = {
+        verify_msg = inject({
             "type": "verify",
             "from": update.get("from"),
             "task_id": task_id,
             "state": update.get("state"),
             "summary": update.get("summary"),
             "timestamp": datetime.now().isoformat(),
-        }
+        })
         inbox_dir = INBOX_ROOT / captain / "inbox"
         inbox_dir.mkdir(parents=True, exist_ok=True)
         verify_fp = inbox_dir / f"verify_{task_id}.json"
@@ -249,18 +255,19 @@ def process_fsm_update(agent: str, update_data: Dict[str, Any]) -> bool:
         summary = update_data['summary']
         
         # Write update to agent's inbox for FSM processing
-        message = {
-            "type": "fsm_update",
-            "from": agent,
-            "task_id": task_id,
-            "state": state,
-            "summary": summary,
-            "evidence": update_data.get('evidence', []),
-            "timestamp": datetime.now().isoformat(),
-            "workflow": update_data.get('workflow', 'default')
-        }
-        
-        return _write_inbox_message(agent, message)
+        with get_tracer().span("fsm.report", task_id=task_id, agent=agent, state=state):
+            message = inject({
+                "type": "fsm_update",
+                "from": agent,
+                "task_id": task_id,
+                "state": state,
+                "summary": summary,
+                "evidence": update_data.get('evidence', []),
+                "timestamp": datetime.now().isoformat(),
+                "workflow": update_data.get('workflow', 'default')
+            })
+            
+            return _write_inbox_message(agent, message)
         
     except Exception as e:
         print(f"❌ Failed to process FSM update: {e}")
@@ -7,13 +7,19 @@ import os
 import sys
 import time
 from pathlib import Path
+from typing import Callable
 from urllib import request, error
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
 
 from core.inbox_listener import InboxListener  # type: ignore
+from core.config import get_communications_root, get_signals_root  # type: ignore
+from overnight_runner.contracts_service import ContractsService, locate_contracts_file  # type: ignore
+from overnight_runner.signal_bus import RESUME_NOW, UI_REQUEST, publish_signal  # type: ignore
 from core.message_pipeline import MessagePipeline  # type: ignore
 from core.command_router import CommandRouter  # type: ignore
+from src.core.tracing import extract, get_tracer, inject  # type: ignore
 
 
 def parse_args() -> argparse.Namespace:
@@ -21,6 +27,8 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--agent", default="Agent-3")
     p.add_argument("--inbox")
     p.add_argument("--poll", type=float, default=0.2)
+    p.add_argument("--comm-root", default=str(get_communications_root()), help="communications root holding overnight_*/<agent>/contracts.json")
+    p.add_argument("--signals-root", default=str(get_signals_root()), help="signal bus root shared with the runner (resume/ui_request signals)")
     p.add_argument("--env-file", help="path to .env file with KEY=VALUE lines (e.g., DISCORD_WEBHOOK_URL)")
     p.add_argument("--devlog-webhook", default=os.environ.get("DISCORD_WEBHOOK_URL"), help="Discord webhook URL for devlog notifications (or set DISCORD_WEBHOOK_URL)")
     p.add_argument("--devlog-username", default=os.environ.get("DEVLOG_USERNAME", "Agent Devlog"))
@@ -53,22 +61,21 @@ def _load_env_file(path: str | None) -> None:
         pass
 
 
-def main() -> int:
-    args = parse_args()
-    _load_env_file(args.env_file)
-    agent = args.agent
-    inbox_dir = args.inbox or os.path.join(os.environ.get("AGENT_FILE_ROOT", "D:\\repos\\Dadudekc"), agent, "inbox")
-    devlog_webhook = args.devlog_webhook or os.environ.get("DISCORD_WEBHOOK_URL")
-    devlog_username = args.devlog_username or os.environ.get("DEVLOG_USERNAME", "Agent Devlog")
-    devlog_use_embed = bool(args.devlog_embed)
+def create_message_handler(
+    agent: str,
+    state_path: Path,
+    signals_root: str | Path,
+    get_contracts: Callable[[], ContractsService | None] | None = None,
+    post_devlog: Callable[[str, str], None] | None = None,
+    router: CommandRouter | None = None,
+    now: Callable[[], str] | None = None,
+    verbose: bool = True,
+) -> Callable[[dict], None]:
+    """Build the inbox callback that persists agent state, emits signals and patches contracts.
 
-    pipeline = MessagePipeline()
-    router = CommandRouter()
-
-    # Simple per-agent state file under D:\repos\Dadudekc\Agent-X\state.json
-    state_dir = Path(os.environ.get("AGENT_FILE_ROOT", "D:\\repos\\Dadudekc")) / agent
-    state_dir.mkdir(parents=True, exist_ok=True)
-    state_path = state_dir / "state.json"
+    ``now`` supplies the ``updated`` stamp (defaults to wall clock) so the
+    simulation harness can drive the same handler on virtual time.
+    """
 
     def load_state() -> dict:
         try:
@@ -83,29 +90,17 @@ def main() -> int:
             pass
 
     def _now() -> str:
-        return time.strftime("%Y-%m-%dT%H:%M:%S")
+        return now() if now is not None else time.strftime("%Y-%m-%dT%H:%M:%S")
 
-    def _post_discord(title: str, description: str) -> None:
-        if not devlog_webhook:
-            return
-        payload: dict = {"username": devlog_username}
-        if devlog_use_embed:
-            payload["embeds"] = [{"title": title, "description": description, "color": 5814783}]
-        else:
-            payload["content"] = f"**{title}**\n{description}"
-        data = json.dumps(payload).encode("utf-8")
-        req = request.Request(devlog_webhook, data=data, headers={"Content-Type": "application/json"})
-        try:
-            with request.urlopen(req, timeout=5) as _:
-                pass
-        except error.HTTPError:
-            pass
-        except error.URLError:
-            pass
-
-    listener = InboxListener(inbox_dir=inbox_dir, poll_interval_s=args.poll, pipeline=pipeline)
     def on_message(data: dict) -> None:
-        print(f"[INBOX] {agent} <- {json.dumps(data, ensure_ascii=False)}")
+        # Continue the sender's trace when the envelope carries one
+        with get_tracer().span("listener.handle", task_id=data.get("task_id"), parent=extract(data),
+                               agent=agent, type=str(data.get("type", "")).lower()):
+            _handle(data)
+
+    def _handle(data: dict) -> None:
+        if verbose:
+            print(f"[INBOX] {agent} <- {json.dumps(data, ensure_ascii=False)}")
         # Idempotent processing: move into processing/ is assumed inside InboxListener;
         # here we only route and persist minimal state
         st = load_state()
@@ -147,107 +142,69 @@ def main() -> int:
         })
         save_state(st)
 
-        # Emit a lightweight resume trigger note for runner when state moves to a done/completed state
+        # Signal the runner over the signal bus when state moves to a done/completed state
         try:
             if msg_type in ("fsm_update", "verify") and st.get("state") in ("done", "completed", "ready"):
-                # Drop a small note file under communications to signal runner for immediate RESUME
-                from pathlib import Path as _P
-                signal_root = _P("D:/repositories/communications/_signals")
-                signal_root.mkdir(parents=True, exist_ok=True)
-                (signal_root / f"resume_now_{agent}.signal").write_text(_now(), encoding="utf-8")
+                publish_signal(signals_root, RESUME_NOW, agent, inject({
+                    "task_id": data.get("task_id"),
+                    "state": st.get("state"),
+                    "updated": st.get("updated"),
+                }))
         except Exception:
             pass
 
         # Emit a UI request signal for Agent GUIs to react (e.g., ctrl+T + inbox check)
         try:
             if msg_type == "ui_request":
-                from pathlib import Path as _P
-                signal_root = _P("D:/repositories/communications/_signals")
-                signal_root.mkdir(parents=True, exist_ok=True)
-                # Persist full payload for richer UI actions
-                ui_sig = {
-                    "agent": agent,
+                publish_signal(signals_root, UI_REQUEST, agent, {
                     "intent": data.get("intent") or "open_new_chat_and_check_inbox",
                     "task_id": data.get("task_id"),
                     "message": data.get("payload", {}).get("message") if isinstance(data.get("payload"), dict) else data.get("message"),
-                    "created_at": _now(),
-                }
-                (signal_root / f"ui_request_{agent}.json").write_text(json.dumps(ui_sig, ensure_ascii=False, indent=2), encoding="utf-8")
+                })
         except Exception:
             pass
 
-        # If a task_id present, update consolidated contracts file and optionally patch TASK_LIST.md
+        # If a task_id present, patch the in-memory contracts (debounced flush) and optionally TASK_LIST.md
         try:
             if "task_id" in data:
-                comms_root = Path("D:/repositories/communications")
-                # find latest overnight_* folder
-                latest = None
-                if comms_root.exists():
-                    candidates = sorted([p for p in comms_root.iterdir() if p.is_dir() and p.name.startswith("overnight_")])
-                    latest = candidates[-1] if candidates else None
-                if latest is not None:
-                    agent_dir = latest / agent
-                    contracts_path = agent_dir / "FSM_CONTRACTS" / "contracts.json"
-                    if not contracts_path.exists():
-                        contracts_path = agent_dir / "contracts.json"
-                    if contracts_path.exists():
-                        import json as _j
-                        try:
-                            arr = _j.loads(contracts_path.read_text(encoding="utf-8"))
-                        except Exception:
-                            arr = []
-                        updated = False
-                        target_repo_path = data.get("repo_path")
-                        for c in arr:
-                            if isinstance(c, dict) and c.get("task_id") == data.get("task_id"):
-                                if "state" in data:
-                                    c["state"] = data["state"]
-                                if "evidence" in data:
-                                    existing = c.get("evidence") or []
-                                    new_ev = data["evidence"] if isinstance(data["evidence"], list) else [data["evidence"]]
-                                    c["evidence"] = existing + new_ev
-                                target_repo_path = c.get("repo_path")
-                                c["updated"] = _now()
-                                updated = True
-                                break
-                        if not updated:
-                            entry = {k: v for k, v in data.items() if k in ("task_id", "state", "summary", "evidence", "repo_path")}
-                            entry["updated"] = _now()
-                            arr.append(entry)
-                        contracts_path.parent.mkdir(parents=True, exist_ok=True)
-                        contracts_path.write_text(_j.dumps(arr, ensure_ascii=False, indent=2), encoding="utf-8")
-
-                        # Patch TASK_LIST.md conservatively: append or update state badge next to the first matching title line
-                        try:
-                            if target_repo_path and isinstance(target_repo_path, str):
-                                tl = Path(target_repo_path) / "TASK_LIST.md"
-                                if tl.exists() and "state" in data:
-                                    lines = tl.read_text(encoding="utf-8").splitlines()
-                                    new_lines = []
-                                    found = False
-                                    for line in lines:
-                                        if not found and line.strip().startswith("- [") and data.get("summary") and data["summary"] in line:
-                                            # rewrite with state badge
-                                            found = True
-                                            if "(state:" in line:
-                                                # replace existing badge
-                                                import re as _re
-                                                newline = _re.sub(r"\(state:[^)]+\)", f"(state: {data['state']})", line)
-                                            else:
-                                                newline = f"{line} (state: {data['state']})"
-                                            new_lines.append(newline)
+                contracts = get_contracts() if get_contracts is not None else None
+                if contracts is not None:
+                    target_repo_path = data.get("repo_path")
+                    patched = contracts.apply_update(data)
+                    if patched is not None and patched.get("repo_path"):
+                        target_repo_path = patched.get("repo_path")
+
+                    # Patch TASK_LIST.md conservatively: append or update state badge next to the first matching title line
+                    try:
+                        if target_repo_path and isinstance(target_repo_path, str):
+                            tl = Path(target_repo_path) / "TASK_LIST.md"
+                            if tl.exists() and "state" in data:
+                                lines = tl.read_text(encoding="utf-8").splitlines()
+                                new_lines = []
+                                found = False
+                                for line in lines:
+                                    if not found and line.strip().startswith("- [") and data.get("summary") and data["summary"] in line:
+                                        # rewrite with state badge
+                                        found = True
+                                        if "(state:" in line:
+                                            # replace existing badge
+                                            import re as _re
+                                            newline = _re.sub(r"\(state:[^)]+\)", f"(state: {data['state']})", line)
                                         else:
-                                            new_lines.append(line)
-                                    if found:
-                                        tl.write_text("\n".join(new_lines) + "\n", encoding="utf-8")
-                        except Exception:
-                            pass
+                                            newline = f"{line} (state: {data['state']})"
+                                        new_lines.append(newline)
+                                    else:
+                                        new_lines.append(line)
+                                if found:
+                                    tl.write_text("\n".join(new_lines) + "\n", encoding="utf-8")
+                    except Exception:
+                        pass
         except Exception:
             pass
 
         # Devlog to Discord (optional): summarize meaningful events
         try:
-            if devlog_webhook:
+            if post_devlog is not None:
                 msg_type = str(data.get("type", "")).lower()
                 task_id = data.get("task_id") or ""
                 repo_path = data.get("repo_path") or ""
@@ -266,16 +223,83 @@ def main() -> int:
                     if isinstance(ev, list):
                         desc_parts.append("evidence: " + "; ".join(map(str, ev))[:900])
                 description = " | ".join(desc_parts) or json.dumps(data)[:1000]
-                _post_discord(title, description)
+                post_devlog(title, description)
         except Exception:
             pass
 
         # Attempt to route through CommandRouter if it supports this type
         try:
-            router.route(data)
+            if router is not None:
+                router.route(data)
         except Exception:
             pass
 
+    return on_message
+
+
+def main() -> int:
+    args = parse_args()
+    _load_env_file(args.env_file)
+    agent = args.agent
+    inbox_dir = args.inbox or os.path.join(os.environ.get("AGENT_FILE_ROOT", "D:\\repos\\Dadudekc"), agent, "inbox")
+    devlog_webhook = args.devlog_webhook or os.environ.get("DISCORD_WEBHOOK_URL")
+    devlog_username = args.devlog_username or os.environ.get("DEVLOG_USERNAME", "Agent Devlog")
+    devlog_use_embed = bool(args.devlog_embed)
+
+    pipeline = MessagePipeline()
+    router = CommandRouter()
+
+    # Simple per-agent state file under D:\repos\Dadudekc\Agent-X\state.json
+    state_dir = Path(os.environ.get("AGENT_FILE_ROOT", "D:\\repos\\Dadudekc")) / agent
+    state_dir.mkdir(parents=True, exist_ok=True)
+    state_path = state_dir / "state.json"
+
+    def _post_discord(title: str, description: str) -> None:
+        if not devlog_webhook:
+            return
+        payload: dict = {"username": devlog_username}
+        if devlog_use_embed:
+            payload["embeds"] = [{"title": title, "description": description, "color": 5814783}]
+        else:
+            payload["content"] = f"**{title}**\n{description}"
+        data = json.dumps(payload).encode("utf-8")
+        req = request.Request(devlog_webhook, data=data, headers={"Content-Type": "application/json"})
+        try:
+            with request.urlopen(req, timeout=5) as _:
+                pass
+        except error.HTTPError:
+            pass
+        except error.URLError:
+            pass
+
+    # Contracts for this agent live under the latest communications/overnight_* folder.
+    # Resolve once and re-check only when the folder list may have changed.
+    contracts_holder: dict = {"service": None, "checked": 0.0}
+
+    def get_contracts() -> ContractsService | None:
+        now = time.monotonic()
+        svc = contracts_holder["service"]
+        if svc is None or now - contracts_holder["checked"] > 60.0:
+            contracts_holder["checked"] = now
+            path = locate_contracts_file(args.comm_root, agent, include_fsm_subdir=True)
+            if path is not None and (svc is None or svc.path != path):
+                if svc is not None:
+                    svc.close()
+                svc = ContractsService(path)
+                contracts_holder["service"] = svc
+        if svc is not None:
+            svc.maybe_reload()
+        return svc
+
+    listener = InboxListener(inbox_dir=inbox_dir, poll_interval_s=args.poll, pipeline=pipeline)
+    on_message = create_message_handler(
+        agent,
+        state_path,
+        args.signals_root,
+        get_contracts=get_contracts,
+        post_devlog=_post_discord if devlog_webhook else None,
+        router=router,
+    )
     listener.on_message(on_message)
     listener.start()
     print(f"Listening for {agent} inbox at: {inbox_dir}")
@@ -291,6 +315,8 @@ def main() -> int:
         pass
     finally:
         listener.stop()
+        if contracts_holder["service"] is not None:
+            contracts_holder["service"].close()
         print("Stopped inbox listener")
     return 0
 
@@ -3,13 +3,12 @@ from __future__ import annotations
 
 import argparse
 import os
-import random
 import signal
 import sys
 import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List
+from typing import Any, Dict, Iterable, List
 import datetime as _dt
 from urllib import request, error
 
@@ -20,7 +19,14 @@ sys.path.insert(0, str(_THIS.parents[1] / 'src'))
 
 from src.services.agent_cell_phone import AgentCellPhone, MsgTag  # type: ignore
 from src.core.fsm_orchestrator import FSMOrchestrator  # type: ignore
+from src.core.activity_timeline import ActivityTimeline, ActivityWatcher, get_timeline  # type: ignore
+from src.core.mitigation_executor import MitigationStep, get_executor  # type: ignore
+from src.core.tracing import get_tracer  # type: ignore
 from src.core.config import get_repos_root, get_owner_path, get_communications_root, get_signals_root  # type: ignore
+from overnight_runner.scheduler import AgentScheduler, AgentStateCache, PacingConfig, parse_state_ts  # type: ignore
+from overnight_runner.signal_bus import RESUME_NOW, Signal, SignalBus  # type: ignore
+from overnight_runner.contracts_service import ContractsService, locate_contracts_file  # type: ignore
+from overnight_runner.sharding import DEFAULT_ENVELOPE_DIR, DEFAULT_LEASE_SEC, RemoteCellPhone, ShardCoordinator  # type: ignore
 
 
 @dataclass
@@ -193,6 +199,12 @@ def parse_args() -> argparse.Namespace:
     # Cursor DB capture arguments
     p.add_argument("--cursor-db-capture-enabled", action="store_true", help="Enable Cursor database capture for AI assistant responses")
     p.add_argument("--agent-workspace-map", default="src/runtime/config/agent_workspace_map.json", help="Path to agent workspace mapping file")
+
+    # Multi-desktop sharding: this runner coordinates, shard workers type (see overnight_runner/sharding.py)
+    p.add_argument("--shard-listen", help="HOST:PORT to accept shard workers on; sends are routed to workers instead of the local mouse")
+    p.add_argument("--shard-lease-sec", type=float, default=DEFAULT_LEASE_SEC, help="drop a worker and reassign its agents after N seconds without a heartbeat")
+    p.add_argument("--shard-wait-sec", type=float, default=30.0, help="wait up to N seconds for workers to host all cycle targets before starting")
+    p.add_argument("--shard-envelope-dir", default=DEFAULT_ENVELOPE_DIR, help="where envelopes captured on workers are written for the FSM side (must differ from the workers' --envelope-dir)")
     args = p.parse_args()
     # Propagate ACP throttling to environment so AgentCellPhone honors it
     if args.default_new_chat:
@@ -281,28 +293,9 @@ def load_contracts_map(contracts_file: str | None) -> Dict[str, List[dict]]:
     """Load contracts.json and return mapping of assignee -> list[contract].
     Contract keys expected: task_id, title, description, acceptance_criteria, evidence, assignee, repo, repo_path.
     """
-    mapping: Dict[str, List[dict]] = {}
     if not contracts_file:
-        return mapping
-    try:
-        import json as _j
-        from pathlib import Path as _P
-        p = _P(contracts_file)
-        if not p.exists():
-            return {}
-        items = _j.loads(p.read_text(encoding="utf-8"))
-        if not isinstance(items, list):
-            return {}
-        for c in items:
-            if not isinstance(c, dict):
-                continue
-            assignee = c.get("assignee") or ""
-            if not assignee:
-                continue
-            mapping.setdefault(assignee, []).append(c)
-    except Exception:
         return {}
-    return mapping
+    return ContractsService(contracts_file).by_assignee()
 
 
 def build_tailored_message(agent: str, tag: MsgTag, contracts: List[dict]) -> str:
@@ -372,32 +365,25 @@ def read_agent_state(agent: str, workspace_root: str = str(get_owner_path())) ->
         return {}
 
 
+def _agent_timeline(agent: str, workspace_root: str) -> ActivityTimeline:
+    """Shared activity timeline with the agent's state.json ``updated`` stamp folded in."""
+    timeline = get_timeline()
+    ts = parse_state_ts(read_agent_state(agent, workspace_root).get("updated"))
+    if ts is not None and ts != timeline.last_activity(agent, ("state",)):
+        timeline.record(agent, ts, "state")
+    return timeline
+
+
 def is_recently_active(agent: str, active_grace_sec: int, workspace_root: str = str(get_owner_path())) -> bool:
-    st = read_agent_state(agent, workspace_root)
-    updated = st.get("updated")
-    if not updated:
-        return False
-    try:
-        # updated format: YYYY-MM-DDTHH:MM:SS
-        ts = _dt.datetime.strptime(updated, "%Y-%m-%dT%H:%M:%S")
-        age = (_dt.datetime.utcnow() - ts).total_seconds()
-        return age < float(active_grace_sec)
-    except Exception:
-        return False
+    timeline = _agent_timeline(agent, workspace_root)
+    last = timeline.last_activity(agent)
+    return last is not None and timeline.clock() - last < float(active_grace_sec)
 
 
 def is_stalled(agent: str, stalled_threshold_sec: int, workspace_root: str = str(get_owner_path())) -> bool:
-    """True if agent hasn't updated state.json within stalled_threshold_sec. Missing file counts as stalled."""
-    st = read_agent_state(agent, workspace_root)
-    updated = st.get("updated")
-    if not updated:
-        return True
-    try:
-        ts = _dt.datetime.strptime(updated, "%Y-%m-%dT%H:%M:%S")
-        age = (_dt.datetime.utcnow() - ts).total_seconds()
-        return age >= float(stalled_threshold_sec)
-    except Exception:
-        return True
+    """True if agent shows no activity within stalled_threshold_sec. Never-seen agents count as stalled."""
+    timeline = _agent_timeline(agent, workspace_root)
+    return timeline.is_stalled(agent, float(stalled_threshold_sec), unseen_is_stalled=True)
 
 
 def main() -> int:
@@ -427,7 +413,8 @@ def main() -> int:
         if args.plan not in ("single-repo-beta", "contracts"):
             args.plan = "single-repo-beta"
 
-    acp = AgentCellPhone(agent_id=args.sender, layout_mode=args.layout, test=args.test)
+    # In shard mode the local phone only answers layout queries; workers do the typing
+    acp = AgentCellPhone(agent_id=args.sender, layout_mode=args.layout, test=args.test or bool(args.shard_listen))
     
     available = acp.get_available_agents()
     
@@ -451,6 +438,16 @@ def main() -> int:
     if not cycle_targets:
         print(f"No valid cycle targets in layout {args.layout}. Available: {available}")
         return 2
+
+    coordinator: ShardCoordinator | None = None
+    if args.shard_listen:
+        host, _, port = args.shard_listen.rpartition(":")
+        coordinator = ShardCoordinator(available, lease_sec=args.shard_lease_sec, envelope_dir=args.shard_envelope_dir)
+        bound = coordinator.serve(host or "127.0.0.1", int(port or 0))
+        print(f"Shard coordinator listening on http://{bound[0]}:{bound[1]}")
+        acp = RemoteCellPhone(coordinator, acp)
+        if not coordinator.wait_for_owners(cycle_targets, args.shard_wait_sec):
+            print(f"Warning: no worker hosts {[a for a in cycle_targets if coordinator.owner_of(a) is None]} yet; their sends fail until one joins")
     
     # Initialize response capture if enabled
     if args.capture_enabled:
@@ -554,29 +551,22 @@ def main() -> int:
     # Resolve contracts file if not explicitly provided: pick latest from communications/overnight_*/<fsm-agent>/contracts.json
     contracts_file = args.contracts_file
     if not contracts_file:
-        try:
-            from pathlib import Path as _P
-            # Respect --comm-root instead of hardcoded drive path
-            comms = _P(args.comm_root)
-            if comms.exists():
-                overnight_dirs = sorted([p for p in comms.iterdir() if p.is_dir() and p.name.startswith("overnight_")])
-                latest = overnight_dirs[-1] if overnight_dirs else None
-                if latest is not None:
-                    fsm_agent = args.fsm_agent or captain or ("Agent-5" if args.layout == "5-agent" else None)
-                    if fsm_agent:
-                        cand = latest / fsm_agent / "contracts.json"
-                        if cand.exists():
-                            contracts_file = str(cand)
-        except Exception:
-            pass
-    contracts_map = load_contracts_map(contracts_file)
+        # Respect --comm-root instead of hardcoded drive path
+        fsm_agent = args.fsm_agent or captain or ("Agent-5" if args.layout == "5-agent" else None)
+        if fsm_agent:
+            cand = locate_contracts_file(args.comm_root, fsm_agent)
+            contracts_file = str(cand) if cand else None
+    contracts = ContractsService(contracts_file, renderer=build_tailored_message)
     total_cycles = compute_iterations(args)
 
     stop_flag = {"stop": False}
+    scheduler: AgentScheduler | None = None
 
     def handle_sigint(_sig, _frame):
         stop_flag["stop"] = True
-        print("\nSTOP: Stopping after current cycle...")
+        if scheduler is not None:
+            scheduler.stop()
+        print("\nSTOP: Stopping after current send...")
 
     signal.signal(signal.SIGINT, handle_sigint)
 
@@ -704,24 +694,147 @@ def main() -> int:
 
     time.sleep(max(0, args.initial_wait_sec))
 
-    last_sent: Dict[str, Dict[str, float]] = {}
-    # Track last any-message time per agent for global cooldown
-    last_any_sent: Dict[str, float] = {}
     # Signal path for immediate resume on state-changes
     signal_dir = get_signals_root()
     # Track last repo focus we announced per agent, to decide when to re-open a new chat
     last_focus_repo_sent: Dict[str, str | None] = {a: None for a in available}
-    for cycle in range(total_cycles):
-        if stop_flag["stop"]:
-            break
-        planned = plan[cycle % len(plan)]
-        print(f"\nCycle {cycle+1}/{total_cycles} - tag={planned.tag.name}")
-        if args.fsm_enabled:
-            # In FSM mode, captain triggers fsm_request to Agent-5 each cycle
+    # Shard workers push agent state with their heartbeats
+    state_cache = coordinator.state_cache if coordinator is not None else AgentStateCache(args.workspace_root)
+    # Replies and state writes count as activity for the grace/stall guards
+    timeline = get_timeline()
+    activity_watcher = ActivityWatcher(timeline, workspace_root=args.workspace_root) if coordinator is None else None
+    # Rescue-on-stall sends share cooldowns/dedupe with the Agent-5 monitor and captain
+    mitigations = get_executor()
+
+    def compose_content(agent: str, planned: PlannedMessage, stalled: bool) -> str:
+        # Build content (tailored when available); memoized per contracts version
+        contracts.maybe_reload()
+        if contracts:
+            return contracts.render(agent, planned.tag)
+        if args.__dict__.get("rescue_on_stall") and stalled:
+            checklist = ", ".join([s.strip() for s in str(args.beta_ready_checklist).split(',') if s.strip()])
+            return (
+                f"{agent} resume. You appear stalled. Regain focus and continue on the beta-ready checklist: {checklist}. "
+                f"Open TASK_LIST.md, pick the next verifiable step, and after completion send an fsm_update (task_id,state,summary,evidence)."
+            )
+        if args.plan == "single-repo-beta":
+            repos_root = get_repos_root()
+            repo_line = f"Focus repo: {focus_repo}. " if focus_repo else f"Focus a valid repository under {repos_root} (not caches/temp). "
+            checklist = ", ".join([s.strip() for s in str(args.beta_ready_checklist).split(',') if s.strip()])
+            if planned.tag == MsgTag.RESUME:
+                return (
+                    f"{agent} resume. {repo_line}Goal: reach beta-ready tonight. "
+                    f"Checklist: {checklist}. Start with GUI loads cleanly; all buttons/menus wired; happy-path flows; basic tests; README quickstart."
+                )
+            if planned.tag == MsgTag.TASK:
+                return (
+                    f"{agent} implement one concrete step toward beta-ready in {focus_repo or 'the focus repo'}: "
+                    f"e.g., wire a missing button handler, fix a flow, add a smoke test. Commit small, verifiable edits with evidence."
+                )
+            if planned.tag == MsgTag.COORDINATE:
+                return (
+                    f"{agent} coordinate to avoid duplication in {focus_repo or 'the focus repo'}: declare your current component area, "
+                    f"search first for reuse, and request a quick sanity check from a peer before large changes."
+                )
+            if planned.tag == MsgTag.SYNC:
+                return (
+                    f"{agent} 10-min sync: status vs beta-ready checklist for {focus_repo or 'the focus repo'}; next verifiable step; risks."
+                )
+            if planned.tag == MsgTag.VERIFY:
+                return (
+                    f"{agent} verify: run GUI smoke, tests/build for {focus_repo or 'the focus repo'}. Attach evidence. "
+                    f"If blocked, stage diffs and summarize the gap + next step."
+                )
+            return planned.template.format(agent=agent)
+        if args.fsm_enabled and planned.tag == MsgTag.RESUME:
+            # Include per-agent workspace and inbox directories in the guidance
+            workspace_dir = os.path.join(args.workspace_root, agent)
+            inbox_dir = os.path.join(workspace_dir, "inbox")
+            ffn_line = f"\nFocus file: {args.focus_file}" if getattr(args, "focus_file", None) else ""
+            return (
+                f"{agent} check your inbox for new assignments. Create/refresh your TASK_LIST.md based on assigned tasks,"
+                f" then execute sequentially with small, verifiable edits. Post evidence and updates via inbox.\n"
+                f"Workspace: {workspace_dir}\nInbox: {inbox_dir}{ffn_line}"
+            )
+        return planned.template.format(agent=agent)
+
+    def current_task_id(agent: str) -> str | None:
+        for c in contracts.contracts_for(agent) if contracts else []:
+            if c.get("task_id") and str(c.get("state", "")).lower() not in ("done", "completed", "verified"):
+                return str(c["task_id"])
+        return None
+
+    def send_turn(agent: str, planned: PlannedMessage, force_resume: bool, stalled: bool) -> bool:
+        # One trace per send; the task_id ties it to the capture/listener/FSM spans of the reply
+        with get_tracer().span("runner.send", task_id=current_task_id(agent), agent=agent,
+                               tag=planned.tag.name, stalled=stalled) as span:
+            sent = _send_turn(agent, planned, force_resume, stalled)
+            span.set(sent=sent)
+            return sent
+
+    def _send_turn(agent: str, planned: PlannedMessage, force_resume: bool, stalled: bool) -> bool:
+        content = compose_content(agent, planned, stalled)
+        # Decide whether to request new-chat (Ctrl+T) for this send.
+        # Stricter policy: only when explicitly recovering (force_resume). Avoid opening new tabs otherwise.
+        use_new_chat = planned.tag == MsgTag.RESUME and force_resume
+        if args.__dict__.get("rescue_on_stall") and stalled:
+            outcome: Dict[str, Any] = {}
+
+            def resume() -> None:
+                try:
+                    acp.send(agent, content, planned.tag, new_chat=use_new_chat)
+                except Exception as e:
+                    outcome["error"] = e
+                    raise
+                outcome["sent"] = True
+
+            decision = mitigations.request(agent, "rescue", [MitigationStep("resume", resume)], source="runner")
+            if not decision.accepted:
+                print(f"[Scheduler] rescue suppressed ({decision.status}) -> {agent}")
+                return False
+            # Only a started/upgraded sequence carries this content, and a zero-delay step runs inside
+            # request(); merged and queued rescues have not sent anything yet
+            if decision.status not in ("started", "upgraded") or not outcome.get("sent"):
+                if "error" in outcome:
+                    print(f"[Scheduler] rescue send failed -> {agent}: {outcome['error']}")
+                else:
+                    print(f"[Scheduler] rescue deferred ({decision.status}) -> {agent}")
+                return False
+        else:
             try:
-                import time as _t, json as _j
-                from pathlib import Path as _P
-                # Drop fsm_request into Agent-5 inbox
+                acp.send(agent, content, planned.tag, new_chat=use_new_chat)
+            except Exception:
+                return False
+        print(f"[Scheduler] SEND {planned.tag.name} -> {agent}{' (resume signal)' if force_resume else ''}")
+        if args.devlog_sends:
+            _post_discord(
+                args.devlog_webhook,
+                args.devlog_username,
+                args.devlog_embed,
+                f"SEND {planned.tag.name} -> {agent}",
+                (content[:900] + "…") if len(content) > 900 else content,
+            )
+        if args.single_repo_mode:
+            last_focus_repo_sent[agent] = focus_repo
+        return True
+
+    scheduler = AgentScheduler(
+        cycle_targets,
+        plan,
+        PacingConfig.from_args(args),
+        send_turn,
+        state_cache=state_cache,
+        timeline=timeline,
+        max_turns=total_cycles,
+    )
+    if activity_watcher is not None:
+        scheduler.add_periodic("activity", min(60.0, float(args.interval_sec)), lambda: activity_watcher.poll(cycle_targets))
+
+    if args.fsm_enabled:
+        def drop_fsm_request() -> None:
+            # In FSM mode, captain triggers fsm_request to Agent-5 each interval
+            try:
+                import json as _j
                 payload = {
                     "type": "fsm_request",
                     "from": captain or args.sender,
@@ -729,166 +842,61 @@ def main() -> int:
                     "workflow": args.fsm_workflow,
                     "agents": cycle_targets,
                     "focus_repo": focus_repo,
-                    "timestamp": _t.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
                 }
-                inbox = _P(args.workspace_root) / args.fsm_agent / "inbox"
+                inbox = Path(args.workspace_root) / args.fsm_agent / "inbox"
                 inbox.mkdir(parents=True, exist_ok=True)
-                fn = inbox / f"fsm_request_{_t.strftime('%Y%m%d_%H%M%S')}.json"
+                fn = inbox / f"fsm_request_{time.strftime('%Y%m%d_%H%M%S')}.json"
                 fn.write_text(_j.dumps(payload, indent=2), encoding="utf-8")
             except Exception:
                 pass
-        for agent in cycle_targets:
-            # Check for immediate resume signal and honor it once by bypassing cooldown
-            force_resume = False
-            try:
-                if args.resume_on_state_change and planned.tag == MsgTag.RESUME and signal_dir.exists():
-                    sig = signal_dir / f"resume_now_{agent}.signal"
-                    if sig.exists():
-                        force_resume = True
-                        try:
-                            sig.unlink()
-                        except Exception:
-                            pass
-            except Exception:
-                pass
-            # If FSM is enabled, adjust RESUME content to inbox-driven flow
-            agent_contracts = contracts_map.get(agent, []) or contracts_map.get(f"Agent-{agent}", [])
-
-            # Pacing guards
-            # 1) active grace: if agent updated state recently, skip to reduce noise/duplication
-            try:
-                from pathlib import Path as _P
-            except Exception:
-                pass
-            from pathlib import Path as _P  # already imported above
-            def _recent():
-                try:
-                    p = _P(args.workspace_root) / agent / "state.json"
-                    if not p.exists():
-                        return False
-                    import json as _j
-                    data = _j.loads(p.read_text(encoding="utf-8"))
-                    updated = data.get("updated")
-                    if not updated:
-                        return False
-                    ts = _dt.datetime.strptime(updated, "%Y-%m-%dT%H:%M:%S")
-                    return (_dt.datetime.utcnow() - ts).total_seconds() < float(args.active_grace_sec)
-                except Exception:
-                    return False
-            if _recent():
-                continue
-            # 2) stall detection (optional)
-            stalled = False
-            if args.__dict__.get("rescue_on_stall"):
-                try:
-                    stalled = is_stalled(agent, args.__dict__.get("stalled_threshold_sec", 1200), args.workspace_root)
-                except Exception:
-                    stalled = False
-            # 3) per-agent global cooldown: avoid sending too frequently to the same agent
-            if (time.time() - last_any_sent.get(agent, 0.0)) < float(args.per_agent_cooldown_sec):
-                continue
-            # 4) resume cooldown: limit RESUME frequency (unless force or stalled rescue)
-            if planned.tag == MsgTag.RESUME and not (force_resume or stalled):
-                if args.suppress_resume:
-                    continue
-                last_resume_ts = last_sent.get(agent, {}).get("RESUME")
-                if last_resume_ts is not None and (time.time() - last_resume_ts) < args.resume_cooldown_sec:
-                    continue
-
-            # Build content (tailored when available)
-            if contracts_map:
-                content = build_tailored_message(agent, planned.tag, agent_contracts)
-            else:
-                if args.__dict__.get("rescue_on_stall") and stalled:
-                    checklist = ", ".join([s.strip() for s in str(args.beta_ready_checklist).split(',') if s.strip()])
-                    content = (
-                        f"{agent} resume. You appear stalled. Regain focus and continue on the beta-ready checklist: {checklist}. "
-                        f"Open TASK_LIST.md, pick the next verifiable step, and after completion send an fsm_update (task_id,state,summary,evidence)."
-                    )
-                elif args.plan == "single-repo-beta":
-                    repos_root = get_repos_root()
-                    repo_line = f"Focus repo: {focus_repo}. " if focus_repo else f"Focus a valid repository under {repos_root} (not caches/temp). "
-                    checklist = ", ".join([s.strip() for s in str(args.beta_ready_checklist).split(',') if s.strip()])
-                    if planned.tag == MsgTag.RESUME:
-                        content = (
-                            f"{agent} resume. {repo_line}Goal: reach beta-ready tonight. "
-                            f"Checklist: {checklist}. Start with GUI loads cleanly; all buttons/menus wired; happy-path flows; basic tests; README quickstart."
-                        )
-                    elif planned.tag == MsgTag.TASK:
-                        content = (
-                            f"{agent} implement one concrete step toward beta-ready in {focus_repo or 'the focus repo'}: "
-                            f"e.g., wire a missing button handler, fix a flow, add a smoke test. Commit small, verifiable edits with evidence."
-                        )
-                    elif planned.tag == MsgTag.COORDINATE:
-                        content = (
-                            f"{agent} coordinate to avoid duplication in {focus_repo or 'the focus repo'}: declare your current component area, "
-                            f"search first for reuse, and request a quick sanity check from a peer before large changes."
-                        )
-                    elif planned.tag == MsgTag.SYNC:
-                        content = (
-                            f"{agent} 10-min sync: status vs beta-ready checklist for {focus_repo or 'the focus repo'}; next verifiable step; risks."
-                        )
-                    elif planned.tag == MsgTag.VERIFY:
-                        content = (
-                            f"{agent} verify: run GUI smoke, tests/build for {focus_repo or 'the focus repo'}. Attach evidence. "
-                            f"If blocked, stage diffs and summarize the gap + next step."
-                        )
-                    else:
-                        content = planned.template.format(agent=agent)
-                else:
-                    if args.fsm_enabled and planned.tag == MsgTag.RESUME:
-                        # Include per-agent workspace and inbox directories in the guidance
-                        workspace_dir = os.path.join(args.workspace_root, agent)
-                        inbox_dir = os.path.join(workspace_dir, "inbox")
-                        ffn_line = f"\nFocus file: {args.focus_file}" if getattr(args, "focus_file", None) else ""
-                        content = (
-                            f"{agent} check your inbox for new assignments. Create/refresh your TASK_LIST.md based on assigned tasks,"
-                            f" then execute sequentially with small, verifiable edits. Post evidence and updates via inbox.\n"
-                            f"Workspace: {workspace_dir}\nInbox: {inbox_dir}{ffn_line}"
-                        )
-                    else:
-                        content = planned.template.format(agent=agent)
-            # Decide whether to request new-chat (Ctrl+T) for this send.
-            # Stricter policy: only when explicitly recovering (force_resume). Avoid opening new tabs otherwise.
-            use_new_chat = planned.tag == MsgTag.RESUME and force_resume
-            try:
-                acp.send(agent, content, planned.tag, new_chat=use_new_chat)
-                if args.devlog_sends:
-                    _post_discord(
-                        args.devlog_webhook,
-                        args.devlog_username,
-                        args.devlog_embed,
-                        f"SEND {planned.tag.name} -> {agent}",
-                        (content[:900] + "…") if len(content) > 900 else content,
-                    )
-                now_ts = time.time()
-                last_any_sent[agent] = now_ts
-                last_sent.setdefault(agent, {})[planned.tag.name] = now_ts
-                if args.single_repo_mode:
-                    last_focus_repo_sent[agent] = focus_repo
-            except Exception:
-                pass
-            base = args.stagger_ms / 1000.0
-            jitter = (args.jitter_ms / 1000.0) if args.jitter_ms else 0.0
-            delay = base + random.uniform(-jitter, jitter)
-            time.sleep(max(0.0, delay))
-
-        if cycle < total_cycles - 1:
-            remaining = args.interval_sec
-            while remaining > 0 and not stop_flag["stop"]:
-                time.sleep(min(1.0, remaining))
-                remaining -= 1
-        
+        scheduler.add_periodic("fsm_request", args.interval_sec, drop_fsm_request)
+
+    signal_bus: SignalBus | None = None
+    if args.resume_on_state_change:
+        def on_signal(sig: Signal) -> None:
+            # Listener wakes the scheduler directly; repeated signals arrive coalesced
+            if sig.agent in cycle_targets:
+                state_cache.invalidate(sig.agent)
+                scheduler.request_resume(sig.agent, requested_at=sig.created_at)
+        try:
+            signal_bus = SignalBus(signal_dir, on_signal, kinds={RESUME_NOW}).start()
+            print(f"Signal bus listening ({signal_bus.transport}) at {signal_dir}")
+        except Exception as e:
+            print(f"Warning: signal bus unavailable: {e}")
+            signal_bus = None
+
+    def report_status() -> None:
+        m = scheduler.metrics()
+        print(f"\n[Scheduler] queue={m['queue_depth']} due={m['due_now']} sends={m['sends']} "
+              f"lag_avg={m['lag_avg']:.2f}s lag_max={m['lag_max']:.2f}s deferrals={m['deferrals']} skips={m['skips']}")
+        if signal_bus is not None:
+            print(f"[Signals] {signal_bus.stats} resume signal->send latency={m['resume_latency']}")
+        if coordinator is not None:
+            st = coordinator.status()
+            hosted = {w: v["agents"] for w, v in st["workers"].items()}
+            print(f"[Shard] workers={hosted} stats={st['stats']}")
         # Report FSM status if orchestrator is enabled
         if fsm_orchestrator and fsm_orchestrator.is_monitoring():
             try:
                 status = fsm_orchestrator.get_status_summary()
-                print(f"\n[FSM Status] Tasks: {status['total_tasks']} total, "
+                print(f"[FSM Status] Tasks: {status['total_tasks']} total, "
                       f"{status['completed_tasks']} completed, "
                       f"{status['in_progress_tasks']} in progress, "
                       f"{status['processed_updates']} updates processed")
             except Exception as e:
                 print(f"[FSM Status] Error getting status: {e}")
+    scheduler.add_periodic("status", args.interval_sec, report_status, first_due=time.time() + args.interval_sec)
+
+    if stop_flag["stop"]:
+        scheduler.stop()
+    try:
+        scheduler.run()
+    finally:
+        if signal_bus is not None:
+            signal_bus.stop()
+        if coordinator is not None:
+            coordinator.close()
 
     # Cleanup response capture if enabled
     if args.capture_enabled and acp.is_capture_enabled():
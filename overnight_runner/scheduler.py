@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""Timer-heap send scheduler for the overnight runner.
+
+Each cycle target owns a slot with its own next-eligible time.  Pacing guards
+(active grace, per-agent cooldown, RESUME cooldown, stall rescue and resume
+signals) are turned into absolute timestamps, so a blocked agent is re-queued
+for exactly the moment its guard clears instead of waiting for the next cycle.
+
+Agent ``state.json`` files are read through :class:`AgentStateCache`, which
+only re-parses a file when its mtime changes or when it is explicitly
+invalidated by a file event.
+"""
+from __future__ import annotations
+
+import calendar
+import heapq
+import itertools
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+STATE_TS_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def parse_state_ts(value: Any) -> Optional[float]:
+    """Return epoch seconds for a ``state.json`` ``updated`` stamp.
+
+    Stamps are compared against ``utcnow`` by the runner guards, so they are
+    interpreted as UTC here as well.
+    """
+    if not value:
+        return None
+    try:
+        return float(calendar.timegm(time.strptime(str(value), STATE_TS_FORMAT)))
+    except Exception:
+        return None
+
+
+@dataclass
+class PacingConfig:
+    """Pacing knobs shared by all agent slots (mirrors runner CLI flags)."""
+
+    interval_sec: float = 600.0
+    per_agent_cooldown_sec: float = 300.0
+    resume_cooldown_sec: float = 600.0
+    active_grace_sec: float = 900.0
+    stalled_threshold_sec: float = 1200.0
+    rescue_on_stall: bool = False
+    suppress_resume: bool = False
+    stagger_sec: float = 2.0
+    jitter_sec: float = 0.5
+
+    @classmethod
+    def from_args(cls, args: Any) -> "PacingConfig":
+        return cls(
+            interval_sec=float(args.interval_sec),
+            per_agent_cooldown_sec=float(args.per_agent_cooldown_sec),
+            resume_cooldown_sec=float(args.resume_cooldown_sec),
+            active_grace_sec=float(args.active_grace_sec),
+            stalled_threshold_sec=float(getattr(args, "stalled_threshold_sec", 1200)),
+            rescue_on_stall=bool(getattr(args, "rescue_on_stall", False)),
+            suppress_resume=bool(args.suppress_resume),
+            stagger_sec=max(0.0, args.stagger_ms / 1000.0),
+            jitter_sec=max(0.0, (args.jitter_ms or 0) / 1000.0),
+        )
+
+
+class AgentStateCache:
+    """Cache of ``<workspace_root>/<agent>/state.json`` keyed by file mtime."""
+
+    def __init__(self, workspace_root: str | Path) -> None:
+        self.workspace_root = Path(workspace_root)
+        self._entries: Dict[str, Tuple[Optional[int], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.reads = 0
+
+    def path_for(self, agent: str) -> Path:
+        return self.workspace_root / agent / "state.json"
+
+    def invalidate(self, agent: Optional[str] = None) -> None:
+        """Drop cached state for ``agent`` (or every agent) after a file event."""
+        with self._lock:
+            if agent is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(agent, None)
+
+    def get(self, agent: str) -> Dict[str, Any]:
+        p = self.path_for(agent)
+        try:
+            mtime: Optional[int] = p.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        with self._lock:
+            cached = self._entries.get(agent)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+        data: Dict[str, Any] = {}
+        if mtime is not None:
+            try:
+                loaded = json.loads(p.read_text(encoding="utf-8"))
+                data = loaded if isinstance(loaded, dict) else {}
+            except Exception:
+                data = {}
+            self.reads += 1
+        with self._lock:
+            self._entries[agent] = (mtime, data)
+        return data
+
+    def updated_at(self, agent: str) -> Optional[float]:
+        return parse_state_ts(self.get(agent).get("updated"))
+
+
+@dataclass
+class _AgentSlot:
+    agent: str
+    turn: int = 0
+    turn_due: float = 0.0
+    force_resume: bool = False
+    force_requested_at: Optional[float] = None
+    last_any_sent: float = 0.0
+    last_sent: Dict[str, float] = field(default_factory=dict)
+    done: bool = False
+
+
+@dataclass
+class _Job:
+    name: str
+    interval: float
+    fn: Callable[[], None]
+
+
+class AgentScheduler:
+    """Fire planned messages per agent from a heap of due times.
+
+    ``send_fn(agent, planned, force_resume, stalled)`` performs the actual
+    send and returns True on success.  ``planned`` items only need a ``tag``
+    with a ``name`` attribute (``PlannedMessage`` in the runner).  An
+    optional ``timeline`` (``src.core.activity_timeline.ActivityTimeline``)
+    widens the activity guards beyond ``state.json``.
+    """
+
+    def __init__(
+        self,
+        agents: Sequence[str],
+        plan: Sequence[Any],
+        pacing: PacingConfig,
+        send_fn: Callable[[str, Any, bool, bool], bool],
+        state_cache: Optional[AgentStateCache] = None,
+        timeline: Any = None,
+        max_turns: Optional[int] = None,
+        resume_planned: Any = None,
+        clock: Callable[[], float] = time.time,
+        wait: Optional[Callable[[float], Any]] = None,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        if not plan:
+            raise ValueError("plan must contain at least one message")
+        self.plan = list(plan)
+        self.pacing = pacing
+        self.send_fn = send_fn
+        self.state_cache = state_cache
+        self.timeline = timeline
+        self.max_turns = max_turns
+        self.resume_planned = resume_planned or next(
+            (p for p in self.plan if self._tag_name(p) == "RESUME"), None
+        )
+        self.clock = clock
+        self._rng = rng or random.Random()
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._wait = wait or self._wake.wait
+        self._heap: List[Tuple[float, int, str]] = []
+        self._tokens: Dict[str, int] = {}
+        self._seq = itertools.count()
+        self._jobs: Dict[str, _Job] = {}
+        self._slots: Dict[str, _AgentSlot] = {a: _AgentSlot(agent=a) for a in agents}
+        self._next_send_at = 0.0
+        self._started = False
+        # metrics
+        self._lag_count = 0
+        self._lag_total = 0.0
+        self._lag_max = 0.0
+        self._lag_last = 0.0
+        self._sends = 0
+        self._send_failures = 0
+        self._deferrals: Dict[str, int] = {}
+        self._skips: Dict[str, int] = {}
+        self._resume_latencies: List[float] = []
+
+    # ------------------------------------------------------------------ public
+    @staticmethod
+    def _tag_name(planned: Any) -> str:
+        tag = getattr(planned, "tag", None)
+        return str(getattr(tag, "name", tag or ""))
+
+    def add_periodic(self, name: str, interval: float, fn: Callable[[], None], first_due: Optional[float] = None) -> None:
+        """Register a periodic job that shares the scheduler loop."""
+        with self._lock:
+            self._jobs[name] = _Job(name=name, interval=max(0.001, float(interval)), fn=fn)
+            self._push(f"job:{name}", self.clock() if first_due is None else first_due)
+        self._wake.set()
+
+    def request_resume(self, agent: str, requested_at: Optional[float] = None) -> bool:
+        """Force a RESUME to ``agent`` as soon as its guards allow (bypasses RESUME cooldown once).
+
+        ``requested_at`` is the signal origin time used for signal-to-send latency.
+        """
+        with self._lock:
+            slot = self._slots.get(agent)
+            if slot is None or self.resume_planned is None:
+                return False
+            if not slot.force_resume:
+                slot.force_resume = True
+                slot.force_requested_at = self.clock() if requested_at is None else requested_at
+            self._push(f"agent:{agent}", self.clock())
+        self._wake.set()
+        return True
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped.is_set()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of queue depth, dispatch lag and guard counters."""
+        now = self.clock()
+        with self._lock:
+            live = [(due, key) for due, seq, key in self._heap if self._tokens.get(key) == seq]
+            next_due = min((due for due, _ in live), default=None)
+            return {
+                "queue_depth": len(live),
+                "due_now": sum(1 for due, _ in live if due <= now),
+                "next_due_in": None if next_due is None else max(0.0, next_due - now),
+                "lag_last": self._lag_last,
+                "lag_max": self._lag_max,
+                "lag_avg": (self._lag_total / self._lag_count) if self._lag_count else 0.0,
+                "sends": self._sends,
+                "send_failures": self._send_failures,
+                "deferrals": dict(self._deferrals),
+                "skips": dict(self._skips),
+                "resume_latency": self._latency_summary(),
+                "active_agents": sum(1 for s in self._slots.values() if not s.done),
+            }
+
+    def run(self, until: Optional[float] = None) -> None:
+        """Dispatch timers until every agent used its turns, ``stop()`` or ``until``."""
+        self._start()
+        while not self._stopped.is_set():
+            with self._lock:
+                if not any(not s.done for s in self._slots.values()):
+                    break
+                entry = self._peek()
+                now = self.clock()
+                if entry is None:
+                    break
+                due, _, key = entry
+                if until is not None and min(due, now) >= until:
+                    break
+                if due > now:
+                    timeout = due - now if until is None else min(due, until) - now
+                else:
+                    heapq.heappop(self._heap)
+                    self._tokens.pop(key, None)
+                    timeout = None
+            if timeout is not None:
+                self._wait(max(0.0, timeout))
+                self._wake.clear()
+                continue
+            self._record_lag(now - due)
+            if key.startswith("job:"):
+                self._fire_job(key[4:], due, now)
+            else:
+                self._fire_agent(key[6:], now)
+
+    # ----------------------------------------------------------------- internals
+    def _start(self) -> None:
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            now = self.clock()
+            for i, slot in enumerate(self._slots.values()):
+                slot.turn_due = now + i * self.pacing.stagger_sec
+                self._push(f"agent:{slot.agent}", slot.turn_due)
+
+    def _push(self, key: str, due: float) -> None:
+        seq = next(self._seq)
+        self._tokens[key] = seq
+        heapq.heappush(self._heap, (due, seq, key))
+
+    def _peek(self) -> Optional[Tuple[float, int, str]]:
+        while self._heap:
+            due, seq, key = self._heap[0]
+            if self._tokens.get(key) == seq:
+                return self._heap[0]
+            heapq.heappop(self._heap)
+        return None
+
+    def _latency_summary(self) -> Dict[str, Any]:
+        values = sorted(self._resume_latencies)
+        if not values:
+            return {"count": 0}
+        return {
+            "count": len(values),
+            "last": self._resume_latencies[-1],
+            "p50": values[len(values) // 2],
+            "max": values[-1],
+        }
+
+    def _record_lag(self, lag: float) -> None:
+        lag = max(0.0, lag)
+        self._lag_last = lag
+        self._lag_max = max(self._lag_max, lag)
+        self._lag_total += lag
+        self._lag_count += 1
+
+    def _fire_job(self, name: str, due: float, now: float) -> None:
+        job = self._jobs.get(name)
+        if job is None:
+            return
+        try:
+            job.fn()
+        except Exception as exc:
+            print(f"[Scheduler] job {name} failed: {exc}")
+        with self._lock:
+            # Fixed-rate schedule without burst catch-up after a long stall
+            nxt = due + job.interval
+            if nxt <= now:
+                nxt = now + job.interval
+            self._push(f"job:{name}", nxt)
+
+    def _advance_turn(self, slot: _AgentSlot) -> None:
+        slot.turn += 1
+        slot.turn_due += self.pacing.interval_sec
+        if self.max_turns is not None and slot.turn >= self.max_turns and not slot.force_resume:
+            slot.done = True
+            return
+        self._push(f"agent:{slot.agent}", slot.turn_due)
+
+    def _last_activity(self, agent: str) -> Optional[float]:
+        """Newest of the ``state.json`` stamp and any timeline activity (replies, heartbeats, commits)."""
+        updated = self.state_cache.updated_at(agent) if self.state_cache else None
+        if self.timeline is not None:
+            seen = self.timeline.last_activity(agent)
+            if seen is not None and (updated is None or seen > updated):
+                updated = seen
+        return updated
+
+    def _eligible_at(self, slot: _AgentSlot, planned: Any, force: bool, now: float) -> Tuple[Optional[float], str, bool]:
+        """Return (eligible_at, reason, stalled); eligible_at None means skip this turn."""
+        p = self.pacing
+        updated = self._last_activity(slot.agent)
+        blockers: List[Tuple[float, str]] = []
+        if updated is not None and now - updated < p.active_grace_sec:
+            blockers.append((updated + p.active_grace_sec, "active_grace"))
+        stalled = bool(p.rescue_on_stall) and (updated is None or now - updated >= p.stalled_threshold_sec)
+        cooldown_end = slot.last_any_sent + p.per_agent_cooldown_sec
+        if slot.last_any_sent and now < cooldown_end:
+            blockers.append((cooldown_end, "agent_cooldown"))
+        if self._tag_name(planned) == "RESUME" and not (force or stalled):
+            if p.suppress_resume:
+                return None, "suppress_resume", stalled
+            last_resume = slot.last_sent.get("RESUME")
+            if last_resume is not None and now - last_resume < p.resume_cooldown_sec:
+                resume_at = last_resume + p.resume_cooldown_sec
+                if p.rescue_on_stall and updated is not None:
+                    # A stall rescue bypasses the RESUME cooldown, so wake at the stall edge
+                    resume_at = min(resume_at, max(now, updated + p.stalled_threshold_sec))
+                blockers.append((resume_at, "resume_cooldown"))
+        if blockers:
+            at, reason = max(blockers)
+            return at, reason, stalled
+        return now, "", stalled
+
+    def _fire_agent(self, agent: str, now: float) -> None:
+        with self._lock:
+            slot = self._slots.get(agent)
+            if slot is None or slot.done:
+                return
+            force = slot.force_resume
+            planned = self.resume_planned if force else self.plan[slot.turn % len(self.plan)]
+            eligible, reason, stalled = self._eligible_at(slot, planned, force, now)
+            if eligible is None:
+                self._skips[reason] = self._skips.get(reason, 0) + 1
+                self._advance_turn(slot)
+                return
+            if eligible > now:
+                self._deferrals[reason] = self._deferrals.get(reason, 0) + 1
+                window_end = slot.turn_due + self.pacing.interval_sec
+                if force or eligible < window_end:
+                    self._push(f"agent:{agent}", eligible)
+                else:
+                    self._skips[reason] = self._skips.get(reason, 0) + 1
+                    self._advance_turn(slot)
+                return
+            if now < self._next_send_at:
+                # One mouse: keep the stagger gap between consecutive sends
+                self._deferrals["stagger"] = self._deferrals.get("stagger", 0) + 1
+                self._push(f"agent:{agent}", self._next_send_at)
+                return
+        ok = False
+        try:
+            ok = bool(self.send_fn(agent, planned, force, stalled))
+        except Exception as exc:
+            print(f"[Scheduler] send to {agent} failed: {exc}")
+        with self._lock:
+            sent_at = self.clock()
+            jitter = self._rng.uniform(-self.pacing.jitter_sec, self.pacing.jitter_sec) if self.pacing.jitter_sec else 0.0
+            self._next_send_at = sent_at + max(0.0, self.pacing.stagger_sec + jitter)
+            if ok:
+                self._sends += 1
+                slot.last_any_sent = sent_at
+                slot.last_sent[self._tag_name(planned)] = sent_at
+            else:
+                self._send_failures += 1
+            if force:
+                if slot.force_requested_at is not None and ok:
+                    self._resume_latencies.append(max(0.0, sent_at - slot.force_requested_at))
+                    del self._resume_latencies[:-256]
+                slot.force_resume = False
+                slot.force_requested_at = None
+                if self.max_turns is not None and slot.turn >= self.max_turns:
+                    slot.done = True
+                else:
+                    self._push(f"agent:{agent}", max(slot.turn_due, sent_at))
+            else:
+                self._advance_turn(slot)
@@ -0,0 +1,589 @@
+#!/usr/bin/env python3
+"""Coordinator/worker split for running the overnight pipeline on several desktops.
+
+The coordinator (the runner started with ``--shard-listen``) owns the plan,
+the pacing guards and the FSM.  Each worker owns one desktop: its local
+``AgentCellPhone``, response capture and agent inboxes.  Workers poll the
+coordinator over plain HTTP/JSON:
+
+``POST /register``   ``{worker_id, hostable, capacity}`` → assignment
+``POST /heartbeat``  ``{worker_id, results, states, envelopes}`` → assignment + send commands
+``GET  /status``     coordinator view of workers, owners and counters
+
+New workers take agents from the most loaded worker until loads differ by
+at most one.  A worker that misses heartbeats for ``lease_sec`` is dropped and
+its agents are reassigned to the least loaded live worker that can host them.  Commands
+that were queued but not yet handed out move with the agent; commands already
+handed to the dead worker are counted as lost rather than re-sent, so a
+prompt is typed at most once (the next scheduled turn covers the gap).
+
+Workers ship captured response envelopes with each heartbeat; the
+coordinator writes them into its own capture inbox so the FSM side is
+unchanged.  A worker's capture inbox must not be the coordinator's inbox
+(the worker deletes what it shipped), so the two default to different
+directories and a worker on the coordinator's host refuses to run when
+both resolve to the same path.
+
+Usage (worker)::
+
+    python -m overnight_runner.sharding --coordinator http://captain-host:8765 --layout 5-agent
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+from urllib import error, request
+
+_THIS = Path(__file__).resolve()
+sys.path.insert(0, str(_THIS.parents[1]))
+sys.path.insert(0, str(_THIS.parents[1] / 'src'))
+
+from src.core.config import get_owner_path  # type: ignore
+from src.utils import atomic_write  # type: ignore
+from overnight_runner.scheduler import AgentStateCache, parse_state_ts  # type: ignore
+
+
+DEFAULT_LEASE_SEC = 15.0
+DEFAULT_ENVELOPE_DIR = "runtime/agent_comms/inbox"  # coordinator: FSM inbox envelopes are written to
+DEFAULT_WORKER_ENVELOPE_DIR = "runtime/agent_comms/shard_outbox"  # worker: capture inbox shipped upstream
+
+
+@dataclass
+class SendCommand:
+    command_id: str
+    agent: str
+    tag: str
+    content: str
+    new_chat: bool = False
+    created_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class _Worker:
+    worker_id: str
+    hostable: Optional[Set[str]]
+    capacity: Optional[int]
+    last_seen: float
+    agents: Set[str] = field(default_factory=set)
+    inflight: Dict[str, SendCommand] = field(default_factory=dict)
+
+    def can_host(self, agent: str) -> bool:
+        if self.hostable is not None and agent not in self.hostable:
+            return False
+        return self.capacity is None or len(self.agents) < self.capacity
+
+
+class RemoteStateCache:
+    """``AgentStateCache`` look-alike fed by worker heartbeats instead of local files."""
+
+    def __init__(self) -> None:
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def update(self, agent: str, state: Dict[str, Any]) -> None:
+        with self._lock:
+            self._states[agent] = dict(state)
+
+    def invalidate(self, agent: Optional[str] = None) -> None:
+        # Remote state is pushed, not pulled; nothing to re-read
+        return None
+
+    def get(self, agent: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._states.get(agent) or {})
+
+    def updated_at(self, agent: str) -> Optional[float]:
+        return parse_state_ts(self.get(agent).get("updated"))
+
+
+class ShardCoordinator:
+    """Tracks workers, owns agent assignment and queues send commands per agent."""
+
+    def __init__(
+        self,
+        agents: Iterable[str],
+        lease_sec: float = DEFAULT_LEASE_SEC,
+        envelope_dir: str | Path | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.agents = list(agents)
+        self.lease_sec = max(0.1, float(lease_sec))
+        self.envelope_dir = Path(envelope_dir) if envelope_dir else None
+        self.clock = clock
+        self.state_cache = RemoteStateCache()
+        self._workers: Dict[str, _Worker] = {}
+        self._owner: Dict[str, Optional[str]] = {a: None for a in self.agents}
+        self._queues: Dict[str, Deque[SendCommand]] = {a: deque() for a in self.agents}
+        self._seq = itertools.count(1)
+        self._lock = threading.RLock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._server_thread: Optional[threading.Thread] = None
+        self.stats: Dict[str, int] = {
+            "dispatched": 0, "undeliverable": 0, "sent": 0, "send_failed": 0,
+            "lost": 0, "assigned": 0, "released": 0, "workers_dead": 0, "envelopes": 0,
+        }
+
+    # ------------------------------------------------------------------ membership
+    def register(self, worker_id: str, hostable: Optional[Iterable[str]] = None,
+                 capacity: Optional[int] = None) -> Dict[str, Any]:
+        with self._lock:
+            now = self.clock()
+            worker = self._workers.get(worker_id)
+            if worker is None:
+                worker = _Worker(worker_id, set(hostable) if hostable is not None else None,
+                                 int(capacity) if capacity else None, now)
+                self._workers[worker_id] = worker
+                self.reap()
+                self._assign_unowned()
+                self._rebalance()
+            else:
+                worker.hostable = set(hostable) if hostable is not None else None
+                worker.capacity = int(capacity) if capacity else None
+                worker.last_seen = now
+            self.reap()
+            self._assign_unowned()
+            return self._view(worker)
+
+    def reap(self) -> List[str]:
+        """Drop workers whose lease expired and hand their agents to live workers."""
+        with self._lock:
+            now = self.clock()
+            dead = [w for w in self._workers.values() if now - w.last_seen > self.lease_sec]
+            for worker in dead:
+                del self._workers[worker.worker_id]
+                self.stats["workers_dead"] += 1
+                self.stats["lost"] += len(worker.inflight)
+                for agent in worker.agents:
+                    self._owner[agent] = None
+                self.stats["released"] += len(worker.agents)
+                print(f"[Shard] worker {worker.worker_id} missed its lease; releasing {sorted(worker.agents)}")
+            if dead:
+                self._assign_unowned()
+            return [w.worker_id for w in dead]
+
+    def _assign_unowned(self) -> None:
+        for agent in self.agents:
+            if self._owner.get(agent) is not None:
+                continue
+            candidates = [w for w in self._workers.values() if w.can_host(agent)]
+            if not candidates:
+                continue
+            target = min(candidates, key=lambda w: (len(w.agents), w.worker_id))
+            target.agents.add(agent)
+            self._owner[agent] = target.worker_id
+            self.stats["assigned"] += 1
+
+    def _rebalance(self) -> None:
+        """Even out load after a worker joins; agents with sends in flight stay put."""
+        while len(self._workers) > 1:
+            workers = sorted(self._workers.values(), key=lambda w: (len(w.agents), w.worker_id))
+            moved = False
+            for receiver in workers:
+                for donor in reversed(workers):
+                    if len(donor.agents) - len(receiver.agents) <= 1:
+                        continue
+                    busy = {c.agent for c in donor.inflight.values()}
+                    movable = sorted(a for a in donor.agents if a not in busy and receiver.can_host(a))
+                    if movable:
+                        agent = movable[0]
+                        donor.agents.discard(agent)
+                        receiver.agents.add(agent)
+                        self._owner[agent] = receiver.worker_id
+                        self.stats["assigned"] += 1
+                        moved = True
+                        break
+                if moved:
+                    break
+            if not moved:
+                return
+
+    def owner_of(self, agent: str) -> Optional[str]:
+        with self._lock:
+            return self._owner.get(agent)
+
+    def wait_for_owners(self, agents: Iterable[str], timeout: float, poll_sec: float = 0.2) -> bool:
+        """Block until every agent in ``agents`` is hosted by a live worker (or ``timeout``)."""
+        wanted = list(agents)
+        deadline = time.monotonic() + max(0.0, timeout)
+        while True:
+            with self._lock:
+                self.reap()
+                if all(self._owner.get(a) is not None for a in wanted):
+                    return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(poll_sec)
+
+    # ------------------------------------------------------------------ commands
+    def dispatch(self, agent: str, tag: str, content: str, new_chat: bool = False) -> bool:
+        """Queue a send for the worker hosting ``agent``; False when nobody hosts it."""
+        with self._lock:
+            self.reap()
+            if agent not in self._queues or self._owner.get(agent) is None:
+                self.stats["undeliverable"] += 1
+                return False
+            cmd = SendCommand(f"c{next(self._seq)}", agent, str(getattr(tag, "name", tag)), content, bool(new_chat))
+            self._queues[agent].append(cmd)
+            self.stats["dispatched"] += 1
+            return True
+
+    def heartbeat(self, worker_id: str, results: Optional[List[Dict[str, Any]]] = None,
+                  states: Optional[Dict[str, Dict[str, Any]]] = None,
+                  envelopes: Optional[List[Dict[str, Any]]] = None,
+                  hostable: Optional[Iterable[str]] = None, capacity: Optional[int] = None) -> Dict[str, Any]:
+        with self._lock:
+            worker = self._workers.get(worker_id)
+            if worker is None:
+                # Unknown (or previously reaped) worker: treat as a fresh registration
+                self.register(worker_id, hostable, capacity)
+                worker = self._workers[worker_id]
+            worker.last_seen = self.clock()
+            for res in results or []:
+                cmd = worker.inflight.pop(str(res.get("id")), None)
+                if cmd is not None:
+                    self.stats["sent" if res.get("ok") else "send_failed"] += 1
+            for agent, state in (states or {}).items():
+                if worker.agents and agent in worker.agents and isinstance(state, dict):
+                    self.state_cache.update(agent, state)
+            self.reap()
+            self._assign_unowned()
+            commands: List[Dict[str, Any]] = []
+            for agent in sorted(worker.agents):
+                queue = self._queues[agent]
+                while queue:
+                    cmd = queue.popleft()
+                    worker.inflight[cmd.command_id] = cmd
+                    commands.append(cmd.to_dict())
+            view = self._view(worker)
+        self._store_envelopes(envelopes or [])
+        view["commands"] = commands
+        return view
+
+    def _view(self, worker: _Worker) -> Dict[str, Any]:
+        view = {"worker_id": worker.worker_id, "assignment": sorted(worker.agents), "lease_sec": self.lease_sec}
+        if self.envelope_dir is not None:
+            view["envelope_dir"] = {"host": socket.gethostname(), "path": str(self.envelope_dir.resolve())}
+        return view
+
+    def _store_envelopes(self, envelopes: List[Dict[str, Any]]) -> None:
+        if self.envelope_dir is None:
+            return
+        for item in envelopes:
+            name = Path(str(item.get("name") or f"response_{int(time.time() * 1000)}.json")).name
+            body = item.get("envelope")
+            if not isinstance(body, dict):
+                continue
+            try:
+                atomic_write(self.envelope_dir / name, json.dumps(body, ensure_ascii=False, indent=2))
+                with self._lock:
+                    self.stats["envelopes"] += 1
+            except OSError:
+                continue
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            now = self.clock()
+            return {
+                "workers": {
+                    w.worker_id: {
+                        "agents": sorted(w.agents),
+                        "last_seen_age": round(now - w.last_seen, 3),
+                        "inflight": len(w.inflight),
+                    }
+                    for w in self._workers.values()
+                },
+                "owners": dict(self._owner),
+                "queued": {a: len(q) for a, q in self._queues.items() if q},
+                "stats": dict(self.stats),
+            }
+
+    # ------------------------------------------------------------------ http
+    def serve(self, host: str = "127.0.0.1", port: int = 0) -> Tuple[str, int]:
+        """Start the HTTP endpoint in a background thread; returns the bound address."""
+        coordinator = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def _reply(self, code: int, payload: Dict[str, Any]) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:  # noqa: N802 - http.server API
+                if self.path.rstrip("/") == "/status":
+                    self._reply(200, coordinator.status())
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def do_POST(self) -> None:  # noqa: N802 - http.server API
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                    body = json.loads(self.rfile.read(length).decode("utf-8") or "{}")
+                    worker_id = str(body["worker_id"])
+                except Exception as exc:
+                    self._reply(400, {"error": f"bad request: {exc}"})
+                    return
+                route = self.path.rstrip("/")
+                if route == "/register":
+                    self._reply(200, coordinator.register(worker_id, body.get("hostable"), body.get("capacity")))
+                elif route == "/heartbeat":
+                    self._reply(200, coordinator.heartbeat(
+                        worker_id,
+                        results=body.get("results"),
+                        states=body.get("states"),
+                        envelopes=body.get("envelopes"),
+                        hostable=body.get("hostable"),
+                        capacity=body.get("capacity"),
+                    ))
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def log_message(self, format: str, *args: Any) -> None:
+                return
+
+        self._server = ThreadingHTTPServer((host, int(port)), _Handler)
+        self._server.daemon_threads = True
+        self._server_thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._server_thread.start()
+        addr = self._server.server_address
+        return str(addr[0]), int(addr[1])
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._server_thread is not None:
+            self._server_thread.join(timeout=1.0)
+            self._server_thread = None
+
+
+class RemoteCellPhone:
+    """Drop-in for the runner's ``AgentCellPhone`` that routes sends through the coordinator.
+
+    Layout queries are answered by the local (test-mode) phone; capture runs on
+    the workers, so it is reported as disabled here.
+    """
+
+    def __init__(self, coordinator: ShardCoordinator, local: Any) -> None:
+        self._coordinator = coordinator
+        self._local = local
+
+    def send(self, agent: str, message: str, tag: Any = "NORMAL", new_chat: bool = False, **_: Any) -> None:
+        if not self._coordinator.dispatch(agent, getattr(tag, "name", tag), message, new_chat):
+            raise RuntimeError(f"no live worker hosts {agent}")
+
+    def is_capture_enabled(self) -> bool:
+        return False
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._local, name)
+
+
+class ShardWorker:
+    """Runs sends for the agents the coordinator assigns to this desktop."""
+
+    def __init__(
+        self,
+        coordinator_url: str,
+        acp: Any,
+        worker_id: Optional[str] = None,
+        hostable: Optional[Iterable[str]] = None,
+        capacity: Optional[int] = None,
+        workspace_root: str | Path | None = None,
+        envelope_dir: str | Path | None = None,
+        heartbeat_sec: float = 2.0,
+        timeout: float = 5.0,
+        capture: bool = False,
+        max_envelopes: int = 50,
+    ) -> None:
+        self.url = coordinator_url.rstrip("/")
+        self.acp = acp
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.hostable = list(hostable) if hostable is not None else list(acp.get_available_agents())
+        self.capacity = capacity
+        self.state_cache = AgentStateCache(workspace_root) if workspace_root else None
+        self.envelope_dir = Path(envelope_dir) if envelope_dir else None
+        self.heartbeat_sec = max(0.05, float(heartbeat_sec))
+        self.timeout = timeout
+        self.capture = capture
+        self.max_envelopes = max(1, int(max_envelopes))
+        self.assignment: List[str] = []
+        self._results: List[Dict[str, Any]] = []
+        self._reported: Dict[str, Any] = {}
+        self._capturing: Set[str] = set()
+        self._stop = threading.Event()
+        self.stats: Dict[str, int] = {"heartbeats": 0, "errors": 0, "sent": 0, "send_failed": 0, "envelopes": 0}
+
+    def _post(self, route: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        req = request.Request(f"{self.url}{route}", data=json.dumps(payload).encode("utf-8"),
+                              headers={"Content-Type": "application/json"})
+        with request.urlopen(req, timeout=self.timeout) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+
+    def _changed_states(self) -> Dict[str, Dict[str, Any]]:
+        if self.state_cache is None:
+            return {}
+        states: Dict[str, Dict[str, Any]] = {}
+        for agent in self.assignment:
+            state = self.state_cache.get(agent)
+            stamp = state.get("updated")
+            if state and self._reported.get(agent) != stamp:
+                states[agent] = {"state": state.get("state"), "updated": stamp}
+        return states
+
+    def _pending_envelopes(self) -> List[Tuple[Path, Dict[str, Any]]]:
+        if self.envelope_dir is None or not self.envelope_dir.exists():
+            return []
+        out: List[Tuple[Path, Dict[str, Any]]] = []
+        for f in sorted(self.envelope_dir.glob("*.json"))[: self.max_envelopes]:
+            try:
+                out.append((f, json.loads(f.read_text(encoding="utf-8"))))
+            except Exception:
+                continue
+        return out
+
+    def step(self) -> bool:
+        """One heartbeat round trip plus the sends it returned; False if the coordinator was unreachable."""
+        states = self._changed_states()
+        envelopes = self._pending_envelopes()
+        payload = {
+            "worker_id": self.worker_id,
+            "hostable": self.hostable,
+            "capacity": self.capacity,
+            "results": list(self._results),
+            "states": states,
+            "envelopes": [{"name": f.name, "envelope": env} for f, env in envelopes],
+        }
+        try:
+            reply = self._post("/heartbeat", payload)
+        except (error.URLError, OSError, ValueError):
+            self.stats["errors"] += 1
+            return False
+        self.stats["heartbeats"] += 1
+        self._check_envelope_dir(reply.get("envelope_dir"))
+        self._results.clear()
+        for agent, state in states.items():
+            self._reported[agent] = state.get("updated")
+        for f, _ in envelopes:
+            try:
+                f.unlink()
+                self.stats["envelopes"] += 1
+            except OSError:
+                pass
+        self._apply_assignment(list(reply.get("assignment") or []))
+        for cmd in reply.get("commands") or []:
+            self._execute(cmd)
+        return True
+
+    def _check_envelope_dir(self, remote: Optional[Dict[str, Any]]) -> None:
+        """Refuse to ship (and then delete) envelopes from the directory the coordinator writes them to."""
+        if self.envelope_dir is None or not remote or remote.get("host") != socket.gethostname():
+            return
+        if str(self.envelope_dir.resolve()) == remote.get("path"):
+            self.stop()
+            raise RuntimeError(f"worker envelope dir {self.envelope_dir} is the coordinator's inbox; "
+                               f"pass a separate --envelope-dir (default {DEFAULT_WORKER_ENVELOPE_DIR})")
+
+    def _apply_assignment(self, assignment: List[str]) -> None:
+        if assignment != self.assignment:
+            print(f"[Shard] {self.worker_id} now hosts {assignment}")
+        self.assignment = assignment
+        if self.capture and self.acp.is_capture_enabled():
+            new = [a for a in assignment if a not in self._capturing]
+            if new:
+                self.acp.start_capture_for_agents(new)
+                self._capturing.update(new)
+
+    def _execute(self, cmd: Dict[str, Any]) -> None:
+        from src.services.agent_cell_phone import MsgTag  # type: ignore
+
+        ok = False
+        try:
+            tag = MsgTag[str(cmd.get("tag") or "NORMAL")]
+        except KeyError:
+            tag = MsgTag.NORMAL
+        try:
+            self.acp.send(cmd["agent"], cmd.get("content", ""), tag, new_chat=bool(cmd.get("new_chat")))
+            ok = True
+        except Exception as exc:
+            print(f"[Shard] send {cmd.get('command_id')} to {cmd.get('agent')} failed: {exc}")
+        self.stats["sent" if ok else "send_failed"] += 1
+        self._results.append({"id": cmd.get("command_id"), "ok": ok, "sent_at": time.time()})
+
+    def run(self) -> None:
+        while not self._stop.is_set():
+            self.step()
+            self._stop.wait(self.heartbeat_sec)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser("overnight_shard_worker")
+    p.add_argument("--coordinator", required=True, help="coordinator URL, e.g. http://127.0.0.1:8765")
+    p.add_argument("--worker-id", help="stable id for this desktop (default host-pid)")
+    p.add_argument("--layout", default="5-agent")
+    p.add_argument("--agents", help="comma list of agents this desktop can host (default: all in layout)")
+    p.add_argument("--capacity", type=int, help="maximum agents to host")
+    p.add_argument("--sender", default="Agent-3", help="sender agent id label for ACP")
+    p.add_argument("--workspace-root", default=str(get_owner_path()), help="root holding <agent>/state.json")
+    p.add_argument("--envelope-dir", default=DEFAULT_WORKER_ENVELOPE_DIR,
+                   help="local capture inbox shipped to the coordinator (must differ from the coordinator's inbox)")
+    p.add_argument("--heartbeat-sec", type=float, default=2.0)
+    p.add_argument("--capture-enabled", action="store_true", help="start response capture for hosted agents")
+    p.add_argument("--test", action="store_true", help="dry-run; do not move mouse/keyboard")
+    return p.parse_args()
+
+
+def main() -> int:
+    from src.services.agent_cell_phone import AgentCellPhone  # type: ignore
+
+    args = parse_args()
+    acp = AgentCellPhone(agent_id=args.sender, layout_mode=args.layout, test=args.test)
+    hostable = [a.strip() for a in args.agents.split(",") if a.strip()] if args.agents else None
+    worker = ShardWorker(
+        args.coordinator,
+        acp,
+        worker_id=args.worker_id,
+        hostable=hostable,
+        capacity=args.capacity,
+        workspace_root=args.workspace_root,
+        envelope_dir=args.envelope_dir,
+        heartbeat_sec=args.heartbeat_sec,
+        capture=args.capture_enabled,
+    )
+    print(f"Shard worker {worker.worker_id} -> {worker.url} (hostable: {worker.hostable})")
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        pass
+    except RuntimeError as exc:
+        print(f"[Shard] {exc}")
+        return 1
+    finally:
+        worker.stop()
+        if args.capture_enabled and acp.is_capture_enabled():
+            acp.stop_capture()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""Local signal bus between the listener and the runner scheduler.
+
+The runner subscribes on a Unix domain socket (``<signals_root>/bus.sock``) or,
+where AF_UNIX is unavailable, on a localhost TCP port advertised in
+``<signals_root>/bus.port``.  Publishers send one JSON line per signal.  When no
+subscriber is reachable the publisher falls back to the legacy files
+(``resume_now_<agent>.signal`` / ``ui_request_<agent>.json``), which the
+subscriber drains on start-up and on a slow rescan.
+
+Signals with the same ``(kind, agent)`` that arrive before the previous one
+was dispatched are coalesced into a single delivery.  A bus created with a
+``kinds`` filter leaves other kinds on disk for their own consumers (GUIs read
+``ui_request`` files).
+"""
+from __future__ import annotations
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+RESUME_NOW = "resume_now"
+UI_REQUEST = "ui_request"
+
+SOCKET_NAME = "bus.sock"
+PORT_FILE = "bus.port"
+
+
+@dataclass
+class Signal:
+    kind: str
+    agent: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+    signal_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    count: int = 1
+    transport: str = "socket"
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Signal":
+        return cls(
+            kind=str(data.get("kind", "")),
+            agent=str(data.get("agent", "")),
+            payload=data.get("payload") if isinstance(data.get("payload"), dict) else {},
+            created_at=float(data.get("created_at") or time.time()),
+            signal_id=str(data.get("signal_id") or uuid.uuid4().hex[:12]),
+            count=int(data.get("count") or 1),
+            transport=str(data.get("transport") or "socket"),
+        )
+
+
+def _fallback_path(root: Path, sig: Signal) -> Path:
+    if sig.kind == RESUME_NOW:
+        return root / f"resume_now_{sig.agent}.signal"
+    if sig.kind == UI_REQUEST:
+        return root / f"ui_request_{sig.agent}.json"
+    return root / f"{sig.kind}_{sig.agent}.json"
+
+
+def _connect(root: Path, timeout: float) -> Optional[socket.socket]:
+    sock_path = root / SOCKET_NAME
+    if hasattr(socket, "AF_UNIX") and sock_path.exists():
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        s.settimeout(timeout)
+        try:
+            s.connect(str(sock_path))
+            return s
+        except OSError:
+            s.close()
+    port_file = root / PORT_FILE
+    if port_file.exists():
+        try:
+            port = int(port_file.read_text(encoding="utf-8").strip())
+            return socket.create_connection(("127.0.0.1", port), timeout=timeout)
+        except (OSError, ValueError):
+            return None
+    return None
+
+
+def publish_signal(signals_root: str | Path, kind: str, agent: str,
+                   payload: Optional[Dict[str, Any]] = None, timeout: float = 0.5) -> str:
+    """Publish a signal; returns the transport used (``socket`` or ``file``)."""
+    root = Path(signals_root)
+    sig = Signal(kind=kind, agent=agent, payload=dict(payload or {}))
+    try:
+        s = _connect(root, timeout)
+    except Exception:
+        s = None
+    if s is not None:
+        try:
+            with s:
+                s.sendall((sig.to_json() + "\n").encode("utf-8"))
+            return "socket"
+        except OSError:
+            pass
+    try:
+        root.mkdir(parents=True, exist_ok=True)
+        sig.transport = "file"
+        _fallback_path(root, sig).write_text(sig.to_json(), encoding="utf-8")
+    except Exception:
+        pass
+    return "file"
+
+
+class SignalBus:
+    """Subscriber side of the bus; dispatches coalesced signals to a handler."""
+
+    def __init__(self, signals_root: str | Path, handler: Callable[[Signal], None],
+                 kinds: Optional[Iterable[str]] = None, fallback_poll_sec: float = 2.0,
+                 prefer_unix: bool = True) -> None:
+        self.root = Path(signals_root)
+        self.handler = handler
+        self.kinds = set(kinds) if kinds is not None else None
+        self.fallback_poll_sec = max(0.1, float(fallback_poll_sec))
+        self.prefer_unix = prefer_unix
+        self.transport = "file"
+        self._server: Optional[socket.socket] = None
+        self._pending: "OrderedDict[tuple[str, str], Signal]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.stats: Dict[str, int] = {"received": 0, "coalesced": 0, "dispatched": 0, "fallback_files": 0}
+
+    # ------------------------------------------------------------------ lifecycle
+    def start(self) -> "SignalBus":
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._bind()
+        targets = [self._dispatch_loop, self._fallback_loop]
+        if self._server is not None:
+            targets.append(self._accept_loop)
+        for target in targets:
+            t = threading.Thread(target=target, daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._server is not None:
+            try:
+                self._server.close()
+            except OSError:
+                pass
+        for name in (SOCKET_NAME, PORT_FILE):
+            try:
+                if self.transport in ("unix", "tcp"):
+                    (self.root / name).unlink()
+            except OSError:
+                pass
+        for t in self._threads:
+            t.join(timeout=1.0)
+
+    def _bind(self) -> None:
+        sock_path = self.root / SOCKET_NAME
+        if self.prefer_unix and hasattr(socket, "AF_UNIX"):
+            try:
+                if sock_path.exists():
+                    sock_path.unlink()
+                srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                srv.bind(str(sock_path))
+                srv.listen(16)
+                self._server, self.transport = srv, "unix"
+                return
+            except OSError:
+                self._server = None
+        try:
+            srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            srv.bind(("127.0.0.1", 0))
+            srv.listen(16)
+            (self.root / PORT_FILE).write_text(str(srv.getsockname()[1]), encoding="utf-8")
+            self._server, self.transport = srv, "tcp"
+        except OSError:
+            self._server, self.transport = None, "file"
+
+    # ------------------------------------------------------------------ ingest
+    def submit(self, sig: Signal) -> None:
+        """Queue a signal for dispatch, merging it into a pending one of the same key."""
+        if self.kinds is not None and sig.kind not in self.kinds:
+            # Not ours: persist it where file-based consumers look for it
+            try:
+                sig.transport = "file"
+                _fallback_path(self.root, sig).write_text(sig.to_json(), encoding="utf-8")
+            except OSError:
+                pass
+            return
+        key = (sig.kind, sig.agent)
+        with self._cond:
+            self.stats["received"] += 1
+            pending = self._pending.get(key)
+            if pending is not None:
+                self.stats["coalesced"] += 1
+                pending.count += sig.count
+                pending.payload.update(sig.payload)
+                pending.created_at = min(pending.created_at, sig.created_at)
+            else:
+                self._pending[key] = sig
+            self._cond.notify()
+
+    def _accept_loop(self) -> None:
+        assert self._server is not None
+        self._server.settimeout(0.5)
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            try:
+                conn.settimeout(1.0)
+                buf = b""
+                with conn:
+                    while True:
+                        chunk = conn.recv(65536)
+                        if not chunk:
+                            break
+                        buf += chunk
+                for line in buf.splitlines():
+                    if line.strip():
+                        self.submit(Signal.from_dict(json.loads(line.decode("utf-8"))))
+            except Exception:
+                continue
+
+    def scan_fallback(self) -> int:
+        """Drain legacy signal files into the bus; returns number of files consumed."""
+        consumed = 0
+        try:
+            entries = list(os.scandir(self.root))
+        except OSError:
+            return 0
+        for entry in entries:
+            name = entry.name
+            if name.startswith("resume_now_") and name.endswith(".signal"):
+                kind, agent = RESUME_NOW, name[len("resume_now_"):-len(".signal")]
+            elif name.startswith("ui_request_") and name.endswith(".json"):
+                kind, agent = UI_REQUEST, name[len("ui_request_"):-len(".json")]
+            else:
+                continue
+            if self.kinds is not None and kind not in self.kinds:
+                continue
+            path = Path(entry.path)
+            try:
+                raw = path.read_text(encoding="utf-8")
+                mtime = entry.stat().st_mtime
+                path.unlink()
+            except OSError:
+                continue
+            try:
+                data = json.loads(raw)
+            except Exception:
+                data = None
+            if isinstance(data, dict) and data.get("kind"):
+                sig = Signal.from_dict(data)
+            else:
+                # Pre-bus files hold a timestamp string or the bare ui_request payload
+                payload = data if isinstance(data, dict) else {}
+                sig = Signal(kind=kind, agent=agent, payload=payload, created_at=mtime)
+            sig.transport = "file"
+            self.submit(sig)
+            consumed += 1
+        self.stats["fallback_files"] += consumed
+        return consumed
+
+    def _fallback_loop(self) -> None:
+        while not self._stop.is_set():
+            self.scan_fallback()
+            self._stop.wait(self.fallback_poll_sec)
+
+    # ------------------------------------------------------------------ dispatch
+    def dispatch_pending(self) -> int:
+        """Deliver queued signals on the calling thread (for buses driven without ``start()``)."""
+        delivered = 0
+        while True:
+            with self._cond:
+                if not self._pending:
+                    return delivered
+                _, sig = self._pending.popitem(last=False)
+            self._deliver(sig)
+            delivered += 1
+
+    def _deliver(self, sig: Signal) -> None:
+        try:
+            self.handler(sig)
+        except Exception as exc:
+            print(f"[SignalBus] handler failed for {sig.kind}/{sig.agent}: {exc}")
+        with self._cond:
+            self.stats["dispatched"] += 1
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._stop.is_set():
+                    self._cond.wait()
+                if self._stop.is_set():
+                    return
+                _, sig = self._pending.popitem(last=False)
+            self._deliver(sig)
@@ -0,0 +1,585 @@
+#!/usr/bin/env python3
+"""Headless simulation of the overnight pipeline on virtual time.
+
+The real pieces run unchanged on a temporary tree:
+
+    AgentScheduler → AgentCellPhone(test=True) → synthetic agents
+        → response.txt → ResponseCapture → envelope inbox
+        → FSMOrchestrator + fsm_bridge → fsm_update / verify messages
+        → InboxListener + listener handler → state.json / signals → scheduler
+
+Only the humans are simulated: :class:`SyntheticDesktop` decodes the
+``_TestCursor`` record into prompts per agent and :class:`SyntheticAgent`
+answers after a log-normal delay, sometimes with a freeform note, sometimes
+not at all, and occasionally stalls for a long stretch (see
+:class:`SimProfile`).  Time is driven by :class:`SimClock`, which the
+scheduler uses as both its clock and its wait function, so hours of
+overnight traffic run in seconds.
+
+Usage::
+
+    python -m overnight_runner.simulation --agents 4 --hours 8
+"""
+from __future__ import annotations
+
+import argparse
+import builtins
+import contextlib
+import heapq
+import io
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+_THIS = Path(__file__).resolve()
+sys.path.insert(0, str(_THIS.parents[1]))
+sys.path.insert(0, str(_THIS.parents[1] / 'src'))
+
+from src.agent_cell_phone.response_capture import CaptureConfig, ResponseCapture, parse_structured  # type: ignore
+from src.core.fsm_orchestrator import FSMOrchestrator, FSMUpdate  # type: ignore
+from src.core.inbox_listener import InboxListener  # type: ignore
+from src.services.agent_cell_phone import AgentCellPhone, MsgTag  # type: ignore
+from src.utils import atomic_write  # type: ignore
+from overnight_runner import fsm_bridge  # type: ignore
+from overnight_runner.inbox_consumer import to_fsm_event  # type: ignore
+from overnight_runner.listener import create_message_handler  # type: ignore
+from overnight_runner.runner import build_message_plan  # type: ignore
+from overnight_runner.scheduler import STATE_TS_FORMAT, AgentScheduler, AgentStateCache, PacingConfig  # type: ignore
+from overnight_runner.signal_bus import RESUME_NOW, Signal, SignalBus  # type: ignore
+
+
+REF_RX = re.compile(r"ref=(sim-\d+)")
+
+
+@dataclass
+class SimProfile:
+    """Behaviour of the synthetic agents."""
+
+    reply_latency_sec: float = 180.0      # median prompt → response.txt delay
+    reply_latency_sigma: float = 0.6      # log-normal spread
+    p_no_reply: float = 0.05              # prompt silently ignored
+    p_freeform: float = 0.15              # reply without Task/Actions/Commit/Status
+    p_complete: float = 0.35              # structured reply reporting completion
+    p_stall: float = 0.01                 # agent goes quiet for ``stall_sec``
+    stall_sec: float = 3600.0
+
+
+@dataclass
+class SimConfig:
+    agents: int = 4
+    hours: float = 1.0
+    plan: str = "contracts"
+    tick_sec: float = 5.0                 # capture / consumer / listener poll interval
+    seed: int = 7
+    pacing: PacingConfig = field(default_factory=lambda: PacingConfig(jitter_sec=0.0))
+    profile: SimProfile = field(default_factory=SimProfile)
+
+
+class SimClock:
+    """Virtual clock plus event heap; doubles as the scheduler's wait function."""
+
+    def __init__(self, start: float) -> None:
+        self.now = float(start)
+        self._events: List[Tuple[float, int, Callable[[], None]]] = []
+        self._seq = itertools.count()
+
+    def __call__(self) -> float:
+        return self.now
+
+    def call_at(self, when: float, fn: Callable[[], None]) -> None:
+        heapq.heappush(self._events, (max(when, self.now), next(self._seq), fn))
+
+    @property
+    def pending(self) -> int:
+        return len(self._events)
+
+    def wait(self, timeout: float) -> bool:
+        """Fire the next event due within ``timeout`` or jump to the deadline.
+
+        Returning after a single event lets the scheduler re-read its heap,
+        since any event may request an earlier send.
+        """
+        deadline = self.now + max(0.0, timeout)
+        if self._events and self._events[0][0] <= deadline:
+            when, _, fn = heapq.heappop(self._events)
+            self.now = max(self.now, when)
+            fn()
+            return True
+        self.now = deadline
+        return False
+
+    def stamp(self) -> str:
+        return time.strftime(STATE_TS_FORMAT, time.gmtime(self.now))
+
+
+class SyntheticAgent:
+    """Turns prompts into ``response.txt`` writes according to a :class:`SimProfile`."""
+
+    def __init__(self, name: str, response_path: Path, profile: SimProfile,
+                 clock: SimClock, rng: random.Random, stats: Counter) -> None:
+        self.name = name
+        self.response_path = response_path
+        self.profile = profile
+        self.clock = clock
+        self.rng = rng
+        self.stats = stats
+        self.stalled_until = 0.0
+        self.step = 0
+
+    def on_prompt(self, text: str, ref: str) -> None:
+        p = self.profile
+        self.stats["prompts"] += 1
+        now = self.clock.now
+        if now < self.stalled_until:
+            self.stats["ignored_while_stalled"] += 1
+            return
+        if self.rng.random() < p.p_stall:
+            self.stalled_until = now + p.stall_sec
+            self.stats["stalls"] += 1
+            return
+        if self.rng.random() < p.p_no_reply:
+            self.stats["no_reply"] += 1
+            return
+        delay = self.rng.lognormvariate(0.0, p.reply_latency_sigma) * p.reply_latency_sec
+        self.clock.call_at(now + delay, lambda: self._reply(text, ref))
+
+    def _reply(self, prompt: str, ref: str) -> None:
+        p = self.profile
+        self.step += 1
+        first = prompt.strip().splitlines()[-1][:80] if prompt.strip() else ""
+        if self.rng.random() < p.p_freeform:
+            body = f"Still working on it: {first} (ref={ref})"
+        else:
+            status = "completed" if self.rng.random() < p.p_complete else "in progress"
+            body = (
+                f"Task: task-sim-{self.name}-{self.step}\n"
+                "Actions Taken:\n"
+                "- edited module\n"
+                "- ran tests\n"
+                f"Commit Message: sim step {self.step} (ref={ref})\n"
+                f"Status: {status}\n"
+            )
+        try:
+            if self.response_path.exists() and self.response_path.read_text(encoding="utf-8").strip():
+                # The previous reply was not captured yet and is overwritten
+                self.stats["clobbered"] += 1
+        except OSError:
+            pass
+        atomic_write(self.response_path, body)
+        self.stats["replies"] += 1
+
+
+class SyntheticDesktop:
+    """Decodes ``_TestCursor.record`` into complete prompts per agent."""
+
+    _MOVE_RX = re.compile(r"move\((-?\d+),(-?\d+)\)\+click")
+
+    def __init__(self, coords: Dict[str, Dict[str, Any]]) -> None:
+        self._by_point: Dict[Tuple[int, int], str] = {}
+        for agent, boxes in coords.items():
+            for key in ("input_box", "starter_location_box"):
+                box = boxes.get(key)
+                if box:
+                    self._by_point[(int(box["x"]), int(box["y"]))] = agent
+        self._focus: Optional[str] = None
+        self._buffer: List[str] = []
+
+    def drain(self, record: List[str]) -> List[Tuple[str, str]]:
+        """Consume the cursor record; returns ``(agent, text)`` for every Enter press."""
+        prompts: List[Tuple[str, str]] = []
+        for action in record:
+            m = self._MOVE_RX.fullmatch(action)
+            if m:
+                self._focus = self._by_point.get((int(m.group(1)), int(m.group(2))))
+            elif action.startswith("type(") and action.endswith(")"):
+                self._buffer.append(action[5:-1])
+            elif action == "hotkey(ctrl,shift,enter)":
+                self._buffer.append("\n")
+            elif action == "enter":
+                if self._focus is not None:
+                    prompts.append((self._focus, "".join(self._buffer)))
+                self._buffer = []
+        del record[:]
+        return prompts
+
+
+class FsOpCounter:
+    """Counts file-system calls made through ``os``/``open`` while active.
+
+    Only calls from the thread that entered :meth:`active` are counted; the
+    patched functions pass other threads' calls straight through.
+    """
+
+    _OS_FUNCS = ("stat", "scandir", "listdir", "replace", "rename", "unlink", "remove", "mkdir")
+
+    def __init__(self) -> None:
+        self.counts: Counter = Counter()
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    @contextlib.contextmanager
+    def active(self) -> Iterator["FsOpCounter"]:
+        originals: Dict[Tuple[Any, str], Any] = {}
+        owner_thread = threading.get_ident()
+
+        def wrap(owner: Any, name: str, label: str) -> None:
+            fn = getattr(owner, name)
+            originals[(owner, name)] = fn
+
+            def counted(*args: Any, **kwargs: Any) -> Any:
+                if threading.get_ident() == owner_thread:
+                    self.counts[label] += 1
+                return fn(*args, **kwargs)
+
+            setattr(owner, name, counted)
+
+        for name in self._OS_FUNCS:
+            wrap(os, name, name)
+        wrap(io, "open", "open")
+        builtins_open = builtins.open
+        builtins.open = io.open  # type: ignore[assignment]
+        try:
+            yield self
+        finally:
+            builtins.open = builtins_open  # type: ignore[assignment]
+            for (owner, name), fn in originals.items():
+                setattr(owner, name, fn)
+
+
+@contextlib.contextmanager
+def _env(**values: str) -> Iterator[None]:
+    saved = {k: os.environ.get(k) for k in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(q / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[idx]
+
+
+@dataclass
+class SimReport:
+    agents: int
+    sim_seconds: float
+    wall_seconds: float
+    speedup: float
+    sends: int
+    messages: int
+    messages_per_sec: float
+    fs_ops: int
+    fs_ops_per_send: float
+    fs_ops_by_kind: Dict[str, int]
+    cycle_latency_p50: float
+    cycle_latency_p99: float
+    cycles_completed: int
+    tick_cost_ms_p50: float
+    tick_cost_ms_p99: float
+    queue_depth: Dict[str, Dict[str, float]]
+    counters: Dict[str, int]
+    scheduler: Dict[str, Any]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def summary(self) -> str:
+        return (
+            f"{self.agents} agents × {self.sim_seconds / 3600:.1f}h in {self.wall_seconds:.2f}s "
+            f"({self.speedup:,.0f}x) | sends={self.sends} msgs={self.messages} "
+            f"({self.messages_per_sec:,.1f}/s) | fs_ops={self.fs_ops} ({self.fs_ops_per_send:.1f}/send) | "
+            f"cycle p50={self.cycle_latency_p50:.0f}s p99={self.cycle_latency_p99:.0f}s | "
+            f"tick p50={self.tick_cost_ms_p50:.2f}ms p99={self.tick_cost_ms_p99:.2f}ms"
+        )
+
+
+class OvernightSimulation:
+    """Wires the real overnight components to synthetic agents on a temp tree."""
+
+    def __init__(self, config: SimConfig, root: str | Path) -> None:
+        self.config = config
+        self.root = Path(root)
+        self.rng = random.Random(config.seed)
+        self.clock = SimClock(start=float(int(time.time())))
+        self.stats: Counter = Counter()
+        self.agents = [f"Agent-{i}" for i in range(1, config.agents + 1)]
+        self.fsm_agent = f"Agent-{config.agents + 1}"
+        self.workspace = self.root / "workspace"
+        self.fs = FsOpCounter()
+        self._sent_at: Dict[str, float] = {}
+        self._latencies: List[float] = []
+        self._tick_costs: List[float] = []
+        self._depth_samples: Dict[str, List[int]] = {"scheduler": [], "capture_inbox": [], "listener_inbox": [], "in_flight": []}
+        self._ref_seq = itertools.count(1)
+        self._build()
+
+    # ------------------------------------------------------------------ wiring
+    def _build(self) -> None:
+        coords = {
+            agent: {
+                "input_box": {"x": 100 * i, "y": 500},
+                "starter_location_box": {"x": 100 * i, "y": 100},
+            }
+            for i, agent in enumerate(self.agents, start=1)
+        }
+        coords_file = self.root / "cursor_agent_coords.json"
+        coords_file.parent.mkdir(parents=True, exist_ok=True)
+        coords_file.write_text(json.dumps({"sim": coords}), encoding="utf-8")
+        with _env(ACP_HEARTBEAT_SEC="0", ACP_SETTLE_DELAYS="0"):
+            self.acp = AgentCellPhone(agent_id=self.fsm_agent, layout_mode="sim", test=True, coords_file=coords_file)
+        self.desktop = SyntheticDesktop(coords)
+        self.synthetic = {
+            agent: SyntheticAgent(agent, self.workspace / agent / "response.txt", self.config.profile,
+                                  self.clock, random.Random(self.rng.random()), self.stats)
+            for agent in self.agents
+        }
+
+        self.capture_inbox = self.workspace / self.fsm_agent / "capture_inbox"
+        self.capture = ResponseCapture(
+            coords=coords,
+            cfg=CaptureConfig(
+                strategy="file",
+                file_watch_root=str(self.workspace),
+                file_response_name="response.txt",
+                clipboard_poll_ms=500,
+                ocr_tesseract_cmd=None,
+                ocr_lang="eng",
+                ocr_psm=6,
+                inbox_root=str(self.capture_inbox),
+                fsm_enabled=True,
+            ),
+            get_output_rect=lambda agent: None,
+        )
+        fsm_root = self.root / "fsm_data"
+        self.orchestrator = FSMOrchestrator(fsm_root, self.capture_inbox, self.root / "fsm_outbox")
+        self._bridge_paths = {"INBOX_ROOT": self.workspace, "TASKS_DIR": fsm_root / "tasks"}
+
+        self.signals_root = self.root / "signals"
+        self.signals_root.mkdir(parents=True, exist_ok=True)
+        self.listeners: Dict[str, InboxListener] = {}
+        for agent in self.agents + [self.fsm_agent]:
+            inbox = self.workspace / agent / "inbox"
+            inbox.mkdir(parents=True, exist_ok=True)
+            listener = InboxListener(inbox_dir=str(inbox))
+            listener.on_message(self._observe)
+            listener.on_message(create_message_handler(
+                agent,
+                self.workspace / agent / "state.json",
+                self.signals_root,
+                now=self.clock.stamp,
+                verbose=False,
+            ))
+            self.listeners[agent] = listener
+
+        self.state_cache = AgentStateCache(self.workspace)
+        self.scheduler = AgentScheduler(
+            self.agents,
+            build_message_plan(self.config.plan),
+            self.config.pacing,
+            self._send,
+            state_cache=self.state_cache,
+            clock=self.clock,
+            wait=self.clock.wait,
+            rng=random.Random(self.config.seed),
+        )
+        self.scheduler.add_periodic("pipeline", self.config.tick_sec, self._tick,
+                                    first_due=self.clock.now + self.config.tick_sec)
+        self.bus = SignalBus(self.signals_root, self._on_signal, kinds={RESUME_NOW})
+
+    # ------------------------------------------------------------------ outbound
+    def _send(self, agent: str, planned: Any, force_resume: bool, stalled: bool) -> bool:
+        ref = f"sim-{next(self._ref_seq)}"
+        content = planned.template.format(agent=agent) + f" (ref={ref})"
+        use_new_chat = planned.tag == MsgTag.RESUME and force_resume
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.acp.send(agent, content, planned.tag, new_chat=use_new_chat)
+        self._sent_at[ref] = self.clock.now
+        self.stats["sends"] += 1
+        for target, text in self.desktop.drain(self.acp._cursor.record):
+            m = REF_RX.search(text)
+            self.synthetic[target].on_prompt(text, m.group(1) if m else ref)
+        return True
+
+    def _on_signal(self, sig: Signal) -> None:
+        if sig.agent in self.synthetic:
+            self.state_cache.invalidate(sig.agent)
+            self.scheduler.request_resume(sig.agent, requested_at=self.clock.now)
+            self.stats["resume_signals"] += 1
+
+    # ------------------------------------------------------------------ inbound
+    def _tick(self) -> None:
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for agent in self.agents:
+                text = self.capture._pull_file(agent)
+                if text:
+                    self.capture._route(agent, parse_structured(text))
+                    self.stats["captured"] += 1
+            self._sample("capture_inbox", sum(1 for _ in self.capture_inbox.glob("*.json")))
+            self._consume_envelopes()
+            self._sample("listener_inbox", sum(
+                sum(1 for _ in (self.workspace / a / "inbox").glob("*.json")) for a in self.listeners))
+            for listener in self.listeners.values():
+                self.stats["listener_messages"] += listener.poll_once()
+            self.bus.scan_fallback()
+            self.bus.dispatch_pending()
+        self._sample("scheduler", self.scheduler.metrics()["queue_depth"])
+        self._sample("in_flight", self.clock.pending)
+        self._tick_costs.append((time.perf_counter() - started) * 1000.0)
+
+    def _consume_envelopes(self) -> None:
+        """Agent-5 side: envelope → FSMOrchestrator + bridge → fsm_update to the agent inbox."""
+        for f in sorted(self.capture_inbox.glob("*.json")):
+            try:
+                env = json.loads(f.read_text(encoding="utf-8"))
+            except Exception:
+                continue
+            payload = env.get("payload") or {}
+            agent = env.get("agent") or env.get("from") or "unknown"
+            if payload.get("type") == "agent_report":
+                self.orchestrator.process_fsm_update(FSMUpdate(
+                    event="AGENT_REPORT",
+                    agent=agent,
+                    task=payload.get("task"),
+                    actions=payload.get("actions", []),
+                    commit_message=payload.get("commit_message"),
+                    status=payload.get("status"),
+                    raw=payload.get("raw"),
+                    timestamp=env.get("timestamp"),
+                    ts=env.get("ts"),
+                ))
+            else:
+                self.orchestrator.process_fsm_update(FSMUpdate(event="AGENT_FREEFORM", agent=agent, raw=payload.get("raw")))
+            event = to_fsm_event(env)
+            if event.get("type") == "fsm_update":
+                result = fsm_bridge.handle_fsm_update({**event, "captain": self.fsm_agent})
+                self.stats["fsm_updates"] += 1
+                if result.get("ok"):
+                    self.stats["verifies"] += 1
+            atomic_write(self.workspace / agent / "inbox" / f.name, json.dumps(event, ensure_ascii=False))
+            f.unlink()
+
+    def _observe(self, data: Dict[str, Any]) -> None:
+        m = REF_RX.search(str(data.get("raw") or ""))
+        if m and data.get("type") in ("fsm_update", "note"):
+            sent_at = self._sent_at.pop(m.group(1), None)
+            if sent_at is not None:
+                self._latencies.append(self.clock.now - sent_at)
+
+    def _sample(self, name: str, value: int) -> None:
+        self._depth_samples[name].append(int(value))
+
+    # ------------------------------------------------------------------ run
+    def run(self) -> SimReport:
+        saved = {k: getattr(fsm_bridge, k) for k in self._bridge_paths}
+        for k, v in self._bridge_paths.items():
+            setattr(fsm_bridge, k, v)
+        start_sim = self.clock.now
+        previous_disable = logging.root.manager.disable
+        logging.disable(logging.INFO)
+        started = time.perf_counter()
+        try:
+            with self.fs.active():
+                self.scheduler.run(until=start_sim + self.config.hours * 3600.0)
+        finally:
+            wall = time.perf_counter() - started
+            self.acp.stop()
+            logging.disable(previous_disable)
+            for k, v in saved.items():
+                setattr(fsm_bridge, k, v)
+        return self._report(self.clock.now - start_sim, wall)
+
+    def _report(self, sim_seconds: float, wall: float) -> SimReport:
+        sched = self.scheduler.metrics()
+        sends = self.stats["sends"]
+        messages = sends + self.stats["captured"] + self.stats["listener_messages"]
+        wall = max(wall, 1e-9)
+        return SimReport(
+            agents=len(self.agents),
+            sim_seconds=sim_seconds,
+            wall_seconds=wall,
+            speedup=sim_seconds / wall,
+            sends=sends,
+            messages=messages,
+            messages_per_sec=messages / wall,
+            fs_ops=self.fs.total,
+            fs_ops_per_send=self.fs.total / sends if sends else 0.0,
+            fs_ops_by_kind=dict(self.fs.counts),
+            cycle_latency_p50=_percentile(self._latencies, 50),
+            cycle_latency_p99=_percentile(self._latencies, 99),
+            cycles_completed=len(self._latencies),
+            tick_cost_ms_p50=_percentile(self._tick_costs, 50),
+            tick_cost_ms_p99=_percentile(self._tick_costs, 99),
+            queue_depth={
+                name: {"max": max(vals) if vals else 0, "avg": (sum(vals) / len(vals)) if vals else 0.0}
+                for name, vals in self._depth_samples.items()
+            },
+            counters=dict(self.stats),
+            scheduler={k: sched[k] for k in ("sends", "send_failures", "deferrals", "skips", "lag_max", "resume_latency")},
+        )
+
+
+def run_simulation(config: SimConfig, root: str | Path | None = None) -> SimReport:
+    """Run one simulation, in a throwaway directory unless ``root`` is given."""
+    if root is not None:
+        return OvernightSimulation(config, root).run()
+    with tempfile.TemporaryDirectory(prefix="overnight_sim_") as tmp:
+        return OvernightSimulation(config, tmp).run()
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser("overnight_simulation")
+    p.add_argument("--agents", type=int, default=4)
+    p.add_argument("--hours", type=float, default=8.0)
+    p.add_argument("--plan", default="contracts")
+    p.add_argument("--interval-sec", type=float, default=600.0)
+    p.add_argument("--tick-sec", type=float, default=5.0, help="capture/consumer/listener poll interval (simulated)")
+    p.add_argument("--reply-latency-sec", type=float, default=180.0, help="median agent reply delay (simulated)")
+    p.add_argument("--p-no-reply", type=float, default=0.05)
+    p.add_argument("--p-stall", type=float, default=0.01)
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--root", help="keep the simulated tree here instead of a temp dir")
+    p.add_argument("--json", action="store_true", help="print the full report as JSON")
+    return p.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    config = SimConfig(
+        agents=args.agents,
+        hours=args.hours,
+        plan=args.plan,
+        tick_sec=args.tick_sec,
+        seed=args.seed,
+        pacing=PacingConfig(interval_sec=args.interval_sec, jitter_sec=0.0),
+        profile=SimProfile(reply_latency_sec=args.reply_latency_sec, p_no_reply=args.p_no_reply, p_stall=args.p_stall),
+    )
+    report = run_simulation(config, args.root)
+    print(json.dumps(report.to_dict(), indent=2) if args.json else report.summary())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
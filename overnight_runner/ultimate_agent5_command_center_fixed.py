@@ -53,6 +53,15 @@ except ImportError:
     def get_repos_root(): return "D:/repos"
     def get_owner_path(): return "D:/repos/Dadudekc"
     def get_communications_root(): return "D:/repos/communications"
+try:
+    from resource_profiler import open_store as open_resource_store
+except ImportError:
+    open_resource_store = None
+try:
+    from metrics_store import open_store as open_metrics_store
+except ImportError:
+    open_metrics_store = None
+AGENT5_METRICS_DB = Path(__file__).resolve().parents[1] / "runtime" / "agent_monitors" / "agent5" / "metrics.sqlite"
 
 # Import our enhanced systems
 sys.path.insert(0, str(Path(__file__).resolve().parent))
@@ -251,7 +260,11 @@ class UltimateAgent5CommandCenter(QMainWindow):
             ("Active Agents", "0"),
             ("Queue Depth", "0"),
             ("System Uptime", "00:00:00"),
-            ("Last Activity", "Never")
+            ("Last Activity", "Never"),
+            ("Fleet CPU", "N/A"),
+            ("Fleet Memory", "N/A"),
+            ("Busiest Process", "N/A"),
+            ("Stalled (1h avg)", "N/A")
         ]
         
         for i, (label, value) in enumerate(status_items):
@@ -607,6 +620,44 @@ class UltimateAgent5CommandCenter(QMainWindow):
                 self.system_status["Memory Usage"].setText("N/A")
         except Exception as e:
             print(f"Error updating system status: {e}")
+        self.update_fleet_resources()
+        self.update_stall_history()
+    
+    def update_fleet_resources(self):
+        # Per-process figures from the resource profiler (scripts/profile_fleet.py)
+        if open_resource_store is None or "Fleet CPU" not in self.system_status:
+            return
+        try:
+            if not hasattr(self, "_resource_store"):
+                self._resource_store = open_resource_store()
+            series = self._resource_store.summary(60)
+            if not series:
+                return
+            cpu = sum(s["cpu_avg"] for s in series.values())
+            rss_mb = sum(s["rss_last"] for s in series.values()) / (1024 * 1024)
+            busiest = max(series, key=lambda name: series[name]["cpu_avg"])
+            self.system_status["Fleet CPU"].setText(f"{cpu:.0f}%")
+            self.system_status["Fleet Memory"].setText(f"{rss_mb:.0f} MB")
+            self.system_status["Busiest Process"].setText(f"{busiest} ({series[busiest]['cpu_avg']:.0f}%)")
+        except Exception as e:
+            print(f"Error updating fleet resources: {e}")
+    
+    def update_stall_history(self):
+        # Hourly stall level from the Agent-5 monitor's metrics store
+        if open_metrics_store is None or "Stalled (1h avg)" not in self.system_status:
+            return
+        try:
+            if getattr(self, "_metrics_store", None) is None:
+                self._metrics_store = open_metrics_store(AGENT5_METRICS_DB)
+                if self._metrics_store is None:
+                    return
+            points = self._metrics_store.query("agents_stalled", since=time.time() - 3600, resolution=60)
+            if points:
+                avg = sum(p.value * p.n for p in points) / sum(p.n for p in points)
+                peak = max(p.hi for p in points)
+                self.system_status["Stalled (1h avg)"].setText(f"{avg:.1f} (peak {peak:.0f})")
+        except Exception as e:
+            print(f"Error updating stall history: {e}")
     
     def update_queue_status(self):
         # Update queue status displays
@@ -1,18 +1,43 @@
 #!/usr/bin/env python3
-import os, json, sys, pathlib, requests  # pip install requests
+import os, json, sys, time, pathlib, requests  # pip install requests
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from src.core.metrics_store import FLEET, open_store  # type: ignore
 REPORTS_DIR = pathlib.Path("runtime/overnight")
+METRICS_DB = pathlib.Path(os.getenv("AGENT_METRICS_DB", "runtime/agent_monitors/agent5/metrics.sqlite"))
 def find_latest():
     dirs = sorted([p for p in REPORTS_DIR.glob("overnight_*") if p.is_dir()], reverse=True)
     return dirs[0] if dirs else None
 
+def stall_summary(hours: float = 12.0) -> str:
+    """Per-agent stall figures for the last `hours` from the Agent-5 metrics store."""
+    store = open_store(METRICS_DB)
+    if store is None:
+        return ""
+    try:
+        data = store.summary(time.time() - hours * 3600)
+    finally:
+        store.close()
+    lines = [f"\n**Agent-5 monitor, last {hours:g}h**"]
+    for agent in sorted(a for a in data if a != FLEET):
+        m = data[agent]
+        stalled = m.get("stalled", {}).get("mean", 0.0) * 100
+        max_age = m.get("age_sec", {}).get("max", 0.0) / 60
+        lines.append(f"- {agent}: stalled {stalled:.0f}% of the time, longest silence {max_age:.0f} min")
+    fleet = data.get(FLEET, {})
+    rescues = fleet.get("rescues_sent", {})
+    if rescues:
+        lines.append(f"- rescues sent: {rescues['mean'] * rescues['samples']:.0f}")
+    return "\n".join(lines) if len(lines) > 1 else ""
+
 def main():
     dest = os.getenv("DISCORD_WEBHOOK_URL") or os.getenv("SLACK_WEBHOOK_URL")
-    if not dest: 
+    if not dest:
         print("No webhook set; skip post."); return
     latest = find_latest()
-    if not latest: 
+    if not latest:
         print("No reports."); return
     md = (latest/"digest.md").read_text()
+    md += stall_summary(float(os.getenv("DIGEST_HOURS", "12")))
     if "discord" in dest:
         requests.post(dest, json={"content": md[:1900]})
     else:  # slack
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fleet resource profiler:
+- run: sample CPU/RSS/fds/threads/IO for runner, listener, monitor, GUIs, watchers,
+  term_watch terminals and Cursor process trees into a ring-buffer series file
+- show: print per-series averages/peaks from that file
+
+Requires: psutil (for run)
+"""
+
+from __future__ import annotations
+import argparse, sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.core.resource_profiler import (  # type: ignore
+    DEFAULT_CAPACITY, ResourceProfiler, ResourceSeriesStore, default_store_path, open_store,
+)
+
+def run(args: argparse.Namespace) -> int:
+    store = ResourceSeriesStore(args.store, capacity=int(args.capacity))
+    profiler = ResourceProfiler(store, interval_sec=float(args.interval), term_root=args.term_root,
+                                include_cursor=not args.no_cursor)
+    print(f"profiling every {profiler.interval_sec:g}s -> {store.path}")
+    try:
+        if args.once:
+            for s in profiler.sample_once():
+                print(f"{s.series:<24} procs={s.nprocs:<3} cpu={s.cpu:6.1f}% rss={s.rss / 2**20:8.1f}MB")
+        else:
+            profiler.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        profiler.stop()
+    return 0
+
+def show(args: argparse.Namespace) -> int:
+    store = open_store(args.store)
+    summary = store.summary(float(args.window))
+    if not summary:
+        print(f"no samples in the last {args.window}s ({store.path})")
+        return 1
+    print(f"{'series':<24} {'procs':>5} {'cpu avg':>8} {'cpu max':>8} {'rss MB':>8} {'fds':>5} {'thr':>5} {'io KB/s':>8}")
+    for name, s in sorted(summary.items(), key=lambda kv: -kv[1]["cpu_avg"]):
+        io = (s["read_bps"] + s["write_bps"]) / 1024
+        print(f"{name:<24} {s['nprocs']:>5} {s['cpu_avg']:>7.1f}% {s['cpu_max']:>7.1f}% "
+              f"{s['rss_last'] / 2**20:>8.1f} {s['fds']:>5} {s['threads']:>5} {io:>8.1f}")
+    return 0
+
+def main():
+    p = argparse.ArgumentParser(prog="profile_fleet")
+    p.add_argument("--store", default=str(default_store_path()), help="Series file (env ACP_RESOURCE_STORE)")
+    sub = p.add_subparsers(dest="sub")
+
+    p_run = sub.add_parser("run", help="Sample fleet processes until interrupted")
+    p_run.add_argument("--interval", default=5.0, help="Seconds between samples")
+    p_run.add_argument("--capacity", default=DEFAULT_CAPACITY, help="Samples kept in the ring (new files only)")
+    p_run.add_argument("--term-root", default=None, help="term_watch root (default runtime/agent_comms)")
+    p_run.add_argument("--no-cursor", action="store_true", help="Skip Cursor process trees")
+    p_run.add_argument("--once", action="store_true", help="Take one sample, print it and exit")
+    p_run.set_defaults(func=run)
+
+    p_show = sub.add_parser("show", help="Summarize recent samples")
+    p_show.add_argument("--window", default=300, help="Seconds to summarize")
+    p_show.set_defaults(func=show)
+
+    args = p.parse_args()
+    if not args.sub:
+        p.print_help()
+        return 2
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
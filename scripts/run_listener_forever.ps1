@@ -1,3 +1,4 @@
+# Windows restart loop. On Linux use: python scripts/supervise.py run (services in config/services.yaml)
 Param(
     [string]$Agent = 'Agent-5'
 )
@@ -1,3 +1,4 @@
+# Windows restart loop. On Linux use: python scripts/supervise.py run (services in config/services.yaml)
 Param(
     [string]$Agents = 'Agent-1,Agent-2,Agent-3,Agent-4',
     [string]$Layout = '5-agent',
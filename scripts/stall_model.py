@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stall prediction model (offline):
+- train: fit a logistic model on the Agent-5 metrics history and save it for the monitor
+- eval: report precision/recall and early-warning lead time of a saved model on recorded runs
+"""
+
+from __future__ import annotations
+import argparse, json, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.core.metrics_store import HOUR, MINUTE, RAW, open_store  # type: ignore
+from src.core.stall_predictor import StallModel, build_dataset, evaluate  # type: ignore
+
+RESOLUTIONS = {"raw": RAW, "1m": MINUTE, "1h": HOUR}
+
+def _dataset(args: argparse.Namespace, horizon_sec: float):
+    store = open_store(args.db)
+    if store is None:
+        print(f"no metrics store at {args.db}")
+        return None
+    until = time.time()
+    try:
+        return build_dataset(store, until - float(args.days) * 86400, until, horizon_sec,
+                             resolution=RESOLUTIONS[args.resolution])
+    finally:
+        store.close()
+
+def _print_report(name: str, r: dict) -> None:
+    print(f"{name}: {r['samples']} samples, {r['positives']} pre-stall, {r['onsets']} stall onsets")
+    print(f"  threshold={r['threshold']:.2f} precision={r['precision']:.2f} recall={r['recall']:.2f} f1={r['f1']:.2f}")
+    print(f"  onsets flagged early: {r['onsets_flagged']}/{r['onsets']} (mean lead {r['mean_lead_sec'] / 60:.1f} min)")
+
+def train(args: argparse.Namespace) -> int:
+    ds = _dataset(args, float(args.horizon))
+    if ds is None:
+        return 1
+    if not ds.ts:
+        print("no samples in the selected window")
+        return 1
+    # hold out the most recent runs so the report reflects unseen nights
+    cut = sorted(ds.ts)[int(len(ds.ts) * (1 - float(args.holdout)))]
+    train_ds, test_ds = ds.split(cut)
+    try:
+        model = StallModel(horizon_sec=float(args.horizon)).fit(train_ds.X, train_ds.y, epochs=int(args.epochs))
+    except ValueError as e:
+        print(f"cannot train: {e}")
+        return 1
+    model.tune_threshold(train_ds, float(args.min_precision))
+    model.report = evaluate(model, test_ds)
+    _print_report("train", evaluate(model, train_ds))
+    _print_report("holdout", model.report)
+    model.save(args.model)
+    print(f"saved {args.model}")
+    return 0
+
+def eval_(args: argparse.Namespace) -> int:
+    model = StallModel.load(args.model)
+    ds = _dataset(args, model.horizon_sec)
+    if ds is None:
+        return 1
+    r = evaluate(model, ds, float(args.threshold) if args.threshold else None)
+    if args.json:
+        print(json.dumps(r, indent=2))
+    else:
+        _print_report("eval", r)
+    return 0
+
+def main():
+    p = argparse.ArgumentParser(prog="stall_model")
+    p.add_argument("--db", default="runtime/agent_monitors/agent5/metrics.sqlite", help="Agent-5 metrics store")
+    p.add_argument("--model", default="runtime/agent_monitors/agent5/stall_model.json", help="Model file")
+    p.add_argument("--days", default=30, help="History window to use")
+    p.add_argument("--resolution", choices=sorted(RESOLUTIONS), default="1m", help="Store resolution to replay")
+    sub = p.add_subparsers(dest="sub")
+
+    p_train = sub.add_parser("train", help="Fit and save a model")
+    p_train.add_argument("--horizon", default=600, help="Predict stalls this many seconds ahead")
+    p_train.add_argument("--holdout", default=0.25, help="Fraction of the newest samples kept for evaluation")
+    p_train.add_argument("--min-precision", default=0.5, help="Pick the lowest threshold with this precision")
+    p_train.add_argument("--epochs", default=300)
+    p_train.set_defaults(func=train)
+
+    p_eval = sub.add_parser("eval", help="Evaluate a saved model on recorded runs")
+    p_eval.add_argument("--threshold", default="", help="Override the model threshold")
+    p_eval.add_argument("--json", action="store_true")
+    p_eval.set_defaults(func=eval_)
+
+    args = p.parse_args()
+    if not args.sub:
+        p.print_help()
+        return 2
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
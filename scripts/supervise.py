@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Service supervisor (replaces run_listener_forever.ps1 / run_runner_forever.ps1 on Linux):
+- run: start the services in config/services.yaml, probe them and restart with backoff
+- status: print restart counts, uptime and probe results from the status file
+"""
+
+from __future__ import annotations
+import argparse, json, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.core.process_supervisor import DEFAULT_STATUS_PATH, ProcessSupervisor, load_services  # type: ignore
+
+def run(args: argparse.Namespace) -> int:
+    services = load_services(args.services)
+    if args.only:
+        wanted = {n.strip() for n in args.only.split(",") if n.strip()}
+        services = [s for s in services if s.name in wanted]
+    if not services:
+        print("no services to run")
+        return 2
+    sup = ProcessSupervisor(services, status_path=args.status_file, tick_sec=float(args.tick))
+    if args.http_port:
+        sup.serve_status(args.http_host, int(args.http_port))
+        print(f"status at http://{args.http_host}:{args.http_port}/status")
+    print(f"supervising {', '.join(s.name for s in services)}")
+    sup.run()
+    return 0
+
+def status(args: argparse.Namespace) -> int:
+    path = Path(args.status_file)
+    if not path.exists():
+        print(f"no status file at {path}")
+        return 1
+    data = json.loads(path.read_text(encoding="utf-8"))
+    age = time.time() - data.get("ts", 0)
+    print(f"supervisor pid={data.get('pid')} uptime={data.get('uptime_sec', 0):.0f}s (status {age:.0f}s old)")
+    print(f"{'service':<20} {'state':<10} {'pid':>7} {'restarts':>8} {'uptime':>8}  last exit")
+    for name, s in data.get("services", {}).items():
+        last = f"{s.get('last_reason') or '-'} ({s.get('last_exit_code')})" if s.get("last_exit_at") else "-"
+        print(f"{name:<20} {s['state']:<10} {s.get('pid') or '-':>7} {s['restarts']:>8} {s['uptime_sec']:>7.0f}s  {last}")
+        for probe, p in s.get("probes", {}).items():
+            print(f"    {probe:<20} ok={p.get('ok')} age={p.get('age_sec')} failures={p.get('failures')}")
+    return 0
+
+def main():
+    p = argparse.ArgumentParser(prog="supervise")
+    p.add_argument("--status-file", default=str(DEFAULT_STATUS_PATH), help="JSON status written by the supervisor")
+    sub = p.add_subparsers(dest="sub")
+
+    p_run = sub.add_parser("run", help="Start and supervise services")
+    p_run.add_argument("--services", default="config/services.yaml", help="Service list (YAML or JSON)")
+    p_run.add_argument("--only", default="", help="Comma-separated service names to run")
+    p_run.add_argument("--tick", default=0.5, help="Seconds between supervision passes")
+    p_run.add_argument("--http-host", default="127.0.0.1")
+    p_run.add_argument("--http-port", default=0, help="Serve GET /status on this port (0 = off)")
+    p_run.set_defaults(func=run)
+
+    p_status = sub.add_parser("status", help="Show service status")
+    p_status.set_defaults(func=status)
+
+    args = p.parse_args()
+    if not args.sub:
+        p.print_help()
+        return 2
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,14 +2,15 @@
 # -*- coding: utf-8 -*-
 """
 Terminal Watch:
-- wrap: run a command, tee output to terminal + log, maintain heartbeat/state JSON
+- wrap: run a command, tee output to terminal + rotating log, maintain heartbeat/state JSON
+- supervise: run N agent terminals from one process (selectors on POSIX)
 - watch: scan all agent term_state.json files, detect exited/dead/stalled, emit escalation events
 
 Cross-platform (Windows/macOS/Linux). Requires: psutil
 """
 
 from __future__ import annotations
-import argparse, json, os, sys, time, threading, queue, shlex, subprocess, traceback
+import argparse, json, os, sys, time, traceback
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional, List, Dict, Any
@@ -19,6 +20,14 @@ except ImportError:
     print("Missing dependency: psutil. Install with `pip install psutil`.", file=sys.stderr)
     sys.exit(1)
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.core.term_stream import TermSupervisor  # type: ignore
+from src.core.resource_profiler import ProcessTreeSampler  # type: ignore
+try:
+    from src.core.activity_timeline import ActivityTimeline, ActivityWatcher  # type: ignore
+except ImportError:
+    ActivityWatcher = None  # type: ignore
+
 ISO = "%Y-%m-%dT%H:%M:%S.%fZ"
 
 def utcnow_str() -> str:
@@ -35,158 +44,57 @@ def append_ndjson(path: Path, obj: Dict[str, Any]) -> None:
     with path.open("a", encoding="utf-8") as f:
         f.write(json.dumps(obj, ensure_ascii=False) + "\n")
 
-def aggregate_cpu_percent(proc: psutil.Process) -> float:
-    """Sum cpu% of proc + descendants. psutil.cpu_percent needs two calls to warm up."""
-    total = proc.cpu_percent(interval=None)
-    for c in proc.children(recursive=True):
-        try:
-            total += c.cpu_percent(interval=None)
-        except Exception:
-            pass
-    return total
-
 def safe_proc(pid: int) -> Optional[psutil.Process]:
     try:
         return psutil.Process(pid)
     except Exception:
         return None
 
-def platform_shell_command(cmd: str) -> List[str]:
-    if os.name == "nt":
-        # Use cmd.exe for broad compatibility
-        return ["cmd", "/c", cmd]
-    else:
-        # POSIX
-        return ["bash", "-lc", cmd]
-
-def wrap(args: argparse.Namespace) -> int:
-    agent_id = str(args.agent_id)
-    root = Path(args.root)
-    agent_root = root / f"agent-{agent_id}"
-    log_file = agent_root / "term.log"
-    state_file = agent_root / "term_state.json"
-    events = root / "events.ndjson"
-
-    cmd = args.cmd
-    cwd = Path(args.cwd) if args.cwd else Path.cwd()
-
-    # Boot state
-    state: Dict[str, Any] = {
-        "agent_id": agent_id,
-        "cmd": cmd,
-        "cwd": str(cwd),
-        "started_at": utcnow_str(),
-        "last_output_at": None,
-        "last_heartbeat_at": utcnow_str(),
-        "pid": None,
-        "ppid": os.getpid(),
-        "exit_code": None,
-        "status": "starting",
-        "bytes_out": 0,
-        "bytes_err": 0,
-        "cpu_percent": 0.0,
-        "host": os.uname().sysname if hasattr(os, "uname") else "Windows",
-        "version": "term_watch/1.0",
-    }
-    write_json(state_file, state)
-
-    # Launch
-    proc = subprocess.Popen(
-        platform_shell_command(cmd),
-        cwd=str(cwd),
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        bufsize=1,
-        universal_newlines=True,
-        text=True,
+_tree_sampler: Optional[ProcessTreeSampler] = None
+
+def cpu_sampler(pid: int) -> float:
+    """cpu% of pid + descendants, shared with the fleet resource profiler."""
+    global _tree_sampler
+    if _tree_sampler is None:
+        _tree_sampler = ProcessTreeSampler()
+    return _tree_sampler.cpu_percent(pid)
+
+def make_supervisor(args: argparse.Namespace) -> TermSupervisor:
+    return TermSupervisor(
+        args.root,
+        state_interval=float(args.state_interval),
+        heartbeat_secs=float(args.heartbeat_secs),
+        cpu_sampler=cpu_sampler,
     )
-    state["pid"] = proc.pid
-    state["status"] = "running"
-    write_json(state_file, state)
-
-    # Warm up cpu metrics
-    p = safe_proc(proc.pid)
-    if p:
-        p.cpu_percent(interval=None)
-        for c in p.children(recursive=True):
-            try: c.cpu_percent(interval=None)
-            except Exception: pass
-
-    out_q: "queue.Queue[tuple[str,str]]" = queue.Queue()
-
-    def pump(stream, tag: str):
-        nonlocal state
-        with log_file.open("a", encoding="utf-8") as lf:
-            for line in stream:
-                ts = utcnow_str()
-                line2 = line.rstrip("\n")
-                # Mirror to console
-                print(line2, flush=True) if tag == "stdout" else print(line2, file=sys.stderr, flush=True)
-                # Log with timestamp + tag
-                lf.write(f"[{ts}] [{tag}] {line2}\n")
-                if tag == "stdout":
-                    state["bytes_out"] += len(line2) + 1
-                else:
-                    state["bytes_err"] += len(line2) + 1
-                state["last_output_at"] = ts
-                state["last_heartbeat_at"] = ts
-                write_json(state_file, state)
-        out_q.put(("eof", tag))
-
-    t_out = threading.Thread(target=pump, args=(proc.stdout, "stdout"), daemon=True)
-    t_err = threading.Thread(target=pump, args=(proc.stderr, "stderr"), daemon=True)
-    t_out.start(); t_err.start()
-
-    idle_beat = max(1.0, float(args.heartbeat_secs))
-    try:
-        while True:
-            if p:
-                try:
-                    cpu = aggregate_cpu_percent(p)
-                except Exception:
-                    cpu = 0.0
-            else:
-                cpu = 0.0
-
-            state["cpu_percent"] = round(cpu, 2)
-            state["last_heartbeat_at"] = utcnow_str()
-            write_json(state_file, state)
 
-            if proc.poll() is not None:
-                # Process exited
-                state["exit_code"] = proc.returncode
-                state["status"] = "exited"
-                state["last_heartbeat_at"] = utcnow_str()
-                write_json(state_file, state)
-                append_ndjson(events, {
-                    "ts": utcnow_str(),
-                    "agent_id": agent_id,
-                    "kind": "terminal_exit",
-                    "exit_code": proc.returncode,
-                    "cmd": cmd,
-                    "state_file": str(state_file),
-                })
-                break
-
-            try:
-                item = out_q.get(timeout=idle_beat)
-                if item[0] == "eof":
-                    # Streams closed; wait for poll in next loop
-                    pass
-            except queue.Empty:
-                pass
-            time.sleep(idle_beat)
-    except KeyboardInterrupt:
-        try:
-            proc.terminate()
-        except Exception:
-            pass
-        state["status"] = "terminated"
-        state["exit_code"] = proc.returncode
-        write_json(state_file, state)
-    return proc.returncode if proc and proc.returncode is not None else 0
+def channel_options(args: argparse.Namespace) -> Dict[str, Any]:
+    return {"log_max_bytes": int(float(args.log_max_mb) * 1024 * 1024), "log_backups": int(args.log_backups)}
 
-def classify_status(state: Dict[str, Any], idle_secs: float, cpu_threshold: float) -> str:
+def wrap(args: argparse.Namespace) -> int:
+    sup = make_supervisor(args)
+    ch = sup.add(str(args.agent_id), args.cmd, cwd=args.cwd, echo=not args.quiet, **channel_options(args))
+    codes = sup.run()
+    code = codes.get(ch.agent_id)
+    return code if code is not None else 0
+
+def supervise(args: argparse.Namespace) -> int:
+    """One process, N terminals: --term 1="npm run dev" --term 2="pytest -x" ..."""
+    sup = make_supervisor(args)
+    for spec in args.term:
+        agent_id, sep, cmd = spec.partition("=")
+        if not sep or not cmd:
+            print(f"--term expects AGENT_ID=COMMAND, got {spec!r}", file=sys.stderr)
+            return 2
+        sup.add(agent_id.strip(), cmd, cwd=args.cwd, echo=args.echo, **channel_options(args))
+    codes = sup.run()
+    for agent_id, code in codes.items():
+        print(f"agent-{agent_id}: exit {code}")
+    # First failure wins; signal deaths are negative and must not read as success
+    return next((c for c in codes.values() if c), 0)
+
+def classify_status(state: Dict[str, Any], idle_secs: float, cpu_threshold: float,
+                    last_activity: Optional[float] = None) -> str:
+    """last_activity: epoch of the agent's newest timeline event (reply/state/commit/output), if tracked."""
     now = datetime.utcnow()
     hb = state.get("last_heartbeat_at")
     lo = state.get("last_output_at")
@@ -214,12 +122,31 @@ def classify_status(state: Dict[str, Any], idle_secs: float, cpu_threshold: floa
     if not pid_ok and hb_age > (2 * idle_secs):
         return "dead"
 
+    # A quiet terminal is not stalled while the agent is replying or committing elsewhere
+    recently_active = last_activity is not None and (time.time() - last_activity) <= idle_secs
+
     # Soft stall: process alive, no output for idle window, and low CPU
-    if pid_ok and lo_age > idle_secs and cpu < cpu_threshold:
+    if pid_ok and lo_age > idle_secs and cpu < cpu_threshold and not recently_active:
         return "stalled"
 
     return "running"
 
+_watchers: Dict[str, Any] = {}
+
+def activity_watcher(args: argparse.Namespace):
+    """Timeline watcher over term_state + agent workspaces, kept across watch loop passes."""
+    ws = getattr(args, "workspace_root", None)
+    if ActivityWatcher is None or not ws:
+        return None
+    key = f"{args.root}|{ws}"
+    if key not in _watchers:
+        _watchers[key] = ActivityWatcher(ActivityTimeline(), workspace_root=ws, term_root=args.root)
+    return _watchers[key]
+
+def timeline_agent(agent_id: Any) -> str:
+    aid = str(agent_id)
+    return f"Agent-{aid}" if aid.isdigit() else aid
+
 def watch_once(args: argparse.Namespace) -> int:
     root = Path(args.root)
     idle_secs = float(args.idle_secs)
@@ -235,7 +162,13 @@ def watch_once(args: argparse.Namespace) -> int:
         except Exception:
             continue
         prev = state.get("status")
-        curr = classify_status(state, idle_secs=idle_secs, cpu_threshold=cpu_threshold)
+        last_activity = None
+        watcher = activity_watcher(args)
+        if watcher is not None:
+            agent = timeline_agent(state.get("agent_id"))
+            watcher.poll([agent])
+            last_activity = watcher.timeline.last_activity(agent)
+        curr = classify_status(state, idle_secs=idle_secs, cpu_threshold=cpu_threshold, last_activity=last_activity)
 
         # Persist normalized status if changed
         if prev != curr:
@@ -281,14 +214,28 @@ def main():
     p_wrap.add_argument("--cmd", required=True, help="Command to run inside the terminal")
     p_wrap.add_argument("--cwd", default=None, help="Working directory")
     p_wrap.add_argument("--root", default="runtime/agent_comms", help="Root for agent comms")
-    p_wrap.add_argument("--heartbeat-secs", default=1.0, help="Heartbeat frequency")
+    p_wrap.add_argument("--quiet", action="store_true", help="Do not mirror output to this console")
     p_wrap.set_defaults(func=wrap)
 
+    p_sup = sub.add_parser("supervise", help="Run several agent terminals from one supervisor process")
+    p_sup.add_argument("--term", action="append", required=True, help="AGENT_ID=COMMAND (repeatable)")
+    p_sup.add_argument("--cwd", default=None, help="Working directory")
+    p_sup.add_argument("--root", default="runtime/agent_comms", help="Root for agent comms")
+    p_sup.add_argument("--echo", action="store_true", help="Mirror all output to this console")
+    p_sup.set_defaults(func=supervise)
+
+    for sp in (p_wrap, p_sup):
+        sp.add_argument("--heartbeat-secs", default=1.0, help="Heartbeat/CPU sampling frequency")
+        sp.add_argument("--state-interval", default=1.0, help="Minimum seconds between term_state.json writes")
+        sp.add_argument("--log-max-mb", default=10, help="Rotate term.log past this size")
+        sp.add_argument("--log-backups", default=3, help="Rotated term.log files to keep")
+
     p_watch = sub.add_parser("watch", help="Scan states and detect stalls/stops")
     p_watch.add_argument("--root", default="runtime/agent_comms", help="Root for agent comms")
     p_watch.add_argument("--idle-secs", default=45, help="Soft stall threshold in seconds")
     p_watch.add_argument("--cpu-threshold", default=1.0, help="CPU% below which we consider idle")
     p_watch.add_argument("--interval", default=10, help="Loop interval (secs)")
+    p_watch.add_argument("--workspace-root", default=None, help="Agent workspaces; replies/state writes there keep a quiet terminal from counting as stalled")
     p_watch.add_argument("--loop", action="store_true", help="Run continuously")
     def _watch_entry(a):
         return watch_loop(a) if a.loop else watch_once(a)
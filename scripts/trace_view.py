@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Trace viewer for the spans written with ACP_TRACE=1:
+- tasks: list traced task_ids with span count, services and end-to-end time
+- show: render one task as a timeline (send -> capture -> listener -> FSM -> verify)
+"""
+
+from __future__ import annotations
+import argparse, json, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.core.tracing import DEFAULT_TRACE_DIR, read_spans, render_timeline, spans_for_task  # type: ignore
+
+def tasks(args: argparse.Namespace) -> int:
+    spans = read_spans(args.dir)
+    by_task: dict = {}
+    for s in spans:
+        if s.get("task_id"):
+            by_task.setdefault(s["task_id"], []).append(s)
+    if not by_task:
+        print(f"no traced tasks in {args.dir}")
+        return 1
+    rows = []
+    for task_id in by_task:
+        ts = spans_for_task(spans, task_id)
+        start = ts[0]["start"]
+        end = max(s["start"] + s["dur_ms"] / 1000.0 for s in ts)
+        rows.append((start, task_id, len(ts), sorted({s.get("service", "") for s in ts}), end - start))
+    print(f"{'started':<20} {'task_id':<32} {'spans':>5} {'elapsed':>9}  services")
+    for start, task_id, n, services, elapsed in sorted(rows)[-int(args.limit):]:
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start))
+        print(f"{stamp:<20} {task_id:<32} {n:>5} {elapsed:>8.1f}s  {', '.join(services)}")
+    return 0
+
+def show(args: argparse.Namespace) -> int:
+    spans = spans_for_task(read_spans(args.dir), args.task_id)
+    if not spans:
+        print(f"no spans for task {args.task_id} in {args.dir}")
+        return 1
+    if args.json:
+        print(json.dumps(spans, indent=2))
+        return 0
+    print(f"task {args.task_id}: {len(spans)} spans in {len({s['trace_id'] for s in spans})} trace(s)")
+    print(render_timeline(spans, width=int(args.width)))
+    return 0
+
+def main():
+    p = argparse.ArgumentParser(prog="trace_view")
+    p.add_argument("--dir", default=str(DEFAULT_TRACE_DIR), help="Directory of *.ndjson span files")
+    sub = p.add_subparsers(dest="sub")
+
+    p_tasks = sub.add_parser("tasks", help="List traced task_ids")
+    p_tasks.add_argument("--limit", default=30, help="Show the most recent N tasks")
+    p_tasks.set_defaults(func=tasks)
+
+    p_show = sub.add_parser("show", help="Timeline for one task_id")
+    p_show.add_argument("task_id")
+    p_show.add_argument("--width", default=50, help="Bar width in characters")
+    p_show.add_argument("--json", action="store_true", help="Print the raw spans")
+    p_show.set_defaults(func=show)
+
+    args = p.parse_args()
+    if not args.sub:
+        p.print_help()
+        return 2
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,7 @@ from dataclasses import dataclass
 from typing import Optional, Dict, Callable
 
 from ..utils import atomic_write
+from ..core.tracing import get_tracer, inject
 
 try:
     import pyperclip
@@ -179,22 +180,27 @@ class ResponseCapture:
     def _route(self, agent: str, payload: Dict):
         """Route captured response to the inbox system"""
         try:
-            # Create envelope with metadata
-            envelope = {
-                "type": "agent_response",
-                "from": agent,
-                "to": "Agent-5",  # Route to FSM agent
-                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
-                "agent": agent,
-                "ts": int(time.time()),
-                "payload": payload
-            }
-            
-            # Write to inbox directory
-            out = Path(self.cfg.inbox_root) / f"response_{int(time.time()*1000)}_{agent}.json"
-            atomic_write(out, json.dumps(envelope, ensure_ascii=False, indent=2))
-            
-            print(f"[CAPTURE] Captured response from {agent}: {payload.get('type', 'unknown')}")
-            
+            task = str(payload.get("task") or "")
+            task_id = payload.get("task_id") or (task if task.startswith("task-") else None)
+            with get_tracer().span("capture.route", task_id=task_id, agent=agent, kind=payload.get("type")):
+                self._write_envelope(agent, payload)
         except Exception as e:
             print(f"Error routing response from {agent}: {e}")
+
+    def _write_envelope(self, agent: str, payload: Dict):
+        # Create envelope with metadata; the trace stamp lets the listener continue this span
+        envelope = inject({
+            "type": "agent_response",
+            "from": agent,
+            "to": "Agent-5",  # Route to FSM agent
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "agent": agent,
+            "ts": int(time.time()),
+            "payload": payload
+        })
+
+        # Write to inbox directory
+        out = Path(self.cfg.inbox_root) / f"response_{int(time.time()*1000)}_{agent}.json"
+        atomic_write(out, json.dumps(envelope, ensure_ascii=False, indent=2))
+
+        print(f"[CAPTURE] Captured response from {agent}: {payload.get('type', 'unknown')}")
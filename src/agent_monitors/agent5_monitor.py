@@ -22,6 +22,13 @@ from typing import Dict, List, Optional
 
 # Real ACP send
 from src.services.agent_cell_phone import AgentCellPhone, MsgTag  # type: ignore
+from src.core.activity_timeline import ActivityTimeline, ActivityWatcher, StallThresholds  # type: ignore
+from src.core.fleet_analytics import FleetActivityMatrix  # type: ignore
+from src.core.heartbeat_table import HeartbeatTable, default_table_path  # type: ignore
+from src.core.mitigation_executor import MitigationDecision, MitigationExecutor, MitigationStep  # type: ignore
+from src.core.metrics_store import FLEET, STATUS_CODES, MetricsStore  # type: ignore
+from src.core.stall_predictor import Sample, StallFeatures, load_model, tag_code  # type: ignore
+from src.utils import atomic_write  # type: ignore
 
 # File-lane capture (flows into inbox/FSM you already wired)
 try:
@@ -43,7 +50,10 @@ RUNTIME.mkdir(parents=True, exist_ok=True)
 STATE = RUNTIME / "activity.json"
 HEALTH = RUNTIME / "health.json"
 METRICS = RUNTIME / "metrics.json"
+METRICS_DB = RUNTIME / "metrics.sqlite"
+STALL_MODEL = RUNTIME / "stall_model.json"
 LOG = RUNTIME / "monitor.log"
+MITIGATIONS = RUNTIME / "mitigations.ndjson"
 
 def _iso() -> str:
     """Get current timestamp in ISO format"""
@@ -69,8 +79,13 @@ class MonitorConfig:
     file_watch_root: str = "agent_workspaces"
     file_response_name: str = "response.txt"
     inbox_root: str = "runtime/agent_comms/inbox"
+    heartbeat_table: str = ""        # defaults to the writers' table: ACP_HEARTBEAT_TABLE or runtime/agent_comms/heartbeats.bin
     fsm_enabled: bool = True
     rescue_cooldown_sec: int = 300   # 5 minutes between rescues
+    mitigation_state_dir: str = ""   # share rescue cooldowns with other processes when set
+    metrics_db: str = ""             # time-series store; defaults to metrics.sqlite in RUNTIME
+    stall_model: str = ""            # trained by scripts/stall_model.py; defaults to stall_model.json in RUNTIME
+    predictive_nudge: bool = True    # nudge agents the model scores at or above its threshold
     active_grace_sec: int = 300      # 5 minutes before considered idle
     onboarding_grace_period: int = 600  # 10 minutes grace during onboarding
     use_db_lane: bool = False
@@ -95,11 +110,35 @@ class MonitorConfig:
 class Agent5Monitor:
     """Production monitor for Agent-5 to track agent responses and send rescues"""
     
-    def __init__(self, cfg: MonitorConfig, sender: str = "Agent-5", layout: str = "5-agent", test: bool = False):
+    def __init__(self, cfg: MonitorConfig, sender: str = "Agent-5", layout: str = "5-agent", test: bool = False,
+                 timeline: Optional[ActivityTimeline] = None, mitigations: Optional[MitigationExecutor] = None,
+                 metrics_store: Optional[MetricsStore] = None):
         self.cfg = cfg
         self.acp = AgentCellPhone(agent_id=sender, layout_mode=layout, test=test)
         self.capture: Optional[ResponseCapture] = None
         self.db_lane: Optional[CursorDBWatcher] = None
+        self.timeline = timeline or ActivityTimeline()
+        self.watcher = ActivityWatcher(
+            self.timeline,
+            workspace_root=cfg.file_watch_root,
+            inbox_root=cfg.inbox_root,
+            response_name=cfg.file_response_name,
+            heartbeat_table=HeartbeatTable(cfg.heartbeat_table or default_table_path(), create=False),
+        )
+        self.fleet = FleetActivityMatrix().attach(self.timeline)
+        # Warnings and rescues share one cooldown; the executor also dedupes against other rescuers
+        self.mitigations = mitigations or MitigationExecutor(
+            default_cooldown_sec=cfg.rescue_cooldown_sec,
+            audit_path=MITIGATIONS,
+            state_dir=cfg.mitigation_state_dir or None,
+        )
+        # Per-tick samples with 1m/1h rollups; metrics.json only holds the latest snapshot
+        self.metrics_store = metrics_store or MetricsStore(cfg.metrics_db or METRICS_DB)
+        self._mitigations_this_tick: Dict[str, int] = {"warning": 0, "rescue": 0, "predicted": 0}
+        # Optional stall model: scores every agent per tick so nudges go out before the thresholds
+        self.stall_model = load_model(cfg.stall_model or STALL_MODEL)
+        self.stall_features = StallFeatures()
+        # Seen activity plus optimistic rescue bumps; persisted across restarts
         self.last_activity: Dict[str, float] = {}
         self.last_rescue: Dict[str, float] = {}
         self._stop = threading.Event()
@@ -154,8 +193,11 @@ class Agent5Monitor:
                 self.db_lane.stop()
         except Exception:
             pass
+        self.watcher.heartbeat_table.close()
+        self.mitigations.stop()
         self._persist_state()
         self._write_health(False, "stopped")
+        self.metrics_store.close()
         _log("monitor stopped")
 
     # ---- init lanes ----
@@ -221,6 +263,12 @@ class Agent5Monitor:
 
         now = time.time()
         metrics = {"ts": _iso(), "agents": {}}
+        fleet = self.fleet.analyze(StallThresholds(
+            active_sec=self.cfg.active_grace_sec,
+            warn_sec=self.cfg.warn_threshold_sec,
+            stall_sec=self.cfg.stall_threshold_sec,
+        ), now)
+        metrics["fleet_anomalies"] = fleet.flagged()
         
         for agent in agents:
             age = now - self.last_activity.get(agent, 0.0)
@@ -235,7 +283,27 @@ class Agent5Monitor:
             else:
                 status = "stalled"
                 
-            metrics["agents"][agent] = {"age_sec": age, "status": status}
+            row = fleet.row(agent) or {}
+            last_msg = getattr(self.acp, "last_message_to", lambda a: None)(agent)
+            sample = Sample(
+                ts=now, age_sec=age, events_last_hour=row.get("rate_now") or 0.0,
+                reply_bytes=self._reply_bytes(agent), last_tag=tag_code(last_msg.tag if last_msg else None),
+                stalled=status == "stalled",
+            )
+            features = self.stall_features.update(agent, sample)
+            risk = self.stall_model.score(features) if self.stall_model else None
+            metrics["agents"][agent] = {
+                "age_sec": age,
+                "status": status,
+                "idle_streak": row.get("idle_streak"),
+                "events_last_hour": row.get("rate_now"),
+                "hourly_rate_p50": row.get("rate_p50"),
+                "hourly_rate_p90": row.get("rate_p90"),
+                "anomaly": bool(row.get("anomaly")),
+                "reply_bytes": sample.reply_bytes,
+                "last_tag": sample.last_tag,
+                "stall_risk": risk,
+            }
 
             # FIXED: Progressive stall detection with realistic timing
             if age >= self.cfg.stall_threshold_sec:
@@ -244,130 +312,100 @@ class Agent5Monitor:
             elif age >= self.cfg.warn_threshold_sec:
                 # Agent might be stalling - send warning nudge
                 self._send_stall_warning(agent)
+            elif risk is not None and risk >= self.stall_model.threshold and self.cfg.predictive_nudge:
+                # Model expects a stall within its horizon - nudge ahead of the thresholds
+                self._predictive_nudge(agent, risk)
 
         self._write_metrics(metrics)
+        self._record_metrics(now, metrics)
         self._write_health(True, "running")
         self._persist_state()
 
     # ---- activity sources ----
     def _update_activity_from_files(self, agents: List[str]):
-        """Update activity timestamps from file modification times"""
-        root = Path(self.cfg.file_watch_root)
-
-        # Process heartbeat envelopes
-        inbox = Path(self.cfg.inbox_root)
-        if inbox.exists():
-            for hb in inbox.glob("heartbeat_*.json"):
-                try:
-                    data = json.loads(hb.read_text(encoding="utf-8"))
-                    agent = data.get("agent")
-                    ts = float(data.get("ts") or 0)
-                    if agent in agents and ts:
-                        self.last_activity[agent] = max(self.last_activity.get(agent, 0.0), ts)
-                except Exception:
-                    pass
-                finally:
-                    try:
-                        hb.unlink()
-                    except Exception:
-                        pass
-
+        """Pull heartbeat-table beats, state.json and response.txt activity through the shared timeline"""
+        self.watcher.poll(agents)
         for agent in agents:
-            ws = root / agent
-            # Prefer state.json; fallback to response.txt
-            st = ws / "state.json"
-            rt = ws / self.cfg.file_response_name
-            mtime = 0.0
-            
-            try:
-                if st.exists():
-                    mtime = max(mtime, st.stat().st_mtime)
-                if rt.exists():
-                    mtime = max(mtime, rt.stat().st_mtime)
-            except Exception:
-                pass
-                
-            if mtime:
-                # Normalize to seconds and only move forward
-                self.last_activity[agent] = max(self.last_activity.get(agent, 0.0), float(mtime))
+            seen = self.timeline.last_activity(agent)
+            if seen:
+                # Only move forward
+                self.last_activity[agent] = max(self.last_activity.get(agent, 0.0), seen)
 
     # ---- rescue path ----
+    def _mitigate(self, agent: str, kind: str, message: str, fallback) -> MitigationDecision:
+        """Submit progressive escalation (or a single send) through the mitigation executor"""
+        steps_for = getattr(self.acp, "escalation_steps", None)
+        steps = steps_for(agent, message, MsgTag.RESCUE) if steps_for else [MitigationStep("send", fallback)]
+        return self.mitigations.request(agent, kind, steps, source="agent5")
+
+    def _reply_bytes(self, agent: str) -> Optional[float]:
+        try:
+            return float((Path(self.cfg.file_watch_root) / agent / self.cfg.file_response_name).stat().st_size)
+        except OSError:
+            return None
+
+    def _predictive_nudge(self, agent: str, risk: float):
+        """Shift+Backspace nudge for an agent the stall model flags before any threshold"""
+        decision = self.mitigations.request(
+            agent, "nudge", [MitigationStep("nudge", lambda: self.acp.nudge_agent(agent, "subtle"))], source="predictor"
+        )
+        if decision.accepted:
+            self._mitigations_this_tick["predicted"] += 1
+            _log(f"predictive nudge {decision.status} -> {agent} (risk {risk:.2f})")
+
     def _send_stall_warning(self, agent: str):
         """Send Shift+Backspace nudge for potential stall (before full rescue)"""
-        now = time.time()
-        
-        # Check cooldown to prevent spam
-        if (now - self.last_rescue.get(agent, 0.0)) < self.cfg.rescue_cooldown_sec:
-            return
-            
-        try:
-            # Send gentle warning with Shift+Backspace nudge
-            warning_msg = (
-                f"[STALL WARNING] {agent}, you appear to be taking longer than usual to respond.\n"
-                f"Sending Shift+Backspace nudge to ensure your terminal is responsive.\n"
-                f"Please confirm you are working on your task."
-            )
-            
-            # Use progressive escalation with nudge flag
-            if hasattr(self.acp, 'progressive_escalation'):
-                self.acp.progressive_escalation(agent, warning_msg, MsgTag.RESCUE)
-            else:
-                # Fallback to direct send with nudge flag
-                self.acp.send(agent, warning_msg, MsgTag.RESCUE, False, True)
-            
-            self.last_rescue[agent] = now
-            _log(f"stall warning sent -> {agent}")
-            
-        except Exception as e:
-            _log(f"stall warning failed -> {agent}: {e}")
+        # Send gentle warning with Shift+Backspace nudge
+        warning_msg = (
+            f"[STALL WARNING] {agent}, you appear to be taking longer than usual to respond.\n"
+            f"Sending Shift+Backspace nudge to ensure your terminal is responsive.\n"
+            f"Please confirm you are working on your task."
+        )
+        # Fallback to direct send with nudge flag
+        decision = self._mitigate(
+            agent, "warning", warning_msg, lambda: self.acp.send(agent, warning_msg, MsgTag.RESCUE, False, True)
+        )
+        if decision.accepted:
+            self.last_rescue[agent] = time.time()
+            self._mitigations_this_tick["warning"] += 1
+            _log(f"stall warning {decision.status} -> {agent}")
     
     def _rescue(self, agent: str):
         """Send rescue message to stalled agent using progressive escalation"""
-        now = time.time()
-        
-        # Check cooldown to prevent spam
-        if (now - self.last_rescue.get(agent, 0.0)) < self.cfg.rescue_cooldown_sec:
+        rescue_msg = (
+            f"[RESCUE] {agent}, you appear stalled.\n"
+            f"Reply using the Dream.OS block:\n"
+            f"Task: <what you're doing>\n"
+            f"Actions Taken:\n- ...\n"
+            f"Commit Message: <if any>\n"
+            f"Status: 🟡 pending or ✅ done"
+        )
+        # Progressive escalation: nudge → rescue message → new chat; fallback to traditional rescue
+        decision = self._mitigate(
+            agent, "rescue", rescue_msg, lambda: self.acp.send(agent, rescue_msg, MsgTag.RESCUE, new_chat=False)
+        )
+        if decision.status == "merged":
+            _log(f"rescue merged into in-flight mitigation -> {agent}")
+        if not decision.accepted:
             return
-            
-        try:
-            # Use progressive escalation for stalled agents
-            rescue_msg = (
-                f"[RESCUE] {agent}, you appear stalled.\n"
-                f"Reply using the Dream.OS block:\n"
-                f"Task: <what you're doing>\n"
-                f"Actions Taken:\n- ...\n"
-                f"Commit Message: <if any>\n"
-                f"Status: 🟡 pending or ✅ done"
-            )
-            
-            # Progressive escalation: nudge → rescue message → new chat
-            if hasattr(self.acp, 'progressive_escalation'):
-                # Use the new progressive escalation system
-                self.acp.progressive_escalation(agent, rescue_msg, MsgTag.RESCUE)
-            else:
-                # Fallback to traditional rescue
-                self.acp.send(agent, rescue_msg, MsgTag.RESCUE, new_chat=False)
-            
-            self.last_rescue[agent] = now
-            
-            # Optimistic nudge to reduce duplicate rescues until we see file updates
-            self.last_activity[agent] = max(self.last_activity.get(agent, 0.0), now)
-            _log(f"progressive rescue sent -> {agent}")
-            
-        except Exception as e:
-            _log(f"rescue failed -> {agent}: {e}")
+        now = time.time()
+        self.last_rescue[agent] = now
+        self._mitigations_this_tick["rescue"] += 1
+        # Optimistic nudge to reduce duplicate rescues until we see file updates
+        self.last_activity[agent] = max(self.last_activity.get(agent, 0.0), now)
+        _log(f"progressive rescue {decision.status} -> {agent}")
 
     # ---- state/health/metrics ----
     def _persist_state(self):
         """Persist current state to disk"""
         try:
-            STATE.write_text(json.dumps({
+            atomic_write(STATE, json.dumps({
                 "ts": _iso(),
                 "last_activity": self.last_activity,
                 "last_rescue": self.last_rescue,
                 "config": self.cfg.__dict__,
                 "uptime_sec": time.time() - self._start_time
-            }, indent=2), encoding="utf-8")
+            }, indent=2))
         except Exception as e:
             _log(f"persist error: {e}")
 
@@ -378,6 +416,8 @@ class Agent5Monitor:
                 data = json.loads(STATE.read_text(encoding="utf-8"))
                 self.last_activity.update({k: float(v) for k, v in data.get("last_activity", {}).items()})
                 self.last_rescue.update({k: float(v) for k, v in data.get("last_rescue", {}).items()})
+                for agent, ts in self.last_rescue.items():
+                    self.mitigations.mark(agent, "rescue", ts)
                 _log("state restored")
         except Exception as e:
             _log(f"restore error: {e}")
@@ -385,22 +425,52 @@ class Agent5Monitor:
     def _write_health(self, ok: bool, note: str):
         """Write health status"""
         try:
-            HEALTH.write_text(json.dumps({
+            atomic_write(HEALTH, json.dumps({
                 "ok": ok, 
                 "note": note, 
                 "ts": _iso(),
                 "uptime_sec": time.time() - self._start_time
-            }, indent=2), encoding="utf-8")
+            }, indent=2))
         except Exception as e:
             _log(f"health write error: {e}")
 
     def _write_metrics(self, data: dict):
-        """Write metrics data"""
+        """Write the latest metrics snapshot (history lives in the metrics store)"""
         try:
-            METRICS.write_text(json.dumps(data, indent=2), encoding="utf-8")
+            atomic_write(METRICS, json.dumps(data, indent=2))
         except Exception as e:
             _log(f"metrics write error: {e}")
 
+    def _record_metrics(self, now: float, data: dict):
+        """Append this tick's per-agent and fleet samples to the time-series store"""
+        rows = []
+        for agent, m in data["agents"].items():
+            rows += [
+                ("age_sec", agent, m["age_sec"]),
+                ("status", agent, STATUS_CODES[m["status"]]),
+                ("stalled", agent, m["status"] == "stalled"),
+                ("idle_streak", agent, m["idle_streak"]),
+                ("events_last_hour", agent, m["events_last_hour"]),
+                ("anomaly", agent, m["anomaly"]),
+                ("reply_bytes", agent, m["reply_bytes"]),
+                ("last_tag", agent, m["last_tag"]),
+                ("stall_risk", agent, m["stall_risk"]),
+            ]
+        statuses = [m["status"] for m in data["agents"].values()]
+        rows += [
+            ("agents_stalled", FLEET, statuses.count("stalled")),
+            ("agents_active", FLEET, statuses.count("active")),
+            ("anomalies", FLEET, len(data.get("fleet_anomalies") or [])),
+            ("warnings_sent", FLEET, self._mitigations_this_tick["warning"]),
+            ("rescues_sent", FLEET, self._mitigations_this_tick["rescue"]),
+            ("predicted_nudges", FLEET, self._mitigations_this_tick["predicted"]),
+        ]
+        self._mitigations_this_tick = {"warning": 0, "rescue": 0, "predicted": 0}
+        try:
+            self.metrics_store.record(rows, ts=now)
+        except Exception as e:
+            _log(f"metrics store error: {e}")
+
     def get_status(self) -> dict:
         """Get current monitor status"""
         return {
@@ -431,6 +501,10 @@ def main():
         inbox_root=os.environ.get("AGENT_INBOX_ROOT", "runtime/agent_comms/inbox"),
         fsm_enabled=os.environ.get("AGENT_FSM_ENABLED", "1") == "1",
         rescue_cooldown_sec=int(os.environ.get("AGENT_RESCUE_COOLDOWN_SEC", "300")),
+        mitigation_state_dir=os.environ.get("AGENT_MITIGATION_STATE_DIR", "runtime/agent_comms/mitigations"),
+        metrics_db=os.environ.get("AGENT_METRICS_DB", str(METRICS_DB)),
+        stall_model=os.environ.get("AGENT_STALL_MODEL", str(STALL_MODEL)),
+        predictive_nudge=os.environ.get("AGENT_PREDICTIVE_NUDGE", "1") == "1",
         active_grace_sec=int(os.environ.get("AGENT_ACTIVE_GRACE_SEC", "300")),
         onboarding_grace_period=int(os.environ.get("AGENT_ONBOARDING_SEC", "600")),  # FIXED: 10 minutes
         use_db_lane=os.environ.get("AGENT_USE_DB_LANE", "0") == "1",
@@ -9,20 +9,29 @@ This module provides secure communication infrastructure for multi-agent
 collaboration, enabling encrypted messaging and collaborative learning.
 """
 
-import json
+import sys
 import time
 import threading
 import hashlib
 import hmac
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from pathlib import Path
 import logging
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from enum import Enum
 import base64
 import secrets
 
+try:
+    from ..entity_store import EntityStore, coerce_enum, read_json
+    from ...core.job_scheduler import get_scheduler
+except ImportError:  # imported as a top-level module
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    sys.path.append(str(Path(__file__).resolve().parents[3]))
+    from entity_store import EntityStore, coerce_enum, read_json
+    from src.core.job_scheduler import get_scheduler
+
 class MessageType(Enum):
     """Message type enumeration."""
     TASK_UPDATE = "task_update"
@@ -61,11 +70,11 @@ class LearningSession:
     topic: str
     participants: List[str]
     start_time: str
-    end_time: Optional[str] = None
     learning_objectives: List[str]
     materials_shared: List[str]
     participant_contributions: Dict[str, List[str]]
     session_outcomes: List[str]
+    end_time: Optional[str] = None
     effectiveness_score: float = 0.0
 
 @dataclass
@@ -76,8 +85,8 @@ class CapabilityEnhancement:
     current_capability: float
     target_capability: float
     learning_path: List[str]
-    progress: float = 0.0
     last_updated: str
+    progress: float = 0.0
     mentor_agent: Optional[str] = None
 
 class CollaborativeCommunicationHub:
@@ -92,11 +101,15 @@ class CollaborativeCommunicationHub:
         self.data_path = Path(data_path)
         self.data_path.mkdir(parents=True, exist_ok=True)
         
-        # Core communication infrastructure
-        self.secure_messages: Dict[str, SecureMessage] = {}
-        self.learning_sessions: Dict[str, LearningSession] = {}
-        self.capability_enhancements: Dict[str, CapabilityEnhancement] = {}
+        # Core communication infrastructure (persisted, loaded lazily)
+        self._store = EntityStore(self.data_path / 'communication_hub.sqlite')
+        self.secure_messages = self._store.repository("secure_messages", decode=self._message_from_dict)
+        self.learning_sessions = self._store.repository("learning_sessions", decode=lambda d: LearningSession(**d))
+        self.capability_enhancements = self._store.repository(
+            "capability_enhancements", decode=lambda d: CapabilityEnhancement(**d))
         self.communication_channels: Dict[str, Dict] = {}
+        # Called with every sent message, e.g. by the synergy optimizer
+        self.message_listeners: List[Callable[[SecureMessage], None]] = []
         
         # Security infrastructure
         self.security_keys: Dict[str, str] = {}
@@ -110,7 +123,7 @@ class CollaborativeCommunicationHub:
         
         # Real-time communication
         self._communication_active = False
-        self._communication_thread = None
+        self._communication_job = None
         self._lock = threading.RLock()
         
         # Initialize logging
@@ -138,36 +151,27 @@ class CollaborativeCommunicationHub:
             ]
         )
     
+    @staticmethod
+    def _message_from_dict(data: Dict[str, Any]) -> SecureMessage:
+        """Rebuild a stored message, restoring its enums."""
+        msg = SecureMessage(**data)
+        msg.message_type = coerce_enum(MessageType, data['message_type'])
+        msg.security_level = coerce_enum(SecurityLevel, data['security_level'])
+        return msg
+    
     def _load_existing_data(self):
-        """Load existing communication hub data."""
+        """Open persisted communication hub data (imports the old JSON files once)."""
         try:
-            # Load secure messages
-            messages_file = self.data_path / 'secure_messages.json'
-            if messages_file.exists():
-                with open(messages_file, 'r') as f:
-                    messages_data = json.load(f)
-                    for msg_id, msg_data in messages_data.items():
-                        # Convert back to SecureMessage object
-                        msg = SecureMessage(**msg_data)
-                        msg.message_type = MessageType(msg_data['message_type'])
-                        msg.security_level = SecurityLevel(msg_data['security_level'])
-                        self.secure_messages[msg_id] = msg
-            
-            # Load learning sessions
-            sessions_file = self.data_path / 'learning_sessions.json'
-            if sessions_file.exists():
-                with open(sessions_file, 'r') as f:
-                    sessions_data = json.load(f)
-                    for session_id, session_data in sessions_data.items():
-                        self.learning_sessions[session_id] = LearningSession(**session_data)
-            
-            # Load capability enhancements
-            capabilities_file = self.data_path / 'capability_enhancements.json'
-            if capabilities_file.exists():
-                with open(capabilities_file, 'r') as f:
-                    capabilities_data = json.load(f)
-                    for agent_id, cap_data in capabilities_data.items():
-                        self.capability_enhancements[agent_id] = CapabilityEnhancement(**cap_data)
+            def import_json_files():
+                for name, repo, decode in (
+                    ('secure_messages.json', self.secure_messages, self._message_from_dict),
+                    ('learning_sessions.json', self.learning_sessions, lambda d: LearningSession(**d)),
+                    ('capability_enhancements.json', self.capability_enhancements, lambda d: CapabilityEnhancement(**d)),
+                ):
+                    for key, data in (read_json(self.data_path / name) or {}).items():
+                        repo[key] = decode(data)
+            
+            self._store.import_legacy("json-v1", import_json_files)
                     
             logging.info(f"📚 Loaded existing data: {len(self.secure_messages)} messages, {len(self.learning_sessions)} sessions")
             
@@ -251,43 +255,36 @@ class CollaborativeCommunicationHub:
         with self._lock:
             if not self._communication_active:
                 self._communication_active = True
-                self._communication_thread = threading.Thread(target=self._monitor_communications, daemon=True)
-                self._communication_thread.start()
+                self._communication_job = get_scheduler().add_job(
+                    "communication_hub.monitor", self._monitor_communications,
+                    interval=45, error_interval=90, priority=1)
                 logging.info("🚀 Agent-4: Communication monitoring started - security and learning active")
     
     def stop_communication_monitoring(self):
         """Stop communication monitoring."""
         with self._lock:
             self._communication_active = False
-            if self._communication_thread:
-                self._communication_thread.join(timeout=5)
+            if self._communication_job:
+                get_scheduler().remove_job(self._communication_job)
+                self._communication_job = None
             logging.info("🛑 Agent-4: Communication monitoring stopped")
     
     def _monitor_communications(self):
-        """Background thread for monitoring communications."""
-        while self._communication_active:
-            try:
-                # Monitor secure communications
-                self._monitor_security_status()
-                
-                # Monitor learning sessions
-                self._monitor_learning_progress()
-                
-                # Monitor capability enhancements
-                self._monitor_capability_progress()
-                
-                # Clean up expired messages
-                self._cleanup_expired_messages()
-                
-                # Save data periodically
-                self._save_data()
-                
-                # Sleep for monitoring interval
-                time.sleep(45)  # 45 second monitoring interval
-                
-            except Exception as e:
-                logging.error(f"❌ Communication monitoring error: {e}")
-                time.sleep(90)  # Longer sleep on error
+        """One monitoring pass; a shared scheduler job every 45 s (90 s after an error)."""
+        # Monitor secure communications
+        self._monitor_security_status()
+            
+        # Monitor learning sessions
+        self._monitor_learning_progress()
+            
+        # Monitor capability enhancements
+        self._monitor_capability_progress()
+            
+        # Clean up expired messages
+        self._cleanup_expired_messages()
+            
+        # Save data periodically
+        self._save_data()
     
     def send_secure_message(self, sender: str, recipients: List[str], 
                           message_type: MessageType, content: str,
@@ -339,6 +336,11 @@ class CollaborativeCommunicationHub:
             self._log_security_audit("message_sent", sender, recipients, security_level)
             
             logging.info(f"🔐 Agent-4: Sent secure message '{message_id}' from {sender} to {len(recipients)} recipients")
+            for listener in self.message_listeners:
+                try:
+                    listener(message)
+                except Exception as e:
+                    logging.warning(f"⚠️ Message listener failed for '{message_id}': {e}")
             return message_id
     
     def _create_message_signature(self, sender: str, content: str, security_level: SecurityLevel) -> str:
@@ -459,6 +461,7 @@ class CollaborativeCommunicationHub:
             
             # Update session
             session.last_updated = datetime.now().isoformat()
+            self.learning_sessions.mark(session_id)
             
             logging.info(f"🔐 Agent-4: Updated learning session '{session_id}' with contribution from {agent}")
             return True
@@ -487,6 +490,7 @@ class CollaborativeCommunicationHub:
             session.end_time = datetime.now().isoformat()
             session.session_outcomes = outcomes
             session.effectiveness_score = max(0.0, min(1.0, effectiveness_score))
+            self.learning_sessions.mark(session_id)
             
             # Update capability enhancements for participants
             for agent in session.participants:
@@ -530,6 +534,7 @@ class CollaborativeCommunicationHub:
             })
             
             enhancement.last_updated = datetime.now().isoformat()
+            self.capability_enhancements.mark(agent)
             
         except Exception as e:
             logging.error(f"❌ Failed to update agent capabilities: {e}")
@@ -744,23 +749,9 @@ class CollaborativeCommunicationHub:
             return summary
     
     def _save_data(self):
-        """Save communication hub data to persistent storage."""
+        """Write changed messages, sessions and capability enhancements to persistent storage."""
         try:
-            # Save secure messages
-            messages_data = {mid: asdict(msg) for mid, msg in self.secure_messages.items()}
-            with open(self.data_path / 'secure_messages.json', 'w') as f:
-                json.dump(messages_data, f, indent=2)
-            
-            # Save learning sessions
-            sessions_data = {sid: asdict(session) for sid, session in self.learning_sessions.items()}
-            with open(self.data_path / 'learning_sessions.json', 'w') as f:
-                json.dump(sessions_data, f, indent=2)
-            
-            # Save capability enhancements
-            capabilities_data = {eid: asdict(enhancement) for eid, enhancement in self.capability_enhancements.items()}
-            with open(self.data_path / 'capability_enhancements.json', 'w') as f:
-                json.dump(capabilities_data, f, indent=2)
-                
+            self._store.flush()
         except Exception as e:
             logging.error(f"❌ Failed to save communication hub data: {e}")
     
@@ -774,8 +765,18 @@ class CollaborativeCommunicationHub:
                 f"Security: {summary['security_alerts_last_100_events']} alerts")
 
 
-# Global instance for system-wide access
-collaborative_communication_hub = CollaborativeCommunicationHub()
+# Global instance for system-wide access, created on first use so that
+# importing the module does not open a store under the working directory
+_global_instance: Optional[CollaborativeCommunicationHub] = None
+
+
+def __getattr__(name: str):
+    global _global_instance
+    if name == "collaborative_communication_hub":
+        if _global_instance is None:
+            _global_instance = CollaborativeCommunicationHub()
+        return _global_instance
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 
@@ -0,0 +1,327 @@
+"""Shared persistence for the collaborative managers (SQLite).
+
+The task manager, knowledge manager, communication hub, synergy optimizer and
+workflow optimizer used to serialize every in-memory dict to indented JSON on
+each save, every 30-60 s, whether anything had changed or not.
+:class:`EntityStore` keeps one ``entities`` table instead:
+
+- :class:`Repository` is a dict-like view of one collection. Assigning or
+  deleting a key marks it dirty; in-place edits of a stored object are
+  announced with :meth:`Repository.mark`;
+- :meth:`EntityStore.flush` upserts only dirty rows (and deletes removed ones)
+  for every collection in a single transaction, so save cost follows the
+  number of changes rather than the size of the history;
+- loads are lazy: opening a collection reads its keys only, and a row is
+  decoded on first access (``values()``/``items()`` fetch the rest in one query);
+- :meth:`EntityStore.maybe_flush` batches frequent writers: it commits once
+  ``batch_size`` changes are pending or ``max_delay`` seconds have passed;
+- :meth:`EntityStore.import_legacy` runs a one-off import of the old JSON files.
+
+WAL journaling lets other processes read while a manager writes.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import MutableMapping
+from dataclasses import asdict, is_dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Type, Union
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    collection TEXT NOT NULL, key TEXT NOT NULL, body TEXT NOT NULL, updated REAL NOT NULL,
+    PRIMARY KEY (collection, key)
+);
+CREATE TABLE IF NOT EXISTS imports (tag TEXT PRIMARY KEY, ts REAL NOT NULL);
+"""
+
+_UPSERT = """
+INSERT INTO entities (collection, key, body, updated) VALUES (?, ?, ?, ?)
+ON CONFLICT (collection, key) DO UPDATE SET body = excluded.body, updated = excluded.updated
+"""
+
+_MAX_KEY = "\U0010ffff"
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    return str(value)
+
+
+def to_record(value: Any) -> Any:
+    """Default encoder: dataclasses become dicts, everything else is stored as is."""
+    return asdict(value) if is_dataclass(value) else value
+
+
+def coerce_enum(cls: Type[Enum], raw: Any) -> Enum:
+    """Enum from its value, or from ``"Cls.NAME"`` as older ``default=str`` dumps wrote it."""
+    if isinstance(raw, cls):
+        return raw
+    raw = str(raw)
+    if raw.startswith(f"{cls.__name__}."):
+        return cls[raw.split(".", 1)[1]]
+    return cls(raw)
+
+
+def read_json(path: Union[str, Path]) -> Any:
+    """Contents of a legacy JSON file; None when it is missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class Repository(MutableMapping):
+    """Lazy, dirty-tracked mapping over one collection of an :class:`EntityStore`."""
+
+    def __init__(
+        self,
+        store: "EntityStore",
+        name: str,
+        decode: Optional[Callable[[Any], Any]] = None,
+        encode: Callable[[Any], Any] = to_record,
+        key_encode: Callable[[Any], str] = str,
+        key_decode: Callable[[str], Any] = str,
+    ) -> None:
+        self.store = store
+        self.name = name
+        self.decode = decode or (lambda raw: raw)
+        self.encode = encode
+        self.key_encode = key_encode
+        self.key_decode = key_decode
+        self._lock = threading.RLock()
+        self._cache: Dict[Any, Any] = {}
+        self._keys: Optional[Dict[Any, None]] = None  # ordered key set, read on first use
+        self._dirty: Dict[Any, None] = {}  # insertion-ordered, so rows keep creation order
+        self._deleted: Set[Any] = set()
+
+    # ---- mapping ----
+    def _all_keys(self) -> Dict[Any, None]:
+        if self._keys is None:
+            stored = self.store._fetch_keys(self.name)
+            keys = {self.key_decode(k): None for k in stored}
+            keys.update(dict.fromkeys(self._cache))
+            for key in self._deleted:
+                keys.pop(key, None)
+            self._keys = keys
+        return self._keys
+
+    def __getitem__(self, key: Any) -> Any:
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+            if key in self._deleted or key not in self._all_keys():
+                raise KeyError(key)
+            body = self.store._fetch_one(self.name, self.key_encode(key))
+            if body is None:
+                raise KeyError(key)
+            value = self._cache[key] = self.decode(json.loads(body))
+            return value
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._all_keys()[key] = None
+            self._cache[key] = value
+            self._dirty[key] = None
+            self._deleted.discard(key)
+
+    def __delitem__(self, key: Any) -> None:
+        with self._lock:
+            if key not in self:
+                raise KeyError(key)
+            del self._all_keys()[key]
+            self._cache.pop(key, None)
+            self._dirty.pop(key, None)
+            self._deleted.add(key)
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            return key in self._cache or key in self._all_keys()
+
+    def __iter__(self) -> Iterator[Any]:
+        with self._lock:
+            return iter(list(self._all_keys()))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._all_keys())
+
+    def _load_all(self) -> None:
+        with self._lock:
+            missing = [k for k in self._all_keys() if k not in self._cache]
+            if not missing:
+                return
+            wanted = {self.key_encode(k): k for k in missing}
+            for raw_key, body in self.store._fetch_all(self.name):
+                key = wanted.get(raw_key)
+                if key is not None:
+                    self._cache[key] = self.decode(json.loads(body))
+
+    def values(self) -> List[Any]:  # type: ignore[override]
+        self._load_all()
+        with self._lock:
+            return [self._cache[k] for k in self._all_keys() if k in self._cache]
+
+    def items(self) -> List[Tuple[Any, Any]]:  # type: ignore[override]
+        self._load_all()
+        with self._lock:
+            return [(k, self._cache[k]) for k in self._all_keys() if k in self._cache]
+
+    def scan(self, prefix: str) -> List[Tuple[Any, Any]]:
+        """Entries whose encoded key starts with ``prefix``, in insertion order."""
+        with self._lock:
+            found: Dict[Any, Any] = {}
+            for raw_key, body in self.store._fetch_range(self.name, prefix):
+                key = self.key_decode(raw_key)
+                if key in self._deleted:
+                    continue
+                if key not in self._cache:
+                    self._cache[key] = self.decode(json.loads(body))
+                found[key] = self._cache[key]
+            for key, value in self._cache.items():
+                if key not in found and self.key_encode(key).startswith(prefix):
+                    found[key] = value
+            return list(found.items())
+
+    # ---- dirty tracking ----
+    def mark(self, *keys: Any) -> None:
+        """Record in-place changes to stored objects so the next flush writes them."""
+        with self._lock:
+            self._dirty.update((k, None) for k in keys if k in self._cache)
+
+    @property
+    def pending(self) -> int:
+        return len(self._dirty) + len(self._deleted)
+
+    def _collect(self) -> Tuple[List[Tuple[Any, Any]], List[Any]]:
+        with self._lock:
+            upserts = [(k, self._cache[k]) for k in self._dirty]
+            deletes = list(self._deleted)
+            self._dirty.clear()
+            self._deleted.clear()
+        return upserts, deletes
+
+    def _restore(self, upserts: List[Tuple[Any, Any]], deletes: List[Any]) -> None:
+        """Re-mark a batch whose write failed, unless it changed again meanwhile."""
+        with self._lock:
+            for key, _ in upserts:
+                if key in self._cache and key not in self._deleted:
+                    self._dirty.setdefault(key)
+            for key in deletes:
+                if key not in self._cache:
+                    self._deleted.add(key)
+
+
+class EntityStore:
+    """One SQLite file holding every collection of a manager."""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        batch_size: int = 200,
+        max_delay: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.path = Path(path)
+        self.batch_size = max(1, int(batch_size))
+        self.max_delay = max_delay
+        self.clock = clock
+        self._repositories: Dict[str, Repository] = {}
+        self._lock = threading.RLock()
+        self._last_flush = clock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def repository(self, name: str, **codecs: Any) -> Repository:
+        """The collection ``name``; codecs: decode, encode, key_encode, key_decode."""
+        with self._lock:
+            if name not in self._repositories:
+                self._repositories[name] = Repository(self, name, **codecs)
+            return self._repositories[name]
+
+    # ---- reads ----
+    def _fetch_keys(self, collection: str) -> List[str]:
+        with self._lock:
+            cur = self._conn.execute("SELECT key FROM entities WHERE collection = ? ORDER BY rowid", (collection,))
+            return [row[0] for row in cur]
+
+    def _fetch_one(self, collection: str, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body FROM entities WHERE collection = ? AND key = ?", (collection, key)).fetchone()
+            return row[0] if row else None
+
+    def _fetch_all(self, collection: str) -> List[Tuple[str, str]]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT key, body FROM entities WHERE collection = ? ORDER BY rowid", (collection,)).fetchall()
+
+    def _fetch_range(self, collection: str, prefix: str) -> List[Tuple[str, str]]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT key, body FROM entities WHERE collection = ? AND key >= ? AND key < ? ORDER BY rowid",
+                (collection, prefix, prefix + _MAX_KEY)).fetchall()
+
+    # ---- writes ----
+    @property
+    def pending(self) -> int:
+        return sum(repo.pending for repo in list(self._repositories.values()))
+
+    def flush(self) -> int:
+        """Write every pending change in one transaction; returns rows written or deleted."""
+        with self._lock:
+            batches = [(repo, *repo._collect()) for repo in list(self._repositories.values())]
+            now = time.time()
+            try:
+                with self._conn:
+                    for repo, upserts, deletes in batches:
+                        if upserts:
+                            self._conn.executemany(_UPSERT, [
+                                (repo.name, repo.key_encode(k),
+                                 json.dumps(repo.encode(v), default=_json_default, separators=(",", ":")), now)
+                                for k, v in upserts
+                            ])
+                        if deletes:
+                            self._conn.executemany(
+                                "DELETE FROM entities WHERE collection = ? AND key = ?",
+                                [(repo.name, repo.key_encode(k)) for k in deletes])
+            except Exception:
+                for repo, upserts, deletes in batches:
+                    repo._restore(upserts, deletes)
+                raise
+            self._last_flush = self.clock()
+            return sum(len(u) + len(d) for _, u, d in batches)
+
+    def maybe_flush(self) -> int:
+        """Flush once ``batch_size`` changes are pending or ``max_delay`` has passed."""
+        pending = self.pending
+        if pending and (pending >= self.batch_size or self.clock() - self._last_flush >= self.max_delay):
+            return self.flush()
+        return 0
+
+    def import_legacy(self, tag: str, loader: Callable[[], Any]) -> bool:
+        """Run ``loader`` (which fills repositories) once per store; True if it ran now."""
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM imports WHERE tag = ?", (tag,)).fetchone():
+                return False
+            loader()
+            self.flush()
+            with self._conn:
+                self._conn.execute("INSERT INTO imports (tag, ts) VALUES (?, ?)", (tag, time.time()))
+            return True
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            self._conn.close()
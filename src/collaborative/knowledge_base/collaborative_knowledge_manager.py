@@ -9,14 +9,22 @@ This module provides the core system for managing collaborative knowledge
 across all agents, enabling strategic coordination and collective intelligence.
 """
 
-import json
-import time
+import sys
 import threading
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any
 from pathlib import Path
 import logging
 
+try:
+    from ..entity_store import EntityStore, read_json
+    from ...core.job_scheduler import get_scheduler
+except ImportError:  # imported as a top-level module
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    sys.path.append(str(Path(__file__).resolve().parents[3]))
+    from entity_store import EntityStore, read_json
+    from src.core.job_scheduler import get_scheduler
+
 class CollaborativeKnowledgeManager:
     """
     Centralized knowledge management system for multi-agent collaboration.
@@ -29,21 +37,25 @@ class CollaborativeKnowledgeManager:
         self.knowledge_base_path = Path(knowledge_base_path)
         self.knowledge_base_path.mkdir(parents=True, exist_ok=True)
         
-        # Core knowledge structures
-        self.collaborative_tasks = {}
-        self.agent_knowledge = {}
-        self.shared_insights = {}
+        # Core knowledge structures (persisted, loaded lazily)
+        self._store = EntityStore(self.knowledge_base_path / 'knowledge.sqlite')
+        self.collaborative_tasks = self._store.repository("collaborative_tasks")
+        self.agent_knowledge = self._store.repository("agent_knowledge")
+        self.shared_insights = self._store.repository("shared_insights")
+        self._documents = self._store.repository("documents")
         self.collaboration_metrics = {}
         
         # Real-time collaboration state
         self.active_collaborations = {}
         self.collaboration_history = []
         self.agent_synergy_scores = {}
+        # Called with ("created" | "completed", task), e.g. by the synergy optimizer
+        self.task_listeners: List[Callable[[str, Dict[str, Any]], None]] = []
         
         # Threading for real-time updates
         self._lock = threading.RLock()
         self._monitoring_active = False
-        self._monitor_thread = None
+        self._monitor_job = None
         
         # Initialize logging
         self._setup_logging()
@@ -65,25 +77,17 @@ class CollaborativeKnowledgeManager:
         )
     
     def _load_existing_knowledge(self):
-        """Load existing knowledge from persistent storage."""
+        """Open persisted knowledge (imports the old JSON files once)."""
         try:
-            # Load collaborative tasks
-            tasks_file = self.knowledge_base_path / 'collaborative_tasks.json'
-            if tasks_file.exists():
-                with open(tasks_file, 'r') as f:
-                    self.collaborative_tasks = json.load(f)
-            
-            # Load agent knowledge
-            agents_file = self.knowledge_base_path / 'agent_knowledge.json'
-            if agents_file.exists():
-                with open(agents_file, 'r') as f:
-                    self.agent_knowledge = json.load(f)
+            def import_json_files():
+                self.collaborative_tasks.update(read_json(self.knowledge_base_path / 'collaborative_tasks.json') or {})
+                self.agent_knowledge.update(read_json(self.knowledge_base_path / 'agent_knowledge.json') or {})
+                metrics = read_json(self.knowledge_base_path / 'collaboration_metrics.json')
+                if metrics:
+                    self._documents["collaboration_metrics"] = metrics
             
-            # Load collaboration metrics
-            metrics_file = self.knowledge_base_path / 'collaboration_metrics.json'
-            if metrics_file.exists():
-                with open(metrics_file, 'r') as f:
-                    self.collaboration_metrics = json.load(f)
+            self._store.import_legacy("json-v1", import_json_files)
+            self.collaboration_metrics = self._documents.get("collaboration_metrics", {})
                     
             logging.info(f"📚 Loaded existing knowledge: {len(self.collaborative_tasks)} tasks, {len(self.agent_knowledge)} agents")
             
@@ -95,34 +99,27 @@ class CollaborativeKnowledgeManager:
         with self._lock:
             if not self._monitoring_active:
                 self._monitoring_active = True
-                self._monitor_thread = threading.Thread(target=self._monitor_collaborations, daemon=True)
-                self._monitor_thread.start()
+                self._monitor_job = get_scheduler().add_job(
+                    "knowledge_manager.monitor", self._monitor_collaborations,
+                    interval=30, error_interval=60, priority=1)
                 logging.info("🚀 Agent-1: Collaboration monitoring started - strategic coordination active")
     
     def stop_collaboration_monitoring(self):
         """Stop collaboration monitoring."""
         with self._lock:
             self._monitoring_active = False
-            if self._monitor_thread:
-                self._monitor_thread.join(timeout=5)
+            if self._monitor_job:
+                get_scheduler().remove_job(self._monitor_job)
+                self._monitor_job = None
             logging.info("🛑 Agent-1: Collaboration monitoring stopped")
     
     def _monitor_collaborations(self):
-        """Background thread for monitoring active collaborations."""
-        while self._monitoring_active:
-            try:
-                # Monitor active collaborations
-                self._update_collaboration_metrics()
-                
-                # Save knowledge periodically
-                self._save_knowledge()
-                
-                # Sleep for monitoring interval
-                time.sleep(30)  # 30 second monitoring interval
-                
-            except Exception as e:
-                logging.error(f"❌ Collaboration monitoring error: {e}")
-                time.sleep(60)  # Longer sleep on error
+        """One monitoring pass; a shared scheduler job every 30 s (60 s after an error)."""
+        # Monitor active collaborations
+        self._update_collaboration_metrics()
+            
+        # Save knowledge periodically
+        self._save_knowledge()
     
     def create_collaborative_task(self, task_id: str, task_type: str, 
                                 description: str, agents: List[str], 
@@ -170,8 +167,16 @@ class CollaborativeKnowledgeManager:
                 }
             
             logging.info(f"📋 Agent-1: Created collaborative task '{task_id}' with {len(agents)} agents")
+            self._notify_task_listeners("created", task)
             return task
     
+    def _notify_task_listeners(self, event: str, task: Dict[str, Any]):
+        for listener in self.task_listeners:
+            try:
+                listener(event, task)
+            except Exception as e:
+                logging.warning(f"⚠️ Task listener failed for '{task['task_id']}': {e}")
+    
     def update_task_progress(self, task_id: str, agent: str, 
                            progress: float, insights: List[str] = None,
                            blockers: List[str] = None) -> bool:
@@ -213,12 +218,14 @@ class CollaborativeKnowledgeManager:
             total_progress = sum(c["progress"] for c in task["contributions"].values())
             task["progress"] = total_progress / len(task["contributions"])
             task["updated_at"] = datetime.now().isoformat()
+            self.collaborative_tasks.mark(task_id)
             
             # Check for task completion
             if task["progress"] >= 1.0 and task["status"] != "completed":
                 task["status"] = "completed"
                 task["actual_completion"] = datetime.now().isoformat()
                 logging.info(f"🎉 Task '{task_id}' completed by collaborative effort!")
+                self._notify_task_listeners("completed", task)
             
             logging.info(f"📊 Agent-1: Updated progress for task '{task_id}' - {agent}: {progress:.1%}")
             return True
@@ -260,6 +267,7 @@ class CollaborativeKnowledgeManager:
                 self.agent_knowledge[agent] = {"insights": [], "expertise": {}, "collaboration_history": []}
             
             self.agent_knowledge[agent]["insights"].append(insight_id)
+            self.agent_knowledge.mark(agent)
             
             logging.info(f"💡 Agent-1: Added shared insight '{insight_id}' from {agent}")
             return insight
@@ -312,16 +320,12 @@ class CollaborativeKnowledgeManager:
             self.collaboration_metrics = summary
     
     def _save_knowledge(self):
-        """Save knowledge to persistent storage."""
+        """Write changed knowledge to persistent storage."""
         try:
-            with open(self.knowledge_base_path / 'collaborative_tasks.json', 'w') as f:
-                json.dump(self.collaborative_tasks, f, indent=2)
-            
-            with open(self.knowledge_base_path / 'agent_knowledge.json', 'w') as f:
-                json.dump(self.agent_knowledge, f, indent=2)
-            
-            with open(self.knowledge_base_path / 'collaboration_metrics.json', 'w') as f:
-                json.dump(self.collaboration_metrics, f, indent=2)
+            with self._lock:
+                if self._documents.get("collaboration_metrics") is not self.collaboration_metrics:
+                    self._documents["collaboration_metrics"] = self.collaboration_metrics
+            self._store.flush()
                 
         except Exception as e:
             logging.error(f"❌ Failed to save knowledge: {e}")
@@ -385,6 +389,16 @@ class CollaborativeKnowledgeManager:
                 f"Momentum: {summary['collaboration_momentum']}")
 
 
-# Global instance for system-wide access
-collaborative_knowledge_manager = CollaborativeKnowledgeManager()
+# Global instance for system-wide access, created on first use so that
+# importing the module does not open a store under the working directory
+_global_instance: Optional[CollaborativeKnowledgeManager] = None
+
+
+def __getattr__(name: str):
+    global _global_instance
+    if name == "collaborative_knowledge_manager":
+        if _global_instance is None:
+            _global_instance = CollaborativeKnowledgeManager()
+        return _global_instance
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
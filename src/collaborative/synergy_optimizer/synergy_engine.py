@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Synergy Engine - Pairwise Agent Synergy from Interaction Events
+
+**Agent-3 Responsibility**: Data analysis and technical implementation
+**Purpose**: Build the agent x agent interaction matrix from real events and keep synergy scores current
+**Features**:
+- Message, collaboration and task-completion events update the pairs they touch in O(1)
+- Exponentially decayed pair accumulators (forward decay: no per-pair decay passes)
+- Top-k and below-threshold pair queries from lazily invalidated heaps
+- Running average and high/medium/low distribution of the synergy scores
+- Full recomputation of every accumulator matrix from an event log
+  (NumPy ``add.at`` over all events when installed, a replay otherwise)
+
+Per agent pair the engine keeps decayed sums of interactions, messages, reply
+quality, task outcomes, successes and speed samples. Every event is weighted
+``2 ** ((t - reference) / half_life)`` when it is added; the decayed value at
+``now`` is the stored sum times ``2 ** (-(now - reference) / half_life)``.
+Since that factor is shared by every pair, ratios of two sums do not change
+between events, so the synergy score of a pair only changes when one of its
+own events arrives:
+
+    overall = 0.4 * success_rate + 0.3 * communication_efficiency + 0.3 * task_completion_speed
+
+- success_rate: decayed successes / decayed task outcomes
+- communication_efficiency: decayed reply quality / decayed messages, where a
+  reply after ``latency`` seconds scores ``reply_target / (reply_target + latency)``
+  and unanswered messages score 0. A message from B to A answers the oldest
+  unanswered message from A to B.
+- task_completion_speed: decayed mean of ``min(1, expected / actual)`` duration
+
+Components without evidence count as 0.5. Events are expected in time order;
+:meth:`SynergyEngine.recompute` sorts its input.
+"""
+
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np  # type: ignore
+    HAS_NUMPY = True
+except ImportError:
+    np = None  # type: ignore
+    HAS_NUMPY = False
+
+Pair = Tuple[str, str]
+
+EVENT_KINDS = ("message", "collaboration", "task_completion")
+KIND_WEIGHTS = {"message": 0.2, "collaboration": 1.0, "task_completion": 1.0}
+
+# Accumulator slots kept per pair
+INTERACTIONS, MESSAGES, REPLY_QUALITY, OUTCOMES, SUCCESSES, SPEED_SAMPLES, SPEED_SUM = range(7)
+ACCUMULATORS = ("interactions", "messages", "reply_quality", "outcomes", "successes", "speed_samples", "speed_sum")
+
+SCORE_WEIGHTS = (0.4, 0.3, 0.3)  # success rate, communication efficiency, task completion speed
+NEUTRAL_SCORE = 0.5
+HIGH_SYNERGY = 0.8
+MEDIUM_SYNERGY = 0.5
+MAX_GROWTH_EXPONENT = 500.0  # rebase the forward-decay reference before 2**x gets near overflow
+
+
+def pair_key(a: str, b: str) -> Pair:
+    return (a, b) if a <= b else (b, a)
+
+
+def synergy_band(score: float) -> str:
+    if score >= HIGH_SYNERGY:
+        return "high"
+    return "medium" if score >= MEDIUM_SYNERGY else "low"
+
+
+@dataclass
+class InteractionEvent:
+    """One observed interaction; ``agents`` is (sender, *recipients) for messages."""
+    kind: str
+    agents: Tuple[str, ...]
+    timestamp: float
+    success: Optional[bool] = None
+    duration: Optional[float] = None           # seconds
+    expected_duration: Optional[float] = None  # seconds
+
+    def pairs(self) -> List[Tuple[str, str]]:
+        """(a, b) agent pairs the event touches; for messages a is the sender"""
+        agents = list(dict.fromkeys(self.agents))
+        if self.kind == "message":
+            return [(agents[0], r) for r in agents[1:]]
+        return list(itertools.combinations(agents, 2))
+
+    @property
+    def speed(self) -> Optional[float]:
+        if self.duration and self.expected_duration and self.duration > 0:
+            return min(1.0, self.expected_duration / self.duration)
+        return None
+
+
+class SynergyEngine:
+    """Incremental pairwise synergy scores with heap-backed pair queries (not thread-safe)"""
+
+    def __init__(self, half_life_sec: float = 7 * 24 * 3600.0, reply_target_sec: float = 300.0,
+                 history_sec: float = 28 * 24 * 3600.0):
+        self.half_life = float(half_life_sec)
+        self.reply_target = float(reply_target_sec)
+        self.history_sec = float(history_sec)
+        self.reference: Optional[float] = None
+
+        self.agents: Dict[str, int] = {}
+        self._acc: Dict[Pair, List[float]] = {}
+        self._pending: Dict[Tuple[str, str], float] = {}  # (sender, recipient) -> first unanswered message time
+        self.events: Deque[InteractionEvent] = deque()
+
+        # Scores and the structures answering queries over them
+        self._scores: Dict[Pair, float] = {}
+        self._version: Dict[Pair, int] = {}
+        self._high: List[Tuple[float, int, Pair]] = []  # (-score, version, pair)
+        self._low: List[Tuple[float, int, Pair]] = []   # (score, version, pair)
+        self._seq = itertools.count()
+        self._score_sum = 0.0
+        self._bands = {"high": 0, "medium": 0, "low": 0}
+        self._changed: Dict[Pair, None] = {}
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, pair: Pair) -> bool:
+        return pair_key(*pair) in self._scores
+
+    # ---------- forward decay ----------
+    def _growth(self, timestamp: float) -> float:
+        if self.reference is None:
+            self.reference = timestamp
+        exponent = (timestamp - self.reference) / self.half_life
+        if exponent > MAX_GROWTH_EXPONENT:
+            self._rebase(timestamp)
+            exponent = 0.0
+        return 2.0 ** exponent
+
+    def _rebase(self, timestamp: float) -> None:
+        factor = 2.0 ** (-(timestamp - self.reference) / self.half_life)
+        for acc in self._acc.values():
+            for slot in range(len(acc)):
+                acc[slot] *= factor
+        self.reference = timestamp
+
+    def _decay(self, now: Optional[float]) -> float:
+        """Factor turning stored sums into values decayed to ``now``"""
+        if self.reference is None:
+            return 1.0
+        now = time.time() if now is None else now
+        return 2.0 ** (-(now - self.reference) / self.half_life)
+
+    def _agent(self, agent: str) -> None:
+        if agent not in self.agents:
+            self.agents[agent] = len(self.agents)
+
+    # ---------- recording ----------
+    def record_message(self, sender: str, recipients: Sequence[str], timestamp: Optional[float] = None) -> None:
+        self.record(InteractionEvent("message", (sender, *recipients), time.time() if timestamp is None else timestamp))
+
+    def record_collaboration(self, agents: Sequence[str], timestamp: Optional[float] = None,
+                             success: Optional[bool] = None, duration: Optional[float] = None,
+                             expected_duration: Optional[float] = None) -> None:
+        self.record(InteractionEvent("collaboration", tuple(agents), time.time() if timestamp is None else timestamp,
+                                     success, duration, expected_duration))
+
+    def record_task_completion(self, agents: Sequence[str], timestamp: Optional[float] = None,
+                               success: bool = True, duration: Optional[float] = None,
+                               expected_duration: Optional[float] = None) -> None:
+        self.record(InteractionEvent("task_completion", tuple(agents), time.time() if timestamp is None else timestamp,
+                                     success, duration, expected_duration))
+
+    def record(self, event: InteractionEvent) -> None:
+        """Add one event to the log and rescore the pairs it touches"""
+        if event.kind not in KIND_WEIGHTS:
+            raise ValueError(f"Unknown interaction kind '{event.kind}'")
+        self.events.append(event)
+        cutoff = event.timestamp - self.history_sec
+        while self.events and self.events[0].timestamp < cutoff:
+            self.events.popleft()
+        for pair in self._ingest(event):
+            self._rescore(pair)
+
+    def _ingest(self, event: InteractionEvent) -> List[Pair]:
+        """Add an event to the pair accumulators; returns the touched pairs"""
+        w = self._growth(event.timestamp)
+        weight = KIND_WEIGHTS[event.kind] * w
+        speed = event.speed
+        touched = []
+        for a, b in event.pairs():
+            if a == b:
+                continue
+            self._agent(a)
+            self._agent(b)
+            pair = pair_key(a, b)
+            acc = self._acc.get(pair)
+            if acc is None:
+                acc = self._acc[pair] = [0.0] * len(ACCUMULATORS)
+            acc[INTERACTIONS] += weight
+            if event.kind == "message":
+                acc[MESSAGES] += w
+                asked = self._pending.pop((b, a), None)
+                if asked is not None:
+                    latency = max(0.0, event.timestamp - asked)
+                    acc[REPLY_QUALITY] += w * self.reply_target / (self.reply_target + latency)
+                self._pending.setdefault((a, b), event.timestamp)
+            else:
+                if event.success is not None:
+                    acc[OUTCOMES] += w
+                    acc[SUCCESSES] += w * bool(event.success)
+                if speed is not None:
+                    acc[SPEED_SAMPLES] += w
+                    acc[SPEED_SUM] += w * speed
+            touched.append(pair)
+        return touched
+
+    # ---------- scores ----------
+    @staticmethod
+    def _components(acc: Sequence[float]) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        success = acc[SUCCESSES] / acc[OUTCOMES] if acc[OUTCOMES] > 0 else None
+        communication = acc[REPLY_QUALITY] / acc[MESSAGES] if acc[MESSAGES] > 0 else None
+        speed = acc[SPEED_SUM] / acc[SPEED_SAMPLES] if acc[SPEED_SAMPLES] > 0 else None
+        return success, communication, speed
+
+    @classmethod
+    def _overall(cls, acc: Sequence[float]) -> float:
+        return sum(weight * (NEUTRAL_SCORE if value is None else value)
+                   for weight, value in zip(SCORE_WEIGHTS, cls._components(acc)))
+
+    def _rescore(self, pair: Pair) -> None:
+        score = self._overall(self._acc[pair])
+        old = self._scores.get(pair)
+        if old is not None:
+            self._score_sum -= old
+            self._bands[synergy_band(old)] -= 1
+        self._scores[pair] = score
+        self._score_sum += score
+        self._bands[synergy_band(score)] += 1
+        version = next(self._seq)
+        self._version[pair] = version
+        heapq.heappush(self._high, (-score, version, pair))
+        heapq.heappush(self._low, (score, version, pair))
+        self._changed[pair] = None
+        if len(self._high) > 2 * len(self._scores) + 64:
+            self._rebuild_heaps()
+
+    def _rebuild_heaps(self) -> None:
+        """Drop stale heap entries; also resyncs the running sum"""
+        self._high = [(-score, self._version[pair], pair) for pair, score in self._scores.items()]
+        self._low = [(score, self._version[pair], pair) for pair, score in self._scores.items()]
+        heapq.heapify(self._high)
+        heapq.heapify(self._low)
+        self._score_sum = math.fsum(self._scores.values())
+
+    def _rescore_all(self) -> None:
+        self._scores = {pair: self._overall(acc) for pair, acc in self._acc.items()}
+        self._version = {pair: next(self._seq) for pair in self._scores}
+        self._bands = {"high": 0, "medium": 0, "low": 0}
+        for score in self._scores.values():
+            self._bands[synergy_band(score)] += 1
+        self._changed = dict.fromkeys(self._scores)
+        self._rebuild_heaps()
+
+    def _valid(self, entry: Tuple[float, int, Pair]) -> bool:
+        return self._version.get(entry[2]) == entry[1]
+
+    def score(self, a: str, b: str) -> Optional[float]:
+        return self._scores.get(pair_key(a, b))
+
+    def top_k(self, k: int) -> List[Tuple[Pair, float]]:
+        """The k highest-synergy pairs, best first"""
+        found, kept = [], []
+        while self._high and len(found) < k:
+            entry = heapq.heappop(self._high)
+            if self._valid(entry):  # stale entries are dropped for good
+                kept.append(entry)
+                found.append((entry[2], -entry[0]))
+        for entry in kept:
+            heapq.heappush(self._high, entry)
+        return found
+
+    def below(self, threshold: float) -> List[Tuple[Pair, float]]:
+        """Pairs scoring under ``threshold``, worst first"""
+        found, kept = [], []
+        while self._low and self._low[0][0] < threshold:
+            entry = heapq.heappop(self._low)
+            if self._valid(entry):
+                kept.append(entry)
+                found.append((entry[2], entry[0]))
+        for entry in kept:
+            heapq.heappush(self._low, entry)
+        return found
+
+    def statistics(self) -> Dict[str, Any]:
+        count = len(self._scores)
+        return {
+            "pairs": count,
+            "average": self._score_sum / count if count else 0.0,
+            "distribution": dict(self._bands),
+        }
+
+    def snapshot(self, a: str, b: str, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Score components and decayed counts of one pair"""
+        pair = pair_key(a, b)
+        acc = self._acc.get(pair)
+        if acc is None:
+            return None
+        decay = self._decay(now)
+        success, communication, speed = self._components(acc)
+        return {
+            "agent_pair": pair,
+            "interactions": acc[INTERACTIONS] * decay,
+            "messages": acc[MESSAGES] * decay,
+            "success_rate": NEUTRAL_SCORE if success is None else success,
+            "communication_efficiency": NEUTRAL_SCORE if communication is None else communication,
+            "task_completion_speed": NEUTRAL_SCORE if speed is None else speed,
+            "overall_synergy": self._scores[pair],
+        }
+
+    def drain_changed(self) -> List[Pair]:
+        """Pairs rescored since the last call"""
+        changed = list(self._changed)
+        self._changed.clear()
+        return changed
+
+    # ---------- matrices and persistence ----------
+    def interaction_matrix(self, accumulator: str = "interactions", now: Optional[float] = None):
+        """Symmetric agent x agent matrix of one decayed accumulator, rows in ``agents`` order"""
+        slot = ACCUMULATORS.index(accumulator)
+        decay = self._decay(now)
+        n = len(self.agents)
+        matrix = np.zeros((n, n)) if HAS_NUMPY else [[0.0] * n for _ in range(n)]
+        for (a, b), acc in self._acc.items():
+            i, j = self.agents[a], self.agents[b]
+            if HAS_NUMPY:
+                matrix[i, j] = matrix[j, i] = acc[slot] * decay
+            else:
+                matrix[i][j] = matrix[j][i] = acc[slot] * decay
+        return matrix
+
+    def export_state(self, a: str, b: str, now: Optional[float] = None) -> Dict[str, Any]:
+        """JSON-friendly accumulators of one pair, decayed to ``now``"""
+        now = time.time() if now is None else now
+        decay = self._decay(now)
+        return {"at": now, "accumulators": [value * decay for value in self._acc[pair_key(a, b)]]}
+
+    def load(self, states: Iterable[Tuple[Pair, Dict[str, Any]]], changed: bool = False) -> int:
+        """Restore pairs from :meth:`export_state` records; returns how many were loaded"""
+        loaded = 0
+        for (a, b), state in states:
+            pair = pair_key(a, b)
+            self._agent(pair[0])
+            self._agent(pair[1])
+            growth = self._growth(float(state["at"]))
+            self._acc[pair] = [float(value) * growth for value in state["accumulators"]]
+            self._rescore(pair)
+            if not changed:
+                self._changed.pop(pair, None)
+            loaded += 1
+        return loaded
+
+    def recompute(self, events: Optional[Iterable[InteractionEvent]] = None) -> int:
+        """Rebuild every accumulator from ``events`` (default: the engine's event log)
+
+        Replaces the incremental state, including reply tracking; returns the
+        number of pairs. With NumPy all pair contributions are accumulated at
+        once with ``np.add.at``; replies are matched per pair from the runs of
+        same-direction messages in time order.
+        """
+        events = sorted(self.events if events is None else events, key=lambda e: e.timestamp)
+        self._acc, self._pending = {}, {}
+        # Reference at the newest event: every weight is at most 1, so nothing can overflow
+        self.reference = events[-1].timestamp if events else None
+        for event in events:
+            for agent in event.agents:
+                self._agent(agent)
+        if HAS_NUMPY and events:
+            self._recompute_vectorized(events)
+        else:
+            for event in events:
+                self._ingest(event)
+        self._rescore_all()
+        return len(self._scores)
+
+    def _recompute_vectorized(self, events: List[InteractionEvent]) -> None:
+        n = len(self.agents)
+        kind_codes = {kind: code for code, kind in enumerate(EVENT_KINDS)}
+        kind_weights = np.array([KIND_WEIGHTS[kind] for kind in EVENT_KINDS])
+        first, second, stamps, kinds, outcomes, speeds = [], [], [], [], [], []
+        for event in events:
+            speed = event.speed
+            outcome = -1 if event.kind == "message" or event.success is None else int(bool(event.success))
+            for a, b in event.pairs():
+                if a == b:
+                    continue
+                first.append(self.agents[a])
+                second.append(self.agents[b])
+                stamps.append(event.timestamp)
+                kinds.append(kind_codes[event.kind])
+                outcomes.append(outcome)
+                speeds.append(math.nan if speed is None or event.kind == "message" else speed)
+        if not first:
+            return
+
+        first, second = np.array(first), np.array(second)
+        stamps, kinds = np.array(stamps, dtype=float), np.array(kinds)
+        outcomes, speeds = np.array(outcomes), np.array(speeds, dtype=float)
+        low, high = np.minimum(first, second), np.maximum(first, second)
+        flat = low * n + high
+        w = np.exp2((stamps - self.reference) / self.half_life)
+        acc = np.zeros((len(ACCUMULATORS), n * n))
+
+        np.add.at(acc[INTERACTIONS], flat, w * kind_weights[kinds])
+        is_message = kinds == kind_codes["message"]
+        np.add.at(acc[MESSAGES], flat[is_message], w[is_message])
+        has_outcome = outcomes >= 0
+        np.add.at(acc[OUTCOMES], flat[has_outcome], w[has_outcome])
+        np.add.at(acc[SUCCESSES], flat[has_outcome], w[has_outcome] * outcomes[has_outcome])
+        has_speed = ~np.isnan(speeds)
+        np.add.at(acc[SPEED_SAMPLES], flat[has_speed], w[has_speed])
+        np.add.at(acc[SPEED_SUM], flat[has_speed], w[has_speed] * speeds[has_speed])
+
+        # Replies: within a pair, the first message of each run answers the previous run's first message
+        idx = np.nonzero(is_message)[0]
+        if len(idx):
+            idx = idx[np.lexsort((idx, stamps[idx], flat[idx]))]  # by pair, then time, then arrival
+            m_flat, m_sender, m_time = flat[idx], first[idx], stamps[idx]
+            new_pair = np.ones(len(idx), dtype=bool)
+            new_pair[1:] = m_flat[1:] != m_flat[:-1]
+            run_start = new_pair.copy()
+            run_start[1:] |= m_sender[1:] != m_sender[:-1]
+            starts = np.nonzero(run_start)[0]
+            answers = starts[1:][~new_pair[starts[1:]]]
+            asked = starts[:-1][~new_pair[starts[1:]]]
+            latency = np.maximum(0.0, m_time[answers] - m_time[asked])
+            quality = self.reply_target / (self.reply_target + latency)
+            np.add.at(acc[REPLY_QUALITY], m_flat[answers], w[idx[answers]] * quality)
+
+            # The last run of every pair is still waiting for an answer
+            last_run = np.ones(len(starts), dtype=bool)
+            last_run[:-1] = m_flat[starts[1:]] != m_flat[starts[:-1]]
+            names = list(self.agents)
+            for k in starts[last_run].tolist():
+                a, b = int(first[idx[k]]), int(second[idx[k]])
+                self._pending[(names[a], names[b])] = float(m_time[k])
+
+        acc = acc.reshape(len(ACCUMULATORS), n, n)
+        names = list(self.agents)
+        for i, j in zip(*np.nonzero(acc[INTERACTIONS])):
+            self._acc[pair_key(names[i], names[j])] = acc[:, i, j].tolist()
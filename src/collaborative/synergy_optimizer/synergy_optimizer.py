@@ -9,7 +9,6 @@ This module provides advanced analytics and optimization for multi-agent
 collaboration, enabling data-driven improvements in agent synergy and performance.
 """
 
-import json
 import time
 import threading
 from datetime import datetime, timedelta
@@ -19,7 +18,11 @@ import logging
 import math
 from dataclasses import dataclass, asdict
 from collections import defaultdict, Counter
-import numpy as np
+
+from ...core.job_scheduler import get_scheduler
+from ...core.resource_profiler import ResourceSeriesStore, open_store
+from ..entity_store import EntityStore, read_json
+from .synergy_engine import SynergyEngine
 
 @dataclass
 class SynergyScore:
@@ -33,6 +36,12 @@ class SynergyScore:
     last_updated: str
     trend: str  # "improving", "stable", "declining"
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SynergyScore":
+        data = dict(data)
+        data["agent_pair"] = tuple(data["agent_pair"])
+        return cls(**data)
+
 @dataclass
 class PerformanceMetric:
     """Performance metric structure."""
@@ -67,16 +76,29 @@ class SynergyOptimizer:
     collaboration patterns, and implement automated improvement tools.
     """
     
-    def __init__(self, data_path: str = "src/collaborative/synergy_optimizer/data"):
+    def __init__(self, data_path: str = "src/collaborative/synergy_optimizer/data",
+                 resource_store: Optional[ResourceSeriesStore] = None):
         self.data_path = Path(data_path)
+        # Samples written by the fleet resource profiler (read-only here)
+        self.resource_store = resource_store or open_store()
+        self.resource_window_sec = 300.0
         self.data_path.mkdir(parents=True, exist_ok=True)
         
-        # Core synergy data
-        self.agent_synergies: Dict[Tuple[str, str], SynergyScore] = {}
-        self.performance_metrics: Dict[str, PerformanceMetric] = {}
-        self.collaboration_patterns: Dict[str, Dict] = {} # Changed to Dict for simpler JSON loading
+        # Core synergy data (SQLite-backed, only changed entries are written)
+        self._store = EntityStore(self.data_path / 'synergy_optimizer.sqlite')
+        self.agent_synergies = self._store.repository(
+            "agent_synergies", decode=SynergyScore.from_dict,
+            key_encode="|".join, key_decode=lambda raw: tuple(raw.split("|")))
+        self.performance_metrics = self._store.repository(
+            "performance_metrics", decode=lambda raw: PerformanceMetric(**raw))
+        self.collaboration_patterns = self._store.repository("collaboration_patterns")
+        self.pair_interactions = self._store.repository(
+            "pair_interactions", key_encode="|".join, key_decode=lambda raw: tuple(raw.split("|")))
         self.optimization_history: List[Dict] = []
         
+        # Pairwise synergy from message, collaboration and task-completion events
+        self.synergy_engine = SynergyEngine()
+        
         # Analytics engine
         self.analytics_engine = None
         self.optimization_algorithms = {}
@@ -84,7 +106,7 @@ class SynergyOptimizer:
         
         # Real-time optimization
         self._optimization_active = False
-        self._optimization_thread = None
+        self._optimization_job = None
         self._lock = threading.RLock()
         
         # Performance tracking
@@ -115,37 +137,105 @@ class SynergyOptimizer:
         )
     
     def _load_existing_data(self):
-        """Load existing synergy optimization data."""
+        """Open persisted synergy data (imports the old JSON files once)."""
         try:
-            # Load agent synergies
-            synergies_file = self.data_path / 'agent_synergies.json'
-            if synergies_file.exists():
-                with open(synergies_file, 'r') as f:
-                    synergies_data = json.load(f)
-                    for pair_str, synergy_data in synergies_data.items():
-                        # Convert string pair back to tuple
-                        agent_pair = tuple(pair_str.strip('()').split(', '))
-                        self.agent_synergies[agent_pair] = SynergyScore(**synergy_data)
-            
-            # Load performance metrics
-            metrics_file = self.data_path / 'performance_metrics.json'
-            if metrics_file.exists():
-                with open(metrics_file, 'r') as f:
-                    metrics_data = json.load(f)
-                    for metric_id, metric_data in metrics_data.items():
-                        self.performance_metrics[metric_id] = PerformanceMetric(**metric_data)
-            
-            # Load collaboration patterns
-            patterns_file = self.data_path / 'collaboration_patterns.json'
-            if patterns_file.exists():
-                with open(patterns_file, 'r') as f:
-                    self.collaboration_patterns = json.load(f)
+            def import_json_files():
+                synergies_data = read_json(self.data_path / 'agent_synergies.json') or {}
+                for pair_str, synergy_data in synergies_data.items():
+                    # Keys were written as str(tuple): "('Agent-1', 'Agent-2')"
+                    agent_pair = tuple(part.strip(" '\"") for part in pair_str.strip('()').split(','))
+                    self.agent_synergies[agent_pair] = SynergyScore.from_dict({**synergy_data, "agent_pair": agent_pair})
+                metrics_data = read_json(self.data_path / 'performance_metrics.json') or {}
+                for metric_id, metric_data in metrics_data.items():
+                    self.performance_metrics[metric_id] = PerformanceMetric(**metric_data)
+                self.collaboration_patterns.update(read_json(self.data_path / 'collaboration_patterns.json') or {})
+            
+            self._store.import_legacy("json-v1", import_json_files)
+            self._load_synergy_engine()
                     
             logging.info(f"📚 Loaded existing data: {len(self.agent_synergies)} synergies, {len(self.performance_metrics)} metrics")
             
         except Exception as e:
             logging.warning(f"⚠️ Could not load existing data: {e}")
     
+    def _load_synergy_engine(self):
+        """Restore pair accumulators; scores without any (older data) seed one observation each."""
+        engine = self.synergy_engine
+        engine.load(self.pair_interactions.items())
+        seeds = []
+        for pair in self.agent_synergies.keys():
+            if pair not in engine:
+                score = self.agent_synergies[pair]
+                seeds.append((pair, {
+                    "at": datetime.fromisoformat(score.last_updated).timestamp(),
+                    "accumulators": [max(1, score.collaboration_frequency), 1.0, score.communication_efficiency,
+                                     1.0, score.success_rate, 1.0, score.task_completion_speed],
+                }))
+        engine.load(seeds, changed=True)
+    
+    def connect(self, communication_hub=None, knowledge_manager=None):
+        """Feed hub messages and knowledge-manager tasks into the synergy engine."""
+        if communication_hub is not None:
+            communication_hub.message_listeners.append(
+                lambda message: self.record_message(
+                    message.sender, message.recipients, datetime.fromisoformat(message.timestamp).timestamp()))
+        if knowledge_manager is not None:
+            knowledge_manager.task_listeners.append(self._on_collaborative_task)
+    
+    def _on_collaborative_task(self, event: str, task: Dict[str, Any]):
+        created = datetime.fromisoformat(task["created_at"]).timestamp()
+        if event == "created":
+            self.record_collaboration(task["agents"], created)
+        elif event == "completed":
+            completed = datetime.fromisoformat(task["actual_completion"]).timestamp()
+            expected = None
+            if task.get("estimated_completion"):
+                expected = datetime.fromisoformat(task["estimated_completion"]).timestamp() - created
+            self.record_task_completion(task["agents"], completed, duration=completed - created,
+                                        expected_duration=expected)
+    
+    def record_message(self, sender: str, recipients: List[str], timestamp: Optional[float] = None):
+        """Record a message between agents (a reply answers the partner's oldest open message)."""
+        with self._lock:
+            self.synergy_engine.record_message(sender, recipients, timestamp)
+    
+    def record_collaboration(self, agents: List[str], timestamp: Optional[float] = None,
+                             success: Optional[bool] = None, duration: Optional[float] = None,
+                             expected_duration: Optional[float] = None):
+        """Record agents working together; ``success`` and durations are optional outcome data."""
+        with self._lock:
+            self.synergy_engine.record_collaboration(agents, timestamp, success, duration, expected_duration)
+    
+    def record_task_completion(self, agents: List[str], timestamp: Optional[float] = None,
+                               success: bool = True, duration: Optional[float] = None,
+                               expected_duration: Optional[float] = None):
+        """Record a task finished by ``agents``; durations in seconds score completion speed."""
+        with self._lock:
+            self.synergy_engine.record_task_completion(agents, timestamp, success, duration, expected_duration)
+    
+    def _sync_synergy_scores(self) -> List[Tuple[str, str]]:
+        """Write the pairs the engine rescored since the last sync; returns them."""
+        with self._lock:
+            engine = self.synergy_engine
+            now = time.time()
+            changed = engine.drain_changed()
+            for pair in changed:
+                snapshot = engine.snapshot(*pair, now=now)
+                previous = self.agent_synergies.get(pair)
+                delta = snapshot["overall_synergy"] - previous.overall_synergy if previous else 0.0
+                self.agent_synergies[pair] = SynergyScore(
+                    agent_pair=pair,
+                    collaboration_frequency=int(round(snapshot["interactions"])),
+                    success_rate=snapshot["success_rate"],
+                    communication_efficiency=snapshot["communication_efficiency"],
+                    task_completion_speed=snapshot["task_completion_speed"],
+                    overall_synergy=snapshot["overall_synergy"],
+                    last_updated=datetime.now().isoformat(),
+                    trend="improving" if delta > 0.05 else "declining" if delta < -0.05 else "stable"
+                )
+                self.pair_interactions[pair] = engine.export_state(*pair, now=now)
+            return changed
+    
     def _initialize_analytics(self):
         """Initialize analytics engine and optimization algorithms."""
         try:
@@ -175,47 +265,40 @@ class SynergyOptimizer:
         with self._lock:
             if not self._optimization_active:
                 self._optimization_active = True
-                self._optimization_thread = threading.Thread(target=self._monitor_and_optimize, daemon=True)
-                self._optimization_thread.start()
+                self._optimization_job = get_scheduler().add_job(
+                    "synergy_optimizer.optimize", self._monitor_and_optimize,
+                    interval=60, error_interval=120)
                 logging.info("🚀 Agent-3: Optimization monitoring started - analytics and optimization active")
     
     def stop_optimization_monitoring(self):
         """Stop optimization monitoring."""
         with self._lock:
             self._optimization_active = False
-            if self._optimization_thread:
-                self._optimization_thread.join(timeout=5)
+            if self._optimization_job:
+                get_scheduler().remove_job(self._optimization_job)
+                self._optimization_job = None
             logging.info("🛑 Agent-3: Optimization monitoring stopped")
     
     def _monitor_and_optimize(self):
-        """Background thread for monitoring and optimization."""
-        while self._optimization_active:
-            try:
-                # Collect performance data
-                self._collect_performance_data()
-                
-                # Analyze current state
-                analysis_results = self._analyze_current_state()
-                
-                # Generate optimization recommendations
-                recommendations = self._generate_optimization_recommendations(analysis_results)
-                
-                # Apply optimizations
-                if recommendations:
-                    self._apply_optimizations(recommendations)
-                
-                # Update metrics and tracking
-                self._update_optimization_tracking()
-                
-                # Save data periodically
-                self._save_data()
-                
-                # Sleep for optimization interval
-                time.sleep(60)  # 1 minute optimization interval
-                
-            except Exception as e:
-                logging.error(f"❌ Optimization monitoring error: {e}")
-                time.sleep(120)  # Longer sleep on error
+        """One optimization pass; a shared scheduler job every 60 s (120 s after an error)."""
+        # Collect performance data
+        self._collect_performance_data()
+            
+        # Analyze current state
+        analysis_results = self._analyze_current_state()
+            
+        # Generate optimization recommendations
+        recommendations = self._generate_optimization_recommendations(analysis_results)
+            
+        # Apply optimizations
+        if recommendations:
+            self._apply_optimizations(recommendations)
+            
+        # Update metrics and tracking
+        self._update_optimization_tracking()
+            
+        # Save data periodically
+        self._save_data()
     
     def _collect_performance_data(self):
         """Collect real-time performance data from the system."""
@@ -245,15 +328,23 @@ class SynergyOptimizer:
             logging.error(f"❌ Failed to collect performance data: {e}")
     
     def _collect_collaboration_data(self) -> Dict[str, Any]:
-        """Collect agent collaboration data."""
-        # This would integrate with the collaborative knowledge manager
-        # For now, return sample data structure
-        return {
-            "active_collaborations": 0,
-            "agent_interactions": {},
-            "task_completion_rates": {},
-            "communication_frequency": {}
-        }
+        """Collect agent collaboration data for the pairs that interacted since the last pass."""
+        with self._lock:
+            changed = self._sync_synergy_scores()
+            now = time.time()
+            data = {
+                "active_collaborations": len(changed),
+                "agent_interactions": {},
+                "task_completion_rates": {},
+                "communication_frequency": {}
+            }
+            for pair in changed:
+                snapshot = self.synergy_engine.snapshot(*pair, now=now)
+                key = "|".join(pair)
+                data["agent_interactions"][key] = snapshot["interactions"]
+                data["task_completion_rates"][key] = snapshot["success_rate"]
+                data["communication_frequency"][key] = snapshot["messages"]
+            return data
     
     def _collect_system_performance(self) -> Dict[str, Any]:
         """Collect system performance metrics."""
@@ -265,12 +356,27 @@ class SynergyOptimizer:
         }
     
     def _collect_resource_utilization(self) -> Dict[str, Any]:
-        """Collect resource utilization data."""
+        """Collect resource utilization from the fleet resource profiler's store.
+        
+        CPU is percent of one core summed over every profiled process and
+        memory is RSS in MB.  psutil does not attribute network traffic per
+        process, so ``network_usage`` stays 0 and process I/O is reported as
+        ``io_bytes_per_sec``.  Everything is zero while no profiler is running.
+        """
+        try:
+            series = self.resource_store.summary(self.resource_window_sec)
+        except Exception as e:
+            logging.warning(f"⚠️ Resource store unavailable: {e}")
+            series = {}
         return {
-            "cpu_usage": 0.0,
-            "memory_usage": 0.0,
+            "cpu_usage": sum(s["cpu_avg"] for s in series.values()),
+            "memory_usage": sum(s["rss_last"] for s in series.values()) / (1024 * 1024),
             "network_usage": 0.0,
-            "agent_workloads": {}
+            "io_bytes_per_sec": sum(s["read_bps"] + s["write_bps"] for s in series.values()),
+            "agent_workloads": {
+                name: {"cpu_avg": s["cpu_avg"], "cpu_max": s["cpu_max"], "rss_mb": s["rss_last"] / (1024 * 1024)}
+                for name, s in series.items()
+            },
         }
     
     def _cleanup_old_data(self):
@@ -297,7 +403,7 @@ class SynergyOptimizer:
         
         try:
             # Analyze agent synergies
-            if self.agent_synergies:
+            if len(self.synergy_engine):
                 analysis_results["synergy_analysis"] = self._analyze_agent_synergies()
             
             # Analyze performance trends
@@ -318,31 +424,24 @@ class SynergyOptimizer:
     
     def _analyze_agent_synergies(self) -> Dict[str, Any]:
         """Analyze agent synergy patterns."""
-        if not self.agent_synergies:
-            return {}
-        
-        # Calculate overall synergy statistics
-        synergy_scores = [s.overall_synergy for s in self.agent_synergies.values()]
-        
-        analysis = {
-            "total_synergies": len(self.agent_synergies),
-            "average_synergy": np.mean(synergy_scores) if synergy_scores else 0.0,
-            "synergy_distribution": {
-                "high": len([s for s in synergy_scores if s >= 0.8]),
-                "medium": len([s for s in synergy_scores if 0.5 <= s < 0.8]),
-                "low": len([s for s in synergy_scores if s < 0.5])
-            },
-            "top_synergies": sorted(
-                [(pair, score.overall_synergy) for pair, score in self.agent_synergies.items()],
-                key=lambda x: x[1], reverse=True
-            )[:5],
-            "improvement_opportunities": [
-                pair for pair, score in self.agent_synergies.items()
-                if score.overall_synergy < 0.6
-            ]
-        }
-        
-        return analysis
+        # The engine is not thread-safe and its heap queries pop and re-push entries,
+        # so they run under the lock the listener threads record events with
+        with self._lock:
+            if not len(self.synergy_engine):
+                return {}
+            
+            # Running statistics and heap queries from the synergy engine
+            stats = self.synergy_engine.statistics()
+            
+            analysis = {
+                "total_synergies": stats["pairs"],
+                "average_synergy": stats["average"],
+                "synergy_distribution": stats["distribution"],
+                "top_synergies": self.synergy_engine.top_k(5),
+                "improvement_opportunities": [pair for pair, _ in self.synergy_engine.below(0.6)]
+            }
+            
+            return analysis
     
     def _analyze_performance_trends(self) -> Dict[str, Any]:
         """Analyze performance trends over time."""
@@ -409,16 +508,13 @@ class SynergyOptimizer:
         opportunities = []
         
         # Check for low synergy scores
-        low_synergies = [
-            (pair, score) for pair, score in self.agent_synergies.items()
-            if score.overall_synergy < 0.6
-        ]
-        
+        with self._lock:
+            low_synergies = self.synergy_engine.below(0.6)
         for pair, score in low_synergies:
             opportunities.append({
                 "type": "synergy_improvement",
-                "priority": "high" if score.overall_synergy < 0.4 else "medium",
-                "description": f"Improve synergy between {pair[0]} and {pair[1]} (current: {score.overall_synergy:.2f})",
+                "priority": "high" if score < 0.4 else "medium",
+                "description": f"Improve synergy between {pair[0]} and {pair[1]} (current: {score:.2f})",
                 "estimated_impact": "high",
                 "implementation_effort": "medium"
             })
@@ -514,11 +610,10 @@ class SynergyOptimizer:
     def _optimize_agent_synergy(self, recommendation: OptimizationRecommendation) -> Dict[str, Any]:
         """Optimize agent synergy patterns."""
         try:
-            # Get low-synergy pairs
-            low_synergies = [
-                (pair, score) for pair, score in self.agent_synergies.items()
-                if score.overall_synergy < 0.6
-            ]
+            # Get low-synergy pairs (sync and query together so every pair has a stored score)
+            with self._lock:
+                self._sync_synergy_scores()
+                low_synergies = [(pair, self.agent_synergies[pair]) for pair, _ in self.synergy_engine.below(0.6)]
             
             optimizations = []
             for pair, score in low_synergies:
@@ -611,29 +706,16 @@ class SynergyOptimizer:
     def get_synergy_summary(self) -> Dict[str, Any]:
         """Get comprehensive synergy optimization summary (Agent-3 reporting)."""
         with self._lock:
-            total_synergies = len(self.agent_synergies)
-            high_synergies = len([s for s in self.agent_synergies.values() if s.overall_synergy >= 0.8])
-            medium_synergies = len([s for s in self.agent_synergies.values() if 0.5 <= s.overall_synergy < 0.8])
-            low_synergies = len([s for s in self.agent_synergies.values() if s.overall_synergy < 0.5])
-            
-            # Calculate average synergy
-            if total_synergies > 0:
-                avg_synergy = sum(s.overall_synergy for s in self.agent_synergies.values()) / total_synergies
-            else:
-                avg_synergy = 0.0
+            stats = self.synergy_engine.statistics()
             
             # Optimization effectiveness
             recent_effectiveness = self.optimization_effectiveness.get("recent_success_rate", 0.0)
             
             summary = {
                 "optimization_status": "ACTIVE",
-                "total_synergies": total_synergies,
-                "synergy_distribution": {
-                    "high": high_synergies,
-                    "medium": medium_synergies,
-                    "low": low_synergies
-                },
-                "average_synergy": avg_synergy,
+                "total_synergies": stats["pairs"],
+                "synergy_distribution": stats["distribution"],
+                "average_synergy": stats["average"],
                 "optimization_effectiveness": recent_effectiveness,
                 "active_optimizations": len([r for r in self.optimization_history if r.get("status") == "applied"]),
                 "pending_recommendations": len([r for r in self.optimization_history if r.get("status") == "pending"]),
@@ -643,22 +725,10 @@ class SynergyOptimizer:
             return summary
     
     def _save_data(self):
-        """Save synergy optimization data to persistent storage."""
+        """Write changed synergy optimization data to persistent storage."""
         try:
-            # Save agent synergies
-            synergies_data = {str(pair): asdict(score) for pair, score in self.agent_synergies.items()}
-            with open(self.data_path / 'agent_synergies.json', 'w') as f:
-                json.dump(synergies_data, f, indent=2)
-            
-            # Save performance metrics
-            metrics_data = {mid: asdict(metric) for mid, metric in self.performance_metrics.items()}
-            with open(self.data_path / 'performance_metrics.json', 'w') as f:
-                json.dump(metrics_data, f, indent=2)
-            
-            # Save collaboration patterns
-            with open(self.data_path / 'collaboration_patterns.json', 'w') as f:
-                json.dump(self.collaboration_patterns, f, indent=2)
-                
+            self._sync_synergy_scores()
+            self._store.flush()
         except Exception as e:
             logging.error(f"❌ Failed to save synergy optimization data: {e}")
     
@@ -671,8 +741,18 @@ class SynergyOptimizer:
                 f"Average: {summary['average_synergy']:.2f}")
 
 
-# Global instance for system-wide access
-synergy_optimizer = SynergyOptimizer()
+# Global instance for system-wide access, created on first use so that
+# importing the module does not open a store under the working directory
+_global_instance: Optional[SynergyOptimizer] = None
+
+
+def __getattr__(name: str):
+    global _global_instance
+    if name == "synergy_optimizer":
+        if _global_instance is None:
+            _global_instance = SynergyOptimizer()
+        return _global_instance
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 
@@ -31,6 +31,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 try:
     from src.services.agent_cell_phone import AgentCellPhone, MsgTag
+    from src.core.job_scheduler import get_scheduler
 except ImportError as e:
     print(f"Import error: {e}")
     print("Make sure you're running from the project root directory")
@@ -251,19 +252,14 @@ class T2AKCCollaborativeSystem:
         self._start_collaboration_monitoring()
     
     def _start_collaboration_monitoring(self):
-        """Start continuous collaboration monitoring"""
+        """Start continuous collaboration monitoring (shared scheduler job)"""
         def monitor_collaboration():
-            while True:
-                try:
-                    self._update_collaboration_metrics()
-                    self._check_collaboration_momentum()
-                    time.sleep(30)  # Update every 30 seconds
-                except Exception as e:
-                    print(f"Collaboration monitoring error: {e}")
-                    time.sleep(60)
+            self._update_collaboration_metrics()
+            self._check_collaboration_momentum()
         
-        monitor_thread = threading.Thread(target=monitor_collaboration, daemon=True)
-        monitor_thread.start()
+        # Update every 30 seconds, 60 seconds after an error
+        self.monitor_job = get_scheduler().add_job(
+            "t2akc.collaboration_monitor", monitor_collaboration, interval=30, error_interval=60)
     
     def _update_collaboration_metrics(self):
         """Update collaboration performance metrics"""
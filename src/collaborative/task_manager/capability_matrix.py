@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Capability Matrix - Vectorized Agent Suitability & Optimal Assignment
+
+**Agent-2 Responsibility**: Task Breakdown & Resource Allocation
+**Purpose**: Score every agent against every component at once and assign optimally
+**Features**:
+- Skills kept as a sparse agent x skill matrix, components as skill vectors
+- All suitability scores from one matrix product plus per-agent workload and
+  experience terms (NumPy when installed, sparse row sums otherwise)
+- O(1) workload updates and single-row refreshes when one agent changes
+- Capacitated min-cost assignment (Hungarian-style successive shortest paths)
+
+The score is the same weighted blend ``EnhancedTaskBreakdown`` always used:
+
+    0.4 * skill_match + 0.2 * experience + 0.2 * (1 - workload) + 0.2 * performance
+
+where skill_match is the mean proficiency (primary 1.0, secondary 0.5) over the
+component's required skills and performance the mean per-skill history score
+(0.5 when unknown). Both means are linear in the component's skill vector, so
+the skill and performance terms fold into one weight matrix ``W`` and
+``scores = W @ C.T + bias`` with one bias entry per agent.
+"""
+
+import heapq
+import logging
+from array import array
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+try:
+    import numpy as np  # type: ignore
+    HAS_NUMPY = True
+except ImportError:
+    np = None  # type: ignore
+    HAS_NUMPY = False
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SuitabilityScores:
+    """Agents x components score table; ``values[i][j]`` is ``agents[i]`` on component ``j``"""
+    agents: List[str]
+    values: List[List[float]]
+    _row: Dict[str, int] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self):
+        self._row = {agent: i for i, agent in enumerate(self.agents)}
+
+    def score(self, agent_id: str, component: int) -> float:
+        return self.values[self._row[agent_id]][component]
+
+    def best_agent(self, component: int, eligible: Optional[Callable[[str], bool]] = None) -> Optional[str]:
+        """Highest-scoring (eligible) agent for one component"""
+        best, best_score = None, float("-inf")
+        for agent, row in zip(self.agents, self.values):
+            if (eligible is None or eligible(agent)) and row[component] > best_score:
+                best, best_score = agent, row[component]
+        return best
+
+
+class CapabilityMatrix:
+    """Sparse agent x skill weights with cached, incrementally updated products"""
+
+    def __init__(
+        self,
+        skill_weight: float = 0.4,
+        experience_weight: float = 0.2,
+        availability_weight: float = 0.2,
+        performance_weight: float = 0.2,
+        default_performance: float = 0.5,
+    ):
+        self.skill_weight = skill_weight
+        self.experience_weight = experience_weight
+        self.availability_weight = availability_weight
+        self.performance_weight = performance_weight
+        self.default_performance = default_performance
+
+        self.skills: Dict[str, int] = {}
+        self.agents: List[str] = []
+        self._row: Dict[str, int] = {}
+        self._profiles: List[Tuple[Dict[str, float], Dict[str, float], float]] = []
+        # Sparse rows of W: skill column -> weight
+        self._weights: List[Dict[int, float]] = []
+        self._experience = array("d")
+        self._workload = array("d")
+
+        self._dense = None              # NumPy copy of W, rebuilt when agents/skills are added
+        self._product_key: Optional[tuple] = None
+        self._product = None            # W @ C.T for the last component set
+
+    # ---------- agents ----------
+    def upsert_agent(
+        self,
+        agent_id: str,
+        proficiency: Mapping[str, float],
+        experience: float,
+        workload: float,
+        performance: Optional[Mapping[str, float]] = None,
+    ) -> None:
+        """Add or update an agent; an unchanged profile only updates the workload"""
+        proficiency = {s: max(0.0, min(1.0, float(p))) for s, p in proficiency.items()}
+        performance = dict(performance or {})
+        profile = (proficiency, performance, float(experience))
+        i = self._row.get(agent_id)
+        if i is not None and self._profiles[i] == profile:
+            self.update_workload(agent_id, workload)
+            return
+
+        grew = False
+        for skill in list(proficiency) + list(performance):
+            if skill not in self.skills:
+                self.skills[skill] = len(self.skills)
+                grew = True
+        row: Dict[int, float] = {}
+        for skill, level in proficiency.items():
+            row[self.skills[skill]] = self.skill_weight * level
+        for skill, score in performance.items():
+            col = self.skills[skill]
+            row[col] = row.get(col, 0.0) + self.performance_weight * (score - self.default_performance)
+
+        if i is None:
+            i = self._row[agent_id] = len(self.agents)
+            self.agents.append(agent_id)
+            self._profiles.append(profile)
+            self._weights.append(row)
+            self._experience.append(float(experience))
+            self._workload.append(float(workload))
+            grew = True
+        else:
+            self._profiles[i] = profile
+            self._weights[i] = row
+            self._experience[i] = float(experience)
+            self._workload[i] = float(workload)
+
+        if grew:
+            self._dense = None
+            self._product_key = self._product = None
+        else:
+            self._refresh_row(i)
+
+    def update_workload(self, agent_id: str, workload: float) -> None:
+        """O(1): workload only enters the per-agent bias, cached products stay valid"""
+        self._workload[self._row[agent_id]] = float(workload)
+
+    def _bias(self, i: int) -> float:
+        return (
+            self.experience_weight * self._experience[i]
+            + self.availability_weight * (1.0 - self._workload[i])
+            + self.performance_weight * self.default_performance
+        )
+
+    def _refresh_row(self, i: int) -> None:
+        """Recompute one agent's row of the dense matrix and of the cached product"""
+        if self._dense is not None:
+            self._dense[i, :] = 0.0
+            for col, weight in self._weights[i].items():
+                self._dense[i, col] = weight
+        if self._product is not None:
+            vectors = self._product_key[1]
+            if HAS_NUMPY:
+                self._product[i, :] = self._dense[i] @ vectors.T
+            else:
+                self._product[i] = self._sparse_row(self._weights[i], vectors)
+
+    # ---------- scoring ----------
+    def _vectors(self, components: Sequence[Sequence[str]]):
+        """Component skill vectors scaled by 1/len(required_skills); unknown skills count in the length"""
+        if HAS_NUMPY:
+            vectors = np.zeros((len(components), len(self.skills)))
+            for j, required in enumerate(components):
+                for skill in required:
+                    col = self.skills.get(skill)
+                    if col is not None:
+                        vectors[j, col] += 1.0 / len(required)
+            return vectors
+        vectors = []
+        for required in components:
+            vector: Dict[int, float] = {}
+            for skill in required:
+                col = self.skills.get(skill)
+                if col is not None:
+                    vector[col] = vector.get(col, 0.0) + 1.0 / len(required)
+            vectors.append(vector)
+        return vectors
+
+    @staticmethod
+    def _sparse_row(weights: Dict[int, float], vectors: List[Dict[int, float]]) -> List[float]:
+        return [sum(weights.get(col, 0.0) * x for col, x in vector.items()) for vector in vectors]
+
+    def scores(self, components: Sequence[Sequence[str]]) -> SuitabilityScores:
+        """Score every agent against every component (given as required-skill lists)"""
+        key = tuple(tuple(required) for required in components)
+        if self._product_key is None or self._product_key[0] != key:
+            vectors = self._vectors(components)
+            if HAS_NUMPY:
+                if self._dense is None:
+                    self._dense = np.zeros((len(self.agents), len(self.skills)))
+                    for i, row in enumerate(self._weights):
+                        for col, weight in row.items():
+                            self._dense[i, col] = weight
+                product = self._dense @ vectors.T
+            else:
+                product = [self._sparse_row(row, vectors) for row in self._weights]
+            self._product_key, self._product = (key, vectors), product
+
+        if HAS_NUMPY:
+            bias = (
+                self.experience_weight * np.frombuffer(self._experience, dtype=np.float64)
+                + self.availability_weight * (1.0 - np.frombuffer(self._workload, dtype=np.float64))
+                + self.performance_weight * self.default_performance
+            )
+            values = (self._product + bias[:, None]).tolist()
+        else:
+            values = [[x + self._bias(i) for x in row] for i, row in enumerate(self._product)]
+        return SuitabilityScores(list(self.agents), values)
+
+
+def optimal_assignment(
+    scores: Sequence[Sequence[float]],
+    capacity: Sequence[int],
+    allowed: Optional[Callable[[int, int], bool]] = None,
+) -> List[Optional[int]]:
+    """Maximum-score assignment of components to agents with per-agent capacity.
+
+    Args:
+        scores: ``scores[j][k]`` for component ``j`` on agent ``k`` (higher is better)
+        capacity: Components each agent may take
+        allowed: ``allowed(j, k)`` constraint; every pair when None
+
+    Returns:
+        Agent index per component, None where it could not be placed.
+
+    Min-cost max-flow (source -> component -> agent -> sink, agent edges with
+    the agent's capacity) by successive shortest paths with Dijkstra over
+    reduced costs: as many components as possible are placed and, among those
+    placements, the total score is maximal. For unit capacities this is the
+    Hungarian assignment.
+    """
+    n, a = len(scores), len(capacity)
+    owner: List[Optional[int]] = [None] * n
+    members: List[set] = [set() for _ in range(a)]
+    load = [0] * a
+    options = [[k for k in range(a) if allowed is None or allowed(j, k)] for j in range(n)]
+    top = max((scores[j][k] for j in range(n) for k in options[j]), default=0.0)
+    cost = [[top - s for s in row] for row in scores]  # non-negative, so zero potentials are valid
+    # Nodes: components 0..n-1, agents n..n+a-1, then sink and source
+    sink, source = n + a, n + a + 1
+    potential = [0.0] * (n + a + 2)
+
+    while True:
+        dist = {source: 0.0}
+        prev: Dict[int, int] = {}
+        done = set()
+        heap = [(0.0, source)]
+        while heap:
+            d, node = heapq.heappop(heap)
+            if node in done:
+                continue
+            done.add(node)
+            if node == sink:
+                break
+            if node == source:
+                edges = [(j, 0.0) for j in range(n) if owner[j] is None and options[j]]
+            elif node < n:
+                edges = [(n + k, cost[node][k]) for k in options[node] if k != owner[node]]
+            else:
+                k = node - n
+                edges = [(j, -cost[j][k]) for j in members[k]]
+                if load[k] < capacity[k]:
+                    edges.append((sink, 0.0))
+            for target, c in edges:
+                nd = d + c + potential[node] - potential[target]
+                if nd < dist.get(target, float("inf")) - 1e-12:
+                    dist[target] = nd
+                    prev[target] = node
+                    heapq.heappush(heap, (nd, target))
+
+        if sink not in done:
+            return owner
+        reach = dist[sink]
+        for node in range(len(potential)):
+            potential[node] += dist[node] if node in done else reach
+
+        # Walk back: the last agent gains a component, every component on the
+        # path moves to the agent after it
+        node = prev[sink]
+        load[node - n] += 1
+        while node != source:
+            component = prev[node]
+            if owner[component] is not None:
+                members[owner[component]].discard(component)
+            owner[component] = node - n
+            members[node - n].add(component)
+            node = prev[component]
@@ -9,16 +9,24 @@ This module provides comprehensive task management for multi-agent collaboration
 enabling efficient resource allocation and workflow optimization.
 """
 
-import json
+import sys
 import time
 import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
 import logging
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from enum import Enum
 
+try:
+    from .capability_matrix import CapabilityMatrix, optimal_assignment
+    from ..entity_store import EntityStore, coerce_enum, read_json
+except ImportError:  # imported as a top-level module
+    from capability_matrix import CapabilityMatrix, optimal_assignment
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    from entity_store import EntityStore, coerce_enum, read_json
+
 class TaskStatus(Enum):
     """Task status enumeration."""
     CREATED = "created"
@@ -98,10 +106,12 @@ class CollaborativeTaskManager:
         self.data_path = Path(data_path)
         self.data_path.mkdir(parents=True, exist_ok=True)
         
-        # Core task management
-        self.tasks: Dict[str, CollaborativeTask] = {}
-        self.agent_capabilities: Dict[str, AgentCapability] = {}
-        self.workflows: Dict[str, Dict] = {}
+        # Core task management (persisted, loaded lazily)
+        self._store = EntityStore(self.data_path / 'task_manager.sqlite')
+        self.tasks = self._store.repository("tasks", decode=self._task_from_dict)
+        self.agent_capabilities = self._store.repository("agent_capabilities", decode=lambda d: AgentCapability(**d))
+        self.capability_matrix = CapabilityMatrix()
+        self.workflows = self._store.repository("workflows")
         self.resource_allocation: Dict[str, Dict] = {}
         
         # Task optimization
@@ -138,34 +148,31 @@ class CollaborativeTaskManager:
             ]
         )
     
+    @staticmethod
+    def _task_from_dict(data: Dict[str, Any]) -> CollaborativeTask:
+        """Rebuild a stored task, restoring its enums."""
+        task = CollaborativeTask(**data)
+        task.priority = coerce_enum(TaskPriority, data['priority'])
+        task.status = coerce_enum(TaskStatus, data['status'])
+        return task
+    
     def _load_existing_data(self):
-        """Load existing task management data."""
+        """Open persisted task management data (imports the old JSON files once)."""
         try:
-            # Load tasks
-            tasks_file = self.data_path / 'tasks.json'
-            if tasks_file.exists():
-                with open(tasks_file, 'r') as f:
-                    tasks_data = json.load(f)
-                    for task_id, task_data in tasks_data.items():
-                        # Convert back to CollaborativeTask object
-                        task = CollaborativeTask(**task_data)
-                        task.priority = TaskPriority(task_data['priority'])
-                        task.status = TaskStatus(task_data['status'])
-                        self.tasks[task_id] = task
-            
-            # Load agent capabilities
-            capabilities_file = self.data_path / 'agent_capabilities.json'
-            if capabilities_file.exists():
-                with open(capabilities_file, 'r') as f:
-                    capabilities_data = json.load(f)
-                    for agent_id, cap_data in capabilities_data.items():
-                        self.agent_capabilities[agent_id] = AgentCapability(**cap_data)
-            
-            # Load workflows
-            workflows_file = self.data_path / 'workflows.json'
-            if workflows_file.exists():
-                with open(workflows_file, 'r') as f:
-                    self.workflows = json.load(f)
+            def import_json_files():
+                for name, repo, decode in (
+                    ('tasks.json', self.tasks, self._task_from_dict),
+                    ('agent_capabilities.json', self.agent_capabilities, lambda d: AgentCapability(**d)),
+                    ('workflows.json', self.workflows, lambda d: d),
+                ):
+                    for key, data in (read_json(self.data_path / name) or {}).items():
+                        repo[key] = decode(data)
+            
+            self._store.import_legacy("json-v1", import_json_files)
+            
+            # Agent profiles are few; the capability matrix needs all of them
+            for capability in self.agent_capabilities.values():
+                self._index_capability(capability)
                     
             logging.info(f"📚 Loaded existing data: {len(self.tasks)} tasks, {len(self.agent_capabilities)} agents")
             
@@ -227,6 +234,8 @@ class CollaborativeTaskManager:
             for agent in agents:
                 if agent in self.agent_capabilities:
                     self.agent_capabilities[agent].current_workload += estimated_hours
+                    self.agent_capabilities.mark(agent)
+                    self.capability_matrix.update_workload(agent, self._load_ratio(self.agent_capabilities[agent]))
             
             logging.info(f"📋 Agent-2: Created task '{title}' with {len(agents)} agents, priority: {priority.value}")
             return task_id
@@ -279,6 +288,7 @@ class CollaborativeTaskManager:
             
             task.status = TaskStatus.PLANNED
             task.updated_at = datetime.now().isoformat()
+            self.tasks.mark(task_id)
             
             logging.info(f"📋 Agent-2: Broke down task '{task.title}' into {len(subtasks)} subtasks")
             return True
@@ -316,9 +326,12 @@ class CollaborativeTaskManager:
                 if agent_id in self.agent_capabilities:
                     agent = self.agent_capabilities[agent_id]
                     agent.current_workload += allocation.get("hours", 0.0)
+                    self.agent_capabilities.mark(agent_id)
+                    self.capability_matrix.update_workload(agent_id, self._load_ratio(agent))
             
             task.status = TaskStatus.PLANNED
             task.updated_at = datetime.now().isoformat()
+            self.tasks.mark(task_id)
             
             logging.info(f"📋 Agent-2: Allocated resources for task '{task.title}'")
             return True
@@ -361,6 +374,7 @@ class CollaborativeTaskManager:
                 logging.info(f"🎉 Task '{task.title}' completed by {agent}!")
             elif progress > 0.0 and task.status == TaskStatus.CREATED:
                 task.status = TaskStatus.IN_PROGRESS
+            self.tasks.mark(task_id)
             
             # Update completion metrics
             if task_id not in self.completion_metrics:
@@ -425,12 +439,38 @@ class CollaborativeTaskManager:
             logging.info(f"📋 Agent-2: Optimized {optimization_results['workflows_optimized']} workflows")
             return optimization_results
     
+    @staticmethod
+    def _load_ratio(capability: AgentCapability) -> float:
+        """Booked hours as a fraction of available hours."""
+        if capability.availability_hours <= 0:
+            return 1.0 if capability.current_workload > 0 else 0.0
+        return capability.current_workload / capability.availability_hours
+
+    def _index_capability(self, capability: AgentCapability) -> None:
+        """Mirror an agent capability into the capability matrix."""
+        proficiency = {area: 1.0 for area in capability.expertise_areas}
+        proficiency.update({skill: level / 10.0 for skill, level in capability.skill_levels.items()})
+        levels = list(capability.skill_levels.values())
+        experience = sum(levels) / (10.0 * len(levels)) if levels else 0.5
+        self.capability_matrix.upsert_agent(
+            capability.agent_id,
+            proficiency,
+            experience,
+            min(1.0, self._load_ratio(capability)),
+        )
+
+    def _agent_loads(self) -> Dict[str, float]:
+        """Load ratio per agent."""
+        return {agent_id: self._load_ratio(cap) for agent_id, cap in self.agent_capabilities.items()}
+
     def _identify_bottlenecks(self, workflow_id: str) -> List[Dict[str, Any]]:
         """Identify workflow bottlenecks."""
         bottlenecks = []
         
         # Analyze task dependencies and critical paths
         workflow_tasks = [t for t in self.tasks.values() if t.tags and 'workflow' in t.tags]
+        overloaded = {a for a, load in self._agent_loads().items() if load > 0.8}
+        reported = set()
         
         for task in workflow_tasks:
             # Check for blocked tasks
@@ -442,18 +482,16 @@ class CollaborativeTaskManager:
                     "severity": "high" if task.priority in [TaskPriority.HIGH, TaskPriority.CRITICAL] else "medium"
                 })
             
-            # Check for resource conflicts
-            if task.agents:
-                for agent in task.agents:
-                    if agent in self.agent_capabilities:
-                        agent_cap = self.agent_capabilities[agent]
-                        if agent_cap.current_workload > agent_cap.availability_hours * 0.8:
-                            bottlenecks.append({
-                                "type": "resource_overload",
-                                "agent_id": agent,
-                                "description": f"Agent {agent} is overloaded",
-                                "severity": "high"
-                            })
+            # Check for resource conflicts (once per agent)
+            for agent in task.agents:
+                if agent in overloaded and agent not in reported:
+                    reported.add(agent)
+                    bottlenecks.append({
+                        "type": "resource_overload",
+                        "agent_id": agent,
+                        "description": f"Agent {agent} is overloaded",
+                        "severity": "high"
+                    })
         
         return bottlenecks
     
@@ -461,31 +499,49 @@ class CollaborativeTaskManager:
         """Optimize resource allocation for a workflow."""
         optimizations = []
         
-        # Rebalance agent workloads
-        for agent_id, capability in self.agent_capabilities.items():
-            if capability.current_workload > capability.availability_hours * 0.9:
-                # Find tasks that can be reassigned
-                reassignable_tasks = [
-                    t for t in self.tasks.values()
-                    if agent_id in t.agents and t.status in [TaskStatus.CREATED, TaskStatus.PLANNED]
-                ]
-                
-                for task in reassignable_tasks:
-                    # Find alternative agents
-                    alternative_agents = [
-                        a for a in self.agent_capabilities.keys()
-                        if a != agent_id and a not in task.agents
-                        and self.agent_capabilities[a].current_workload < self.agent_capabilities[a].availability_hours * 0.7
-                    ]
-                    
-                    if alternative_agents:
-                        optimizations.append({
-                            "type": "workload_rebalancing",
-                            "task_id": task.task_id,
-                            "from_agent": agent_id,
-                            "to_agent": alternative_agents[0],
-                            "reason": "Overload prevention"
-                        })
+        # Tasks that can leave an overloaded agent
+        loads = self._agent_loads()
+        overloaded = [a for a, load in loads.items() if load > 0.9]
+        moves = [
+            (task, agent_id)
+            for agent_id in overloaded
+            for task in self.tasks.values()
+            if agent_id in task.agents and task.status in [TaskStatus.CREATED, TaskStatus.PLANNED]
+        ]
+        candidates = [a for a, load in loads.items() if load < 0.7]
+        if not moves or not candidates:
+            return optimizations
+        
+        # Score every candidate agent on every task at once, then assign optimally
+        for capability in self.agent_capabilities.values():
+            self._index_capability(capability)
+        scores = self.capability_matrix.scores([[task.task_type] + task.tags for task, _ in moves])
+        rows = [scores.agents.index(agent_id) for agent_id in candidates]
+        
+        # Each candidate takes as many tasks as fit under 70% of its hours (at least one)
+        mean_hours = sum(task.estimated_hours for task, _ in moves) / len(moves)
+        capacity = []
+        for agent_id in candidates:
+            cap = self.agent_capabilities[agent_id]
+            spare = cap.availability_hours * 0.7 - cap.current_workload
+            capacity.append(max(1, int(spare // mean_hours)) if mean_hours > 0 else len(moves))
+        
+        placement = optimal_assignment(
+            [[scores.values[i][j] for i in rows] for j in range(len(moves))],
+            capacity,
+            lambda j, k: candidates[k] not in moves[j][0].agents,
+        )
+        for j, ((task, agent_id), k) in enumerate(zip(moves, placement)):
+            if k is None:
+                continue
+            optimizations.append({
+                "type": "workload_rebalancing",
+                "task_id": task.task_id,
+                "from_agent": agent_id,
+                "to_agent": candidates[k],
+                "suitability": round(scores.values[rows[k]][j], 3),
+                "reason": "Overload prevention"
+            })
         
         return optimizations
     
@@ -551,22 +607,9 @@ class CollaborativeTaskManager:
             return summary
     
     def _save_data(self):
-        """Save task management data to persistent storage."""
+        """Write changed tasks, agent capabilities and workflows to persistent storage."""
         try:
-            # Save tasks
-            tasks_data = {tid: asdict(task) for tid, task in self.tasks.items()}
-            with open(self.data_path / 'tasks.json', 'w') as f:
-                json.dump(tasks_data, f, indent=2)
-            
-            # Save agent capabilities
-            capabilities_data = {aid: asdict(cap) for aid, cap in self.agent_capabilities.items()}
-            with open(self.data_path / 'agent_capabilities.json', 'w') as f:
-                json.dump(capabilities_data, f, indent=2)
-            
-            # Save workflows
-            with open(self.data_path / 'workflows.json', 'w') as f:
-                json.dump(self.workflows, f, indent=2)
-                
+            self._store.flush()
         except Exception as e:
             logging.error(f"❌ Failed to save task management data: {e}")
     
@@ -579,8 +622,18 @@ class CollaborativeTaskManager:
                 f"Efficiency: {summary['efficiency_score']:.2f}")
 
 
-# Global instance for system-wide access
-collaborative_task_manager = CollaborativeTaskManager()
+# Global instance for system-wide access, created on first use so that
+# importing the module does not open a store under the working directory
+_global_instance: Optional[CollaborativeTaskManager] = None
+
+
+def __getattr__(name: str):
+    global _global_instance
+    if name == "collaborative_task_manager":
+        if _global_instance is None:
+            _global_instance = CollaborativeTaskManager()
+        return _global_instance
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 
@@ -21,16 +21,26 @@ import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple, Set
 from pathlib import Path
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from enum import Enum
 import uuid
 import math
 from collections import defaultdict, Counter
 
+try:
+    from .task_scheduler import Job, Schedule, Worker, critical_path, list_schedule
+    from .capability_matrix import CapabilityMatrix, SuitabilityScores, optimal_assignment
+except ImportError:  # imported as a top-level module (demo / enhanced_collaborative_system)
+    from task_scheduler import Job, Schedule, Worker, critical_path, list_schedule
+    from capability_matrix import CapabilityMatrix, SuitabilityScores, optimal_assignment
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Hours of queued work an agent at current_workload == 1.0 already has
+WORKDAY_HOURS = 8.0
+
 class TaskComplexity(Enum):
     """Task complexity levels"""
     TRIVIAL = "trivial"      # 1-2 hours
@@ -103,6 +113,9 @@ class TaskBreakdown:
     optimization_score: float
     created_at: str
     updated_at: str
+    # Component ID -> {"agent", "start", "finish", "slack"} in hours from kickoff
+    schedule: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    makespan_hours: float = 0.0
 
 class EnhancedTaskBreakdown:
     """Enhanced task breakdown and resource allocation system"""
@@ -126,6 +139,7 @@ class EnhancedTaskBreakdown:
         
         # Load agent capabilities
         self.agent_capabilities: Dict[str, AgentCapability] = {}
+        self.capability_matrix = CapabilityMatrix()
         self._load_agent_capabilities()
         
         logger.info(f"Enhanced Task Breakdown System initialized: {self.base_path}")
@@ -138,6 +152,7 @@ class EnhancedTaskBreakdown:
                     capability_data = json.load(f)
                     capability = AgentCapability(**capability_data)
                     self.agent_capabilities[capability.agent_id] = capability
+                    self._index_capability(capability)
             except Exception as e:
                 logger.error(f"Error loading capability {capability_file}: {e}")
 
@@ -167,10 +182,37 @@ class EnhancedTaskBreakdown:
         # Save capability profile
         self._save_agent_capability(capability)
         self.agent_capabilities[agent_id] = capability
+        self._index_capability(capability)
         
         logger.info(f"Created capability profile for {agent_id}")
         return capability
 
+    def _index_capability(self, capability: AgentCapability) -> None:
+        """Mirror a capability profile into the capability matrix"""
+        proficiency = {skill: 0.5 for skill in capability.secondary_skills}
+        proficiency.update({skill: 1.0 for skill in capability.primary_skills})
+        self.capability_matrix.upsert_agent(
+            capability.agent_id,
+            proficiency,
+            capability.experience_level,
+            capability.current_workload,
+            capability.performance_history,
+        )
+
+    def update_agent_workload(self, agent_id: str, workload: float) -> None:
+        """Set an agent's current workload (0.0 to 1.0) without rescoring anything else"""
+        capability = self.agent_capabilities[agent_id]
+        capability.current_workload = max(0.0, min(1.0, workload))
+        capability.last_updated = datetime.now().isoformat()
+        self.capability_matrix.update_workload(agent_id, capability.current_workload)
+
+    def suitability_scores(self, components: List[TaskComponent]) -> SuitabilityScores:
+        """Score every agent against every component in one pass"""
+        # Profiles may have been edited in place; unchanged ones only refresh the workload
+        for capability in self.agent_capabilities.values():
+            self._index_capability(capability)
+        return self.capability_matrix.scores([c.required_skills for c in components])
+
     def breakdown_complex_task(
         self,
         task_id: str,
@@ -206,8 +248,9 @@ class EnhancedTaskBreakdown:
         # Calculate critical path
         critical_path = self._calculate_critical_path(components)
         
-        # Optimize resource allocation
-        resource_allocation = self._optimize_resource_allocation(components)
+        # Schedule components on agents (time- and load-aware) and allocate
+        schedule = self.schedule_components(components)
+        resource_allocation = self._apply_schedule(components, schedule)
         
         # Calculate optimization score
         optimization_score = self._calculate_optimization_score(
@@ -226,7 +269,9 @@ class EnhancedTaskBreakdown:
             resource_allocation=resource_allocation,
             optimization_score=optimization_score,
             created_at=datetime.now().isoformat(),
-            updated_at=datetime.now().isoformat()
+            updated_at=datetime.now().isoformat(),
+            schedule=self._schedule_table(schedule),
+            makespan_hours=schedule.makespan
         )
         
         # Save breakdown
@@ -293,7 +338,7 @@ class EnhancedTaskBreakdown:
             components.append(component)
         
         # Add dependencies between components
-        self._add_component_dependencies(components)
+        self._add_component_dependencies(components, [t["phase"] for t in component_templates])
         
         return components
 
@@ -318,40 +363,44 @@ class EnhancedTaskBreakdown:
         
         return skill_groups
 
-    def _get_component_templates(self, complexity: TaskComplexity, base_title: str) -> List[Dict[str, str]]:
-        """Get component templates based on complexity"""
+    def _get_component_templates(self, complexity: TaskComplexity, base_title: str) -> List[Dict[str, Any]]:
+        """Get component templates based on complexity.
+
+        ``phase`` orders the templates: a component depends on every component
+        of the previous phase, components sharing a phase can run in parallel.
+        """
         if complexity == TaskComplexity.TRIVIAL:
-            return [{"title": base_title, "description": "Complete task implementation"}]
+            return [{"title": base_title, "description": "Complete task implementation", "phase": 0}]
         
         elif complexity == TaskComplexity.SIMPLE:
             return [
-                {"title": f"{base_title} - Planning & Design", "description": "Initial planning and design phase"},
-                {"title": f"{base_title} - Implementation", "description": "Core implementation and development"}
+                {"title": f"{base_title} - Planning & Design", "description": "Initial planning and design phase", "phase": 0},
+                {"title": f"{base_title} - Implementation", "description": "Core implementation and development", "phase": 1}
             ]
         
         elif complexity == TaskComplexity.MODERATE:
             return [
-                {"title": f"{base_title} - Analysis & Planning", "description": "Requirements analysis and planning"},
-                {"title": f"{base_title} - Core Development", "description": "Main development and implementation"},
-                {"title": f"{base_title} - Testing & Validation", "description": "Testing and quality assurance"}
+                {"title": f"{base_title} - Analysis & Planning", "description": "Requirements analysis and planning", "phase": 0},
+                {"title": f"{base_title} - Core Development", "description": "Main development and implementation", "phase": 1},
+                {"title": f"{base_title} - Test Development", "description": "Test suites and validation tooling", "phase": 1}
             ]
         
         elif complexity == TaskComplexity.COMPLEX:
             return [
-                {"title": f"{base_title} - Requirements Analysis", "description": "Detailed requirements gathering and analysis"},
-                {"title": f"{base_title} - Architecture Design", "description": "System architecture and design"},
-                {"title": f"{base_title} - Core Implementation", "description": "Main development implementation"},
-                {"title": f"{base_title} - Integration & Testing", "description": "Integration and comprehensive testing"}
+                {"title": f"{base_title} - Requirements & Architecture", "description": "Requirements analysis and system design", "phase": 0},
+                {"title": f"{base_title} - Core Implementation", "description": "Main development implementation", "phase": 1},
+                {"title": f"{base_title} - Test Development", "description": "Test suites and validation tooling", "phase": 1},
+                {"title": f"{base_title} - Integration & Testing", "description": "Integration and comprehensive testing", "phase": 2}
             ]
         
         else:  # VERY_COMPLEX
             return [
-                {"title": f"{base_title} - Strategic Planning", "description": "High-level strategic planning and analysis"},
-                {"title": f"{base_title} - Requirements Engineering", "description": "Comprehensive requirements engineering"},
-                {"title": f"{base_title} - Architecture & Design", "description": "System architecture and detailed design"},
-                {"title": f"{base_title} - Core Development", "description": "Main development implementation"},
-                {"title": f"{base_title} - Integration & Testing", "description": "Integration and comprehensive testing"},
-                {"title": f"{base_title} - Deployment & Validation", "description": "Deployment and final validation"}
+                {"title": f"{base_title} - Requirements Engineering", "description": "Strategic planning and comprehensive requirements engineering", "phase": 0},
+                {"title": f"{base_title} - Architecture & Design", "description": "System architecture and detailed design", "phase": 1},
+                {"title": f"{base_title} - Core Development", "description": "Main development implementation", "phase": 2},
+                {"title": f"{base_title} - Interface Development", "description": "APIs, integrations and user-facing surfaces", "phase": 2},
+                {"title": f"{base_title} - Test Development", "description": "Test suites and validation tooling", "phase": 2},
+                {"title": f"{base_title} - Integration, Testing & Deployment", "description": "Integration, testing, deployment and final validation", "phase": 3}
             ]
 
     def _determine_component_type(self, primary_skill: str) -> TaskType:
@@ -373,54 +422,145 @@ class EnhancedTaskBreakdown:
         """Determine component complexity based on estimated hours"""
         return self._determine_complexity(component_hours)
 
-    def _add_component_dependencies(self, components: List[TaskComponent]) -> None:
-        """Add logical dependencies between components"""
-        for i in range(1, len(components)):
-            # Each component depends on the previous one
-            components[i].dependencies.append(components[i-1].component_id)
+    def _add_component_dependencies(self, components: List[TaskComponent], phases: List[int]) -> None:
+        """Add logical dependencies between components.
+
+        Builds a phase DAG: each component depends on every component of the
+        previous phase, components within a phase are independent. Components
+        that already declare dependencies keep them.
+        """
+        by_phase: Dict[int, List[str]] = defaultdict(list)
+        for component, phase in zip(components, phases):
+            by_phase[phase].append(component.component_id)
+        order = sorted(by_phase)
+        previous = {later: by_phase[earlier] for earlier, later in zip(order, order[1:])}
+        for component, phase in zip(components, phases):
+            if not component.dependencies:
+                component.dependencies.extend(previous.get(phase, []))
+
+    @staticmethod
+    def _jobs(components: List[TaskComponent]) -> List[Job]:
+        return [Job(c.component_id, c.estimated_hours, list(c.dependencies)) for c in components]
 
     def _calculate_critical_path(self, components: List[TaskComponent]) -> List[str]:
-        """Calculate critical path through components"""
-        # Simple critical path calculation
-        # In a real implementation, this would use more sophisticated algorithms
-        return [comp.component_id for comp in components]
+        """Calculate the critical path (zero-slack chain) through the component DAG"""
+        return critical_path(self._jobs(components)).critical_path
 
-    def _optimize_resource_allocation(self, components: List[TaskComponent]) -> Dict[str, List[str]]:
-        """Optimize resource allocation based on agent capabilities"""
-        resource_allocation = defaultdict(list)
+    def schedule_components(
+        self,
+        components: List[TaskComponent],
+        agent_capacity: Optional[Dict[str, int]] = None
+    ) -> Schedule:
+        """
+        Schedule components on agents under dependency, skill and capacity constraints
         
+        Args:
+            components: Components forming a dependency DAG
+            agent_capacity: Parallel components per agent (default 1)
+            
+        Returns:
+            Schedule: start/finish hours per component, makespan and critical path
+        """
+        capacity = agent_capacity or {}
+        workers = [
+            Worker(agent_id, capacity.get(agent_id, 1), cap.current_workload * WORKDAY_HOURS)
+            for agent_id, cap in self.agent_capabilities.items()
+        ]
+        column = {c.component_id: j for j, c in enumerate(components)}
+        scores = self.suitability_scores(components)
+        skilled = self._eligible_agents(components)
+
+        def eligible(agent_id: str, component_id: str) -> bool:
+            return agent_id in skilled[column[component_id]]
+
+        def preference(agent_id: str, component_id: str) -> float:
+            return scores.score(agent_id, column[component_id])
+
+        return list_schedule(self._jobs(components), workers, eligible, preference)
+
+    def _eligible_agents(self, components: List[TaskComponent]) -> List[Set[str]]:
+        """Available agents (workload <= 0.8) with a required skill, per component.
+
+        A component nobody is skilled for may go to any available agent.
+        """
+        available = {a for a, cap in self.agent_capabilities.items() if cap.current_workload <= 0.8}
+        # Inverted skill index instead of an agents x components x skills scan
+        by_skill: Dict[str, Set[str]] = defaultdict(set)
+        for agent_id in available:
+            capability = self.agent_capabilities[agent_id]
+            for skill in capability.primary_skills + capability.secondary_skills:
+                by_skill[skill].add(agent_id)
+        skilled = []
         for component in components:
-            # Find best agent for this component
-            best_agent = self._find_best_agent_for_component(component)
+            if not component.required_skills:
+                skilled.append(available)
+                continue
+            agents = set().union(*(by_skill.get(skill, ()) for skill in component.required_skills))
+            skilled.append(agents or available)
+        return skilled
+
+    def assign_components(
+        self,
+        components: List[TaskComponent],
+        agent_capacity: Optional[Dict[str, int]] = None
+    ) -> Dict[str, List[str]]:
+        """
+        Optimal one-shot assignment of components to agents, ignoring timing
+        
+        Maximizes total suitability under the same skill and workload rules as
+        schedule_components, placing as many components as capacity allows.
+        
+        Args:
+            components: Components to assign
+            agent_capacity: Components per agent (default: an even share)
             
-            if best_agent:
-                resource_allocation[best_agent].append(component.component_id)
-                component.assigned_agent = best_agent
+        Returns:
+            Dict[str, List[str]]: agent -> component IDs
+        """
+        scores = self.suitability_scores(components)
+        skilled = self._eligible_agents(components)
+        even_share = math.ceil(len(components) / max(len(scores.agents), 1))
+        capacity = [(agent_capacity or {}).get(agent, even_share) for agent in scores.agents]
+        placement = optimal_assignment(
+            [list(column) for column in zip(*scores.values)] if scores.values else [[] for _ in components],
+            capacity,
+            lambda j, k: scores.agents[k] in skilled[j],
+        )
+        allocation: Dict[str, List[str]] = {}
+        for component, k in zip(components, placement):
+            if k is not None:
+                allocation.setdefault(scores.agents[k], []).append(component.component_id)
+        return allocation
+
+    def _apply_schedule(self, components: List[TaskComponent], schedule: Schedule) -> Dict[str, List[str]]:
+        """Record scheduled agents on the components; returns agent -> component IDs"""
+        for component in components:
+            agent = schedule.jobs[component.component_id].worker_id
+            if agent:
+                component.assigned_agent = agent
                 component.status = "assigned"
-        
-        return dict(resource_allocation)
+        return schedule.by_worker()
+
+    @staticmethod
+    def _schedule_table(schedule: Schedule) -> Dict[str, Dict[str, Any]]:
+        return {
+            job.job_id: {"agent": job.worker_id, "start": job.start, "finish": job.finish, "slack": job.slack}
+            for job in schedule.jobs.values()
+        }
+
+    def _optimize_resource_allocation(self, components: List[TaskComponent]) -> Dict[str, List[str]]:
+        """Optimize resource allocation based on agent capabilities, timing and load"""
+        return self._apply_schedule(components, self.schedule_components(components))
 
     def _find_best_agent_for_component(self, component: TaskComponent) -> Optional[str]:
         """Find the best agent for a given component"""
-        best_agent = None
-        best_score = -1.0
-        
-        for agent_id, capability in self.agent_capabilities.items():
-            # Skip if agent is overloaded
-            if capability.current_workload > 0.8:
-                continue
-                
-            # Calculate agent suitability score
-            score = self._calculate_agent_suitability(capability, component)
-            
-            if score > best_score:
-                best_score = score
-                best_agent = agent_id
-        
-        return best_agent
+        # Skip overloaded agents
+        return self.suitability_scores([component]).best_agent(
+            0, lambda agent_id: self.agent_capabilities[agent_id].current_workload <= 0.8
+        )
 
     def _calculate_agent_suitability(self, capability: AgentCapability, component: TaskComponent) -> float:
-        """Calculate how suitable an agent is for a component"""
+        """Calculate how suitable an agent is for a component (one pair; see suitability_scores)"""
         # Skill match score (0.0 to 1.0)
         skill_score = 0.0
         for required_skill in component.required_skills:
@@ -503,6 +643,19 @@ class EnhancedTaskBreakdown:
             "resource_utilization": {}
         }
 
+    @staticmethod
+    def _component_from_dict(data: Dict[str, Any]) -> TaskComponent:
+        """Rebuild a saved component (enums were written as "TaskType.DEVELOPMENT")"""
+        def enum(cls, raw):
+            raw = str(raw)
+            return cls[raw.split(".", 1)[1]] if raw.startswith(f"{cls.__name__}.") else cls(raw)
+        return TaskComponent(**{
+            **data,
+            "task_type": enum(TaskType, data["task_type"]),
+            "complexity": enum(TaskComplexity, data["complexity"]),
+            "priority": enum(TaskPriority, data["priority"]),
+        })
+
     def optimize_existing_breakdown(self, breakdown_id: str) -> Optional[TaskBreakdown]:
         """Optimize an existing task breakdown"""
         # Load existing breakdown
@@ -514,10 +667,18 @@ class EnhancedTaskBreakdown:
             with open(breakdown_file, 'r') as f:
                 breakdown_data = json.load(f)
                 breakdown = TaskBreakdown(**breakdown_data)
+            breakdown.components = [
+                self._component_from_dict(c) if isinstance(c, dict) else c
+                for c in breakdown.components
+            ]
             
-            # Re-optimize resource allocation
-            new_resource_allocation = self._optimize_resource_allocation(breakdown.components)
+            # Re-schedule and re-optimize resource allocation
+            schedule = self.schedule_components(breakdown.components)
+            new_resource_allocation = self._apply_schedule(breakdown.components, schedule)
             breakdown.resource_allocation = new_resource_allocation
+            breakdown.critical_path = schedule.critical_path
+            breakdown.schedule = self._schedule_table(schedule)
+            breakdown.makespan_hours = schedule.makespan
             
             # Recalculate optimization score
             breakdown.optimization_score = self._calculate_optimization_score(
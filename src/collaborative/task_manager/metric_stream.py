@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Metric Streams - Streaming Workflow-Metric Analytics
+
+**Agent-2 Responsibility**: Task Breakdown & Resource Allocation
+**Purpose**: Keep trend and pattern state per workflow metric as values arrive
+**Features**:
+- Values kept in compact typed arrays (``array('d')``)
+- Online mean/variance (Welford) over the whole history and the sliding window
+- EWMA level and change, least-squares slope over the sliding window
+- Oscillation, plateau and acceleration detectors, all updated in O(1) per value
+
+The detectors apply the rules ``WorkflowOptimizer`` always used to the last
+``window`` values instead of rescanning the whole history:
+
+- trend: slope above +0.1 per sample is "improving", below -0.1 "declining"
+- oscillation: more than half of the interior points are peaks or valleys
+- plateau: variance below (0.1 * mean)^2
+- acceleration: more than 70% of successive changes are larger than the last
+
+For histories no longer than the window the results are identical to a full
+rescan. Running sums are recomputed from the window once per ``window``
+values, so rounding error cannot build up over long streams.
+"""
+
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+TREND_THRESHOLD = 0.1
+
+
+class MetricStream:
+    """Streaming statistics and pattern detectors for one metric series"""
+
+    def __init__(self, window: int = 20, alpha: float = 0.3):
+        self.window = max(4, int(window))
+        self.alpha = alpha
+        self.values = array("d")
+
+        # Whole history (Welford)
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.ewma: Optional[float] = None
+        self.ewma_change = 0.0
+
+        # Sliding window: ring of values plus per-point detector flags
+        self._ring = array("d", bytes(8 * self.window))
+        self._turn = array("b", bytes(self.window))   # point is a peak/valley
+        self._accel = array("b", bytes(self.window))  # change into point beats the previous change
+        self._start = 0
+        self._size = 0
+        self._sum_y = 0.0
+        self._sum_xy = 0.0  # x = position in the window, 0 for the oldest
+        self._w_mean = 0.0
+        self._w_m2 = 0.0
+        self._turns = 0
+        self._accels = 0
+        self._evictions = 0
+        self._active: Set[str] = set()
+
+    @classmethod
+    def from_values(cls, values: Iterable[float], **kwargs: Any) -> "MetricStream":
+        """Replay a stored history; patterns it already shows are not reported as new"""
+        stream = cls(**kwargs)
+        for value in values:
+            stream.add(value)
+        stream._active = set(stream.patterns())
+        return stream
+
+    # ---------- updates ----------
+    def _at(self, i: int) -> int:
+        return (self._start + i) % self.window
+
+    def add(self, value: float) -> None:
+        value = float(value)
+        self.values.append(value)
+
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if self.ewma is None:
+            self.ewma = value
+        else:
+            self.ewma_change = self.alpha * (value - self.ewma) + (1 - self.alpha) * self.ewma_change
+            self.ewma = self.alpha * value + (1 - self.alpha) * self.ewma
+
+        if self._size == self.window:
+            self._evict()
+
+        m = self._size
+        pos = self._at(m)
+        self._ring[pos] = value
+        self._turn[pos] = 0
+        self._accel[pos] = 0
+        self._sum_xy += m * value
+        self._sum_y += value
+        self._size = m + 1
+        delta = value - self._w_mean
+        self._w_mean += delta / self._size
+        self._w_m2 += delta * (value - self._w_mean)
+
+        if self._size >= 3:
+            mid, prev = self._ring[self._at(m - 1)], self._ring[self._at(m - 2)]
+            if (mid > prev and mid > value) or (mid < prev and mid < value):
+                self._turn[self._at(m - 1)] = 1
+                self._turns += 1
+            if value - mid > mid - prev:
+                self._accel[pos] = 1
+                self._accels += 1
+
+    def _evict(self) -> None:
+        """Drop the oldest window value"""
+        oldest = self._ring[self._start]
+        # The second point stops being interior; the third point's change no longer has a predecessor
+        second, third = self._at(1), self._at(2)
+        self._turns -= self._turn[second]
+        self._turn[second] = 0
+        self._accels -= self._accel[third]
+        self._accel[third] = 0
+
+        self._start = second
+        self._size -= 1
+        self._sum_y -= oldest
+        self._sum_xy -= self._sum_y  # every remaining x moves down by one
+        if self._size:
+            delta = oldest - self._w_mean
+            self._w_mean -= delta / self._size
+            self._w_m2 = max(0.0, self._w_m2 - delta * (oldest - self._w_mean))
+
+        self._evictions += 1
+        if self._evictions % self.window == 0:
+            self._resync()
+
+    def _resync(self) -> None:
+        window = [self._ring[self._at(i)] for i in range(self._size)]
+        self._sum_y = sum(window)
+        self._sum_xy = sum(i * y for i, y in enumerate(window))
+        self._w_mean = self._sum_y / len(window) if window else 0.0
+        self._w_m2 = sum((y - self._w_mean) ** 2 for y in window)
+
+    # ---------- statistics ----------
+    @property
+    def variance(self) -> float:
+        """Population variance of the whole history"""
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def window_variance(self) -> float:
+        return self._w_m2 / self._size if self._size else 0.0
+
+    def slope(self) -> float:
+        """Least-squares slope per sample over the window"""
+        m = self._size
+        sum_x = m * (m - 1) / 2
+        sum_x2 = (m - 1) * m * (2 * m - 1) / 6
+        denominator = m * sum_x2 - sum_x * sum_x
+        if m < 2 or denominator == 0:
+            return 0.0
+        return (m * self._sum_xy - sum_x * self._sum_y) / denominator
+
+    def trend(self) -> str:
+        slope = self.slope()
+        if slope > TREND_THRESHOLD:
+            return "improving"
+        if slope < -TREND_THRESHOLD:
+            return "declining"
+        return "stable"
+
+    # ---------- detectors ----------
+    def oscillating(self) -> bool:
+        return self._size >= 4 and self._turns / (self._size - 2) > 0.5
+
+    def plateau(self) -> bool:
+        return self._size >= 3 and self.window_variance < (self._w_mean * 0.1) ** 2
+
+    def accelerating(self) -> bool:
+        return self._size >= 3 and self._accels / (self._size - 2) > 0.7
+
+    def patterns(self) -> List[str]:
+        """Patterns present in the current window"""
+        found = []
+        if self.oscillating():
+            found.append("oscillation")
+        if self.plateau():
+            found.append("plateau")
+        if self.accelerating():
+            found.append("acceleration")
+        return found
+
+    def new_patterns(self) -> List[str]:
+        """Patterns that started with the latest value (each reported once per episode)"""
+        current = self.patterns()
+        started = [p for p in current if p not in self._active]
+        self._active = set(current)
+        return started
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "std": self.variance ** 0.5,
+            "ewma": self.ewma,
+            "ewma_change": self.ewma_change,
+            "slope": self.slope(),
+            "trend": self.trend(),
+            "patterns": self.patterns(),
+        }
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Task Scheduling Engine - Critical Path & Resource-Constrained Scheduling
+
+**Agent-2 Responsibility**: Task Breakdown & Resource Allocation
+**Purpose**: Turn a component dependency DAG into a timed, agent-assigned plan
+**Features**:
+- CPM forward/backward pass: earliest/latest start and finish, slack, critical path
+- List scheduling under per-agent capacity and skill constraints
+- Start/finish times per component and a makespan estimate
+
+Scheduling is a serial schedule-generation scheme: components are taken in
+topological order, most urgent (smallest CPM latest start) first, and each is
+placed on the eligible agent slot that finishes it earliest, ties going to the
+more suitable agent. Every step is O(log n) plus a scan of the agents, so
+hundreds of components over 8+ agents schedule in milliseconds.
+"""
+
+import heapq
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Job:
+    """A unit of work to schedule (a task component)"""
+    job_id: str
+    duration: float
+    dependencies: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Worker:
+    """An agent that runs ``capacity`` jobs at a time, free from ``available_at``"""
+    worker_id: str
+    capacity: int = 1
+    available_at: float = 0.0
+
+
+@dataclass
+class CriticalPathResult:
+    """CPM timings (hours from project start) for every job"""
+    order: List[str]
+    earliest_start: Dict[str, float]
+    earliest_finish: Dict[str, float]
+    latest_start: Dict[str, float]
+    latest_finish: Dict[str, float]
+    slack: Dict[str, float]
+    critical_path: List[str]
+    makespan: float
+
+
+@dataclass
+class ScheduledJob:
+    """Placement of one job; ``slack`` is its CPM (network) slack"""
+    job_id: str
+    worker_id: Optional[str]
+    start: float
+    finish: float
+    slack: float
+
+
+@dataclass
+class Schedule:
+    """Result of resource-constrained scheduling"""
+    jobs: Dict[str, ScheduledJob]
+    makespan: float
+    critical_path: List[str]
+    unassigned: List[str]
+
+    def by_worker(self) -> Dict[str, List[str]]:
+        """Worker -> job ids in start order"""
+        allocation: Dict[str, List[str]] = {}
+        for job in sorted(self.jobs.values(), key=lambda j: (j.start, j.job_id)):
+            if job.worker_id is not None:
+                allocation.setdefault(job.worker_id, []).append(job.job_id)
+        return allocation
+
+
+def topological_order(jobs: Sequence[Job]) -> List[str]:
+    """Kahn's algorithm; raises ValueError on unknown dependencies or cycles"""
+    index = {job.job_id: job for job in jobs}
+    indegree = {job.job_id: 0 for job in jobs}
+    children: Dict[str, List[str]] = {job.job_id: [] for job in jobs}
+    for job in jobs:
+        for dep in job.dependencies:
+            if dep not in index:
+                raise ValueError(f"{job.job_id} depends on unknown component {dep}")
+            indegree[job.job_id] += 1
+            children[dep].append(job.job_id)
+    order = [jid for jid, n in indegree.items() if n == 0]
+    for jid in order:
+        for child in children[jid]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                order.append(child)
+    if len(order) != len(jobs):
+        cyclic = sorted(jid for jid, n in indegree.items() if n > 0)
+        raise ValueError(f"Dependency cycle among components: {', '.join(cyclic)}")
+    return order
+
+
+def critical_path(jobs: Sequence[Job], eps: float = 1e-9) -> CriticalPathResult:
+    """CPM forward and backward pass over the job DAG (unlimited resources)"""
+    index = {job.job_id: job for job in jobs}
+    order = topological_order(jobs)
+    children: Dict[str, List[str]] = {jid: [] for jid in index}
+    for job in jobs:
+        for dep in job.dependencies:
+            children[dep].append(job.job_id)
+
+    es: Dict[str, float] = {}
+    ef: Dict[str, float] = {}
+    for jid in order:
+        es[jid] = max((ef[d] for d in index[jid].dependencies), default=0.0)
+        ef[jid] = es[jid] + index[jid].duration
+    makespan = max(ef.values(), default=0.0)
+
+    ls: Dict[str, float] = {}
+    lf: Dict[str, float] = {}
+    for jid in reversed(order):
+        lf[jid] = min((ls[c] for c in children[jid]), default=makespan)
+        ls[jid] = lf[jid] - index[jid].duration
+    slack = {jid: ls[jid] - es[jid] for jid in order}
+
+    # Walk the zero-slack chain from a critical start to a critical end
+    path: List[str] = []
+    current = next((jid for jid in order if not index[jid].dependencies and slack[jid] <= eps), None)
+    while current is not None:
+        path.append(current)
+        current = next(
+            (c for c in children[current] if slack[c] <= eps and abs(es[c] - ef[current]) <= eps),
+            None,
+        )
+    return CriticalPathResult(order, es, ef, ls, lf, slack, path, makespan)
+
+
+def list_schedule(
+    jobs: Sequence[Job],
+    workers: Iterable[Worker],
+    eligible: Optional[Callable[[str, str], bool]] = None,
+    preference: Optional[Callable[[str, str], float]] = None,
+) -> Schedule:
+    """Resource-constrained list scheduling.
+
+    Args:
+        jobs: Jobs with durations and dependencies
+        workers: Agents with capacity (parallel jobs) and availability
+        eligible: ``eligible(worker_id, job_id)`` skill constraint; all workers when None
+        preference: ``preference(worker_id, job_id)`` tie-breaker, higher is better
+
+    Returns:
+        Schedule: per-job worker/start/finish/slack, makespan and the critical path.
+        Jobs no worker may take are listed in ``unassigned``; they still take their
+        duration so their dependents are not scheduled early.
+    """
+    cpm = critical_path(jobs)
+    index = {job.job_id: job for job in jobs}
+    position = {jid: i for i, jid in enumerate(cpm.order)}
+    children: Dict[str, List[str]] = {jid: [] for jid in index}
+    waiting = {jid: len(index[jid].dependencies) for jid in index}
+    for job in jobs:
+        for dep in job.dependencies:
+            children[dep].append(job.job_id)
+
+    # One free-time heap per worker, one entry per capacity slot
+    slots: Dict[str, List[float]] = {}
+    for worker in workers:
+        slots[worker.worker_id] = [worker.available_at] * max(1, worker.capacity)
+    worker_ids = list(slots)
+
+    ready = [(cpm.latest_start[jid], position[jid], jid) for jid, n in waiting.items() if n == 0]
+    heapq.heapify(ready)
+    placed: Dict[str, ScheduledJob] = {}
+    unassigned: List[str] = []
+
+    while ready:
+        _, _, jid = heapq.heappop(ready)
+        job = index[jid]
+        release = max((placed[d].finish for d in job.dependencies), default=0.0)
+
+        best = None
+        for wid in worker_ids:
+            if eligible is not None and not eligible(wid, jid):
+                continue
+            start = max(slots[wid][0], release)
+            rank = (start + job.duration, -(preference(wid, jid) if preference else 0.0))
+            if best is None or rank < best[0]:
+                best = (rank, wid, start)
+
+        if best is None:
+            unassigned.append(jid)
+            placed[jid] = ScheduledJob(jid, None, release, release + job.duration, cpm.slack[jid])
+        else:
+            _, wid, start = best
+            heapq.heapreplace(slots[wid], start + job.duration)
+            placed[jid] = ScheduledJob(jid, wid, start, start + job.duration, cpm.slack[jid])
+
+        for child in children[jid]:
+            waiting[child] -= 1
+            if waiting[child] == 0:
+                heapq.heappush(ready, (cpm.latest_start[child], position[child], child))
+
+    makespan = max((j.finish for j in placed.values()), default=0.0)
+    if unassigned:
+        logger.warning(f"No eligible agent for {len(unassigned)} components")
+    return Schedule(placed, makespan, cpm.critical_path, unassigned)
@@ -14,19 +14,27 @@ This module provides intelligent workflow optimization that maximizes
 collaborative efficiency and minimizes process overhead.
 """
 
-import json
 import logging
+import sys
 import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple, Set
 from pathlib import Path
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field, fields
 from enum import Enum
 import uuid
 import math
 from collections import defaultdict, Counter
 import networkx as nx
 
+try:
+    from ..entity_store import EntityStore, coerce_enum, read_json
+    from .metric_stream import MetricStream
+except ImportError:  # imported as a top-level module
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    from entity_store import EntityStore, coerce_enum, read_json
+    from metric_stream import MetricStream
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -104,17 +112,36 @@ class CollaborativeWorkflow:
     updated_at: str
     completed_at: Optional[str] = None
 
+@dataclass
+class WorkflowAnalytics:
+    """Streaming analysis state of one workflow, updated as metrics arrive"""
+    streams: Dict[str, MetricStream] = field(default_factory=dict)
+    metrics_by_type: Dict[str, List[WorkflowMetric]] = field(default_factory=dict)
+    applied_trends: Dict[str, str] = field(default_factory=dict)
+    metric_score_sum: float = 0.0
+    metric_score_count: int = 0
+    time_score_sum: float = 0.0
+    time_score_count: int = 0
+    pattern_score_sum: float = 0.0
+    pattern_count: int = 0
+    saved: Tuple[int, int, int] = (0, 0, 0)  # metrics, patterns, optimizations already stored
+
+# Stored as their own rows, not inside the workflow row
+_WORKFLOW_CHILDREN = ("metrics", "patterns", "optimizations")
+
 class WorkflowOptimizer:
     """Intelligent workflow optimization system"""
 
-    def __init__(self, base_path: Path):
+    def __init__(self, base_path: Path, metric_window: int = 20):
         """
         Initialize Workflow Optimizer
         
         Args:
             base_path: Base directory for workflow optimization data
+            metric_window: Values per metric type that trend and pattern detection look at
         """
         self.base_path = Path(base_path)
+        self.metric_window = metric_window
         self.workflows_dir = self.base_path / "workflows"
         self.metrics_dir = self.base_path / "metrics"
         self.patterns_dir = self.base_path / "patterns"
@@ -126,9 +153,20 @@ class WorkflowOptimizer:
         self.patterns_dir.mkdir(parents=True, exist_ok=True)
         self.optimizations_dir.mkdir(parents=True, exist_ok=True)
         
-        # Workflow cache
-        self._workflow_cache: Dict[str, CollaborativeWorkflow] = {}
+        # Workflows are stored as a header row plus one row per metric, pattern
+        # and optimization (keyed "<workflow_id>:<child_id>"), so recording a
+        # metric writes that metric instead of rewriting the whole workflow
+        self._store = EntityStore(self.base_path / "workflow_optimizer.sqlite")
+        self._metric_rows = self._store.repository(
+            "workflow_metrics", decode=lambda raw: WorkflowMetric(**raw))
+        self._pattern_rows = self._store.repository(
+            "workflow_patterns", decode=lambda raw: WorkflowPattern(**raw))
+        self._optimization_rows = self._store.repository(
+            "workflow_optimizations", decode=lambda raw: WorkflowOptimization(**raw))
+        self._workflow_cache = self._store.repository(
+            "workflows", decode=self._load_workflow, encode=self._workflow_header)
         self._pattern_cache: Dict[str, WorkflowPattern] = {}
+        self._analytics: Dict[str, WorkflowAnalytics] = {}
         
         # Load existing workflows
         self._load_existing_workflows()
@@ -136,15 +174,52 @@ class WorkflowOptimizer:
         logger.info(f"Workflow Optimizer initialized: {self.base_path}")
 
     def _load_existing_workflows(self) -> None:
-        """Load existing workflows from disk"""
-        for workflow_file in self.workflows_dir.glob("*.json"):
-            try:
-                with open(workflow_file, 'r') as f:
-                    workflow_data = json.load(f)
-                    workflow = CollaborativeWorkflow(**workflow_data)
-                    self._workflow_cache[workflow.workflow_id] = workflow
-            except Exception as e:
-                logger.error(f"Error loading workflow {workflow_file}: {e}")
+        """Import workflows saved as JSON files by earlier versions (runs once)"""
+        def import_json_files():
+            for workflow_file in sorted(self.workflows_dir.glob("*.json")):
+                workflow_data = read_json(workflow_file)
+                if not workflow_data:
+                    logger.error(f"Error loading workflow {workflow_file}")
+                    continue
+                try:
+                    workflow = self._workflow_from_dict(
+                        workflow_data,
+                        [WorkflowMetric(**m) for m in workflow_data.get("metrics", [])],
+                        [WorkflowPattern(**p) for p in workflow_data.get("patterns", [])],
+                        [WorkflowOptimization(**o) for o in workflow_data.get("optimizations", [])],
+                    )
+                except Exception as e:
+                    logger.error(f"Error loading workflow {workflow_file}: {e}")
+                    continue
+                self._save_workflow(workflow)
+
+        self._store.import_legacy("json-v1", import_json_files)
+
+    @staticmethod
+    def _workflow_from_dict(
+        data: Dict[str, Any],
+        metrics: List[WorkflowMetric],
+        patterns: List[WorkflowPattern],
+        optimizations: List[WorkflowOptimization]
+    ) -> CollaborativeWorkflow:
+        data = {k: v for k, v in data.items() if k not in _WORKFLOW_CHILDREN}
+        data["stages"] = [coerce_enum(WorkflowStage, stage) for stage in data["stages"]]
+        data["current_stage"] = coerce_enum(WorkflowStage, data["current_stage"])
+        return CollaborativeWorkflow(**data, metrics=metrics, patterns=patterns, optimizations=optimizations)
+
+    def _load_workflow(self, header: Dict[str, Any]) -> CollaborativeWorkflow:
+        """Rebuild a workflow from its header row and child rows"""
+        prefix = f"{header['workflow_id']}:"
+        return self._workflow_from_dict(
+            header,
+            [m for _, m in self._metric_rows.scan(prefix)],
+            [p for _, p in self._pattern_rows.scan(prefix)],
+            [o for _, o in self._optimization_rows.scan(prefix)],
+        )
+
+    @staticmethod
+    def _workflow_header(workflow: CollaborativeWorkflow) -> Dict[str, Any]:
+        return {f.name: getattr(workflow, f.name) for f in fields(workflow) if f.name not in _WORKFLOW_CHILDREN}
 
     def create_collaborative_workflow(
         self,
@@ -216,18 +291,21 @@ class WorkflowOptimizer:
         )
         
         # Add metric to workflow
+        analytics = self._analytics_for(workflow)
         workflow.metrics.append(metric)
+        self._track_metric(analytics, metric)
         workflow.updated_at = datetime.now().isoformat()
         
         # Update workflow efficiency score
         workflow.efficiency_score = self._calculate_workflow_efficiency(workflow)
         
+        # Analyze for patterns: only this metric's series changed, except when
+        # the workflow first has enough metrics and every series is analyzed
+        self._analyze_workflow_patterns(workflow, metric_type if len(workflow.metrics) > 3 else None)
+        
         # Save workflow
         self._save_workflow(workflow)
         
-        # Analyze for patterns
-        self._analyze_workflow_patterns(workflow)
-        
         logger.info(f"Added metric {metric_type} to workflow {workflow_id}")
         return metric
 
@@ -310,23 +388,11 @@ class WorkflowOptimizer:
         if not workflow.metrics:
             return 0.5  # Default neutral score
         
-        # Look for time-related metrics
-        time_metrics = [m for m in workflow.metrics if "time" in m.metric_type.lower()]
-        
-        if not time_metrics:
+        # Average over time-related metrics, kept as a running sum
+        analytics = self._analytics_for(workflow)
+        if not analytics.time_score_count:
             return 0.5
-        
-        # Calculate average time efficiency
-        time_scores = []
-        for metric in time_metrics:
-            # Normalize time values (lower is better for most time metrics)
-            if metric.value > 0:
-                # Assume optimal time is 1 hour, score decreases with longer times
-                optimal_time = 1.0
-                time_score = max(0.0, 1.0 - (metric.value - optimal_time) / optimal_time)
-                time_scores.append(time_score)
-        
-        return sum(time_scores) / len(time_scores) if time_scores else 0.5
+        return analytics.time_score_sum / analytics.time_score_count
 
     def _calculate_collaboration_efficiency(self, workflow: CollaborativeWorkflow) -> float:
         """Calculate efficiency based on collaboration patterns"""
@@ -334,33 +400,65 @@ class WorkflowOptimizer:
             return 0.5  # Default neutral score
         
         # Calculate average pattern efficiency
-        pattern_scores = [pattern.efficiency_score for pattern in workflow.patterns]
-        return sum(pattern_scores) / len(pattern_scores)
+        analytics = self._analytics_for(workflow)
+        return analytics.pattern_score_sum / analytics.pattern_count
 
     def _calculate_metric_efficiency(self, workflow: CollaborativeWorkflow) -> float:
         """Calculate efficiency based on performance metrics"""
         if not workflow.metrics:
             return 0.5  # Default neutral score
         
-        # Calculate average metric value (assuming higher is better)
-        metric_values = [m.value for m in workflow.metrics if m.value >= 0]
-        
-        if not metric_values:
+        # Average normalized metric value (assuming higher is better)
+        analytics = self._analytics_for(workflow)
+        if not analytics.metric_score_count:
             return 0.5
-        
-        # Normalize to 0-1 range (assuming optimal value is 100)
-        optimal_value = 100.0
-        normalized_values = [min(1.0, value / optimal_value) for value in metric_values]
-        
-        return sum(normalized_values) / len(normalized_values)
-
-    def _analyze_workflow_patterns(self, workflow: CollaborativeWorkflow) -> None:
-        """Analyze workflow for recurring patterns"""
+        return analytics.metric_score_sum / analytics.metric_score_count
+
+    def _analytics_for(self, workflow: CollaborativeWorkflow) -> WorkflowAnalytics:
+        """Streaming state of a workflow, rebuilt from its history on first use"""
+        analytics = self._analytics.get(workflow.workflow_id)
+        if analytics is None:
+            analytics = WorkflowAnalytics()
+            history: Dict[str, List[float]] = defaultdict(list)
+            for metric in workflow.metrics:
+                self._track_metric(analytics, metric, stream=False)
+                history[metric.metric_type].append(metric.value)
+            for metric_type, values in history.items():
+                analytics.streams[metric_type] = MetricStream.from_values(values, window=self.metric_window)
+            for pattern in workflow.patterns:
+                self._track_pattern(analytics, pattern)
+            self._analytics[workflow.workflow_id] = analytics
+        return analytics
+
+    def _track_metric(self, analytics: WorkflowAnalytics, metric: WorkflowMetric, stream: bool = True) -> None:
+        analytics.metrics_by_type.setdefault(metric.metric_type, []).append(metric)
+        if stream:
+            if metric.metric_type not in analytics.streams:
+                analytics.streams[metric.metric_type] = MetricStream(window=self.metric_window)
+            analytics.streams[metric.metric_type].add(metric.value)
+        
+        if metric.value >= 0:
+            # Normalize to 0-1 range (assuming optimal value is 100)
+            analytics.metric_score_sum += min(1.0, metric.value / 100.0)
+            analytics.metric_score_count += 1
+        if "time" in metric.metric_type.lower() and metric.value > 0:
+            # Lower is better; assume optimal time is 1 hour
+            optimal_time = 1.0
+            analytics.time_score_sum += max(0.0, 1.0 - (metric.value - optimal_time) / optimal_time)
+            analytics.time_score_count += 1
+
+    @staticmethod
+    def _track_pattern(analytics: WorkflowAnalytics, pattern: WorkflowPattern) -> None:
+        analytics.pattern_score_sum += pattern.efficiency_score
+        analytics.pattern_count += 1
+
+    def _analyze_workflow_patterns(self, workflow: CollaborativeWorkflow, metric_type: Optional[str] = None) -> None:
+        """Analyze workflow for recurring patterns (only ``metric_type`` when given)"""
         if len(workflow.metrics) < 3:
             return  # Need more data for pattern analysis
         
         # Analyze metric patterns
-        self._analyze_metric_patterns(workflow)
+        self._analyze_metric_patterns(workflow, metric_type)
         
         # Analyze stage transition patterns
         self._analyze_stage_patterns(workflow)
@@ -368,32 +466,30 @@ class WorkflowOptimizer:
         # Analyze collaboration patterns
         self._analyze_collaboration_patterns(workflow)
 
-    def _analyze_metric_patterns(self, workflow: CollaborativeWorkflow) -> None:
-        """Analyze patterns in workflow metrics"""
-        # Group metrics by type
-        metrics_by_type = defaultdict(list)
-        for metric in workflow.metrics:
-            metrics_by_type[metric.metric_type].append(metric)
+    def _analyze_metric_patterns(self, workflow: CollaborativeWorkflow, metric_type: Optional[str] = None) -> None:
+        """Analyze patterns in workflow metrics from their streaming state"""
+        analytics = self._analytics_for(workflow)
+        metric_types = [metric_type] if metric_type is not None else list(analytics.streams)
         
-        # Analyze trends for each metric type
-        for metric_type, metrics in metrics_by_type.items():
-            if len(metrics) < 2:
+        for mtype in metric_types:
+            stream = analytics.streams[mtype]
+            if stream.count < 2:
                 continue
             
-            # Sort by timestamp
-            sorted_metrics = sorted(metrics, key=lambda m: m.timestamp)
-            
-            # Calculate trend
-            values = [m.value for m in sorted_metrics]
-            trend = self._calculate_trend(values)
-            
-            # Update metric trends
-            for metric in sorted_metrics:
-                metric.trend = trend
+            # Every metric of a type carries the type's current trend; the whole
+            # series is only rewritten when that trend changes
+            trend = stream.trend()
+            metrics = analytics.metrics_by_type[mtype]
+            changed = metrics if analytics.applied_trends.get(mtype) != trend else metrics[-1:]
+            for metric in changed:
+                if metric.trend != trend:
+                    metric.trend = trend
+                    self._metric_rows.mark(f"{workflow.workflow_id}:{metric.metric_id}")
+            analytics.applied_trends[mtype] = trend
             
             # Check for significant patterns
-            if len(values) >= 3:
-                self._detect_metric_patterns(workflow, metric_type, values, trend)
+            if stream.count >= 3:
+                self._detect_metric_patterns(workflow, mtype, stream)
 
     def _analyze_stage_patterns(self, workflow: CollaborativeWorkflow) -> None:
         """Analyze patterns in workflow stage transitions"""
@@ -407,60 +503,17 @@ class WorkflowOptimizer:
         # For now, we'll implement a basic analysis
         pass
 
-    def _calculate_trend(self, values: List[float]) -> str:
-        """Calculate trend from a series of values"""
-        if len(values) < 2:
-            return "stable"
-        
-        # Simple linear trend calculation
-        x_values = list(range(len(values)))
-        y_values = values
-        
-        # Calculate slope
-        n = len(values)
-        sum_x = sum(x_values)
-        sum_y = sum(y_values)
-        sum_xy = sum(x * y for x, y in zip(x_values, y_values))
-        sum_x2 = sum(x * x for x in x_values)
-        
-        if n * sum_x2 - sum_x * sum_x == 0:
-            return "stable"
-        
-        slope = (n * sum_xy - sum_x * sum_y) / (n * sum_x2 - sum_x * sum_x)
-        
-        # Determine trend based on slope
-        if slope > 0.1:
-            return "improving"
-        elif slope < -0.1:
-            return "declining"
-        else:
-            return "stable"
-
     def _detect_metric_patterns(
         self,
         workflow: CollaborativeWorkflow,
         metric_type: str,
-        values: List[float],
-        trend: str
+        stream: MetricStream
     ) -> None:
-        """Detect specific patterns in metric data"""
-        # Detect common patterns
-        patterns = []
-        
-        # Detect oscillation pattern
-        if self._detect_oscillation(values):
-            patterns.append("oscillation")
-        
-        # Detect plateau pattern
-        if self._detect_plateau(values):
-            patterns.append("plateau")
-        
-        # Detect acceleration pattern
-        if self._detect_acceleration(values):
-            patterns.append("acceleration")
+        """Record oscillation, plateau and acceleration patterns when they start"""
+        analytics = self._analytics_for(workflow)
         
         # Create pattern records
-        for pattern_type in patterns:
+        for pattern_type in stream.new_patterns():
             pattern = WorkflowPattern(
                 pattern_id=str(uuid.uuid4()),
                 pattern_type=pattern_type,
@@ -468,58 +521,21 @@ class WorkflowOptimizer:
                 efficiency_score=0.7,  # Default score
                 frequency=1,
                 agents_involved=workflow.participants,
-                average_duration=sum(values) / len(values),
+                average_duration=stream.mean,
                 success_rate=0.8,  # Default rate
                 identified_at=datetime.now().isoformat()
             )
             
             workflow.patterns.append(pattern)
+            self._track_pattern(analytics, pattern)
             self._pattern_cache[pattern.pattern_id] = pattern
 
-    def _detect_oscillation(self, values: List[float]) -> bool:
-        """Detect oscillation pattern in values"""
-        if len(values) < 4:
-            return False
-        
-        # Check for alternating increases and decreases
-        oscillations = 0
-        for i in range(1, len(values) - 1):
-            if (values[i] > values[i-1] and values[i] > values[i+1]) or \
-               (values[i] < values[i-1] and values[i] < values[i+1]):
-                oscillations += 1
-        
-        # Consider it oscillation if more than 50% of points are peaks/valleys
-        return oscillations / (len(values) - 2) > 0.5
-
-    def _detect_plateau(self, values: List[float]) -> bool:
-        """Detect plateau pattern in values"""
-        if len(values) < 3:
-            return False
-        
-        # Check if values are relatively constant
-        mean_value = sum(values) / len(values)
-        variance = sum((v - mean_value) ** 2 for v in values) / len(values)
-        
-        # Consider it a plateau if variance is low
-        return variance < (mean_value * 0.1) ** 2
-
-    def _detect_acceleration(self, values: List[float]) -> bool:
-        """Detect acceleration pattern in values"""
-        if len(values) < 3:
-            return False
-        
-        # Check if rate of change is increasing
-        changes = [values[i] - values[i-1] for i in range(1, len(values))]
-        if len(changes) < 2:
-            return False
-        
-        # Check if changes are increasing
-        increasing_changes = 0
-        for i in range(1, len(changes)):
-            if changes[i] > changes[i-1]:
-                increasing_changes += 1
-        
-        return increasing_changes / (len(changes) - 1) > 0.7
+    def get_metric_statistics(self, workflow_id: str) -> Dict[str, Dict[str, Any]]:
+        """Streaming statistics (count, mean, std, EWMA, slope, trend, patterns) per metric type"""
+        if workflow_id not in self._workflow_cache:
+            return {}
+        analytics = self._analytics_for(self._workflow_cache[workflow_id])
+        return {metric_type: stream.summary() for metric_type, stream in analytics.streams.items()}
 
     def generate_optimization_recommendations(self, workflow_id: str) -> List[WorkflowOptimization]:
         """Generate optimization recommendations for a workflow"""
@@ -608,10 +624,33 @@ class WorkflowOptimizer:
         return recommendations
 
     def _save_workflow(self, workflow: CollaborativeWorkflow) -> None:
-        """Save workflow to disk"""
-        workflow_file = self.workflows_dir / f"{workflow.workflow_id}.json"
-        with open(workflow_file, 'w') as f:
-            json.dump(asdict(workflow), f, indent=2, default=str)
+        """Queue the workflow header and any new metrics, patterns or optimizations"""
+        wid = workflow.workflow_id
+        self._workflow_cache[wid] = workflow
+        analytics = self._analytics_for(workflow)
+        # Child lists are append-only: only entries past the stored count are new
+        saved = []
+        for rows, children, id_field, done in zip(
+            (self._metric_rows, self._pattern_rows, self._optimization_rows),
+            (workflow.metrics, workflow.patterns, workflow.optimizations),
+            ("metric_id", "pattern_id", "optimization_id"),
+            analytics.saved,
+        ):
+            for child in children[done:]:
+                key = f"{wid}:{getattr(child, id_field)}"
+                if key not in rows:
+                    rows[key] = child
+            saved.append(len(children))
+        analytics.saved = tuple(saved)
+        self._store.maybe_flush()
+
+    def flush(self) -> int:
+        """Write every queued change now; returns the number of rows written"""
+        return self._store.flush()
+
+    def close(self) -> None:
+        """Flush and close the workflow store"""
+        self._store.close()
 
     def get_workflow_summary(self) -> Dict[str, Any]:
         """Get summary of all workflows"""
@@ -0,0 +1,358 @@
+"""Unified per-agent activity timeline.
+
+Every stall detector used to keep its own idea of "when was this agent last
+seen" (heartbeat globbing in the Agent-5 monitor, ``state.json`` parsing in
+the overnight runner, a hard-coded ``False`` in the stall detection system,
+``datetime.now()`` bookkeeping in :mod:`src.core.agent_monitor` and
+``last_output_at`` in ``scripts/term_watch.py``).  :class:`ActivityTimeline`
+is the one place those events land:
+
+- ``record(agent, ts, source)`` appends to a fixed-size per-agent ring buffer
+  and bumps a fixed number of time buckets, so memory is bounded per agent.
+- ``last_activity``, ``activity_rate``, ``classify`` and ``is_stalled`` are
+  answered from per-agent counters without scanning history.
+
+:class:`ActivityWatcher` feeds a timeline from the files the agents already
+write (the heartbeat table, legacy heartbeat envelopes, ``state.json``, ``response.txt``, git reflogs and
+``term_state.json``).  Each poll is a ``stat`` per source and only files whose
+mtime moved are parsed.  The timeline lives in-process; every consumer process
+runs its own watcher over the same files.
+"""
+from __future__ import annotations
+
+import json
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+SOURCES = ("heartbeat", "reply", "state", "commit", "terminal", "manual")
+TERM_TS_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+
+@dataclass
+class StallThresholds:
+    """Age cut-offs (seconds since last activity) used by :meth:`ActivityTimeline.classify`."""
+
+    active_sec: float = 60.0
+    warn_sec: float = 300.0
+    stall_sec: float = 600.0
+
+
+class _AgentActivity:
+    __slots__ = ("events", "last", "last_by_source", "counts", "bucket_ids", "total")
+
+    def __init__(self, capacity: int, n_buckets: int) -> None:
+        self.events: Deque[Tuple[float, str]] = deque(maxlen=capacity)
+        self.last = 0.0
+        self.last_by_source: Dict[str, float] = {}
+        self.counts = [0] * n_buckets
+        self.bucket_ids = [-1] * n_buckets
+        self.total = 0
+
+
+class ActivityTimeline:
+    """Thread-safe ring buffer of activity events per agent.
+
+    ``bucket_sec * n_buckets`` is the longest window :meth:`activity_rate`
+    can answer; larger windows are clamped to it.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 256,
+        bucket_sec: float = 60.0,
+        n_buckets: int = 60,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.capacity = max(1, int(capacity))
+        self.bucket_sec = float(bucket_sec)
+        self.n_buckets = max(1, int(n_buckets))
+        self.clock = clock
+        self.started_at = clock()
+        self._agents: Dict[str, _AgentActivity] = {}
+        self._listeners: List[Callable[[str, float, str], None]] = []
+        self._lock = threading.Lock()
+
+    def _slot(self, agent: str) -> _AgentActivity:
+        act = self._agents.get(agent)
+        if act is None:
+            act = self._agents[agent] = _AgentActivity(self.capacity, self.n_buckets)
+        return act
+
+    # ---- ingest ----
+    def add_listener(self, fn: Callable[[str, float, str], None]) -> None:
+        """Call ``fn(agent, ts, source)`` for every recorded event (e.g. fleet analytics)."""
+        self._listeners.append(fn)
+
+    def record(self, agent: str, ts: Optional[float] = None, source: str = "manual") -> None:
+        """Record one activity event for ``agent`` at epoch ``ts`` (default: now)."""
+        if not agent:
+            return
+        ts = self.clock() if ts is None else float(ts)
+        idx = int(ts // self.bucket_sec)
+        with self._lock:
+            act = self._slot(agent)
+            act.events.append((ts, source))
+            act.total += 1
+            if ts > act.last:
+                act.last = ts
+            if ts > act.last_by_source.get(source, 0.0):
+                act.last_by_source[source] = ts
+            # Events older than the bucket horizon still count as history, not rate
+            newest = int(act.last // self.bucket_sec)
+            pos = idx % self.n_buckets
+            if idx > newest - self.n_buckets and act.bucket_ids[pos] <= idx:
+                if act.bucket_ids[pos] != idx:
+                    act.bucket_ids[pos] = idx
+                    act.counts[pos] = 0
+                act.counts[pos] += 1
+        for fn in self._listeners:
+            try:
+                fn(agent, ts, source)
+            except Exception:
+                pass
+
+    def forget(self, agent: str) -> None:
+        with self._lock:
+            self._agents.pop(agent, None)
+
+    # ---- queries ----
+    def agents(self) -> List[str]:
+        with self._lock:
+            return list(self._agents)
+
+    def last_activity(self, agent: str, sources: Optional[Iterable[str]] = None) -> Optional[float]:
+        """Epoch seconds of the newest event for ``agent`` (optionally per source)."""
+        with self._lock:
+            act = self._agents.get(agent)
+            if act is None:
+                return None
+            if sources is None:
+                return act.last or None
+            best = max((act.last_by_source.get(s, 0.0) for s in sources), default=0.0)
+            return best or None
+
+    def age(self, agent: str, now: Optional[float] = None) -> float:
+        """Seconds since the last event; agents never seen age from timeline start."""
+        now = self.clock() if now is None else now
+        last = self.last_activity(agent)
+        return max(0.0, now - (last if last is not None else self.started_at))
+
+    def activity_rate(self, agent: str, window: float, now: Optional[float] = None) -> float:
+        """Events per second for ``agent`` over the trailing ``window`` seconds."""
+        if window <= 0:
+            return 0.0
+        now = self.clock() if now is None else now
+        span = min(self.n_buckets, max(1, int(math.ceil(window / self.bucket_sec))))
+        cur = int(now // self.bucket_sec)
+        with self._lock:
+            act = self._agents.get(agent)
+            if act is None:
+                return 0.0
+            count = 0
+            for idx in range(cur - span + 1, cur + 1):
+                pos = idx % self.n_buckets
+                if act.bucket_ids[pos] == idx:
+                    count += act.counts[pos]
+        return count / min(float(window), span * self.bucket_sec)
+
+    def recent(self, agent: str, limit: int = 20) -> List[Tuple[float, str]]:
+        """Newest-last ``(ts, source)`` pairs from the agent's ring buffer."""
+        with self._lock:
+            act = self._agents.get(agent)
+            if act is None:
+                return []
+            return list(act.events)[-limit:]
+
+    def classify(self, agent: str, thresholds: StallThresholds, now: Optional[float] = None) -> str:
+        """Return ``active``/``idle``/``warning``/``stalled`` for the agent's current age."""
+        age = self.age(agent, now)
+        if age <= thresholds.active_sec:
+            return "active"
+        if age <= thresholds.warn_sec:
+            return "idle"
+        if age <= thresholds.stall_sec:
+            return "warning"
+        return "stalled"
+
+    def is_stalled(
+        self,
+        agent: str,
+        thresholds: Union[StallThresholds, float],
+        now: Optional[float] = None,
+        unseen_is_stalled: bool = False,
+    ) -> bool:
+        """True once the agent has been silent for longer than the stall threshold.
+
+        Agents with no events age from :attr:`started_at` unless
+        ``unseen_is_stalled`` is set (the runner treats a missing
+        ``state.json`` as stalled).
+        """
+        limit = thresholds.stall_sec if isinstance(thresholds, StallThresholds) else float(thresholds)
+        if unseen_is_stalled and self.last_activity(agent) is None:
+            return True
+        return self.age(agent, now) >= limit
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Dict[str, object]]:
+        now = self.clock() if now is None else now
+        with self._lock:
+            return {
+                agent: {
+                    "last": act.last or None,
+                    "age_sec": round(now - act.last, 1) if act.last else None,
+                    "events": act.total,
+                    "by_source": dict(act.last_by_source),
+                }
+                for agent, act in self._agents.items()
+            }
+
+
+def parse_term_ts(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds for a ``term_state.json`` ``...Z`` stamp."""
+    if not value:
+        return None
+    try:
+        return (datetime.strptime(value, TERM_TS_FORMAT) - datetime(1970, 1, 1)).total_seconds()
+    except Exception:
+        return None
+
+
+class ActivityWatcher:
+    """Poll agent-written files into an :class:`ActivityTimeline`.
+
+    Any root left as ``None`` disables that source.  ``repos`` maps an agent to
+    a git checkout whose ``.git/logs/HEAD`` mtime marks its latest commit.
+    ``heartbeat_table`` is a :class:`src.core.heartbeat_table.HeartbeatTable`;
+    one read per poll covers every agent and only advanced sequence numbers are
+    recorded.  ``inbox_root`` still drains ``heartbeat_*.json`` envelopes from
+    older senders.
+    """
+
+    def __init__(
+        self,
+        timeline: ActivityTimeline,
+        workspace_root: Optional[Union[str, Path]] = None,
+        inbox_root: Optional[Union[str, Path]] = None,
+        term_root: Optional[Union[str, Path]] = None,
+        repos: Optional[Dict[str, Union[str, Path]]] = None,
+        response_name: str = "response.txt",
+        consume_heartbeats: bool = True,
+        heartbeat_table: Any = None,
+    ) -> None:
+        self.timeline = timeline
+        self.workspace_root = Path(workspace_root) if workspace_root else None
+        self.inbox_root = Path(inbox_root) if inbox_root else None
+        self.term_root = Path(term_root) if term_root else None
+        self.repos = {a: Path(p) for a, p in (repos or {}).items()}
+        self.response_name = response_name
+        self.consume_heartbeats = consume_heartbeats
+        self.heartbeat_table = heartbeat_table
+        self._seen: Dict[Tuple[str, str], float] = {}
+        self._beat_seq: Dict[str, int] = {}
+
+    def _changed(self, agent: str, source: str, path: Path) -> Optional[float]:
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            return None
+        key = (agent, source)
+        if self._seen.get(key) == mtime:
+            return None
+        self._seen[key] = mtime
+        return mtime
+
+    def poll(self, agents: Sequence[str]) -> int:
+        """Ingest new activity for ``agents``; returns the number of events recorded."""
+        recorded = self._poll_heartbeat_table(agents) + self._poll_heartbeats(agents)
+        for agent in agents:
+            if self.workspace_root is not None:
+                ws = self.workspace_root / agent
+                for source, name in (("state", "state.json"), ("reply", self.response_name)):
+                    mtime = self._changed(agent, source, ws / name)
+                    if mtime is not None:
+                        self.timeline.record(agent, mtime, source)
+                        recorded += 1
+            repo = self.repos.get(agent)
+            if repo is not None:
+                mtime = self._changed(agent, "commit", repo / ".git" / "logs" / "HEAD")
+                if mtime is not None:
+                    self.timeline.record(agent, mtime, "commit")
+                    recorded += 1
+            if self.term_root is not None:
+                recorded += self._poll_terminal(agent)
+        return recorded
+
+    def _poll_heartbeat_table(self, agents: Sequence[str]) -> int:
+        if self.heartbeat_table is None:
+            return 0
+        try:
+            beats = self.heartbeat_table.read_all()
+        except Exception:
+            return 0
+        recorded = 0
+        for agent in agents:
+            beat = beats.get(agent)
+            if beat is None or self._beat_seq.get(agent) == beat.seq:
+                continue
+            self._beat_seq[agent] = beat.seq
+            self.timeline.record(agent, beat.ts, "heartbeat")
+            recorded += 1
+        return recorded
+
+    def _poll_heartbeats(self, agents: Sequence[str]) -> int:
+        if self.inbox_root is None or not self.inbox_root.exists():
+            return 0
+        recorded = 0
+        wanted = set(agents)
+        for hb in self.inbox_root.glob("heartbeat_*.json"):
+            try:
+                data = json.loads(hb.read_text(encoding="utf-8"))
+                agent = data.get("agent")
+                ts = float(data.get("ts") or 0)
+                if agent in wanted and ts:
+                    self.timeline.record(agent, ts, "heartbeat")
+                    recorded += 1
+            except Exception:
+                pass
+            finally:
+                if self.consume_heartbeats:
+                    try:
+                        hb.unlink()
+                    except Exception:
+                        pass
+        return recorded
+
+    def _poll_terminal(self, agent: str) -> int:
+        # term_watch names its folders agent-<id>; accept "Agent-3" and "3" alike
+        suffix = agent.split("-")[-1]
+        for name in (f"agent-{agent}", f"agent-{suffix}"):
+            path = self.term_root / name / "term_state.json"
+            mtime = self._changed(agent, "terminal", path)
+            if mtime is None:
+                continue
+            try:
+                ts = parse_term_ts(json.loads(path.read_text(encoding="utf-8")).get("last_output_at"))
+            except Exception:
+                ts = None
+            if ts:
+                self.timeline.record(agent, ts, "terminal")
+                return 1
+        return 0
+
+
+_default: Optional[ActivityTimeline] = None
+_default_lock = threading.Lock()
+
+
+def get_timeline() -> ActivityTimeline:
+    """Process-wide timeline shared by consumers that are not handed one."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ActivityTimeline()
+        return _default
@@ -6,13 +6,17 @@ from typing import Dict, List, Optional
 import asyncio
 import aiohttp
 
+from .activity_timeline import ActivityTimeline, get_timeline
+
 class AgentStallDetector:
     """Detects when agents stall and sends rescue messages"""
     
-    def __init__(self, agent_id: str, check_interval: int = 300):
+    def __init__(self, agent_id: str, check_interval: int = 300, timeline: Optional[ActivityTimeline] = None):
         self.agent_id = agent_id
         self.check_interval = check_interval  # 5 minutes default
-        self.last_activity = datetime.now()
+        # Activity lives in the shared timeline so heartbeats/replies seen elsewhere count too
+        self.timeline = timeline or get_timeline()
+        self._watch_started = time.time()
         self.stall_threshold = 600  # 10 minutes
         self.rescue_messages_sent = []
         self.is_monitoring = False
@@ -21,9 +25,15 @@ class AgentStallDetector:
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(f"AgentMonitor-{agent_id}")
         
+    @property
+    def last_activity(self) -> datetime:
+        """Latest timeline activity, never earlier than when this detector started"""
+        seen = self.timeline.last_activity(self.agent_id) or 0.0
+        return datetime.fromtimestamp(max(seen, self._watch_started))
+
     def update_activity(self):
         """Update last activity timestamp"""
-        self.last_activity = datetime.now()
+        self.timeline.record(self.agent_id, source="manual")
         self.logger.info(f"Activity updated: {self.last_activity}")
         
     def is_stalled(self) -> bool:
@@ -0,0 +1,275 @@
+"""Fleet-wide activity analytics over a columnar agent x time-bucket matrix.
+
+The stall detectors classify one agent at a time from a single "last seen"
+timestamp.  :class:`FleetActivityMatrix` keeps days of per-bucket event counts
+for every agent in one contiguous ``array('I')`` (row = agent, column = time
+bucket on a shared ring) and :meth:`FleetActivityMatrix.analyze` derives, for
+the whole fleet at once:
+
+- ``idle_sec`` / ``stall_score`` (idle time over the stall threshold);
+- ``idle_streak`` (trailing buckets with no activity);
+- hourly response-rate percentiles (``rate_p50`` / ``rate_p90``);
+- ``anomaly`` flags: an agent far quieter this hour than its own history, or
+  idle far longer than the rest of the fleet (median + k * MAD);
+- ``status`` with the same active/idle/warning/stalled cut-offs as
+  :class:`src.core.activity_timeline.StallThresholds`.
+
+With NumPy installed the matrix is viewed zero-copy and every metric is one
+vectorized expression; without it the same numbers come from plain loops.
+Attach a matrix to an :class:`ActivityTimeline` with :meth:`attach` so it sees
+every recorded event.
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+try:
+    import numpy as np  # type: ignore
+    HAS_NUMPY = True
+except ImportError:
+    np = None  # type: ignore
+    HAS_NUMPY = False
+
+try:
+    import pandas as pd  # type: ignore
+    HAS_PANDAS = True
+except ImportError:
+    pd = None  # type: ignore
+    HAS_PANDAS = False
+
+from .activity_timeline import StallThresholds
+
+STATUSES = ("active", "idle", "warning", "stalled")
+COLUMNS = ("idle_sec", "stall_score", "idle_streak", "rate_p50", "rate_p90", "rate_now", "anomaly", "status")
+
+
+@dataclass
+class FleetReport:
+    """Columnar analysis result: ``columns[name][i]`` belongs to ``agents[i]``."""
+
+    ts: float
+    agents: List[str]
+    columns: Dict[str, List[Any]] = field(default_factory=dict)
+
+    def row(self, agent: str) -> Optional[Dict[str, Any]]:
+        try:
+            i = self.agents.index(agent)
+        except ValueError:
+            return None
+        return {name: values[i] for name, values in self.columns.items()}
+
+    def flagged(self) -> List[str]:
+        return [a for a, flag in zip(self.agents, self.columns.get("anomaly", [])) if flag]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"ts": self.ts, "agents": {a: self.row(a) for a in self.agents}}
+
+    def to_frame(self):
+        """pandas DataFrame indexed by agent (requires pandas)."""
+        if not HAS_PANDAS:
+            raise RuntimeError("pandas is not installed")
+        return pd.DataFrame(self.columns, index=pd.Index(self.agents, name="agent"))
+
+
+def _percentile(sorted_vals: Sequence[float], q: float) -> float:
+    """Linear-interpolated percentile, matching numpy's default method."""
+    if not sorted_vals:
+        return 0.0
+    pos = (len(sorted_vals) - 1) * q / 100.0
+    lo = int(math.floor(pos))
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return float(sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (pos - lo))
+
+
+class FleetActivityMatrix:
+    """Per-agent event counts in fixed time buckets over a rolling horizon."""
+
+    def __init__(
+        self,
+        bucket_sec: float = 60.0,
+        horizon_sec: float = 3 * 86400.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.bucket_sec = float(bucket_sec)
+        self.n_buckets = max(2, int(math.ceil(horizon_sec / self.bucket_sec)))
+        self.clock = clock
+        self.agents: List[str] = []
+        self._row: Dict[str, int] = {}
+        self._counts = array("I")
+        self._last_ts = array("d")
+        self._head: Optional[int] = None  # newest bucket index written
+        self._lock = threading.Lock()
+
+    # ---- ingest ----
+    def attach(self, timeline: Any) -> "FleetActivityMatrix":
+        """Receive every event recorded on an ``ActivityTimeline``."""
+        timeline.add_listener(lambda agent, ts, source: self.record(agent, ts))
+        return self
+
+    def add_agent(self, agent: str) -> int:
+        with self._lock:
+            return self._ensure_row(agent)
+
+    def _ensure_row(self, agent: str) -> int:
+        row = self._row.get(agent)
+        if row is None:
+            row = self._row[agent] = len(self.agents)
+            self.agents.append(agent)
+            self._counts.extend(array("I", bytes(4 * self.n_buckets)))
+            self._last_ts.append(0.0)
+        return row
+
+    def _advance(self, idx: int) -> None:
+        """Move the ring head to bucket ``idx``, zeroing recycled columns."""
+        if self._head is None:
+            self._head = idx
+            return
+        if idx <= self._head:
+            return
+        n = self.n_buckets
+        first = max(self._head + 1, idx - n + 1)
+        start, stop = first % n, idx % n + 1
+        # Recycled columns form at most two contiguous runs per row
+        runs = [(start, stop)] if start < stop else [(start, n), (0, stop)]
+        for r in range(len(self.agents)):
+            base = r * n
+            for a, b in runs:
+                if b > a:
+                    self._counts[base + a:base + b] = array("I", bytes(4 * (b - a)))
+        self._head = idx
+
+    def record(self, agent: str, ts: Optional[float] = None, count: int = 1) -> None:
+        ts = self.clock() if ts is None else float(ts)
+        idx = int(ts // self.bucket_sec)
+        with self._lock:
+            row = self._ensure_row(agent)
+            self._advance(idx)
+            if ts > self._last_ts[row]:
+                self._last_ts[row] = ts
+            if idx <= self._head - self.n_buckets:
+                return  # older than the horizon
+            pos = row * self.n_buckets + idx % self.n_buckets
+            self._counts[pos] = min(0xFFFFFFFF, self._counts[pos] + count)
+
+    # ---- analysis ----
+    def analyze(
+        self,
+        thresholds: Optional[StallThresholds] = None,
+        now: Optional[float] = None,
+        window_sec: float = 86400.0,
+        z_quiet: float = 2.0,
+        mad_k: float = 5.0,
+        min_hourly_rate: float = 1.0,
+    ) -> FleetReport:
+        """Compute every metric in :data:`COLUMNS` for all agents over ``window_sec``."""
+        thresholds = thresholds or StallThresholds()
+        now = self.clock() if now is None else now
+        cur = int(now // self.bucket_sec)
+        per_hour = max(1, int(round(3600.0 / self.bucket_sec)))
+        width = min(self.n_buckets, max(per_hour, int(math.ceil(window_sec / self.bucket_sec))))
+        width -= width % per_hour
+        with self._lock:
+            self._advance(cur)
+            agents = list(self.agents)
+            cols = [(b % self.n_buckets) for b in range(cur - width + 1, cur + 1)]
+            if HAS_NUMPY:
+                columns = self._analyze_numpy(now, cols, per_hour, thresholds, z_quiet, mad_k, min_hourly_rate)
+            else:
+                columns = self._analyze_python(now, cols, per_hour, thresholds, z_quiet, mad_k, min_hourly_rate)
+        return FleetReport(ts=now, agents=agents, columns=columns)
+
+    def _analyze_numpy(self, now, cols, per_hour, th, z_quiet, mad_k, min_rate) -> Dict[str, List[Any]]:
+        rows = len(self.agents)
+        if not rows:
+            return {c: [] for c in COLUMNS}
+        mat = np.frombuffer(self._counts, dtype=np.uint32).reshape(rows, self.n_buckets)
+        win = mat[:, cols].astype(np.float64)                       # agents x buckets, oldest -> newest
+        last_ts = np.frombuffer(self._last_ts, dtype=np.float64)
+        seen = last_ts > 0
+        idle = np.where(seen, now - last_ts, np.inf)
+        active = win > 0
+        tail = active[:, ::-1]
+        streak = np.where(tail.any(axis=1), tail.argmax(axis=1), win.shape[1])
+        hourly = win.reshape(rows, -1, per_hour).sum(axis=2)        # agents x hours
+        rate_now = hourly[:, -1]
+        history = hourly[:, :-1] if hourly.shape[1] > 1 else hourly
+        p50 = np.percentile(history, 50, axis=1)
+        p90 = np.percentile(history, 90, axis=1)
+        mean, std = history.mean(axis=1), history.std(axis=1)
+        quiet = (mean >= min_rate) & (rate_now < mean - z_quiet * np.maximum(std, 1e-9))
+        finite = idle[np.isfinite(idle)]
+        if finite.size:
+            med = np.median(finite)
+            mad = np.median(np.abs(finite - med))
+            outlier = idle > med + mad_k * max(mad, self.bucket_sec)
+        else:
+            outlier = np.zeros(rows, dtype=bool)
+        status = np.select(
+            [idle <= th.active_sec, idle <= th.warn_sec, idle <= th.stall_sec],
+            list(STATUSES[:3]),
+            default=STATUSES[3],
+        )
+        return {
+            "idle_sec": [float(v) for v in idle],
+            "stall_score": [float(v) for v in idle / th.stall_sec],
+            "idle_streak": [int(v) for v in streak],
+            "rate_p50": [float(v) for v in p50],
+            "rate_p90": [float(v) for v in p90],
+            "rate_now": [float(v) for v in rate_now],
+            "anomaly": [bool(v) for v in (quiet | outlier) & seen],
+            "status": [str(v) for v in status],
+        }
+
+    def _analyze_python(self, now, cols, per_hour, th, z_quiet, mad_k, min_rate) -> Dict[str, List[Any]]:
+        out: Dict[str, List[Any]] = {c: [] for c in COLUMNS}
+        n = self.n_buckets
+        quiet_flags: List[bool] = []
+        for r in range(len(self.agents)):
+            base = r * n
+            win = [self._counts[base + c] for c in cols]
+            last = self._last_ts[r]
+            idle = now - last if last > 0 else math.inf
+            streak = 0
+            for v in reversed(win):
+                if v:
+                    break
+                streak += 1
+            hourly = [float(sum(win[i:i + per_hour])) for i in range(0, len(win), per_hour)]
+            rate_now = hourly[-1]
+            history = hourly[:-1] if len(hourly) > 1 else hourly
+            ordered = sorted(history)
+            mean = sum(history) / len(history)
+            std = math.sqrt(sum((h - mean) ** 2 for h in history) / len(history))
+            quiet_flags.append(mean >= min_rate and rate_now < mean - z_quiet * max(std, 1e-9))
+            if idle <= th.active_sec:
+                status = STATUSES[0]
+            elif idle <= th.warn_sec:
+                status = STATUSES[1]
+            elif idle <= th.stall_sec:
+                status = STATUSES[2]
+            else:
+                status = STATUSES[3]
+            out["idle_sec"].append(float(idle))
+            out["stall_score"].append(float(idle / th.stall_sec))
+            out["idle_streak"].append(streak)
+            out["rate_p50"].append(_percentile(ordered, 50))
+            out["rate_p90"].append(_percentile(ordered, 90))
+            out["rate_now"].append(rate_now)
+            out["status"].append(status)
+        finite = sorted(v for v in out["idle_sec"] if math.isfinite(v))
+        if finite:
+            med = _percentile(finite, 50)
+            mad = _percentile(sorted(abs(v - med) for v in finite), 50)
+            limit = med + mad_k * max(mad, self.bucket_sec)
+        else:
+            limit = math.inf
+        out["anomaly"] = [
+            bool(math.isfinite(idle) and (quiet or idle > limit))
+            for idle, quiet in zip(out["idle_sec"], quiet_flags)
+        ]
+        return out
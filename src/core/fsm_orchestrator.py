@@ -15,6 +15,11 @@ from datetime import datetime
 import time
 import threading
 
+try:
+    from .tracing import extract, get_tracer, inject
+except ImportError:  # run as a script
+    from tracing import extract, get_tracer, inject  # type: ignore
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -31,6 +36,7 @@ class FSMUpdate:
     raw: Optional[str] = None
     timestamp: Optional[str] = None
     ts: Optional[int] = None
+    trace: Optional[Dict[str, Any]] = None  # span context stamped by the sender
 
 @dataclass
 class TaskState:
@@ -132,6 +138,14 @@ class FSMOrchestrator:
     
     def process_fsm_update(self, update: FSMUpdate) -> bool:
         """Process an FSM update and update task state accordingly"""
+        task_id = update.task if update.task and update.task.startswith("task-") else None
+        with get_tracer().span("fsm.process", task_id=task_id, parent=extract({"trace": update.trace}),
+                               event=update.event, agent=update.agent) as span:
+            ok = self._process_fsm_update(update)
+            span.set(ok=ok)
+            return ok
+
+    def _process_fsm_update(self, update: FSMUpdate) -> bool:
         try:
             logger.info(f"Processing FSM update: {update.event} from {update.agent}")
             
@@ -188,7 +202,8 @@ class FSMOrchestrator:
         if self.save_task(task):
             # Emit verification if task completed
             if task.state == "completed":
-                self._emit_verification(task, update)
+                with get_tracer().span("fsm.verify", task_id=task.task_id):
+                    self._emit_verification(task, update)
             return True
         
         return False
@@ -232,7 +247,7 @@ class FSMOrchestrator:
     def _emit_verification(self, task: TaskState, update: FSMUpdate) -> None:
         """Emit verification message for completed task"""
         try:
-            verification = {
+            verification = inject({
                 "type": "verification",
                 "task_id": task.task_id,
                 "agent": update.agent,
@@ -245,7 +260,7 @@ class FSMOrchestrator:
                     "completion_time": task.completed_at,
                     "evidence": task.evidence
                 }
-            }
+            })
             
             # Write verification to outbox
             ver_file = self.outbox_root / f"verification_{task.task_id}_{int(time.time())}.json"
@@ -327,7 +342,8 @@ class FSMOrchestrator:
                             status=data.get("status"),
                             raw=data.get("raw"),
                             timestamp=data.get("timestamp"),
-                            ts=data.get("ts")
+                            ts=data.get("ts"),
+                            trace=data.get("trace")
                         )
                         
                         # Process the update
@@ -0,0 +1,182 @@
+"""Memory-mapped heartbeat slot table.
+
+Heartbeats used to be one JSON envelope per beat in the shared inbox, which
+the Agent-5 monitor globbed, parsed and unlinked.  This module replaces that
+with a fixed-size file mapped into every process:
+
+- a 32-byte header followed by ``slots`` fixed 64-byte records;
+- each record holds the agent id, writer pid, a sequence number and the
+  beat timestamp;
+- a writer claims its slot once (hashed probe on the agent id) and every
+  beat after that is one 16-byte write at a fixed offset, so the cost of a
+  beat does not depend on how many processes share the table;
+- readers copy the whole table in one read and get every agent's latest beat.
+
+The sequence number doubles as a seqlock: it is odd while a writer is
+updating the timestamp, and readers retry a slot whose sequence was odd or
+moved under them.  Beats survive reader restarts because the table keeps the
+latest value per slot instead of a queue of files.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_SLOTS = 256
+
+MAGIC = b"ACPHB1\0\0"
+_HEADER = struct.Struct("<8sII16x")      # magic, slots, slot size
+_SLOT = struct.Struct("<40sIQd4x")      # agent, pid, seq, ts
+_BEAT = struct.Struct("<Qd")            # seq, ts (written together)
+_NAME_LEN = 40
+_BEAT_OFFSET = _NAME_LEN + 4            # seq follows name + pid
+
+
+def default_table_path() -> Path:
+    """``ACP_HEARTBEAT_TABLE`` or ``runtime/agent_comms/heartbeats.bin`` under the repo."""
+    env = os.environ.get("ACP_HEARTBEAT_TABLE")
+    return Path(env) if env else REPO_ROOT / "runtime" / "agent_comms" / "heartbeats.bin"
+
+
+@dataclass(frozen=True)
+class Beat:
+    agent: str
+    ts: float
+    seq: int
+    pid: int
+
+
+class HeartbeatTable:
+    """Fixed-slot heartbeat table shared through a memory-mapped file.
+
+    Writers create the file on first use; a reader opened with
+    ``create=False`` on a missing file simply reports no beats.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, slots: int = DEFAULT_SLOTS, create: bool = True) -> None:
+        self.path = Path(path) if path else default_table_path()
+        self.slots = int(slots)
+        self.create = create
+        self._mm: Optional[mmap.mmap] = None
+        self._file = None
+        self._claimed: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    # ---- mapping ----
+    def _size(self) -> int:
+        return _HEADER.size + self.slots * _SLOT.size
+
+    def _open(self) -> Optional[mmap.mmap]:
+        if self._mm is not None:
+            return self._mm
+        if not self.path.exists():
+            if not self.create:
+                return None
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                with open(self.path, "xb") as f:
+                    f.write(_HEADER.pack(MAGIC, self.slots, _SLOT.size))
+                    f.write(b"\0" * (self._size() - _HEADER.size))
+            except FileExistsError:
+                pass  # another process created it first
+        f = open(self.path, "r+b" if self.create else "rb")
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            f.close()
+            return None
+        magic, slots, slot_size = _HEADER.unpack(header)
+        if magic != MAGIC or slot_size != _SLOT.size:
+            f.close()
+            raise ValueError(f"{self.path} is not a heartbeat table")
+        self.slots = slots
+        access = mmap.ACCESS_WRITE if self.create else mmap.ACCESS_READ
+        self._mm = mmap.mmap(f.fileno(), self._size(), access=access)
+        self._file = f
+        return self._mm
+
+    def close(self) -> None:
+        with self._lock:
+            if self._mm is not None:
+                self._mm.close()
+                self._mm = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._claimed.clear()
+
+    def _offset(self, slot: int) -> int:
+        return _HEADER.size + slot * _SLOT.size
+
+    # ---- writer ----
+    def _claim(self, mm: mmap.mmap, agent: str) -> int:
+        name = agent.encode("utf-8")[:_NAME_LEN]
+        padded = name.ljust(_NAME_LEN, b"\0")
+        start = zlib.crc32(name) % self.slots
+        for i in range(self.slots):
+            slot = (start + i) % self.slots
+            off = self._offset(slot)
+            current = mm[off:off + _NAME_LEN]
+            if current == padded:
+                return slot
+            if current == b"\0" * _NAME_LEN:
+                mm[off:off + _NAME_LEN] = padded
+                # Re-read: a concurrent claimer may have taken the slot first
+                if mm[off:off + _NAME_LEN] == padded:
+                    return slot
+        raise RuntimeError(f"heartbeat table {self.path} is full ({self.slots} slots)")
+
+    def beat(self, agent: str, ts: Optional[float] = None) -> int:
+        """Publish a beat for ``agent``; returns the new sequence number."""
+        ts = time.time() if ts is None else float(ts)
+        with self._lock:
+            mm = self._open()
+            if mm is None:
+                raise RuntimeError(f"heartbeat table {self.path} is not writable")
+            slot = self._claimed.get(agent)
+            if slot is None:
+                slot = self._claimed[agent] = self._claim(mm, agent)
+                off = self._offset(slot)
+                mm[off + _NAME_LEN:off + _BEAT_OFFSET] = struct.pack("<I", os.getpid() & 0xFFFFFFFF)
+            off = self._offset(slot) + _BEAT_OFFSET
+            seq, _ = _BEAT.unpack(mm[off:off + _BEAT.size])
+            seq |= 1  # odd: write in progress
+            mm[off:off + 8] = struct.pack("<Q", seq)
+            mm[off + 8:off + 16] = struct.pack("<d", ts)
+            seq += 1
+            mm[off:off + 8] = struct.pack("<Q", seq)
+            return seq
+
+    # ---- reader ----
+    def read_all(self, retries: int = 3) -> Dict[str, Beat]:
+        """Latest beat for every claimed slot, from a single copy of the table."""
+        with self._lock:
+            mm = self._open()
+            if mm is None:
+                return {}
+            data = mm[:]
+            beats: Dict[str, Beat] = {}
+            for slot in range(self.slots):
+                off = self._offset(slot)
+                name, pid, seq, ts = _SLOT.unpack_from(data, off)
+                if not name.strip(b"\0"):
+                    continue
+                for _ in range(retries):
+                    # Seqlock check: even and unchanged since the copy means ts is whole
+                    if not seq & 1 and struct.unpack_from("<Q", mm, off + _BEAT_OFFSET)[0] == seq:
+                        break
+                    name, pid, seq, ts = _SLOT.unpack(mm[off:off + _SLOT.size])
+                else:
+                    continue
+                if seq == 0:
+                    continue
+                agent = name.rstrip(b"\0").decode("utf-8", "replace")
+                beats[agent] = Beat(agent=agent, ts=ts, seq=seq, pid=pid)
+            return beats
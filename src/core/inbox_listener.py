@@ -57,49 +57,58 @@ class InboxListener:
     def _loop(self) -> None:
         # If no directory configured, idle
         while self._running:
-            if not self._dir or not self._dir.exists():
-                time.sleep(self._poll_interval_s)
-                continue
+            self.poll_once()
+            time.sleep(self._poll_interval_s)
 
-            for path in self._iter_new_files(self._dir, self._pattern):
-                # Move to processing to avoid duplicate readers
-                proc_path = self._move_to_processing(path)
+    def poll_once(self) -> int:
+        """Process every new file currently in the inbox; returns messages dispatched.
+
+        Used by the background loop and by callers that drive the listener
+        synchronously (e.g. the overnight simulation harness).
+        """
+        if not self._dir or not self._dir.exists():
+            return 0
+        dispatched = 0
+        for path in self._iter_new_files(self._dir, self._pattern):
+            # Move to processing to avoid duplicate readers
+            proc_path = self._move_to_processing(path)
+            data = None
+            try:
+                with open(proc_path, "r", encoding="utf-8") as fp:
+                    data = json.load(fp)
+            except Exception:
                 data = None
-                try:
-                    with open(proc_path, "r", encoding="utf-8") as fp:
-                        data = json.load(fp)
-                except Exception:
-                    data = None
-
-                if isinstance(data, dict):
-                    msg_id = str(data.get("id") or proc_path.name)
-                    if self._is_processed(msg_id):
-                        self._finalize_processed(proc_path, already=True)
-                        continue
-
-                    # Fan out to callbacks
-                    for cb in list(self._callbacks):
-                        try:
-                            cb(data)
-                        except Exception:
-                            pass
-
-                    # Enqueue to pipeline if available
-                    if self._pipeline is not None:
-                        to_agent = str(data.get("to", "")).strip() or "unknown"
-                        message = str(data.get("message", "")).strip()
-                        try:
-                            enqueue = getattr(self._pipeline, "enqueue", None)
-                            if callable(enqueue):
-                                enqueue(to_agent, message)
-                        except Exception:
-                            pass
-
-                    # Mark processed and move file
-                    self._mark_processed(msg_id)
-                    self._finalize_processed(proc_path)
 
-            time.sleep(self._poll_interval_s)
+            if isinstance(data, dict):
+                msg_id = str(data.get("id") or proc_path.name)
+                if self._is_processed(msg_id):
+                    self._finalize_processed(proc_path, already=True)
+                    continue
+
+                # Fan out to callbacks
+                for cb in list(self._callbacks):
+                    try:
+                        cb(data)
+                    except Exception:
+                        pass
+
+                # Enqueue to pipeline if available
+                if self._pipeline is not None:
+                    to_agent = str(data.get("to", "")).strip() or "unknown"
+                    message = str(data.get("message", "")).strip()
+                    try:
+                        enqueue = getattr(self._pipeline, "enqueue", None)
+                        if callable(enqueue):
+                            enqueue(to_agent, message)
+                    except Exception:
+                        pass
+
+                # Mark processed and move file
+                self._mark_processed(msg_id)
+                self._finalize_processed(proc_path)
+                dispatched += 1
+
+        return dispatched
 
     def _iter_new_files(self, directory: Path, pattern: str):
         for p in directory.iterdir():
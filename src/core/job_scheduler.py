@@ -0,0 +1,285 @@
+"""Shared scheduler for the periodic background jobs of a process.
+
+The communication hub, knowledge manager, synergy optimizer, the T2A.S KC
+collaborative system and the CORE knowledge/campaign monitors each used to
+start their own daemon thread around ``while True: work(); sleep(n)``.  A
+process hosting all of them kept a dozen mostly idle threads alive, and the
+ones sharing an interval woke up together.
+
+:class:`JobScheduler` runs every such job from one timer heap and a small
+pool of worker threads (two by default):
+
+- jitter: every run is delayed by a random fraction (``jitter``) of the
+  interval, so jobs registered together spread out instead of firing in
+  lockstep;
+- priorities: when several jobs are due and every worker is busy, the
+  highest ``priority`` runs first;
+- overrun protection: a job never runs concurrently with itself.  Runs are
+  kept on the job's original phase; ticks that pass while a run is still
+  going are dropped (counted as ``skipped``) rather than queued for a
+  catch-up burst;
+- failures reschedule after ``error_interval`` (the old loops' "longer sleep
+  on error") and never kill the worker;
+- :meth:`JobScheduler.stats` reports runs, failures, overruns, skipped
+  ticks, run times and start lag per job.
+
+Tests drive a scheduler without threads through :meth:`JobScheduler.run_pending`
+and a fake clock.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class JobStats:
+    """Per-job counters and run times (seconds)."""
+
+    runs: int = 0
+    failures: int = 0
+    overruns: int = 0       # runs that took longer than the interval
+    skipped: int = 0        # ticks dropped because the previous run was still going
+    total_time: float = 0.0
+    max_time: float = 0.0
+    last_time: float = 0.0
+    max_lag: float = 0.0    # worst delay between due time and start (busy workers)
+    last_start: Optional[float] = None
+    last_error: Optional[str] = None
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.runs if self.runs else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs, "failures": self.failures, "overruns": self.overruns, "skipped": self.skipped,
+            "mean_time": self.mean_time, "max_time": self.max_time, "last_time": self.last_time,
+            "max_lag": self.max_lag, "last_start": self.last_start, "last_error": self.last_error,
+        }
+
+
+@dataclass
+class Job:
+    """A periodic job; ``jitter`` is a fraction of ``interval``."""
+
+    name: str
+    func: Callable[[], Any]
+    interval: float
+    jitter: float = 0.1
+    priority: int = 0
+    error_interval: Optional[float] = None
+    stats: JobStats = field(default_factory=JobStats)
+    base: float = 0.0       # unjittered time of the next tick
+    due: float = 0.0
+    running: bool = False
+    active: bool = True
+
+
+class JobScheduler:
+    """Runs periodic jobs from one timer heap on a small worker pool."""
+
+    def __init__(
+        self,
+        workers: int = 2,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Optional[random.Random] = None,
+        autostart: bool = True,
+    ) -> None:
+        self.workers = max(1, int(workers))
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.autostart = autostart
+        self._jobs: Dict[str, Job] = {}
+        self._timers: List[Tuple[float, int, Job]] = []    # (due, seq, job)
+        self._ready: List[Tuple[int, float, int, Job]] = []  # (-priority, due, seq, job)
+        self._seq = itertools.count()
+        self._cond = threading.Condition(threading.Lock())
+        self._stop = False
+        self._threads: List[threading.Thread] = []
+
+    # ---- registration ----
+    def add_job(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        interval: float,
+        jitter: float = 0.1,
+        priority: int = 0,
+        initial_delay: float = 0.0,
+        error_interval: Optional[float] = None,
+    ) -> Job:
+        """Register ``func`` to run every ``interval`` seconds, first after ``initial_delay``.
+
+        A name already in use gets a ``#2``, ``#3``... suffix; the returned
+        :class:`Job` carries the final name and is what :meth:`remove_job` takes.
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        with self._cond:
+            unique, n = name, 1
+            while unique in self._jobs:
+                n += 1
+                unique = f"{name}#{n}"
+            job = Job(unique, func, float(interval), max(0.0, float(jitter)), int(priority),
+                      None if error_interval is None else float(error_interval))
+            job.base = self.clock() + max(0.0, float(initial_delay))
+            self._jobs[unique] = job
+            self._arm(job)
+            self._cond.notify()
+        if self.autostart:
+            self.start()
+        return job
+
+    def remove_job(self, job: Union[Job, str]) -> None:
+        """Unregister a job; a run in progress finishes but is not rescheduled."""
+        with self._cond:
+            job = self._jobs.pop(job if isinstance(job, str) else job.name, None)
+            if job is not None:
+                job.active = False
+                self._cond.notify_all()
+
+    def jobs(self) -> List[str]:
+        with self._cond:
+            return list(self._jobs)
+
+    def _arm(self, job: Job) -> None:
+        job.due = job.base + self.rng.uniform(0.0, job.jitter * job.interval)
+        heapq.heappush(self._timers, (job.due, next(self._seq), job))
+
+    # ---- dispatch ----
+    def _collect_due(self, now: float) -> None:
+        while self._timers and self._timers[0][0] <= now:
+            due, seq, job = heapq.heappop(self._timers)
+            if job.active:
+                heapq.heappush(self._ready, (-job.priority, due, seq, job))
+
+    def _next(self) -> Optional[Job]:
+        while self._ready:
+            job = heapq.heappop(self._ready)[3]
+            if job.active:
+                job.running = True
+                return job
+        return None
+
+    def _run(self, job: Job) -> None:
+        start = self.clock()
+        error: Optional[str] = None
+        try:
+            job.func()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            logger.error(f"Background job {job.name} failed: {error}")
+        end = self.clock()
+        elapsed = end - start
+        with self._cond:
+            stats = job.stats
+            stats.runs += 1
+            stats.last_start = start
+            stats.last_time = elapsed
+            stats.total_time += elapsed
+            stats.max_time = max(stats.max_time, elapsed)
+            stats.max_lag = max(stats.max_lag, start - job.due)
+            if error is not None:
+                stats.failures += 1
+                stats.last_error = error
+            if elapsed > job.interval:
+                stats.overruns += 1
+                logger.warning(f"Background job {job.name} overran: {elapsed:.1f}s for a {job.interval:.0f}s interval")
+            job.running = False
+            if not job.active:
+                return
+            if error is not None and job.error_interval is not None:
+                job.base = end + job.error_interval
+            else:
+                # Stay on phase; ticks that passed during the run are dropped
+                job.base += job.interval
+                if job.base < end:
+                    missed = int((end - job.base) // job.interval) + 1
+                    stats.skipped += missed
+                    job.base += missed * job.interval
+            self._arm(job)
+            self._cond.notify()
+
+    def run_pending(self) -> int:
+        """Run every job that is due now in the calling thread; returns how many ran."""
+        with self._cond:
+            self._collect_due(self.clock())
+            batch = []
+            while True:
+                job = self._next()
+                if job is None:
+                    break
+                batch.append(job)
+        for job in batch:
+            self._run(job)
+        return len(batch)
+
+    def next_due(self) -> Optional[float]:
+        with self._cond:
+            return self._timers[0][0] if self._timers else None
+
+    # ---- worker threads ----
+    def start(self) -> "JobScheduler":
+        with self._cond:
+            self._stop = False
+            self._threads = [t for t in self._threads if t.is_alive()]
+            for i in range(len(self._threads), self.workers):
+                thread = threading.Thread(target=self._worker, name=f"job-scheduler-{i}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+        return self
+
+    def stop(self, timeout: float = 2.0) -> None:
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._stop:
+                        return
+                    now = self.clock()
+                    self._collect_due(now)
+                    job = self._next()
+                    if job is not None:
+                        break
+                    wait = self._timers[0][0] - now if self._timers else None
+                    self._cond.wait(timeout=wait)
+            self._run(job)
+
+    # ---- status ----
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-job runtime statistics plus interval, priority and next due time."""
+        with self._cond:
+            return {
+                name: {"interval": job.interval, "priority": job.priority, "running": job.running,
+                       "next_due": job.due, **job.stats.as_dict()}
+                for name, job in self._jobs.items()
+            }
+
+
+_default: Optional[JobScheduler] = None
+_default_lock = threading.Lock()
+
+
+def get_scheduler() -> JobScheduler:
+    """Process-wide scheduler shared by every subsystem's periodic jobs."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = JobScheduler()
+        return _default
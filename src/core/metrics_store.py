@@ -0,0 +1,199 @@
+"""Rolling time-series store for monitor metrics (SQLite).
+
+The Agent-5 monitor used to overwrite ``metrics.json`` every tick, so only
+the latest sample survived and readers could catch a half-written file.
+:class:`MetricsStore` keeps the history instead:
+
+- raw points ``(ts, series, agent, value)`` appended once per tick in a single
+  transaction;
+- 1-minute and 1-hour rollups (count/sum/min/max/last) maintained on insert
+  with an upsert, so long-range queries never scan raw points;
+- a retention policy per resolution, applied every ``prune_every`` writes;
+- WAL journaling, so GUIs and ``post_digest.py`` read while the monitor writes.
+
+Series are plain numbers; categorical values are stored as codes (see
+:data:`STATUS_CODES`) or 0/1 indicators whose mean is a fraction of time.
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+RAW = 0
+MINUTE = 60
+HOUR = 3600
+RESOLUTIONS = (RAW, MINUTE, HOUR)
+STATUS_CODES = {"active": 0, "idle": 1, "warning": 2, "stalled": 3}
+FLEET = "*"  # agent key for fleet-wide series
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS raw (
+    ts REAL NOT NULL, series TEXT NOT NULL, agent TEXT NOT NULL, value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS raw_series_ts ON raw (series, ts);
+CREATE TABLE IF NOT EXISTS rollup (
+    res INTEGER NOT NULL, bucket REAL NOT NULL, series TEXT NOT NULL, agent TEXT NOT NULL,
+    n INTEGER NOT NULL, total REAL NOT NULL, lo REAL NOT NULL, hi REAL NOT NULL, last REAL NOT NULL,
+    PRIMARY KEY (res, series, agent, bucket)
+) WITHOUT ROWID;
+"""
+
+_UPSERT = """
+INSERT INTO rollup (res, bucket, series, agent, n, total, lo, hi, last) VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?)
+ON CONFLICT (res, series, agent, bucket) DO UPDATE SET
+    n = n + 1, total = total + excluded.total,
+    lo = min(lo, excluded.lo), hi = max(hi, excluded.hi), last = excluded.last
+"""
+
+
+@dataclass(frozen=True)
+class Point:
+    ts: float        # sample time, or bucket start for rollups
+    agent: str
+    value: float     # the sample, or the bucket mean
+    lo: float
+    hi: float
+    n: int = 1
+
+
+class MetricsStore:
+    """Raw points plus minute/hour rollups with per-resolution retention."""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        retention_sec: Optional[Dict[int, float]] = None,
+        prune_every: int = 500,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = Path(path)
+        self.retention_sec = {RAW: 2 * 86400.0, MINUTE: 30 * 86400.0, HOUR: 400 * 86400.0}
+        self.retention_sec.update(retention_sec or {})
+        self.prune_every = max(1, int(prune_every))
+        self.clock = clock
+        self._writes = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ---- writes ----
+    def record(self, rows: Iterable[Tuple[str, str, float]], ts: Optional[float] = None) -> int:
+        """Append ``(series, agent, value)`` rows sampled at ``ts``; returns rows written."""
+        ts = self.clock() if ts is None else float(ts)
+        rows = [(s, a, float(v)) for s, a, v in rows if v is not None]
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT INTO raw (ts, series, agent, value) VALUES (?, ?, ?, ?)",
+                                   [(ts, s, a, v) for s, a, v in rows])
+            for res in (MINUTE, HOUR):
+                bucket = ts - ts % res
+                self._conn.executemany(_UPSERT, [(res, bucket, s, a, v, v, v, v) for s, a, v in rows])
+            self._writes += 1
+            if self._writes % self.prune_every == 0:
+                self._prune(ts)
+        return len(rows)
+
+    def prune(self, now: Optional[float] = None) -> None:
+        with self._lock, self._conn:
+            self._prune(self.clock() if now is None else now)
+
+    def _prune(self, now: float) -> None:
+        self._conn.execute("DELETE FROM raw WHERE ts < ?", (now - self.retention_sec[RAW],))
+        for res in (MINUTE, HOUR):
+            self._conn.execute("DELETE FROM rollup WHERE res = ? AND bucket < ?", (res, now - self.retention_sec[res]))
+
+    # ---- queries ----
+    def pick_resolution(self, span_sec: float) -> int:
+        """Finest resolution that keeps a chart around a few hundred points per agent."""
+        if span_sec <= 2 * HOUR:
+            return RAW
+        if span_sec <= 3 * 86400:
+            return MINUTE
+        return HOUR
+
+    def query(
+        self,
+        series: str,
+        agent: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        resolution: Optional[int] = None,
+    ) -> List[Point]:
+        """Points of one series ordered by time; ``resolution=None`` picks one from the span."""
+        until = self.clock() if until is None else until
+        since = until - HOUR if since is None else since
+        res = self.pick_resolution(until - since) if resolution is None else int(resolution)
+        if res not in RESOLUTIONS:
+            raise ValueError(f"resolution must be one of {RESOLUTIONS}")
+        args: List[object] = [series, since - (since % res if res else 0), until]
+        where = "series = ? AND {t} >= ? AND {t} <= ?"
+        if agent is not None:
+            where += " AND agent = ?"
+            args.append(agent)
+        with self._lock:
+            if res == RAW:
+                cur = self._conn.execute(
+                    f"SELECT ts, agent, value FROM raw WHERE {where.format(t='ts')} ORDER BY ts", args)
+                return [Point(ts, a, v, v, v) for ts, a, v in cur]
+            cur = self._conn.execute(
+                f"SELECT bucket, agent, total / n, lo, hi, n FROM rollup WHERE res = ? AND {where.format(t='bucket')}"
+                " ORDER BY bucket", [res] + args)
+            return [Point(*row) for row in cur]
+
+    def latest(self, series: str) -> Dict[str, Tuple[float, float]]:
+        """agent -> (ts, value) of the newest raw point."""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT agent, max(ts), value FROM raw WHERE series = ? GROUP BY agent", (series,))
+            return {a: (ts, v) for a, ts, v in cur}
+
+    def summary(
+        self,
+        since: float,
+        until: Optional[float] = None,
+        series: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """agent -> series -> {mean, min, max, last, samples} from the minute rollups."""
+        until = self.clock() if until is None else until
+        sql = ("SELECT agent, series, sum(total), sum(n), min(lo), max(hi) FROM rollup"
+               " WHERE res = ? AND bucket >= ? AND bucket <= ?")
+        args: List[object] = [MINUTE, since - since % MINUTE, until]
+        if series:
+            sql += f" AND series IN ({','.join('?' * len(series))})"
+            args.extend(series)
+        out: Dict[str, Dict[str, Dict[str, float]]] = {}
+        with self._lock:
+            for agent, name, total, n, lo, hi in self._conn.execute(sql + " GROUP BY agent, series", args):
+                out.setdefault(agent, {})[name] = {"mean": total / n, "min": lo, "max": hi, "samples": n}
+            last_sql = ("SELECT agent, series, last FROM rollup r WHERE res = ? AND bucket = "
+                        "(SELECT max(bucket) FROM rollup WHERE res = r.res AND series = r.series AND agent = r.agent"
+                        " AND bucket >= ? AND bucket <= ?)")
+            for agent, name, last in self._conn.execute(last_sql, (MINUTE, since - since % MINUTE, until)):
+                if name in out.get(agent, {}):
+                    out[agent][name]["last"] = last
+        return out
+
+    def series(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT DISTINCT series FROM rollup WHERE res = ? ORDER BY 1", (HOUR,))]
+
+    def agents(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT DISTINCT agent FROM rollup WHERE res = ? ORDER BY 1", (HOUR,))]
+
+
+def open_store(path: Union[str, Path]) -> Optional[MetricsStore]:
+    """Open an existing store for reading; None when the monitor never wrote one."""
+    return MetricsStore(path) if Path(path).exists() else None
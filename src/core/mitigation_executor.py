@@ -0,0 +1,355 @@
+"""Central executor for stall mitigations (nudges, warnings, rescues).
+
+Several components used to nudge agents on their own schedule: the Agent-5
+monitor, the unified stall detection system, the autonomous captain, the
+overnight runner's rescue-on-stall path and ``AgentCellPhone``'s progressive
+escalation (which blocked its caller with ``sleep`` between steps).  They
+could all hit the same agent within seconds of each other.
+
+:class:`MitigationExecutor` is the one place those requests go through:
+
+- per-agent cooldowns: after a mitigation is accepted, requests of the same
+  or lower priority for that agent are refused until the cooldown for their
+  kind has passed;
+- de-duplication: a request for an agent that already has a mitigation
+  pending or in flight is merged into it, or replaces it when it is more
+  severe (a rescue supersedes a queued nudge);
+- a cap on concurrently running escalation sequences, since every step
+  drives the same mouse and keyboard; extra requests wait in FIFO order;
+- escalation steps run on a timer heap instead of blocking sleeps: the
+  first step runs in the submitting thread when a slot is free, later steps
+  fire from a worker thread (or :meth:`run_pending` in tests);
+- every decision and step outcome is appended to one NDJSON audit log.
+
+Cooldowns can optionally be shared between processes through ``state_dir``
+(one small JSON file per agent), so a monitor and a runner started
+separately still see each other's rescues.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import json
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+from ..utils import atomic_write
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_AUDIT_PATH = REPO_ROOT / "runtime" / "agent_comms" / "mitigations.ndjson"
+DEFAULT_STATE_DIR = REPO_ROOT / "runtime" / "agent_comms" / "mitigations"
+
+# Higher priority supersedes lower; equal or lower priority is merged or cooled down
+KIND_PRIORITY: Dict[str, int] = {"nudge": 1, "warning": 1, "escalation": 2, "rescue": 3, "emergency": 4}
+ACCEPTED = ("started", "queued", "upgraded")
+
+
+@dataclass
+class MitigationStep:
+    """One action of an escalation sequence, run ``delay_sec`` after the previous one."""
+
+    name: str
+    action: Callable[[], Any]
+    delay_sec: float = 0.0
+
+
+@dataclass
+class MitigationRequest:
+    agent: str
+    kind: str
+    steps: List[MitigationStep]
+    source: str = "unknown"
+    priority: int = 0  # 0 -> KIND_PRIORITY[kind]
+    id: str = ""
+    sources: List[str] = field(default_factory=list)
+    submitted_at: float = 0.0
+    next_step: int = 0
+
+    def __post_init__(self) -> None:
+        if not self.priority:
+            self.priority = KIND_PRIORITY.get(self.kind, 1)
+        if not self.sources:
+            self.sources = [self.source]
+
+
+@dataclass(frozen=True)
+class MitigationDecision:
+    status: str  # started | queued | upgraded | merged | cooldown
+    agent: str
+    request_id: str
+    retry_after: float = 0.0
+
+    @property
+    def accepted(self) -> bool:
+        """True when this request will run (possibly after waiting for a slot)."""
+        return self.status in ACCEPTED
+
+
+def single_step(name: str, action: Callable[[], Any]) -> List[MitigationStep]:
+    return [MitigationStep(name, action)]
+
+
+class MitigationExecutor:
+    """Owns cooldowns, de-duplication and concurrency for agent mitigations."""
+
+    def __init__(
+        self,
+        max_concurrent: int = 1,
+        cooldowns: Optional[Dict[str, float]] = None,
+        default_cooldown_sec: float = 300.0,
+        audit_path: Optional[Union[str, Path]] = None,
+        state_dir: Optional[Union[str, Path]] = None,
+        clock: Callable[[], float] = time.time,
+        autostart: bool = True,
+    ) -> None:
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.cooldowns: Dict[str, float] = dict(cooldowns or {})
+        self.default_cooldown_sec = float(default_cooldown_sec)
+        self.audit_path = Path(audit_path) if audit_path else None
+        self.state_dir = Path(state_dir) if state_dir else None
+        self.clock = clock
+        self.autostart = autostart
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=500)
+        self.stats: Dict[str, int] = {k: 0 for k in ("started", "queued", "upgraded", "merged", "cooldown",
+                                                      "steps", "step_errors", "done", "superseded")}
+        self._active: Dict[str, MitigationRequest] = {}
+        self._pending: Dict[str, MitigationRequest] = {}
+        self._order: Deque[str] = deque()
+        self._timers: List[Tuple[float, int, str, str]] = []  # (due, seq, request id, agent)
+        self._last: Dict[str, Tuple[float, int, str]] = {}    # agent -> (ts, priority, kind)
+        self._ids = itertools.count(1)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._ui_lock = threading.Lock()
+        self._audit_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---- configuration ----
+    def cooldown_for(self, kind: str) -> float:
+        return float(self.cooldowns.get(kind, self.default_cooldown_sec))
+
+    def mark(self, agent: str, kind: str, ts: Optional[float] = None) -> None:
+        """Record a mitigation performed elsewhere (e.g. restored state) for cooldowns."""
+        ts = self.clock() if ts is None else float(ts)
+        with self._lock:
+            last = self._last.get(agent)
+            if last is None or ts > last[0]:
+                self._last[agent] = (ts, KIND_PRIORITY.get(kind, 1), kind)
+
+    # ---- submission ----
+    def submit(self, request: MitigationRequest) -> MitigationDecision:
+        now = self.clock()
+        request.submitted_at = now
+        request.id = request.id or f"m{next(self._ids)}"
+        with self._lock:
+            decision = self._admit(request, now)
+            self.stats[decision.status] += 1
+        self._audit(request, decision.status, request_id=decision.request_id, retry_after=decision.retry_after or None)
+        if decision.accepted:
+            self.run_pending()
+            self._kick()
+        return decision
+
+    def request(self, agent: str, kind: str, steps: List[MitigationStep], source: str = "unknown") -> MitigationDecision:
+        return self.submit(MitigationRequest(agent=agent, kind=kind, steps=steps, source=source))
+
+    def _admit(self, req: MitigationRequest, now: float) -> MitigationDecision:
+        agent = req.agent
+        current = self._active.get(agent) or self._pending.get(agent)
+        if current is not None and req.priority <= current.priority:
+            current.sources.append(req.source)
+            return MitigationDecision("merged", agent, current.id)
+
+        last = self._last_mitigation(agent)
+        if last is not None and last[1] >= req.priority:
+            remaining = last[0] + self.cooldown_for(req.kind) - now
+            if remaining > 0:
+                return MitigationDecision("cooldown", agent, req.id, retry_after=remaining)
+
+        self._last[agent] = (now, req.priority, req.kind)
+        self._store(agent, now, req)
+        if current is not None:
+            req.sources = current.sources + req.sources
+            if agent in self._pending:
+                self._pending[agent] = req  # keeps its place in the queue
+                self._audit(current, "superseded", by=req.id)
+                self.stats["superseded"] += 1
+                return MitigationDecision("upgraded", agent, req.id)
+            # Replace the running sequence in its slot; its remaining timers go stale
+            del self._active[agent]
+            self._audit(current, "superseded", by=req.id, steps_run=current.next_step)
+            self.stats["superseded"] += 1
+            self._start(req, now)
+            return MitigationDecision("upgraded", agent, req.id)
+        if len(self._active) < self.max_concurrent:
+            self._start(req, now)
+            return MitigationDecision("started", agent, req.id)
+        self._pending[agent] = req
+        self._order.append(agent)
+        return MitigationDecision("queued", agent, req.id)
+
+    def _start(self, req: MitigationRequest, now: float) -> None:
+        self._active[req.agent] = req
+        if not req.steps:
+            self._finish(req, "done", now)
+            return
+        self._schedule(req, now + req.steps[0].delay_sec)
+
+    def _schedule(self, req: MitigationRequest, due: float) -> None:
+        heapq.heappush(self._timers, (due, next(self._seq), req.id, req.agent))
+
+    def _finish(self, req: MitigationRequest, outcome: str, now: float) -> None:
+        if self._active.get(req.agent) is req:
+            del self._active[req.agent]
+        if outcome == "done":
+            self.stats["done"] += 1
+        self._audit(req, outcome, steps_run=req.next_step)
+        while self._order and len(self._active) < self.max_concurrent:
+            agent = self._order.popleft()
+            waiting = self._pending.pop(agent, None)
+            if waiting is not None and agent not in self._active:
+                self._audit(waiting, "dequeued")
+                self._start(waiting, now)
+
+    # ---- execution ----
+    def run_pending(self) -> int:
+        """Run every step that is due now; returns how many ran."""
+        ran = 0
+        while True:
+            with self._lock:
+                if not self._timers or self._timers[0][0] > self.clock():
+                    break
+                _, _, rid, agent = heapq.heappop(self._timers)
+                req = self._active.get(agent)
+                if req is None or req.id != rid:
+                    continue  # superseded or finished
+                step = req.steps[req.next_step]
+                req.next_step += 1
+            ok, error = self._run_step(step)
+            ran += 1
+            self._audit(req, "step", step=step.name, ok=ok, error=error)
+            with self._lock:
+                self.stats["steps"] += 1
+                self.stats["step_errors"] += 0 if ok else 1
+                if self._active.get(agent) is not req:
+                    continue
+                now = self.clock()
+                if req.next_step < len(req.steps):
+                    self._schedule(req, now + req.steps[req.next_step].delay_sec)
+                else:
+                    self._finish(req, "done", now)
+        return ran
+
+    def _run_step(self, step: MitigationStep) -> Tuple[bool, Optional[str]]:
+        # One UI action at a time, whichever thread runs it
+        with self._ui_lock:
+            try:
+                return step.action() is not False, None
+            except Exception as e:
+                return False, str(e)
+
+    def next_due(self) -> Optional[float]:
+        with self._lock:
+            return self._timers[0][0] if self._timers else None
+
+    def _kick(self) -> None:
+        if self.next_due() is None:
+            return
+        if self.autostart and (self._thread is None or not self._thread.is_alive()):
+            self.start()
+        self._wake.set()
+
+    def start(self) -> "MitigationExecutor":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="mitigation-executor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            self.run_pending()
+            due = self.next_due()
+            self._wake.wait(timeout=None if due is None else max(0.0, due - self.clock()))
+
+    # ---- status ----
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "active": {a: {"id": r.id, "kind": r.kind, "next_step": r.next_step, "steps": len(r.steps),
+                               "sources": list(r.sources)} for a, r in self._active.items()},
+                "queued": [{"agent": a, "kind": self._pending[a].kind} for a in self._order if a in self._pending],
+                "stats": dict(self.stats),
+            }
+
+    # ---- cooldown store / audit ----
+    def _state_file(self, agent: str) -> Optional[Path]:
+        if self.state_dir is None:
+            return None
+        return self.state_dir / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', agent)}.json"
+
+    def _last_mitigation(self, agent: str) -> Optional[Tuple[float, int, str]]:
+        last = self._last.get(agent)
+        path = self._state_file(agent)
+        if path is not None:
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                shared = (float(data["ts"]), int(data["priority"]), str(data.get("kind", "")))
+                if last is None or shared[:2] > last[:2]:
+                    last = shared
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+        return last
+
+    def _store(self, agent: str, now: float, req: MitigationRequest) -> None:
+        path = self._state_file(agent)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write(path, json.dumps({"ts": now, "priority": req.priority, "kind": req.kind, "source": req.source}))
+        except OSError:
+            pass
+
+    def _audit(self, req: MitigationRequest, event: str, **extra: Any) -> None:
+        record = {"ts": self.clock(), "agent": req.agent, "kind": req.kind, "source": req.source,
+                  "id": req.id, "event": event}
+        record.update({k: v for k, v in extra.items() if v is not None})
+        with self._audit_lock:
+            self.history.append(record)
+            if self.audit_path is None:
+                return
+            try:
+                self.audit_path.parent.mkdir(parents=True, exist_ok=True)
+                with self.audit_path.open("a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            except OSError:
+                pass
+
+
+_default: Optional[MitigationExecutor] = None
+_default_lock = threading.Lock()
+
+
+def get_executor() -> MitigationExecutor:
+    """Process-wide executor sharing cooldowns with other processes via ``runtime/agent_comms``."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = MitigationExecutor(audit_path=DEFAULT_AUDIT_PATH, state_dir=DEFAULT_STATE_DIR)
+        return _default
@@ -0,0 +1,471 @@
+"""Process supervisor for the long-running Agent-Cellphone services.
+
+The listener and the overnight runner used to be kept alive by PowerShell
+``while ($true)`` loops that restarted them a fixed few seconds after any
+exit.  :class:`ProcessSupervisor` replaces those loops with one Python
+process driven by a declarative service list (:func:`load_services`):
+
+- each service is a command line with its own cwd, environment and log;
+- liveness probes (heartbeat-table age, file age, inbox queue lag) restart a
+  service that is still running but no longer making progress; readiness
+  probes only mark it ready/not ready;
+- restarts back off exponentially (reset once a run lasts ``reset_after_sec``)
+  and a service exiting ``crash_loop_max`` times within
+  ``crash_loop_window_sec`` is parked in ``crashloop`` for a cooldown;
+- SIGTERM/SIGINT stop every child gracefully (terminate, then kill after
+  ``stop_timeout_sec``); SIGHUP/SIGUSR1/SIGUSR2 are forwarded to the children;
+- :meth:`ProcessSupervisor.status` reports state, pid, restart counts, uptime
+  and probe results, is mirrored to a JSON status file and can be served
+  over HTTP (``GET /status``).
+
+Children run in their own process group so signals reach their descendants.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, IO, List, Optional, Union
+
+try:
+    import yaml  # type: ignore
+except ImportError:
+    yaml = None  # type: ignore
+
+from ..utils import atomic_write
+from .heartbeat_table import HeartbeatTable
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_STATUS_PATH = REPO_ROOT / "runtime" / "supervisor" / "status.json"
+PROBE_CHECKS = ("heartbeat", "file_age", "queue_lag")
+RESTART_POLICIES = ("always", "on-failure", "never")
+FORWARDED_SIGNALS = ("SIGHUP", "SIGUSR1", "SIGUSR2")
+
+
+@dataclass
+class ProbeSpec:
+    """A liveness or readiness check evaluated while the service runs."""
+
+    name: str
+    check: str                      # heartbeat | file_age | queue_lag
+    kind: str = "liveness"          # liveness | readiness
+    max_age_sec: float = 300.0
+    interval_sec: float = 15.0
+    failure_threshold: int = 3
+    initial_delay_sec: float = 60.0
+    path: str = ""                  # heartbeat table, watched file or queue directory (relative to the service cwd)
+    pattern: str = "*.json"         # queue_lag: files waiting in ``path``
+    agent: str = ""                 # heartbeat: slot to read
+
+    def __post_init__(self) -> None:
+        if self.check not in PROBE_CHECKS:
+            raise ValueError(f"probe {self.name}: unknown check {self.check!r}")
+        if self.kind not in ("liveness", "readiness"):
+            raise ValueError(f"probe {self.name}: kind must be liveness or readiness")
+
+
+@dataclass
+class ServiceSpec:
+    name: str
+    cmd: List[str]
+    cwd: str = ""
+    env: Dict[str, str] = field(default_factory=dict)
+    log: str = ""                   # default logs/<name>.log under the cwd
+    restart: str = "always"         # always | on-failure | never
+    backoff_initial_sec: float = 1.0
+    backoff_max_sec: float = 300.0
+    backoff_factor: float = 2.0
+    reset_after_sec: float = 60.0
+    crash_loop_window_sec: float = 300.0
+    crash_loop_max: int = 5
+    crash_loop_cooldown_sec: float = 900.0
+    stop_timeout_sec: float = 10.0
+    enabled: bool = True
+    probes: List[ProbeSpec] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        if isinstance(self.cmd, str):
+            self.cmd = shlex.split(self.cmd, posix=os.name != "nt")
+        if self.cmd and self.cmd[0] == "python":
+            self.cmd = [sys.executable] + list(self.cmd[1:])
+        if self.restart not in RESTART_POLICIES:
+            raise ValueError(f"service {self.name}: restart must be one of {RESTART_POLICIES}")
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ServiceSpec":
+        data = dict(data)
+        probes = [p if isinstance(p, ProbeSpec) else ProbeSpec(**p) for p in data.pop("probes", [])]
+        data["env"] = {k: str(v) for k, v in (data.get("env") or {}).items()}
+        return cls(probes=probes, **data)
+
+
+def load_services(path: Union[str, Path]) -> List[ServiceSpec]:
+    """Read ``{"services": [...]}`` from a JSON or YAML file."""
+    path = Path(path)
+    text = path.read_text(encoding="utf-8")
+    if path.suffix in (".yaml", ".yml"):
+        if yaml is None:
+            raise RuntimeError("PyYAML is required for YAML service files")
+        data = yaml.safe_load(text) or {}
+    else:
+        data = json.loads(text)
+    return [ServiceSpec.from_dict(s) for s in data.get("services", [])]
+
+
+class _Service:
+    """Runtime state of one supervised service."""
+
+    def __init__(self, spec: ServiceSpec) -> None:
+        self.spec = spec
+        self.proc: Optional[subprocess.Popen] = None
+        self.log: Optional[IO[bytes]] = None
+        self.state = "pending" if spec.enabled else "disabled"
+        self.starts = 0
+        self.failures = 0               # consecutive, drives the backoff
+        self.exits: Deque[float] = deque()
+        self.started_at: Optional[float] = None
+        self.next_start_at: Optional[float] = None
+        self.last_exit_code: Optional[int] = None
+        self.last_exit_at: Optional[float] = None
+        self.last_reason = ""
+        self.ready = False
+        self.probes: Dict[str, Dict[str, Any]] = {}
+
+
+class ProcessSupervisor:
+    """Runs, probes and restarts the services of one declarative service list."""
+
+    def __init__(
+        self,
+        services: List[ServiceSpec],
+        status_path: Optional[Union[str, Path]] = None,
+        tick_sec: float = 0.5,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        names = [s.name for s in services]
+        if len(set(names)) != len(names):
+            raise ValueError("service names must be unique")
+        self.services: Dict[str, _Service] = {s.name: _Service(s) for s in services}
+        self.status_path = Path(status_path) if status_path else None
+        self.tick_sec = float(tick_sec)
+        self.clock = clock
+        self.started_at = clock()
+        self._tables: Dict[str, HeartbeatTable] = {}
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._status_written = 0.0
+
+    # ---- lifecycle ----
+    def start_all(self) -> None:
+        now = self.clock()
+        with self._lock:
+            for svc in self.services.values():
+                if svc.spec.enabled and svc.proc is None:
+                    self._spawn(svc, now)
+
+    def run(self, install_signals: bool = True) -> None:
+        """Supervise until SIGTERM/SIGINT or :meth:`stop`, then stop every child."""
+        if install_signals:
+            self.install_signal_handlers()
+        self.start_all()
+        try:
+            while not self._stop.is_set():
+                self.tick()
+                self._stop.wait(self.tick_sec)
+        finally:
+            self.shutdown()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def shutdown(self) -> None:
+        """Terminate every child, then kill whatever outlives its stop timeout."""
+        with self._lock:
+            running = [s for s in self.services.values() if s.proc is not None]
+            for svc in running:
+                self._signal(svc, signal.SIGTERM)
+            for svc in running:
+                self._reap(svc, svc.spec.stop_timeout_sec)
+                svc.state = "stopped"
+                svc.next_start_at = None
+            for table in self._tables.values():
+                table.close()
+            self._tables.clear()
+            self._write_status(force=True)
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+
+    def install_signal_handlers(self) -> None:
+        def _stop(signum, frame):
+            print(f"[supervisor] signal {signum}: stopping services")
+            self.stop()
+
+        def _forward(signum, frame):
+            self.forward_signal(signum)
+
+        for name in ("SIGTERM", "SIGINT"):
+            signal.signal(getattr(signal, name), _stop)
+        for name in FORWARDED_SIGNALS:
+            if hasattr(signal, name):
+                signal.signal(getattr(signal, name), _forward)
+
+    def forward_signal(self, signum: int) -> None:
+        with self._lock:
+            for svc in self.services.values():
+                if svc.proc is not None:
+                    self._signal(svc, signum)
+
+    def restart(self, name: str, reason: str = "requested") -> None:
+        """Stop a service and start it again right away (not counted as a failure)."""
+        with self._lock:
+            svc = self.services[name]
+            if svc.proc is not None:
+                self._signal(svc, signal.SIGTERM)
+                self._reap(svc, svc.spec.stop_timeout_sec)
+            svc.last_reason = reason
+            self._spawn(svc, self.clock())
+
+    # ---- supervision ----
+    def tick(self, now: Optional[float] = None) -> None:
+        now = self.clock() if now is None else now
+        with self._lock:
+            for svc in self.services.values():
+                self._check(svc, now)
+            self._write_status()
+
+    def _check(self, svc: _Service, now: float) -> None:
+        if svc.proc is not None:
+            code = svc.proc.poll()
+            if code is None:
+                if svc.failures and now - (svc.started_at or now) >= svc.spec.reset_after_sec:
+                    svc.failures = 0
+                if self._run_probes(svc, now):
+                    print(f"[supervisor] {svc.spec.name}: liveness failed, restarting")
+                    self._signal(svc, signal.SIGTERM)
+                    code = self._reap(svc, svc.spec.stop_timeout_sec)
+                    self._on_exit(svc, code, now, "unhealthy")
+                return
+            self._close_log(svc)
+            svc.proc = None
+            self._on_exit(svc, code, now, "exit")
+        if svc.next_start_at is not None and now >= svc.next_start_at:
+            self._spawn(svc, now)
+
+    def _on_exit(self, svc: _Service, code: Optional[int], now: float, reason: str) -> None:
+        spec = svc.spec
+        svc.last_exit_code, svc.last_exit_at, svc.last_reason = code, now, reason
+        svc.ready = False
+        print(f"[supervisor] {spec.name}: {reason} (code={code})")
+        if spec.restart == "never" or (spec.restart == "on-failure" and code == 0 and reason == "exit"):
+            svc.state, svc.next_start_at = "exited", None
+            return
+        svc.failures += 1
+        svc.exits.append(now)
+        while svc.exits and svc.exits[0] < now - spec.crash_loop_window_sec:
+            svc.exits.popleft()
+        if len(svc.exits) >= spec.crash_loop_max:
+            svc.state, svc.next_start_at = "crashloop", now + spec.crash_loop_cooldown_sec
+            svc.exits.clear()
+            print(f"[supervisor] {spec.name}: crash loop, next start in {spec.crash_loop_cooldown_sec:.0f}s")
+            return
+        delay = min(spec.backoff_max_sec, spec.backoff_initial_sec * spec.backoff_factor ** (svc.failures - 1))
+        svc.state, svc.next_start_at = "backoff", now + delay
+
+    @staticmethod
+    def _cwd(spec: ServiceSpec) -> Path:
+        return Path(spec.cwd) if spec.cwd else REPO_ROOT
+
+    def _spawn(self, svc: _Service, now: float) -> None:
+        spec = svc.spec
+        cwd = self._cwd(spec)
+        log_path = Path(spec.log) if spec.log else Path("logs") / f"{spec.name}.log"
+        if not log_path.is_absolute():
+            log_path = cwd / log_path
+        env = dict(os.environ)
+        env.update(spec.env)
+        kwargs: Dict[str, Any] = {}
+        if os.name == "nt":
+            kwargs["creationflags"] = getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0)
+        else:
+            kwargs["start_new_session"] = True
+        try:
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            svc.log = open(log_path, "ab")
+            svc.proc = subprocess.Popen(spec.cmd, cwd=str(cwd), env=env, stdin=subprocess.DEVNULL,
+                                        stdout=svc.log, stderr=subprocess.STDOUT, **kwargs)
+        except OSError as e:
+            self._close_log(svc)
+            svc.proc = None
+            print(f"[supervisor] {spec.name}: failed to start: {e}")
+            self._on_exit(svc, None, now, "spawn_failed")
+            return
+        svc.starts += 1
+        svc.started_at = now
+        svc.next_start_at = None
+        svc.state = "running"
+        svc.ready = not any(p.kind == "readiness" for p in spec.probes)
+        svc.probes = {p.name: {"ok": None, "age_sec": None, "failures": 0, "checked_at": None} for p in spec.probes}
+
+    def _signal(self, svc: _Service, signum: int) -> None:
+        proc = svc.proc
+        if proc is None or proc.poll() is not None:
+            return
+        try:
+            if os.name == "nt":
+                if signum in (signal.SIGINT, getattr(signal, "CTRL_BREAK_EVENT", -1)):
+                    proc.send_signal(signal.CTRL_BREAK_EVENT)
+                else:
+                    proc.terminate()
+            else:
+                os.killpg(proc.pid, signum)
+        except (ProcessLookupError, PermissionError, OSError):
+            pass
+
+    def _reap(self, svc: _Service, timeout: float) -> Optional[int]:
+        proc = svc.proc
+        if proc is None:
+            return svc.last_exit_code
+        try:
+            code = proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            try:
+                if os.name == "nt":
+                    proc.kill()
+                else:
+                    os.killpg(proc.pid, signal.SIGKILL)
+            except OSError:
+                pass
+            code = proc.wait()
+        self._close_log(svc)
+        svc.proc = None
+        return code
+
+    def _close_log(self, svc: _Service) -> None:
+        if svc.log is not None:
+            svc.log.close()
+            svc.log = None
+
+    # ---- probes ----
+    def _run_probes(self, svc: _Service, now: float) -> bool:
+        """Evaluate due probes; True when a liveness probe crossed its failure threshold."""
+        up = now - (svc.started_at or now)
+        ready = True
+        for probe in svc.spec.probes:
+            st = svc.probes[probe.name]
+            if up < probe.initial_delay_sec:
+                if probe.kind == "readiness":
+                    ready = False
+                continue
+            if st["checked_at"] is None or now - st["checked_at"] >= probe.interval_sec:
+                age = self.probe_age(probe, now, self._cwd(svc.spec))
+                st["ok"] = age is not None and age <= probe.max_age_sec
+                st["age_sec"] = age
+                st["checked_at"] = now
+                st["failures"] = 0 if st["ok"] else st["failures"] + 1
+            if probe.kind == "readiness":
+                ready = ready and bool(st["ok"])
+            elif st["failures"] >= probe.failure_threshold:
+                return True
+        svc.ready = ready
+        if ready and svc.state == "running":
+            svc.state = "ready"
+        elif not ready and svc.state == "ready":
+            svc.state = "running"
+        return False
+
+    def probe_age(self, probe: ProbeSpec, now: float, cwd: Optional[Path] = None) -> Optional[float]:
+        """Seconds since the probed signal last moved; None when it was never seen."""
+        path = (cwd or REPO_ROOT) / probe.path if probe.path else None
+        if probe.check == "heartbeat":
+            key = str(path or "")
+            table = self._tables.get(key)
+            if table is None:
+                table = self._tables[key] = HeartbeatTable(path, create=False)
+            beat = table.read_all().get(probe.agent)
+            return None if beat is None else max(0.0, now - beat.ts)
+        if probe.check == "file_age":
+            try:
+                return max(0.0, now - path.stat().st_mtime) if path else None
+            except OSError:
+                return None
+        # queue_lag: age of the oldest message still waiting; a missing queue was never seen
+        if path is None or not path.is_dir():
+            return None
+        oldest = None
+        for f in path.glob(probe.pattern):
+            try:
+                mtime = f.stat().st_mtime
+            except OSError:
+                continue
+            oldest = mtime if oldest is None else min(oldest, mtime)
+        return 0.0 if oldest is None else max(0.0, now - oldest)
+
+    # ---- status ----
+    def status(self) -> Dict[str, Any]:
+        now = self.clock()
+        with self._lock:
+            services = {}
+            for name, svc in self.services.items():
+                running = svc.proc is not None
+                services[name] = {
+                    "state": svc.state,
+                    "pid": svc.proc.pid if running else None,
+                    "ready": svc.ready,
+                    "starts": svc.starts,
+                    "restarts": max(0, svc.starts - 1),
+                    "uptime_sec": now - svc.started_at if running and svc.started_at else 0.0,
+                    "last_exit_code": svc.last_exit_code,
+                    "last_exit_at": svc.last_exit_at,
+                    "last_reason": svc.last_reason,
+                    "next_start_in_sec": max(0.0, svc.next_start_at - now) if svc.next_start_at else None,
+                    "probes": {k: dict(v) for k, v in svc.probes.items()},
+                }
+            return {"ts": now, "pid": os.getpid(), "uptime_sec": now - self.started_at, "services": services}
+
+    def _write_status(self, force: bool = False) -> None:
+        if self.status_path is None:
+            return
+        now = self.clock()
+        if not force and now - self._status_written < 1.0:
+            return
+        self._status_written = now
+        try:
+            self.status_path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write(self.status_path, json.dumps(self.status(), indent=2))
+        except OSError as e:
+            print(f"[supervisor] status write failed: {e}")
+
+    def serve_status(self, host: str = "127.0.0.1", port: int = 8767) -> None:
+        """Serve ``GET /status`` from a background thread."""
+        supervisor = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802 - http.server API
+                if self.path.rstrip("/") != "/status":
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                data = json.dumps(supervisor.status()).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, fmt: str, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((host, int(port)), _Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
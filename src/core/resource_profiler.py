@@ -0,0 +1,463 @@
+"""Process-level resource profiler for the agent fleet.
+
+:class:`ResourceProfiler` samples, at a configurable rate and with psutil,
+CPU %, RSS, open file descriptors (handles on Windows), threads and
+cumulative I/O bytes for:
+
+- every Agent-Cellphone process, grouped by role (``runner``, ``monitor``,
+  ``listener``, ``watcher``, ``gui``) from its command line;
+- each terminal started by ``term_watch`` (``term:agent-N``, from the pid in
+  its ``term_state.json``);
+- each Cursor instance's process tree (``cursor:<root pid>``).
+
+A series aggregates every process in its group or tree.  Samples go to a
+:class:`ResourceSeriesStore`: one memory-mapped file with a 48-byte record
+per sample in a fixed-capacity ring, so days of history stay a few MB and
+readers (``SynergyOptimizer``, the GUI dashboards) query it without talking
+to the profiler process.  There is a single writer per store.
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+try:
+    import psutil  # type: ignore
+    HAS_PSUTIL = True
+except ImportError:
+    psutil = None  # type: ignore
+    HAS_PSUTIL = False
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_CAPACITY = 262_144   # ~12 MB; a day of 5s samples for 12 series
+DEFAULT_SERIES = 512
+
+MAGIC = b"ACPRS1\0\0"
+_HEADER = struct.Struct("<8sIIIIQ")         # magic, capacity, record size, series slots, name len, head
+_RECORD = struct.Struct("<dHHfQIIQQ")       # ts, series, nprocs, cpu, rss, fds, threads, read, write
+_HEAD = struct.Struct("<Q")
+_HEAD_OFFSET = _HEADER.size - _HEAD.size
+_NAME_LEN = 32
+
+# First match wins; matched against the lower-cased command line of python processes
+ROLE_PATTERNS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("runner", ("overnight_runner",)),
+    ("monitor", ("agent5_monitor", "agent_monitor", "stall_detection")),
+    ("watcher", ("term_watch", "watcher", "resource_profiler", "profile_fleet")),
+    ("listener", ("listener", "inbox")),
+    ("gui", ("gui", "command_center", "dashboard")),
+)
+
+
+def default_store_path() -> Path:
+    """``ACP_RESOURCE_STORE`` or ``runtime/profiler/resources.bin`` under the repo."""
+    env = os.environ.get("ACP_RESOURCE_STORE")
+    return Path(env) if env else REPO_ROOT / "runtime" / "profiler" / "resources.bin"
+
+
+@dataclass(frozen=True)
+class ResourceSample:
+    ts: float
+    series: str
+    nprocs: int
+    cpu: float          # percent of one core, summed over the group
+    rss: int            # bytes
+    fds: int
+    threads: int
+    read_bytes: int     # cumulative
+    write_bytes: int    # cumulative
+
+
+class ResourceSeriesStore:
+    """Fixed-capacity ring of resource samples in a memory-mapped file.
+
+    Readers opened with ``create=False`` on a missing file see no samples.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        capacity: int = DEFAULT_CAPACITY,
+        series_slots: int = DEFAULT_SERIES,
+        create: bool = True,
+    ) -> None:
+        self.path = Path(path) if path else default_store_path()
+        self.capacity = int(capacity)
+        self.series_slots = int(series_slots)
+        self.create = create
+        self._mm: Optional[mmap.mmap] = None
+        self._file = None
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._lock = threading.Lock()
+
+    # ---- mapping ----
+    def _records_offset(self) -> int:
+        return _HEADER.size + self.series_slots * _NAME_LEN
+
+    def _size(self) -> int:
+        return self._records_offset() + self.capacity * _RECORD.size
+
+    def _open(self) -> Optional[mmap.mmap]:
+        if self._mm is not None:
+            return self._mm
+        if not self.path.exists():
+            if not self.create:
+                return None
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                with open(self.path, "xb") as f:
+                    f.write(_HEADER.pack(MAGIC, self.capacity, _RECORD.size, self.series_slots, _NAME_LEN, 0))
+                    f.truncate(self._size())
+            except FileExistsError:
+                pass
+        f = open(self.path, "r+b" if self.create else "rb")
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            f.close()
+            return None
+        magic, capacity, rec_size, slots, name_len, _ = _HEADER.unpack(header)
+        if magic != MAGIC or rec_size != _RECORD.size or name_len != _NAME_LEN:
+            f.close()
+            raise ValueError(f"{self.path} is not a resource series store")
+        self.capacity, self.series_slots = capacity, slots
+        access = mmap.ACCESS_WRITE if self.create else mmap.ACCESS_READ
+        self._mm = mmap.mmap(f.fileno(), self._size(), access=access)
+        self._file = f
+        return self._mm
+
+    def close(self) -> None:
+        with self._lock:
+            if self._mm is not None:
+                self._mm.close()
+                self._mm = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _head(self, mm: mmap.mmap) -> int:
+        return _HEAD.unpack_from(mm, _HEAD_OFFSET)[0]
+
+    def _load_names(self, mm: mmap.mmap) -> None:
+        base = _HEADER.size
+        for slot in range(len(self._names), self.series_slots):
+            raw = mm[base + slot * _NAME_LEN:base + (slot + 1) * _NAME_LEN].rstrip(b"\0")
+            if not raw:
+                break
+            name = raw.decode("utf-8", "replace")
+            self._ids[name] = slot
+            self._names.append(name)
+
+    # ---- writer ----
+    def _series_id(self, mm: mmap.mmap, name: str) -> int:
+        sid = self._ids.get(name)
+        if sid is not None:
+            return sid
+        self._load_names(mm)
+        sid = self._ids.get(name)
+        if sid is not None:
+            return sid
+        sid = len(self._names)
+        if sid >= self.series_slots:
+            raise RuntimeError(f"resource store {self.path} has no free series slots")
+        off = _HEADER.size + sid * _NAME_LEN
+        mm[off:off + _NAME_LEN] = name.encode("utf-8")[:_NAME_LEN].ljust(_NAME_LEN, b"\0")
+        self._ids[name] = sid
+        self._names.append(name)
+        return sid
+
+    def append(self, samples: Iterable[ResourceSample]) -> int:
+        """Write samples at the ring head; returns the new head (total ever written)."""
+        with self._lock:
+            mm = self._open()
+            if mm is None:
+                raise RuntimeError(f"resource store {self.path} is not writable")
+            head = self._head(mm)
+            base = self._records_offset()
+            for s in samples:
+                off = base + (head % self.capacity) * _RECORD.size
+                _RECORD.pack_into(
+                    mm, off, s.ts, self._series_id(mm, s.series), min(s.nprocs, 0xFFFF), s.cpu,
+                    s.rss, min(s.fds, 0xFFFFFFFF), min(s.threads, 0xFFFFFFFF), s.read_bytes, s.write_bytes,
+                )
+                head += 1
+            # Publish after the records so readers never see a half-written sample
+            _HEAD.pack_into(mm, _HEAD_OFFSET, head)
+            return head
+
+    # ---- queries ----
+    def series(self) -> List[str]:
+        with self._lock:
+            mm = self._open()
+            if mm is None:
+                return []
+            self._load_names(mm)
+            return list(self._names)
+
+    def _decode(self, data: bytes, first: int, last: int) -> List[ResourceSample]:
+        out = []
+        names = self._names
+        for i in range(first, last):
+            ts, sid, nprocs, cpu, rss, fds, threads, rd, wr = _RECORD.unpack_from(data, (i % self.capacity) * _RECORD.size)
+            name = names[sid] if sid < len(names) else f"series-{sid}"
+            out.append(ResourceSample(ts, name, nprocs, cpu, rss, fds, threads, rd, wr))
+        return out
+
+    def query(
+        self,
+        series: Optional[Sequence[str]] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> List[ResourceSample]:
+        """Samples in write order, optionally filtered by series and time range."""
+        with self._lock:
+            mm = self._open()
+            if mm is None:
+                return []
+            self._load_names(mm)
+            head = self._head(mm)
+            first = max(0, head - self.capacity)
+            base = self._records_offset()
+            data = mm[base:base + self.capacity * _RECORD.size]
+            # The writer may have lapped the oldest records while we copied
+            first = max(first, self._head(mm) - self.capacity)
+            if since is not None:
+                ts_at = lambda i: _RECORD.unpack_from(data, (i % self.capacity) * _RECORD.size)[0]  # noqa: E731
+                first = _bisect_left(ts_at, first, head, since)
+            samples = self._decode(data, first, head)
+        wanted = set(series) if series else None
+        return [
+            s for s in samples
+            if (wanted is None or s.series in wanted) and (until is None or s.ts <= until)
+        ]
+
+    def latest(self) -> Dict[str, ResourceSample]:
+        """Newest sample of every series still in the ring."""
+        out: Dict[str, ResourceSample] = {}
+        for s in self.query():
+            out[s.series] = s
+        return out
+
+    def summary(self, window_sec: float = 300.0, now: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """Per-series averages/peaks over the last ``window_sec`` plus I/O rates."""
+        now = time.time() if now is None else now
+        grouped: Dict[str, List[ResourceSample]] = {}
+        for s in self.query(since=now - window_sec, until=now):
+            grouped.setdefault(s.series, []).append(s)
+        out: Dict[str, Dict[str, float]] = {}
+        for name, rows in grouped.items():
+            last, first = rows[-1], rows[0]
+            span = last.ts - first.ts
+            out[name] = {
+                "samples": len(rows),
+                "cpu_avg": sum(r.cpu for r in rows) / len(rows),
+                "cpu_max": max(r.cpu for r in rows),
+                "rss_last": last.rss,
+                "rss_max": max(r.rss for r in rows),
+                "fds": last.fds,
+                "threads": last.threads,
+                "nprocs": last.nprocs,
+                "read_bps": max(0, last.read_bytes - first.read_bytes) / span if span > 0 else 0.0,
+                "write_bps": max(0, last.write_bytes - first.write_bytes) / span if span > 0 else 0.0,
+            }
+        return out
+
+
+def _bisect_left(ts_at: Callable[[int], float], lo: int, hi: int, since: float) -> int:
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if ts_at(mid) < since:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+class ProcessTreeSampler:
+    """Aggregates psutil counters over a process and its descendants.
+
+    ``Process`` objects are cached per pid so ``cpu_percent`` has a baseline
+    between calls; exited processes drop out of the cache.
+    """
+
+    def __init__(self) -> None:
+        if not HAS_PSUTIL:
+            raise RuntimeError("psutil is not installed")
+        self._procs: Dict[int, "psutil.Process"] = {}
+
+    def process(self, pid: int) -> Optional["psutil.Process"]:
+        proc = self._procs.get(pid)
+        if proc is None:
+            try:
+                proc = self._procs[pid] = psutil.Process(pid)
+            except psutil.Error:
+                return None
+        return proc
+
+    def tree(self, pid: int) -> List["psutil.Process"]:
+        root = self.process(pid)
+        if root is None:
+            return []
+        try:
+            children = root.children(recursive=True)
+        except psutil.Error:
+            self._procs.pop(pid, None)
+            return []
+        return [root] + [p for p in (self.process(c.pid) for c in children) if p is not None]
+
+    def sample(self, series: str, procs: Iterable["psutil.Process"], ts: Optional[float] = None) -> ResourceSample:
+        nprocs = fds = threads = rss = rd = wr = 0
+        cpu = 0.0
+        for p in procs:
+            try:
+                with p.oneshot():
+                    cpu += p.cpu_percent(interval=None)
+                    rss += p.memory_info().rss
+                    threads += p.num_threads()
+                    fds += p.num_fds() if hasattr(p, "num_fds") else p.num_handles()
+                    try:
+                        io = p.io_counters()
+                        rd += io.read_bytes
+                        wr += io.write_bytes
+                    except (psutil.AccessDenied, AttributeError):
+                        pass
+                nprocs += 1
+            except psutil.Error:
+                self._procs.pop(p.pid, None)
+        return ResourceSample(time.time() if ts is None else ts, series, nprocs, cpu, rss, fds, threads, rd, wr)
+
+    def cpu_percent(self, pid: int) -> float:
+        """cpu% of pid + descendants (the ``term_watch`` heartbeat figure)."""
+        return self.sample("", self.tree(pid)).cpu
+
+    def prune(self, alive: Iterable[int]) -> None:
+        keep = set(alive)
+        for pid in [p for p in self._procs if p not in keep]:
+            del self._procs[pid]
+
+
+def classify_cmdline(cmdline: Sequence[str]) -> Optional[str]:
+    """Role of an Agent-Cellphone python process from its command line, else None."""
+    if not cmdline or "python" not in os.path.basename(cmdline[0]).lower():
+        return None
+    text = " ".join(cmdline[1:]).replace("\\", "/").lower()
+    for role, patterns in ROLE_PATTERNS:
+        if any(p in text for p in patterns):
+            return role
+    return None
+
+
+class ResourceProfiler:
+    """Discovers fleet processes and appends one sample per series every ``interval_sec``."""
+
+    def __init__(
+        self,
+        store: Optional[ResourceSeriesStore] = None,
+        interval_sec: float = 5.0,
+        term_root: Optional[Union[str, Path]] = None,
+        include_cursor: bool = True,
+        rediscover_every: int = 12,
+    ) -> None:
+        self.store = store or ResourceSeriesStore()
+        self.interval_sec = float(interval_sec)
+        self.term_root = Path(term_root) if term_root else REPO_ROOT / "runtime" / "agent_comms"
+        self.include_cursor = include_cursor
+        self.rediscover_every = max(1, int(rediscover_every))
+        self.sampler = ProcessTreeSampler()
+        self._groups: Dict[str, List[int]] = {}
+        self._ticks = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---- discovery ----
+    def discover(self) -> Dict[str, List[int]]:
+        """Series name -> root pids (each sampled with its descendants)."""
+        groups: Dict[str, List[int]] = {}
+        cursor_pids: Dict[int, int] = {}
+        for p in psutil.process_iter(["pid", "ppid", "name", "cmdline"]):
+            info = p.info
+            role = classify_cmdline(info.get("cmdline") or [])
+            if role:
+                groups.setdefault(role, []).append(info["pid"])
+            elif self.include_cursor and (info.get("name") or "").lower().startswith("cursor"):
+                cursor_pids[info["pid"]] = info.get("ppid") or 0
+        # A Cursor instance is a cursor process whose parent is not one
+        for pid, ppid in cursor_pids.items():
+            if ppid not in cursor_pids:
+                groups[f"cursor:{pid}"] = [pid]
+        for state in sorted(self.term_root.glob("agent-*/term_state.json")):
+            pid = _term_pid(state)
+            if pid:
+                groups[f"term:{state.parent.name}"] = [pid]
+        return groups
+
+    def sample_once(self, now: Optional[float] = None) -> List[ResourceSample]:
+        if self._ticks % self.rediscover_every == 0 or not self._groups:
+            self._groups = self.discover()
+        self._ticks += 1
+        ts = time.time() if now is None else now
+        samples = []
+        seen: List[int] = []
+        for series, roots in sorted(self._groups.items()):
+            procs = []
+            for pid in roots:
+                # Cursor and terminal series cover the whole tree; role groups list each process
+                if series.startswith(("cursor:", "term:")):
+                    procs.extend(self.sampler.tree(pid))
+                else:
+                    proc = self.sampler.process(pid)
+                    if proc is not None:
+                        procs.append(proc)
+            seen.extend(p.pid for p in procs)
+            samples.append(self.sampler.sample(series, procs, ts))
+        self.sampler.prune(seen)
+        if samples:
+            self.store.append(samples)
+        return samples
+
+    # ---- lifecycle ----
+    def start(self) -> "ResourceProfiler":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name="resource-profiler", daemon=True)
+            self._thread.start()
+        return self
+
+    def run(self) -> None:
+        while not self._stop.is_set():
+            started = time.time()
+            try:
+                self.sample_once(started)
+            except Exception as e:
+                print(f"[profiler] sample failed: {e}")
+            self._stop.wait(max(0.0, self.interval_sec - (time.time() - started)))
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_sec + 1)
+            self._thread = None
+        self.store.close()
+
+
+def _term_pid(state_file: Path) -> Optional[int]:
+    try:
+        data = json.loads(state_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if data.get("exit_code") is not None:
+        return None
+    pid = data.get("pid")
+    return int(pid) if pid else None
+
+
+def open_store(path: Optional[Union[str, Path]] = None) -> ResourceSeriesStore:
+    """Read-only handle for dashboards and optimizers."""
+    return ResourceSeriesStore(path, create=False)
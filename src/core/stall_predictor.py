@@ -0,0 +1,304 @@
+"""Predict stalls before the fixed thresholds expire.
+
+The Agent-5 monitor and :class:`UnifiedStallDetectionSystem` only react once
+an agent has been quiet for ``stall_threshold_sec``.  This module learns from
+the per-tick history in :class:`src.core.metrics_store.MetricsStore` which
+quiet spells turn into stalls:
+
+- :class:`StallFeatures` turns a stream of per-agent samples (age, hourly
+  event rate, response size, tag of the last message sent) into a feature
+  vector; the same code runs offline and in the monitor tick.
+- :func:`build_dataset` replays a store and labels each non-stalled sample
+  with "stalled within ``horizon_sec``".
+- :class:`StallModel` is an L2 logistic regression with balanced class
+  weights, fitted by gradient descent (vectorized with NumPy when installed,
+  plain loops otherwise) and saved as JSON so scoring needs no extra deps.
+- :func:`evaluate` reports sample-level precision/recall plus how many stall
+  onsets were flagged in advance and with how much lead time.
+"""
+from __future__ import annotations
+
+import json
+import math
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np  # type: ignore
+    HAS_NUMPY = True
+except ImportError:
+    np = None  # type: ignore
+    HAS_NUMPY = False
+
+from .metrics_store import MINUTE, MetricsStore
+
+TAGS = ("none", "task", "rescue", "onboarding", "other")
+TAG_CODES = {name: i for i, name in enumerate(TAGS)}
+FEATURES = (
+    "age_min", "log_age", "log_events_hour", "reply_trend",
+    "tag_task", "tag_rescue", "tag_onboarding", "tag_other",
+    "night_sin", "night_cos",
+)
+HISTORY_SERIES = ("age_sec", "stalled", "events_last_hour", "reply_bytes", "last_tag")
+
+
+def tag_code(tag: Optional[str]) -> int:
+    """Map a message tag (``"[TASK]"``, ``MsgTag.RESCUE``...) onto :data:`TAGS`."""
+    name = str(getattr(tag, "value", tag) or "").strip("[] ").lower()
+    if not name:
+        return TAG_CODES["none"]
+    return TAG_CODES.get(name, TAG_CODES["other"])
+
+
+@dataclass
+class Sample:
+    ts: float
+    age_sec: float
+    events_last_hour: float = 0.0
+    reply_bytes: Optional[float] = None
+    last_tag: int = 0
+    stalled: bool = False
+
+
+class StallFeatures:
+    """Per-agent rolling state that turns samples into :data:`FEATURES` vectors."""
+
+    def __init__(self, reply_window: int = 5, max_age_min: float = 240.0) -> None:
+        self.reply_window = max(2, int(reply_window))
+        self.max_age_min = max_age_min
+        self._replies: Dict[str, Deque[float]] = {}
+        self._last_bytes: Dict[str, float] = {}
+
+    def update(self, agent: str, s: Sample) -> List[float]:
+        replies = self._replies.setdefault(agent, deque(maxlen=self.reply_window))
+        if s.reply_bytes is not None and s.reply_bytes != self._last_bytes.get(agent):
+            self._last_bytes[agent] = s.reply_bytes
+            replies.append(math.log1p(max(0.0, s.reply_bytes)))
+        trend = 0.0
+        if len(replies) >= 2:
+            prior = list(replies)[:-1]
+            trend = replies[-1] - sum(prior) / len(prior)  # shrinking replies go negative
+        age_min = min(max(0.0, s.age_sec) / 60.0, self.max_age_min)
+        hour = time.localtime(s.ts).tm_hour + time.localtime(s.ts).tm_min / 60.0
+        tag = s.last_tag if 0 <= s.last_tag < len(TAGS) else TAG_CODES["other"]
+        return [
+            age_min, math.log1p(age_min), math.log1p(max(0.0, s.events_last_hour or 0.0)), trend,
+            float(tag == 1), float(tag == 2), float(tag == 3), float(tag == 4),
+            math.sin(2 * math.pi * hour / 24), math.cos(2 * math.pi * hour / 24),
+        ]
+
+
+@dataclass
+class Dataset:
+    X: List[List[float]] = field(default_factory=list)
+    y: List[int] = field(default_factory=list)
+    ts: List[float] = field(default_factory=list)
+    agents: List[str] = field(default_factory=list)
+    # (agent, ts) of every transition into "stalled", for event-level recall
+    onsets: List[Tuple[str, float]] = field(default_factory=list)
+
+    def split(self, before: float) -> Tuple["Dataset", "Dataset"]:
+        """Time-based split: samples before ``before`` train, the rest test."""
+        a, b = Dataset(), Dataset()
+        for i, t in enumerate(self.ts):
+            d = a if t < before else b
+            d.X.append(self.X[i]); d.y.append(self.y[i]); d.ts.append(t); d.agents.append(self.agents[i])
+        for agent, t in self.onsets:
+            (a if t < before else b).onsets.append((agent, t))
+        return a, b
+
+
+def label_samples(agent: str, samples: Sequence[Sample], horizon_sec: float, ds: Dataset,
+                  features: Optional[StallFeatures] = None) -> None:
+    """Append features/labels for one agent's time-ordered samples to ``ds``."""
+    features = features or StallFeatures()
+    stall_ts = [s.ts for s in samples if s.stalled]
+    j = 0
+    prev_stalled = False
+    for s in samples:
+        x = features.update(agent, s)
+        if s.stalled:
+            if not prev_stalled:
+                ds.onsets.append((agent, s.ts))
+            prev_stalled = True
+            continue  # already stalled: nothing left to predict
+        prev_stalled = False
+        while j < len(stall_ts) and stall_ts[j] <= s.ts:
+            j += 1
+        ds.X.append(x)
+        ds.y.append(int(j < len(stall_ts) and stall_ts[j] - s.ts <= horizon_sec))
+        ds.ts.append(s.ts)
+        ds.agents.append(agent)
+
+
+def load_samples(store: MetricsStore, agent: str, since: float, until: float,
+                 resolution: int = MINUTE) -> List[Sample]:
+    """Align the :data:`HISTORY_SERIES` of one agent on the store's time buckets."""
+    cols: Dict[str, Dict[float, float]] = {}
+    for name in HISTORY_SERIES:
+        # categorical series keep the bucket maximum, numeric ones the mean
+        pick = (lambda p: p.hi) if name in ("stalled", "last_tag") else (lambda p: p.value)
+        cols[name] = {p.ts: pick(p) for p in store.query(name, agent, since, until, resolution=resolution)}
+    out = []
+    for ts in sorted(cols["age_sec"]):
+        out.append(Sample(
+            ts=ts,
+            age_sec=cols["age_sec"][ts],
+            events_last_hour=cols["events_last_hour"].get(ts, 0.0),
+            reply_bytes=cols["reply_bytes"].get(ts),
+            last_tag=int(cols["last_tag"].get(ts, 0)),
+            stalled=cols["stalled"].get(ts, 0.0) >= 1.0,
+        ))
+    return out
+
+
+def build_dataset(store: MetricsStore, since: float, until: Optional[float] = None,
+                  horizon_sec: float = 600.0, agents: Optional[Iterable[str]] = None,
+                  resolution: int = MINUTE) -> Dataset:
+    until = store.clock() if until is None else until
+    ds = Dataset()
+    for agent in agents or [a for a in store.agents() if a != "*"]:
+        label_samples(agent, load_samples(store, agent, since, until, resolution), horizon_sec, ds)
+    return ds
+
+
+def _sigmoid(z: float) -> float:
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+@dataclass
+class StallModel:
+    """Logistic regression over standardized :data:`FEATURES`."""
+
+    weights: List[float] = field(default_factory=lambda: [0.0] * len(FEATURES))
+    bias: float = 0.0
+    mean: List[float] = field(default_factory=lambda: [0.0] * len(FEATURES))
+    std: List[float] = field(default_factory=lambda: [1.0] * len(FEATURES))
+    threshold: float = 0.5
+    horizon_sec: float = 600.0
+    features: List[str] = field(default_factory=lambda: list(FEATURES))
+    trained_at: float = 0.0
+    report: Dict[str, float] = field(default_factory=dict)
+
+    # ---- training ----
+    def fit(self, X: Sequence[Sequence[float]], y: Sequence[int], l2: float = 1e-3,
+            lr: float = 0.5, epochs: int = 300) -> "StallModel":
+        n = len(X)
+        if not n or len(set(y)) < 2:
+            raise ValueError("need samples of both classes to fit")
+        d = len(FEATURES)
+        self.mean = [sum(r[k] for r in X) / n for k in range(d)]
+        self.std = [math.sqrt(sum((r[k] - self.mean[k]) ** 2 for r in X) / n) or 1.0 for k in range(d)]
+        pos = sum(y)
+        # balanced class weights: stalls are rare, so positives would otherwise be ignored
+        cw = (n / (2.0 * (n - pos)), n / (2.0 * pos))
+        if HAS_NUMPY:
+            self._fit_numpy(X, y, cw, l2, lr, epochs)
+        else:
+            self._fit_python(X, y, cw, l2, lr, epochs)
+        self.trained_at = time.time()
+        return self
+
+    def _fit_numpy(self, X, y, cw, l2, lr, epochs) -> None:
+        Z = (np.asarray(X, dtype=np.float64) - np.asarray(self.mean)) / np.asarray(self.std)
+        t = np.asarray(y, dtype=np.float64)
+        sw = np.where(t > 0, cw[1], cw[0]) / len(t)
+        w = np.zeros(Z.shape[1]); b = 0.0
+        for _ in range(epochs):
+            p = 1.0 / (1.0 + np.exp(-np.clip(Z @ w + b, -30, 30)))
+            g = sw * (p - t)
+            w -= lr * (Z.T @ g + l2 * w)
+            b -= lr * float(g.sum())
+        self.weights, self.bias = [float(v) for v in w], float(b)
+
+    def _fit_python(self, X, y, cw, l2, lr, epochs) -> None:
+        Z = [self._standardize(r) for r in X]
+        n, d = len(Z), len(FEATURES)
+        w = [0.0] * d; b = 0.0
+        for _ in range(epochs):
+            gw = [0.0] * d; gb = 0.0
+            for z, t in zip(Z, y):
+                g = cw[t] * (_sigmoid(sum(wi * zi for wi, zi in zip(w, z)) + b) - t) / n
+                gb += g
+                for k in range(d):
+                    gw[k] += g * z[k]
+            w = [w[k] - lr * (gw[k] + l2 * w[k]) for k in range(d)]
+            b -= lr * gb
+        self.weights, self.bias = w, b
+
+    # ---- scoring ----
+    def _standardize(self, x: Sequence[float]) -> List[float]:
+        return [(v - m) / s for v, m, s in zip(x, self.mean, self.std)]
+
+    def score(self, x: Sequence[float]) -> float:
+        """Probability that the agent stalls within ``horizon_sec``."""
+        return _sigmoid(sum(w * z for w, z in zip(self.weights, self._standardize(x))) + self.bias)
+
+    def tune_threshold(self, ds: Dataset, min_precision: float = 0.5) -> float:
+        """Lowest threshold (most recall) that keeps precision at ``min_precision``."""
+        best = self.threshold
+        for thr in [i / 100 for i in range(95, 4, -5)]:
+            r = evaluate(self, ds, thr)
+            if r["alerts"] and r["precision"] >= min_precision:
+                best = thr
+        self.threshold = best
+        return best
+
+    # ---- persistence ----
+    def save(self, path: Union[str, Path]) -> None:
+        from ..utils import atomic_write
+        atomic_write(path, json.dumps(asdict(self), indent=2))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "StallModel":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        if list(data.get("features", [])) != list(FEATURES):
+            raise ValueError(f"{path} was trained on different features; retrain it")
+        return cls(**data)
+
+
+def load_model(path: Union[str, Path]) -> Optional[StallModel]:
+    """The saved model, or None when there is none (or it no longer matches)."""
+    try:
+        return StallModel.load(path)
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def evaluate(model: StallModel, ds: Dataset, threshold: Optional[float] = None) -> Dict[str, float]:
+    """Precision/recall on labelled samples plus early-warning recall over stall onsets."""
+    thr = model.threshold if threshold is None else threshold
+    tp = fp = fn = 0
+    alerts: Dict[str, List[float]] = {}
+    for x, y, ts, agent in zip(ds.X, ds.y, ds.ts, ds.agents):
+        hit = model.score(x) >= thr
+        tp += hit and y == 1
+        fp += hit and y == 0
+        fn += (not hit) and y == 1
+        if hit:
+            alerts.setdefault(agent, []).append(ts)
+    leads = []
+    for agent, onset in ds.onsets:
+        early = [t for t in alerts.get(agent, []) if onset - model.horizon_sec <= t < onset]
+        if early:
+            leads.append(onset - min(early))
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    return {
+        "threshold": thr,
+        "samples": len(ds.y),
+        "positives": sum(ds.y),
+        "alerts": tp + fp,
+        "precision": precision,
+        "recall": recall,
+        "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+        "onsets": len(ds.onsets),
+        "onsets_flagged": len(leads),
+        "mean_lead_sec": sum(leads) / len(leads) if leads else 0.0,
+    }
@@ -0,0 +1,422 @@
+"""Streaming terminal supervisor used by ``scripts/term_watch.py``.
+
+The original ``wrap`` rewrote ``term_state.json`` and flushed the console for
+every output line, so a chatty build turned into thousands of JSON rewrites a
+second.  Here output is handled per read chunk instead of per line:
+
+- :class:`RotatingLog` appends timestamped lines through a large write buffer
+  and rotates ``term.log`` by size;
+- :class:`TermChannel` keeps byte/line counters in memory and snapshots
+  ``term_state.json`` at most every ``state_interval`` seconds (and on exit);
+- :class:`TermSupervisor` runs any number of terminals from one loop.  On
+  POSIX the pipes are multiplexed with :mod:`selectors`; Windows cannot select
+  on pipes, so there one reader thread per pipe feeds a shared queue and the
+  same single loop does all parsing, logging and snapshotting.
+
+The state file keeps the keys ``term_watch watch`` already classifies on.
+"""
+from __future__ import annotations
+
+import json
+import os
+import queue
+import selectors
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from ..utils import atomic_write
+
+ISO = "%Y-%m-%dT%H:%M:%S.%fZ"
+READ_SIZE = 65536
+MAX_PARTIAL = 65536  # flush unterminated output (progress bars) past this size
+
+
+def iso_ts(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime(ISO)
+
+
+def shell_command(cmd: str) -> List[str]:
+    return ["cmd", "/c", cmd] if os.name == "nt" else ["bash", "-lc", cmd]
+
+
+class RotatingLog:
+    """Append-only log with a large write buffer and size-based rotation."""
+
+    def __init__(self, path: Union[str, Path], max_bytes: int = 10 * 1024 * 1024, backups: int = 3,
+                 buffer_size: int = 256 * 1024) -> None:
+        self.path = Path(path)
+        self.max_bytes = int(max_bytes)
+        self.backups = int(backups)
+        self.buffer_size = int(buffer_size)
+        self.rotations = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._open()
+
+    def _open(self) -> None:
+        self._f: BinaryIO = open(self.path, "ab", buffering=self.buffer_size)
+        self._size = self._f.tell()
+
+    def write(self, data: bytes) -> None:
+        if self.max_bytes > 0 and self._size and self._size + len(data) > self.max_bytes:
+            self.rotate()
+        self._f.write(data)
+        self._size += len(data)
+
+    def rotate(self) -> None:
+        self._f.close()
+        if self.backups > 0:
+            for i in range(self.backups - 1, 0, -1):
+                src = self.path.with_name(f"{self.path.name}.{i}")
+                if src.exists():
+                    src.replace(self.path.with_name(f"{self.path.name}.{i + 1}"))
+            self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+        self.rotations += 1
+        self._open()
+
+    def flush(self) -> None:
+        self._f.flush()
+
+    def close(self) -> None:
+        self._f.close()
+
+
+class TermChannel:
+    """One supervised terminal: output parsing, counters and debounced state."""
+
+    def __init__(
+        self,
+        agent_id: str,
+        root: Union[str, Path],
+        cmd: str = "",
+        cwd: Optional[str] = None,
+        state_interval: float = 1.0,
+        log_max_bytes: int = 10 * 1024 * 1024,
+        log_backups: int = 3,
+        echo: Optional[BinaryIO] = None,
+        echo_err: Optional[BinaryIO] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.agent_id = str(agent_id)
+        self.root = Path(root)
+        self.agent_root = self.root / f"agent-{self.agent_id}"
+        self.state_file = self.agent_root / "term_state.json"
+        self.state_interval = float(state_interval)
+        self._echo = {"stdout": echo, "stderr": echo_err or echo}
+        self.clock = clock
+        self.log = RotatingLog(self.agent_root / "term.log", max_bytes=log_max_bytes, backups=log_backups)
+        self.proc: Optional[subprocess.Popen] = None
+        self._partial: Dict[str, bytes] = {"stdout": b"", "stderr": b""}
+        self.open_streams = {"stdout", "stderr"}
+        self.exited_at: Optional[float] = None
+        self.closed = False
+        self._dirty = True
+        self._last_write = 0.0
+        self.state_writes = 0
+        now = clock()
+        self.state: Dict[str, Any] = {
+            "agent_id": self.agent_id,
+            "cmd": cmd,
+            "cwd": str(cwd or Path.cwd()),
+            "started_at": iso_ts(now),
+            "last_output_at": None,
+            "last_heartbeat_at": iso_ts(now),
+            "pid": None,
+            "ppid": os.getpid(),
+            "exit_code": None,
+            "status": "starting",
+            "bytes_out": 0,
+            "bytes_err": 0,
+            "lines_out": 0,
+            "lines_err": 0,
+            "log_rotations": 0,
+            "cpu_percent": 0.0,
+            "host": os.uname().sysname if hasattr(os, "uname") else "Windows",
+            "version": "term_watch/2.0",
+        }
+
+    # ---- output ----
+    def feed(self, tag: str, data: bytes, now: Optional[float] = None) -> None:
+        """Account for one chunk of ``tag`` output (``b""`` flushes the partial line at EOF).
+
+        Output arriving after :meth:`close` (a grandchild still holding the pipe) is dropped.
+        """
+        if self.closed:
+            return
+        now = self.clock() if now is None else now
+        buf = self._partial[tag] + data
+        if data:
+            parts = buf.split(b"\n")
+            rest = parts.pop()
+            if len(rest) > MAX_PARTIAL:
+                parts.append(rest)
+                rest = b""
+        else:
+            parts, rest = ([buf] if buf else []), b""
+            self.open_streams.discard(tag)
+        self._partial[tag] = rest
+        mirror = self._echo[tag]
+        if mirror is not None and data:
+            mirror.write(data)
+        if parts:
+            prefix = f"[{iso_ts(now)}] [{tag}] ".encode()
+            self.log.write(b"".join(prefix + line.rstrip(b"\r") + b"\n" for line in parts))
+        key = "out" if tag == "stdout" else "err"
+        self.state[f"bytes_{key}"] += len(data)
+        self.state[f"lines_{key}"] += len(parts)
+        if data:
+            stamp = iso_ts(now)
+            self.state["last_output_at"] = stamp
+            self.state["last_heartbeat_at"] = stamp
+            self._dirty = True
+
+    # ---- state ----
+    def heartbeat(self, now: float, cpu_percent: Optional[float] = None) -> None:
+        self.state["last_heartbeat_at"] = iso_ts(now)
+        if cpu_percent is not None:
+            self.state["cpu_percent"] = round(cpu_percent, 2)
+        self._dirty = True
+
+    def snapshot(self, now: Optional[float] = None, force: bool = False) -> bool:
+        """Write ``term_state.json`` if dirty and the debounce interval has passed."""
+        now = self.clock() if now is None else now
+        if not force and (not self._dirty or now - self._last_write < self.state_interval):
+            return False
+        self.state["log_rotations"] = self.log.rotations
+        self.log.flush()
+        for mirror in set(self._echo.values()):
+            if mirror is not None:
+                mirror.flush()
+        atomic_write(self.state_file, json.dumps(self.state, ensure_ascii=False, indent=2))
+        self._last_write = now
+        self._dirty = False
+        self.state_writes += 1
+        return True
+
+    def next_snapshot_at(self) -> Optional[float]:
+        return self._last_write + self.state_interval if self._dirty else None
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        for tag in ("stdout", "stderr"):
+            if self._partial[tag]:
+                self.feed(tag, b"")
+        self.snapshot(force=True)
+        self.log.close()
+        self.closed = True
+
+
+class _ThreadReader:
+    """Windows fallback: a blocking reader thread per pipe, one shared queue."""
+
+    def __init__(self) -> None:
+        self._q: "queue.Queue[Tuple[Any, bytes]]" = queue.Queue()
+        self._open: set = set()
+        self._dropped: set = set()
+
+    @property
+    def count(self) -> int:
+        return len(self._open)
+
+    def register(self, stream: BinaryIO, key: Any) -> None:
+        self._open.add(key)
+
+        def pump() -> None:
+            read = getattr(stream, "read1", stream.read)
+            try:
+                while True:
+                    chunk = read(READ_SIZE)
+                    self._q.put((key, chunk))
+                    if not chunk:
+                        return
+            finally:
+                stream.close()
+
+        threading.Thread(target=pump, daemon=True).start()
+
+    def unregister(self, key: Any) -> None:
+        """Stop delivering ``key``; its thread exits (and closes the pipe) once the writer does."""
+        if key in self._open:
+            self._open.discard(key)
+            self._dropped.add(key)
+
+    def read(self, timeout: float) -> List[Tuple[Any, bytes]]:
+        try:
+            items = [self._q.get(timeout=max(0.0, timeout))]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                items.append(self._q.get_nowait())
+            except queue.Empty:
+                break
+        delivered = []
+        for key, chunk in items:
+            if key in self._dropped:
+                if not chunk:
+                    self._dropped.discard(key)
+                continue
+            if not chunk:
+                self._open.discard(key)
+            delivered.append((key, chunk))
+        return delivered
+
+
+class _SelectorReader:
+    def __init__(self) -> None:
+        self._sel = selectors.DefaultSelector()
+        self._streams: Dict[Any, BinaryIO] = {}
+
+    @property
+    def count(self) -> int:
+        return len(self._streams)
+
+    def register(self, stream: BinaryIO, key: Any) -> None:
+        self._sel.register(stream, selectors.EVENT_READ, (key, stream))
+        self._streams[key] = stream
+
+    def unregister(self, key: Any) -> None:
+        """Stop selecting on ``key`` and close its pipe."""
+        stream = self._streams.pop(key, None)
+        if stream is not None:
+            self._sel.unregister(stream)
+            stream.close()
+
+    def read(self, timeout: float) -> List[Tuple[Any, bytes]]:
+        if not self.count:
+            time.sleep(max(0.0, timeout))
+            return []
+        items = []
+        for sk, _ in self._sel.select(max(0.0, timeout)):
+            key, stream = sk.data
+            chunk = os.read(stream.fileno(), READ_SIZE)
+            if not chunk:
+                self.unregister(key)
+            items.append((key, chunk))
+        return items
+
+
+class TermSupervisor:
+    """Run and watch N terminals from a single loop.
+
+    ``cpu_sampler(pid)`` (psutil in ``term_watch``) is called once per
+    ``heartbeat_secs`` per running terminal.
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        state_interval: float = 1.0,
+        heartbeat_secs: float = 1.0,
+        cpu_sampler: Optional[Callable[[int], float]] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.root = Path(root)
+        self.events = self.root / "events.ndjson"
+        self.state_interval = float(state_interval)
+        self.heartbeat_secs = max(0.05, float(heartbeat_secs))
+        self.cpu_sampler = cpu_sampler
+        self.clock = clock
+        self.channels: Dict[str, TermChannel] = {}
+        self._reader = _ThreadReader() if os.name == "nt" else _SelectorReader()
+        self._stop = threading.Event()
+
+    def add(self, agent_id: str, cmd: Union[str, Sequence[str]], cwd: Optional[str] = None,
+            echo: bool = False, **channel_kw: Any) -> TermChannel:
+        argv = shell_command(cmd) if isinstance(cmd, str) else list(cmd)
+        ch = TermChannel(
+            agent_id, self.root, cmd=cmd if isinstance(cmd, str) else " ".join(cmd), cwd=cwd,
+            state_interval=self.state_interval, echo=sys.stdout.buffer if echo else None,
+            echo_err=sys.stderr.buffer if echo else None, clock=self.clock, **channel_kw,
+        )
+        ch.snapshot(force=True)
+        proc = subprocess.Popen(argv, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0)
+        ch.proc = proc
+        ch.state["pid"] = proc.pid
+        ch.state["status"] = "running"
+        ch.snapshot(force=True)
+        self._reader.register(proc.stdout, (ch.agent_id, "stdout"))
+        self._reader.register(proc.stderr, (ch.agent_id, "stderr"))
+        self.channels[ch.agent_id] = ch
+        return ch
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _append_event(self, obj: Dict[str, Any]) -> None:
+        self.events.parent.mkdir(parents=True, exist_ok=True)
+        with self.events.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+
+    def _finish(self, ch: TermChannel, now: float, status: str = "exited") -> None:
+        # Pipes a grandchild still holds open after the grace period are dropped with the channel
+        for tag in ("stdout", "stderr"):
+            self._reader.unregister((ch.agent_id, tag))
+        proc = ch.proc
+        ch.state["exit_code"] = proc.returncode if proc else None
+        ch.state["status"] = status
+        ch.heartbeat(now)
+        ch.close()
+        self._append_event({
+            "ts": iso_ts(now),
+            "agent_id": ch.agent_id,
+            "kind": "terminal_exit",
+            "exit_code": ch.state["exit_code"],
+            "cmd": ch.state["cmd"],
+            "state_file": str(ch.state_file),
+        })
+
+    def _done(self, ch: TermChannel, now: float) -> bool:
+        """Exited and drained; grandchildren holding a pipe open get two heartbeats of grace."""
+        if ch.proc is None or ch.proc.poll() is None:
+            return False
+        if ch.exited_at is None:
+            ch.exited_at = now
+        return not ch.open_streams or now - ch.exited_at >= 2 * self.heartbeat_secs
+
+    def run(self) -> Dict[str, Optional[int]]:
+        """Pump until every terminal exits (or :meth:`stop`); returns exit codes."""
+        running = dict(self.channels)
+        next_beat = self.clock()
+        try:
+            while running and not self._stop.is_set():
+                now = self.clock()
+                if now >= next_beat:
+                    for ch in running.values():
+                        cpu = None
+                        if self.cpu_sampler and ch.proc is not None:
+                            try:
+                                cpu = self.cpu_sampler(ch.proc.pid)
+                            except Exception:
+                                cpu = 0.0
+                        ch.heartbeat(now, cpu)
+                    next_beat = now + self.heartbeat_secs
+                deadlines = [next_beat] + [t for ch in running.values() if (t := ch.next_snapshot_at()) is not None]
+                for (agent_id, tag), chunk in self._reader.read(min(deadlines) - now):
+                    self.channels[agent_id].feed(tag, chunk)
+                now = self.clock()
+                for agent_id, ch in list(running.items()):
+                    if self._done(ch, now):
+                        self._finish(ch, now)
+                        del running[agent_id]
+                    else:
+                        ch.snapshot(now)
+        except KeyboardInterrupt:
+            pass
+        now = self.clock()
+        for ch in running.values():
+            if ch.proc is not None and ch.proc.poll() is None:
+                try:
+                    ch.proc.terminate()
+                    ch.proc.wait(timeout=5)
+                except Exception:
+                    pass
+            self._finish(ch, now, status="terminated")
+        return {a: ch.state["exit_code"] for a, ch in self.channels.items()}
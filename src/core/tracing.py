@@ -0,0 +1,345 @@
+"""Low-overhead structured tracing across runner, listener, capture and FSM.
+
+One message crosses several processes (runner -> ACP send -> agent ->
+response capture -> inbox listener -> FSM -> verify) and each logs in its own
+way.  Spans give every hop a timed, correlated record:
+
+- ``get_tracer().span(name, task_id=..., **attrs)`` is a context manager; the
+  active span lives in a :mod:`contextvars` variable, so nested spans (and
+  threads started with ``contextvars.copy_context``) pick up their parent.
+- :func:`inject` writes ``{"trace": {trace_id, span_id, sampled, task_id}}``
+  into an envelope dict and :func:`extract` turns it back into a parent, so
+  the chain survives the inbox files between processes.
+- Sampling is decided once per trace; with a ``task_id`` the decision is a
+  hash of it, so every process traces the same tasks without coordinating.
+- Finished spans are buffered and appended to one NDJSON file per process
+  under ``ACP_TRACE_DIR`` (``runtime/traces``).  ``scripts/trace_view.py``
+  renders the spans of one task as a timeline.
+
+Tracing is off unless ``ACP_TRACE=1`` (or :func:`configure`); disabled, a span
+is a shared no-op object and costs one attribute check.
+"""
+from __future__ import annotations
+
+import atexit
+import contextvars
+import functools
+import json
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+TRACE_KEY = "trace"
+DEFAULT_TRACE_DIR = Path(os.environ.get("ACP_TRACE_DIR", "runtime/traces"))
+
+
+class SpanContext(NamedTuple):
+    trace_id: str
+    span_id: str
+    sampled: bool = True
+    task_id: Optional[str] = None
+
+
+_UNSAMPLED = SpanContext("", "", False)
+_current: contextvars.ContextVar[Optional[SpanContext]] = contextvars.ContextVar("acp_span", default=None)
+
+
+def _span_id() -> str:
+    return "%016x" % random.getrandbits(64)
+
+
+def _trace_id() -> str:
+    return "%032x" % random.getrandbits(128)
+
+
+def current_span() -> Optional[SpanContext]:
+    return _current.get()
+
+
+class _NoopSpan:
+    __slots__ = ()
+    context = None
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> bool:
+        return False
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _ContextSpan:
+    """Unsampled span: propagates its context so children skip cheaply, records nothing."""
+
+    __slots__ = ("context", "_token")
+
+    def __init__(self, context: SpanContext) -> None:
+        self.context = context
+
+    def __enter__(self) -> "_ContextSpan":
+        self._token = _current.set(self.context)
+        return self
+
+    def __exit__(self, *exc: Any) -> bool:
+        _current.reset(self._token)
+        return False
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+
+class Span(_ContextSpan):
+    __slots__ = ("tracer", "name", "parent_id", "attrs", "start", "_t0")
+
+    def __init__(self, tracer: "Tracer", name: str, context: SpanContext,
+                 parent_id: Optional[str], attrs: Dict[str, Any]) -> None:
+        self.context = context
+        self.tracer = tracer
+        self.name = name
+        self.parent_id = parent_id
+        self.attrs = attrs
+
+    def __enter__(self) -> "Span":
+        self._token = _current.set(self.context)
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> bool:
+        dur = time.perf_counter() - self._t0
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.attrs["error"] = f"{exc_type.__name__}: {exc}"
+        self.tracer.sink.write((self.context, self.parent_id, self.name, self.start, dur,  # type: ignore[union-attr]
+                                "error" if exc_type is not None else "ok", self.attrs))
+        return False
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+_dumps = json.JSONEncoder(ensure_ascii=False, default=str, separators=(",", ":")).encode
+_Record = Tuple[SpanContext, Optional[str], str, float, float, str, Dict[str, Any]]
+
+
+class NdjsonSink:
+    """Buffered append of span records to ``<directory>/<service>-<pid>.ndjson``.
+
+    The traced code only appends a tuple to a deque; a daemon thread encodes
+    and writes batches every ``flush_every_sec`` (sooner once ``batch`` spans
+    are waiting), so JSON and file I/O stay off the hot path.
+    """
+
+    def __init__(self, directory: Union[str, Path], service: str, batch: int = 256,
+                 flush_every_sec: float = 1.0) -> None:
+        self.service = service
+        self.path = Path(directory) / f"{service}-{os.getpid()}.ndjson"
+        self.batch = max(1, int(batch))
+        self.flush_every_sec = flush_every_sec
+        self._buf: Deque[_Record] = deque()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def write(self, record: _Record) -> None:
+        self._buf.append(record)
+        if self._thread is None:
+            self._start()
+        elif len(self._buf) >= self.batch:
+            self._wake.set()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-sink", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_every_sec)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            records = []
+            while self._buf:
+                records.append(self._buf.popleft())
+            if records:
+                self._append(records)
+
+    def _encode(self, record: _Record) -> str:
+        ctx, parent_id, name, start, dur, status, attrs = record
+        return _dumps({
+            "trace_id": ctx.trace_id, "span_id": ctx.span_id, "parent_id": parent_id, "name": name,
+            "service": self.service, "task_id": ctx.task_id, "start": start, "dur_ms": dur * 1000.0,
+            "status": status, "attrs": attrs,
+        })
+
+    def _append(self, records: List[_Record]) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write("\n".join(self._encode(r) for r in records) + "\n")
+        except OSError:
+            pass  # tracing must never break the traced code
+
+
+class Tracer:
+    def __init__(self, sink: Optional[NdjsonSink] = None, sample_rate: float = 0.1,
+                 service: str = "acp", enabled: bool = True) -> None:
+        self.sink = sink
+        self.sample_rate = max(0.0, min(1.0, float(sample_rate)))
+        self.service = service
+        self.enabled = enabled and sink is not None
+
+    def _sampled(self, task_id: Optional[str]) -> bool:
+        if self.sample_rate >= 1.0:
+            return True
+        if task_id:
+            return zlib.crc32(str(task_id).encode("utf-8")) % 10000 < self.sample_rate * 10000
+        return random.random() < self.sample_rate
+
+    def span(self, name: str, task_id: Optional[str] = None, parent: Optional[SpanContext] = None,
+             **attrs: Any) -> Union[Span, _ContextSpan, _NoopSpan]:
+        """Start a child of ``parent`` (default: the active span) or a new trace."""
+        if not self.enabled:
+            return _NOOP
+        parent = parent or _current.get()
+        if parent is None:
+            task_id = str(task_id) if task_id else None
+            if not self._sampled(task_id):
+                # Unsampled trace: no ids, no record; children inherit the decision
+                return _ContextSpan(_UNSAMPLED)
+            trace_id = _trace_id()
+            return Span(self, name, SpanContext(trace_id, trace_id[:16], True, task_id), None, attrs)
+        if not parent.sampled:
+            return _ContextSpan(parent)
+        ctx = SpanContext(parent.trace_id, _span_id(), True, str(task_id) if task_id else parent.task_id)
+        return Span(self, name, ctx, parent.span_id, attrs)
+
+    def flush(self) -> None:
+        if self.sink is not None:
+            self.sink.flush()
+
+
+def inject(envelope: Dict[str, Any], context: Optional[SpanContext] = None) -> Dict[str, Any]:
+    """Stamp the active (or given) span into ``envelope`` so the receiver can continue the trace."""
+    ctx = context or _current.get()
+    if ctx is not None and ctx.sampled:  # receivers re-derive "unsampled" from the task_id hash
+        envelope[TRACE_KEY] = {"trace_id": ctx.trace_id, "span_id": ctx.span_id,
+                               "sampled": ctx.sampled, "task_id": ctx.task_id}
+    return envelope
+
+
+def extract(envelope: Optional[Dict[str, Any]]) -> Optional[SpanContext]:
+    data = envelope.get(TRACE_KEY) if isinstance(envelope, dict) else None
+    if not isinstance(data, dict) or not data.get("trace_id") or not data.get("span_id"):
+        return None
+    return SpanContext(str(data["trace_id"]), str(data["span_id"]), bool(data.get("sampled", True)),
+                       data.get("task_id"))
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def configure(enabled: bool = True, sample_rate: float = 0.1, directory: Union[str, Path, None] = None,
+              service: Optional[str] = None) -> Tracer:
+    """Replace the process tracer (scripts call this from their flags; tests use a tmp dir)."""
+    global _tracer
+    service = service or os.environ.get("ACP_TRACE_SERVICE") or Path(sys.argv[0] or "acp").stem or "acp"
+    sink = NdjsonSink(directory or DEFAULT_TRACE_DIR, service) if enabled else None
+    with _tracer_lock:
+        if _tracer is not None:
+            _tracer.flush()
+        _tracer = Tracer(sink, sample_rate, service, enabled)
+    return _tracer
+
+
+def get_tracer() -> Tracer:
+    """Process tracer configured from ``ACP_TRACE`` / ``ACP_TRACE_SAMPLE`` / ``ACP_TRACE_DIR``."""
+    if _tracer is None:
+        configure(
+            enabled=os.environ.get("ACP_TRACE", "0") == "1",
+            sample_rate=float(os.environ.get("ACP_TRACE_SAMPLE", "0.1")),
+        )
+    return _tracer  # type: ignore[return-value]
+
+
+@atexit.register
+def _flush_at_exit() -> None:
+    if _tracer is not None:
+        _tracer.flush()
+
+
+def traced(name: Optional[str] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator form of :meth:`Tracer.span`."""
+    def deco(fn: Callable[..., Any]) -> Callable[..., Any]:
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with get_tracer().span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+# ---- reading / rendering ----
+def read_spans(directory: Union[str, Path] = DEFAULT_TRACE_DIR) -> List[Dict[str, Any]]:
+    spans = []
+    for path in sorted(Path(directory).glob("*.ndjson")):
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    spans.append(json.loads(line))
+                except ValueError:
+                    continue  # torn line from a crashed writer
+    return spans
+
+
+def spans_for_task(spans: Iterable[Dict[str, Any]], task_id: str) -> List[Dict[str, Any]]:
+    """Spans tagged with ``task_id`` plus the untagged spans of the same traces."""
+    spans = list(spans)
+    traces = {s["trace_id"] for s in spans if s.get("task_id") == task_id}
+    return sorted((s for s in spans if s.get("task_id") == task_id or s["trace_id"] in traces),
+                  key=lambda s: s["start"])
+
+
+def render_timeline(spans: List[Dict[str, Any]], width: int = 50) -> str:
+    """Flamegraph-style text timeline: one row per span, indented by depth, bar on a shared axis."""
+    if not spans:
+        return "no spans"
+    by_id = {s["span_id"]: s for s in spans}
+
+    def depth(s: Dict[str, Any]) -> int:
+        d, seen = 0, set()
+        while s.get("parent_id") in by_id and s["span_id"] not in seen:
+            seen.add(s["span_id"])
+            s = by_id[s["parent_id"]]
+            d += 1
+        return d
+
+    t0 = min(s["start"] for s in spans)
+    total = max(max(s["start"] + s["dur_ms"] / 1000.0 for s in spans) - t0, 1e-6)
+    rows = [f"{'offset':>10} {'duration':>10}  {'service':<14} span"]
+    for s in spans:
+        a = int((s["start"] - t0) / total * width)
+        b = max(a + 1, int((s["start"] - t0 + s["dur_ms"] / 1000.0) / total * width))
+        bar = " " * a + ("#" if s.get("status") == "ok" else "!") * (min(b, width) - a)
+        label = "  " * depth(s) + s["name"]
+        rows.append(f"{(s['start'] - t0) * 1000:>8.1f}ms {s['dur_ms']:>8.1f}ms  {s.get('service', ''):<14} "
+                    f"{label:<32} |{bar:<{width}}|")
+    return "\n".join(rows)
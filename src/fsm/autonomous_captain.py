@@ -13,6 +13,7 @@ from dataclasses import dataclass
 
 from .enhanced_fsm import EnhancedFSM
 from src.services.agent_cell_phone import AgentCellPhone, MsgTag
+from src.core.mitigation_executor import MitigationStep, get_executor
 
 @dataclass
 class CaptainTask:
@@ -36,6 +37,8 @@ class AutonomousCaptain:
     def __init__(self, repos_root: str = "D:/repos/Dadudekc"):
         self.fsm = EnhancedFSM(repos_root)
         self.acp = AgentCellPhone(agent_id="Agent-5", layout_mode="5-agent", test=False)
+        # Rescues share cooldowns with the Agent-5 monitor and the overnight runner
+        self.mitigations = get_executor()
         self.tasks: List[CaptainTask] = []
         self.state_file = Path("runtime/fsm/captain_state.json")
         self.state_file.parent.mkdir(parents=True, exist_ok=True)
@@ -218,8 +221,13 @@ class AutonomousCaptain:
                 # Generate personalized rescue message
                 message = self.fsm.generate_personalized_message(agent, "RESCUE")
                 
-                # Send with new chat (starter coordinates)
-                self._send_message_smart(agent, message, "RESCUE", new_chat=True)
+                # Send with new chat (starter coordinates), unless another rescuer got there first
+                decision = self.mitigations.request(agent, "rescue", [MitigationStep(
+                    "new_chat", lambda a=agent, m=message: self._send_message_smart(a, m, "RESCUE", new_chat=True)
+                )], source="captain")
+                if not decision.accepted:
+                    print(f"⏭️ Rescue for {agent} {decision.status}")
+                    continue
                 
                 # Update task status
                 self._update_task_status("task-002", "in_progress")
@@ -17,6 +17,9 @@ from typing import Dict, Any, List, Optional, Callable
 import queue
 
 from ..core.inbox_listener import InboxListener
+from ..core.heartbeat_table import HeartbeatTable
+from ..core.mitigation_executor import MitigationDecision, MitigationExecutor, MitigationStep, get_executor
+from ..core.tracing import get_tracer
 
 try:
     import pyautogui  # mechanical control
@@ -98,13 +101,16 @@ class AgentCellPhone:
     """Deterministic messenger for Cursor agents with inter-agent communication and PyAutoGUI queue integration."""
 
     # public API ─────────────────────────
-    def __init__(self, agent_id: str = "Agent-1", layout_mode: str = "2-agent", test: bool = False) -> None:
+    def __init__(self, agent_id: str = "Agent-1", layout_mode: str = "2-agent", test: bool = False,
+                 coords_file: Optional[Path] = None) -> None:
         self._agent_id = self._fmt_id(agent_id)
         self._layout_mode = layout_mode
-        self._all_coords = self._load_json(COORD_FILE, "coordinates")
+        self._all_coords = self._load_json(Path(coords_file) if coords_file else COORD_FILE, "coordinates")
         self._coords = self._all_coords.get(layout_mode, {})
         self._modes  = self._load_json(MODE_FILE,  "mode templates")["modes"]
         self._cursor = _TestCursor() if test or pyautogui is None else _Cursor()
+        # UI settle delays between keystrokes; headless simulations switch them off
+        self._settle_delays = os.environ.get("ACP_SETTLE_DELAYS", "1").strip() not in ("0", "", "false", "False")
         # Default send behavior: enable Ctrl+T new-chat flow when env var is set
         self._default_new_chat = os.environ.get("ACP_DEFAULT_NEW_CHAT", "0").strip() not in ("0", "", "false", "False")
         # Throttle new-chat openings (Ctrl+T) per agent to reduce system load
@@ -178,6 +184,9 @@ class AgentCellPhone:
             self._heartbeat_interval = 60.0
         self._hb_stop = threading.Event()
         self._hb_thread: Optional[threading.Thread] = None
+        self._hb_table: Optional[HeartbeatTable] = None
+        # Rescues go through the shared executor (cooldowns, dedupe, one UI sequence at a time)
+        self.mitigation_executor: Optional[MitigationExecutor] = None
         if self._heartbeat_interval > 0:
             self._hb_thread = threading.Thread(target=self._heartbeat_loop, daemon=True)
             self._hb_thread.start()
@@ -214,17 +223,19 @@ class AgentCellPhone:
         msg = AgentMessage(self._agent_id, agent, message, tag)
         self._conversation_history.append(msg)
         
-        # If queue is enabled and available, use it
-        if should_use_queue and self._pyautogui_queue:
-            log.info("→ %s QUEUED MESSAGE: %s", agent, message[:80])
-            if self._pyautogui_queue.queue_message(agent, message, self._queue_priority):
-                log.info("→ %s Message queued successfully", agent)
-                return
-            else:
-                log.warning("→ %s Queue failed, falling back to direct send", agent)
-        
-        # Fallback to direct sending (original behavior)
-        self._send_direct(agent, message, tag, new_chat, nudge_stalled)
+        with get_tracer().span("acp.send", agent=agent, tag=tag.name, chars=len(message), new_chat=new_chat) as span:
+            # If queue is enabled and available, use it
+            if should_use_queue and self._pyautogui_queue:
+                log.info("→ %s QUEUED MESSAGE: %s", agent, message[:80])
+                if self._pyautogui_queue.queue_message(agent, message, self._queue_priority):
+                    log.info("→ %s Message queued successfully", agent)
+                    span.set(queued=True)
+                    return
+                else:
+                    log.warning("→ %s Queue failed, falling back to direct send", agent)
+            
+            # Fallback to direct sending (original behavior)
+            self._send_direct(agent, message, tag, new_chat, nudge_stalled)
 
     def _send_direct(self, agent: str, message: str, tag: MsgTag = MsgTag.NORMAL, new_chat: bool = False, nudge_stalled: bool = False) -> None:
         """Direct send implementation (original behavior)."""
@@ -239,9 +250,9 @@ class AgentCellPhone:
             # Step 1: Try subtle nudge with Shift+Backspace
             if input_loc:
                 self._cursor.move_click(input_loc["x"], input_loc["y"])
-                time.sleep(0.3)
+                self._pause(0.3)
                 self._cursor.hotkey("shift", "backspace")
-                time.sleep(0.2)
+                self._pause(0.2)
                 log.info("→ %s NUDGE (Shift+Backspace) to wake up stalled terminal", agent)
 
         # Respect default new-chat if requested via environment, but allow caller override to keep most sends inline
@@ -276,9 +287,9 @@ class AgentCellPhone:
             target_loc = starter_loc or input_loc
             if target_loc:
                 self._cursor.move_click(target_loc["x"], target_loc["y"])
-                time.sleep(0.8)
+                self._pause(0.8)
                 self._cursor.hotkey("ctrl", "t")
-                time.sleep(0.6)
+                self._pause(0.6)
                 # Increment per-agent new-chat count
                 self._new_chat_count[agent] = self._new_chat_count.get(agent, 0) + 1
         
@@ -302,7 +313,7 @@ class AgentCellPhone:
         self._type_with_shift_enter(composed_text)
         
         # Final delay before sending to ensure all input is buffered
-        time.sleep(0.3)
+        self._pause(0.3)
         
         # Now send the complete message
         self._cursor.enter()
@@ -354,6 +365,14 @@ class AgentCellPhone:
         """Get the conversation history."""
         return self._conversation_history.copy()
 
+    def last_message_to(self, agent: str) -> Optional[AgentMessage]:
+        """Most recent message this instance sent to ``agent``."""
+        agent = self._fmt_id(agent)
+        for msg in reversed(self._conversation_history):
+            if msg.to_agent == agent:
+                return msg
+        return None
+
     def get_available_agents(self) -> List[str]:
         """Get list of available agents in current layout mode."""
         return list(self._coords.keys())
@@ -467,6 +486,9 @@ class AgentCellPhone:
         if self._hb_thread and self._hb_thread.is_alive():
             self._hb_stop.set()
             self._hb_thread.join(timeout=1)
+        if self._hb_table is not None:
+            self._hb_table.close()
+            self._hb_table = None
 
     def __del__(self):
         try:
@@ -481,19 +503,11 @@ class AgentCellPhone:
             self._hb_stop.wait(self._heartbeat_interval)
 
     def _emit_heartbeat(self) -> None:
-        """Write heartbeat envelope to inbox."""
+        """Publish a beat into this agent's slot of the shared heartbeat table."""
         try:
-            inbox = REPO_ROOT / "runtime" / "agent_comms" / "inbox"
-            inbox.mkdir(parents=True, exist_ok=True)
-            envelope = {
-                "type": "heartbeat",
-                "agent": self._agent_id,
-                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
-                "ts": int(time.time()),
-                "payload": {"tag": "[HEARTBEAT]"}
-            }
-            fp = inbox / f"heartbeat_{int(time.time()*1000)}_{self._agent_id}.json"
-            fp.write_text(json.dumps(envelope, ensure_ascii=False, indent=2), encoding="utf-8")
+            if self._hb_table is None:
+                self._hb_table = HeartbeatTable()
+            self._hb_table.beat(self._agent_id)
         except Exception as e:
             log.debug("heartbeat emit failed: %s", e)
 
@@ -603,6 +617,10 @@ class AgentCellPhone:
             log.error("Cannot load %s file %s: %s", label, path, e)
             sys.exit(1)
 
+    def _pause(self, seconds: float) -> None:
+        if self._settle_delays:
+            time.sleep(seconds)
+
     @staticmethod
     def _fmt_id(agent: str) -> str:
         return agent if agent.startswith("Agent-") else f"Agent-{agent}"
@@ -657,7 +675,7 @@ class AgentCellPhone:
             if line:
                 # Type the line content
                 self._cursor.type(line)
-                time.sleep(0.05)  # Small delay between characters for stability
+                self._pause(0.05)  # Small delay between characters for stability
             
             # For multi-line messages, use proper line breaks that don't send
             if idx < len(lines) - 1:
@@ -669,12 +687,12 @@ class AgentCellPhone:
                 except:
                     # Fallback to regular Enter with longer delay
                     self._cursor.hotkey("enter")
-                    time.sleep(0.1)  # Longer delay to ensure input is buffered
+                    self._pause(0.1)  # Longer delay to ensure input is buffered
                 
-                time.sleep(0.1)  # Additional delay for UI stability
+                self._pause(0.1)  # Additional delay for UI stability
         
         # Final delay to ensure all input is properly buffered
-        time.sleep(0.2)
+        self._pause(0.2)
 
     def _compose_onboarding_message(self, agent: str) -> str:
         """Create a single-shot onboarding + FSM primer block for a newly opened chat.
@@ -822,43 +840,43 @@ class AgentCellPhone:
         
         log.info("→ %s NUDGE completed (%s)", agent, nudge_type)
 
-    def progressive_escalation(self, agent: str, message: str, tag: MsgTag = MsgTag.RESCUE) -> None:
-        """Progressive escalation strategy for stalled agents.
-        
-        This method implements a three-tier approach:
+    def escalation_steps(self, agent: str, message: str, tag: MsgTag = MsgTag.RESCUE) -> List[MitigationStep]:
+        """The three-tier escalation as timed steps for the mitigation executor.
+
         1. Subtle nudge (Shift+Backspace)
-        2. Rescue message in existing chat
-        3. New chat if all else fails
+        2. Rescue message in existing chat, 1s later
+        3. New chat, 2s after that
         """
         agent = self._fmt_id(agent)
-        if agent not in self._coords:
-            log.error("Agent %s not found in %s mode", agent, self._layout_mode)
-            return
-        
-        log.info("→ %s PROGRESSIVE ESCALATION starting", agent)
-        
-        # Step 1: Try subtle nudge
-        try:
-            self.nudge_agent(agent, "subtle")
-            time.sleep(1.0)  # Wait for potential response
-        except Exception as e:
-            log.warning("Subtle nudge failed for %s: %s", agent, e)
-        
-        # Step 2: Send rescue message in existing chat
-        try:
-            self.send(agent, message, tag, new_chat=False, nudge_stalled=False)
-            time.sleep(2.0)  # Wait for potential response
-        except Exception as e:
-            log.warning("Rescue message failed for %s: %s", agent, e)
-        
-        # Step 3: Escalate to new chat if needed
-        try:
+
+        def new_chat() -> None:
             log.info("→ %s Escalating to new chat", agent)
             self.send(agent, message, tag, new_chat=True, nudge_stalled=False)
-        except Exception as e:
-            log.error("New chat escalation failed for %s: %s", agent, e)
+
+        return [
+            MitigationStep("nudge", lambda: self.nudge_agent(agent, "subtle")),
+            MitigationStep("message", lambda: self.send(agent, message, tag, new_chat=False, nudge_stalled=False), 1.0),
+            MitigationStep("new_chat", new_chat, 2.0),
+        ]
+
+    def progressive_escalation(self, agent: str, message: str, tag: MsgTag = MsgTag.RESCUE,
+                               executor: Optional[MitigationExecutor] = None, kind: str = "rescue",
+                               source: str = "acp") -> Optional[MitigationDecision]:
+        """Progressive escalation strategy for stalled agents.
         
-        log.info("→ %s PROGRESSIVE ESCALATION completed", agent)
+        Submits :meth:`escalation_steps` to the mitigation executor, which runs
+        the nudge immediately and the later steps on timers instead of
+        blocking the caller.  Returns the executor's decision (``merged`` or
+        ``cooldown`` when another component already rescued this agent).
+        """
+        agent = self._fmt_id(agent)
+        if agent not in self._coords:
+            log.error("Agent %s not found in %s mode", agent, self._layout_mode)
+            return None
+        executor = executor or self.mitigation_executor or get_executor()
+        decision = executor.request(agent, kind, self.escalation_steps(agent, message, tag), source=source)
+        log.info("→ %s PROGRESSIVE ESCALATION %s", agent, decision.status)
+        return decision
 
 # ──────────────────────────── cursor abstraction
 class _Cursor:
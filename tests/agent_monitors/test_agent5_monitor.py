@@ -199,6 +199,17 @@ class TestAgent5Monitor:
         monitor._tick()
         assert len(monitor.acp.sent) == 1
     
+    def test_heartbeat_table_follows_writers_default(self):
+        """Without an explicit table the monitor reads the one heartbeat writers use"""
+        table = Path(self.temp_dir) / "elsewhere" / "heartbeats.bin"
+        os.environ["ACP_HEARTBEAT_TABLE"] = str(table)
+        try:
+            cfg = MonitorConfig(agents=["Agent-1"], inbox_root=str(self.inbox_dir))
+            monitor = Agent5Monitor(cfg, test=True)
+            assert monitor.watcher.heartbeat_table.path == table
+        finally:
+            del os.environ["ACP_HEARTBEAT_TABLE"]
+
     def test_state_restoration_on_restart(self):
         """Test that monitor state is restored after restart"""
         cfg = MonitorConfig(
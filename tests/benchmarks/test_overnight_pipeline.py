@@ -0,0 +1,54 @@
+"""End-to-end load benchmark for the overnight pipeline on simulated time.
+
+Scale with ``ACP_BENCH_AGENTS`` / ``ACP_BENCH_HOURS``; ``-s`` shows the report.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from overnight_runner.simulation import FsOpCounter, SimConfig, SimProfile, run_simulation
+from overnight_runner.scheduler import PacingConfig
+
+
+BENCH_AGENTS = int(os.environ.get("ACP_BENCH_AGENTS", "4"))
+BENCH_HOURS = float(os.environ.get("ACP_BENCH_HOURS", "2"))
+
+
+def test_pipeline_throughput_benchmark(tmp_path: Path) -> None:
+    report = run_simulation(SimConfig(agents=BENCH_AGENTS, hours=BENCH_HOURS), tmp_path)
+    print("\n[bench] " + report.summary())
+
+    assert report.sim_seconds == pytest.approx(BENCH_HOURS * 3600)
+    assert report.speedup > 10  # far faster than real time
+    assert report.sends > 0 and report.cycles_completed > 0
+    assert report.counters["fsm_updates"] > 0
+    assert report.cycle_latency_p50 <= report.cycle_latency_p99
+    assert report.fs_ops > 0 and report.fs_ops_by_kind.get("open", 0) > 0
+    assert set(report.queue_depth) == {"scheduler", "capture_inbox", "listener_inbox", "in_flight"}
+
+
+def test_failure_profile_leaves_prompts_unanswered(tmp_path: Path) -> None:
+    config = SimConfig(
+        agents=2,
+        hours=1,
+        pacing=PacingConfig(interval_sec=300, per_agent_cooldown_sec=60, active_grace_sec=0, jitter_sec=0),
+        profile=SimProfile(reply_latency_sec=30, p_no_reply=1.0, p_stall=0.0),
+    )
+    report = run_simulation(config, tmp_path)
+    assert report.sends >= 2 * 11
+    assert report.counters.get("replies", 0) == 0 and report.cycles_completed == 0
+    assert report.counters["no_reply"] == report.counters["prompts"] == report.sends
+
+
+def test_fs_counter_ignores_other_threads(tmp_path: Path) -> None:
+    counter = FsOpCounter()
+    with counter.active():
+        os.stat(tmp_path)
+        worker = threading.Thread(target=lambda: [os.stat(tmp_path) for _ in range(50)])
+        worker.start()
+        worker.join()
+    assert counter.counts == {"stat": 1}
@@ -0,0 +1,82 @@
+"""Supervisor overhead against a 100 MB/min output generator.
+
+``ACP_TERM_BENCH_SEC`` sets how long the generator runs; ``-s`` shows the
+report.  The per-line baseline replays the old ``wrap`` pump (a JSON state
+rewrite and a flushed print per line) on a sample and extrapolates.
+"""
+from __future__ import annotations
+
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from src.core.term_stream import TermSupervisor
+
+
+BENCH_SEC = float(os.environ.get("ACP_TERM_BENCH_SEC", "3"))
+RATE = 100 * 1024 * 1024 / 60  # bytes per second
+LINE = b"x" * 99 + b"\n"
+
+GENERATOR = """
+import sys, time
+line = {line!r}
+per_tick = max(1, int({rate} * 0.01 / len(line)))
+out = sys.stdout.buffer
+end = time.monotonic() + {sec}
+while time.monotonic() < end:
+    t0 = time.monotonic()
+    out.write(line * per_tick)
+    out.flush()
+    time.sleep(max(0.0, 0.01 - (time.monotonic() - t0)))
+"""
+
+
+def _legacy_per_line_cost(tmp_path: Path, lines: int = 2000) -> float:
+    """Seconds per line for the old pump: print+flush, log write, full state rewrite."""
+    state_file = tmp_path / "legacy" / "term_state.json"
+    state_file.parent.mkdir(parents=True)
+    state = {"bytes_out": 0, "last_output_at": None}
+    sink = io.StringIO()
+    line = LINE.decode().rstrip("\n")
+    with (tmp_path / "legacy" / "term.log").open("a", encoding="utf-8") as lf:
+        t0 = time.perf_counter()
+        for _ in range(lines):
+            ts = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+            print(line, file=sink, flush=True)
+            lf.write(f"[{ts}] [stdout] {line}\n")
+            state["bytes_out"] += len(line) + 1
+            state["last_output_at"] = ts
+            tmp = state_file.with_suffix(".json.tmp")
+            tmp.write_text(json.dumps(state, indent=2))
+            tmp.replace(state_file)
+        return (time.perf_counter() - t0) / lines
+
+
+def test_supervisor_overhead_at_100mb_per_minute(tmp_path: Path) -> None:
+    sup = TermSupervisor(tmp_path, state_interval=1.0, heartbeat_secs=1.0)
+    code = GENERATOR.format(line=LINE, rate=RATE, sec=BENCH_SEC)
+    sup.add("bench", [sys.executable, "-c", code], log_max_bytes=16 * 1024 * 1024)
+
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    assert sup.run() == {"bench": 0}
+    wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+
+    ch = sup.channels["bench"]
+    produced = ch.state["bytes_out"]
+    lines = ch.state["lines_out"]
+    legacy = _legacy_per_line_cost(tmp_path) * lines
+    mb = produced / (1024 * 1024)
+    print(
+        f"\n[bench] {mb:.1f} MB / {lines} lines in {wall:.2f}s "
+        f"({mb / wall * 60:.0f} MB/min) supervisor_cpu={cpu:.3f}s ({cpu / wall:.1%} of one core) "
+        f"state_writes={ch.state_writes} rotations={ch.log.rotations} "
+        f"legacy_per_line_est={legacy:.2f}s"
+    )
+
+    assert lines == produced // len(LINE) and produced > 0
+    assert ch.state_writes <= wall / sup.state_interval + 4  # debounced, not per line
+    assert cpu < legacy
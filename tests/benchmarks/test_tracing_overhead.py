@@ -0,0 +1,64 @@
+"""Tracing overhead on the cheapest traced hop (the inbox listener handler).
+
+Span costs are timed in isolation (best of several loops) and compared with
+the handler's own cost, since the difference between two handler runs is
+below filesystem noise.  The target is under 2% at the default sample rate;
+the asserts leave headroom for noisy CI hosts.  ``-s`` shows the report.
+"""
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+from overnight_runner.listener import create_message_handler
+from src.core import tracing
+
+
+def _best_per_call(fn, n: int, repeats: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        for i in range(n):
+            fn(i)
+        best = min(best, (time.perf_counter() - t0) / n)
+    return best
+
+
+def _loop_cost() -> float:
+    def one(i: int) -> None:
+        f"task-{i}"
+    return _best_per_call(one, 5000, repeats=7)
+
+
+def _span_cost(tmp_path: Path, enabled: bool, sample_rate: float) -> float:
+    """Per-span cost net of the benchmark loop itself."""
+    tracer = tracing.configure(enabled=enabled, sample_rate=sample_rate, directory=tmp_path / "spans", service="bench")
+
+    def one(i: int) -> None:
+        with tracer.span("listener.handle", task_id=f"task-{i}", agent="Agent-1", type="note"):
+            pass
+    try:
+        return max(0.0, _best_per_call(one, 5000, repeats=7) - _loop_cost())
+    finally:
+        tracer.flush()
+
+
+def test_tracing_overhead_on_listener_hop(tmp_path: Path) -> None:
+    handler = create_message_handler("Agent-1", tmp_path / "state.json", tmp_path / "signals", verbose=False)
+    try:
+        off = _span_cost(tmp_path, False, 1.0)
+        unsampled = _span_cost(tmp_path, True, 0.0)
+        sampled = _span_cost(tmp_path, True, 1.0)
+        tracing.configure(enabled=False)
+        hop = _best_per_call(lambda i: handler({"type": "note", "task_id": f"task-{i}", "summary": "x"}), 500)
+    finally:
+        tracing.configure(enabled=False)
+
+    default_rate = tracing.Tracer().sample_rate
+    enabled = default_rate * sampled + (1 - default_rate) * unsampled
+    print(f"\n[bench] hop={hop * 1e6:.1f}us span off={off * 1e6:.2f}us unsampled={unsampled * 1e6:.2f}us "
+          f"sampled={sampled * 1e6:.2f}us -> overhead off={off / hop:.2%} "
+          f"enabled@{default_rate:.0%}={enabled / hop:.2%} all-sampled={sampled / hop:.2%}")
+    assert off / hop < 0.01
+    assert enabled / hop < 0.03
+    assert len(tracing.read_spans(tmp_path / "spans")) == 35000
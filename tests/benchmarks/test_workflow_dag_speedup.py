@@ -0,0 +1,52 @@
+"""Wall-clock speedup of the DAG scheduler on the shipped workflow graphs.
+
+Every agent answers after a fixed latency; the same graph runs once with
+``max_concurrency=1`` (the old one-step-at-a-time loop) and once unbounded
+with one outstanding prompt per agent.  ``-s`` shows the report.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from advanced_workflows.ai_code_review import AICodeReviewWorkflow
+from advanced_workflows.multi_agent_dev import MultiAgentDevWorkflow
+from advanced_workflows.workflow_engine import AIResponse, WorkflowState
+
+LATENCY = 0.02
+AGENTS = ["Agent-1", "Agent-2", "Agent-3", "Agent-4"]
+
+
+def _run(engine, max_concurrency) -> float:
+    engine.max_concurrency = max_concurrency
+    engine.completed_steps.clear()
+    engine.failed_steps.clear()
+
+    async def reply(step):
+        await asyncio.sleep(LATENCY)
+        return AIResponse(agent=step.agent_target, text="ok", timestamp=time.time(), message_id=step.id)
+
+    engine._wait_for_ai_response = reply
+    engine.state = WorkflowState.RUNNING
+    t0 = time.perf_counter()
+    asyncio.run(engine._execute_workflow())
+    elapsed = time.perf_counter() - t0
+    assert engine.state == WorkflowState.COMPLETED
+    return elapsed
+
+
+@pytest.mark.parametrize("name", ["multi_agent_dev", "ai_code_review"])
+def test_dag_speedup(name, tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    if name == "multi_agent_dev":
+        engine = MultiAgentDevWorkflow("build API", AGENTS).workflow_engine
+    else:
+        engine = AICodeReviewWorkflow(str(tmp_path)).workflow_engine
+    sequential = _run(engine, 1)
+    concurrent = _run(engine, None)
+    steps = len(engine.completed_steps)
+    print(f"\n[bench] {name}: {steps} steps sequential={sequential:.3f}s "
+          f"concurrent={concurrent:.3f}s speedup={sequential / concurrent:.2f}x")
+    assert sequential / concurrent > 1.5
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+from src.core.activity_timeline import ActivityTimeline, ActivityWatcher, StallThresholds
+
+
+class FakeClock:
+    def __init__(self, t: float = 10_000.0) -> None:
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
+
+def test_last_activity_rate_and_stall_classification() -> None:
+    clock = FakeClock()
+    tl = ActivityTimeline(capacity=4, bucket_sec=60, n_buckets=10, clock=clock)
+    for i in range(6):
+        tl.record("Agent-1", clock.t - 30 * i, "reply")
+    tl.record("Agent-1", clock.t - 5000, "commit")  # older than the bucket horizon
+
+    assert tl.last_activity("Agent-1") == clock.t
+    assert tl.last_activity("Agent-1", ("commit",)) == clock.t - 5000
+    assert len(tl.recent("Agent-1", 10)) == 4  # ring buffer keeps the newest events only
+    assert tl.activity_rate("Agent-1", 600) == 6 / 600
+    assert tl.activity_rate("Agent-1", 60) == 2 / 60
+
+    thresholds = StallThresholds(active_sec=60, warn_sec=300, stall_sec=600)
+    assert tl.classify("Agent-1", thresholds) == "active"
+    clock.t += 400
+    assert tl.classify("Agent-1", thresholds) == "warning"
+    assert not tl.is_stalled("Agent-1", thresholds)
+    clock.t += 200
+    assert tl.is_stalled("Agent-1", thresholds) and tl.is_stalled("Agent-1", 600.0)
+
+    # Unseen agents age from timeline start unless told otherwise
+    assert not tl.is_stalled("Agent-2", 1000.0)
+    assert tl.is_stalled("Agent-2", 1000.0, unseen_is_stalled=True)
+
+
+def test_watcher_ingests_heartbeats_files_and_terminal(tmp_path: Path) -> None:
+    ws = tmp_path / "agent_workspaces"
+    inbox = tmp_path / "inbox"
+    term = tmp_path / "comms"
+    (ws / "Agent-1").mkdir(parents=True)
+    inbox.mkdir()
+    (term / "agent-2").mkdir(parents=True)
+
+    (inbox / "heartbeat_1_Agent-1.json").write_text(json.dumps({"agent": "Agent-1", "ts": 1000}), encoding="utf-8")
+    reply = ws / "Agent-1" / "response.txt"
+    reply.write_text("done", encoding="utf-8")
+    os.utime(reply, (2000, 2000))
+    (term / "agent-2" / "term_state.json").write_text(
+        json.dumps({"agent_id": "2", "last_output_at": "1970-01-01T00:50:00.000000Z"}), encoding="utf-8"
+    )
+
+    tl = ActivityTimeline()
+    watcher = ActivityWatcher(tl, workspace_root=ws, inbox_root=inbox, term_root=term)
+    assert watcher.poll(["Agent-1", "Agent-2"]) == 3
+    assert not list(inbox.iterdir())  # heartbeats are consumed
+    assert tl.last_activity("Agent-1") == 2000
+    assert tl.last_activity("Agent-1", ("heartbeat",)) == 1000
+    assert tl.last_activity("Agent-2", ("terminal",)) == 3000
+
+    # Unchanged files are not re-recorded
+    assert watcher.poll(["Agent-1", "Agent-2"]) == 0
+    os.utime(reply, (2500, 2500))
+    assert watcher.poll(["Agent-1"]) == 1 and tl.last_activity("Agent-1", ("reply",)) == 2500
+
+
+def test_heartbeat_table_slots_feed_the_watcher(tmp_path: Path) -> None:
+    from src.core.heartbeat_table import HeartbeatTable
+
+    path = tmp_path / "heartbeats.bin"
+    reader = HeartbeatTable(path, create=False)
+    assert reader.read_all() == {}  # no writer yet
+
+    writers = [HeartbeatTable(path, slots=8) for _ in range(3)]
+    for i, w in enumerate(writers):
+        w.beat(f"Agent-{i + 1}", ts=1000.0 + i)
+    writers[0].beat("Agent-1", ts=1500.0)
+    size = path.stat().st_size
+
+    beats = reader.read_all()
+    assert {a: b.ts for a, b in beats.items()} == {"Agent-1": 1500.0, "Agent-2": 1001.0, "Agent-3": 1002.0}
+    assert beats["Agent-1"].seq == 4 and beats["Agent-1"].pid == os.getpid()
+    assert path.stat().st_size == size  # beats overwrite slots in place
+
+    tl = ActivityTimeline()
+    watcher = ActivityWatcher(tl, heartbeat_table=reader)
+    assert watcher.poll(["Agent-1", "Agent-2"]) == 2
+    assert watcher.poll(["Agent-1", "Agent-2"]) == 0  # unchanged sequence numbers
+    writers[1].beat("Agent-2", ts=2000.0)
+    assert watcher.poll(["Agent-1", "Agent-2"]) == 1 and tl.last_activity("Agent-2") == 2000.0
+    for w in writers + [reader]:
+        w.close()
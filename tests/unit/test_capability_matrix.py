@@ -0,0 +1,95 @@
+import itertools
+import pathlib
+import random
+import sys
+import time
+from collections import Counter
+
+# Import the task manager modules without executing the package __init__
+repo_root = pathlib.Path(__file__).resolve().parents[2]
+sys.path.append(str(repo_root / "src" / "collaborative" / "task_manager"))
+from capability_matrix import optimal_assignment  # type: ignore
+from collaborative_task_manager import AgentCapability as TeamCapability  # type: ignore
+from collaborative_task_manager import CollaborativeTask, CollaborativeTaskManager, TaskPriority, TaskStatus  # type: ignore
+from enhanced_task_breakdown import EnhancedTaskBreakdown, TaskComplexity, TaskComponent, TaskPriority as Priority, TaskType  # type: ignore
+
+SKILLS = ["python", "testing", "analysis", "docs", "devops", "ui", "data", "security"]
+
+
+def _component(cid: str, skills: list) -> TaskComponent:
+    return TaskComponent(cid, "T", cid, "", TaskType.DEVELOPMENT, TaskComplexity.SIMPLE, Priority.NORMAL,
+                         2.0, skills, [], None, "pending", "", "")
+
+
+def test_matrix_scores_and_assignment(tmp_path: pathlib.Path) -> None:
+    rng = random.Random(3)
+    etb = EnhancedTaskBreakdown(tmp_path)
+    for k in range(8):
+        cap = etb.create_agent_capability_profile(f"Agent-{k}", rng.sample(SKILLS, 2), rng.sample(SKILLS, 2), rng.random())
+        cap.performance_history = {s: rng.random() for s in rng.sample(SKILLS, 3)}
+    components = [_component(f"c{j}", rng.sample(SKILLS + ["cobol"], rng.randint(0, 3))) for j in range(200)]
+
+    def reference():
+        return [[etb._calculate_agent_suitability(cap, c) for c in components] for cap in etb.agent_capabilities.values()]
+
+    # One product matches the per-pair formula, including in-place profile edits
+    scores = etb.suitability_scores(components)
+    assert scores.agents == list(etb.agent_capabilities)
+    assert all(abs(x - y) < 1e-9 for row, ref in zip(scores.values, reference()) for x, y in zip(row, ref))
+    product = etb.capability_matrix._product
+    etb.update_agent_workload("Agent-2", 0.75)
+    etb.agent_capabilities["Agent-5"].performance_history["python"] = 0.95
+    scores = etb.suitability_scores(components)
+    assert etb.capability_matrix._product is product  # rows refreshed, not recomputed
+    assert all(abs(x - y) < 1e-9 for row, ref in zip(scores.values, reference()) for x, y in zip(row, ref))
+
+    # Min-cost flow: most components placed, then highest total score (brute force check)
+    for _ in range(150):
+        n, a = rng.randint(1, 6), rng.randint(1, 3)
+        capacity = [rng.randint(0, 3) for _ in range(a)]
+        table = [[rng.random() for _ in range(a)] for _ in range(n)]
+        banned = {(j, k) for j in range(n) for k in range(a) if rng.random() < 0.3}
+        got = optimal_assignment(table, capacity, lambda j, k: (j, k) not in banned)
+        counts = Counter(k for k in got if k is not None)
+        assert all(counts[k] <= capacity[k] for k in counts)
+        assert all(k is None or (j, k) not in banned for j, k in enumerate(got))
+        best = max(
+            (sum(k is not None for k in combo), sum(table[j][k] for j, k in enumerate(combo) if k is not None))
+            for combo in itertools.product(*[[None] + [k for k in range(a) if (j, k) not in banned] for j in range(n)])
+            if all(v <= capacity[k] for k, v in Counter(k for k in combo if k is not None).items())
+        )
+        value = (sum(k is not None for k in got), sum(table[j][k] for j, k in enumerate(got) if k is not None))
+        assert value[0] == best[0] and abs(value[1] - best[1]) < 1e-9
+
+    # Hundreds of components over 8 agents
+    t0 = time.perf_counter()
+    allocation = etb.assign_components(components)
+    assert time.perf_counter() - t0 < 1.0
+    assert sum(len(v) for v in allocation.values()) == len(components)
+    assert max(len(v) for v in allocation.values()) <= 25
+
+
+def test_task_manager_rebalances_with_assignment(tmp_path: pathlib.Path) -> None:
+    ctm = CollaborativeTaskManager(str(tmp_path))
+    ctm.agent_capabilities.update({
+        "Agent-1": TeamCapability("Agent-1", ["development"], {"development": 9}, 10.0, 9.5, []),
+        "Agent-2": TeamCapability("Agent-2", ["testing"], {"testing": 8}, 10.0, 2.0, []),
+        "Agent-3": TeamCapability("Agent-3", ["development"], {"development": 7, "api": 6}, 10.0, 1.0, []),
+        "Agent-4": TeamCapability("Agent-4", ["docs"], {"docs": 5}, 10.0, 9.0, []),
+    })
+    for tid, kind, tags in [("t1", "testing", []), ("t2", "development", ["api"]), ("t3", "development", ["workflow"])]:
+        ctm.tasks[tid] = CollaborativeTask(tid, tid, "", kind, TaskPriority.HIGH, TaskStatus.PLANNED,
+                                           ["Agent-1"], 4.0, tags=tags)
+    ctm.workflows["wf"] = {}
+
+    moves = {m["task_id"]: m["to_agent"] for m in ctm._optimize_resource_allocation("wf")}
+    # Agent-2 (5.0 h spare under 70%) fits one task, Agent-3 (6.0 h) one: each gets its own skill
+    assert moves == {"t1": "Agent-2", "t2": "Agent-3"}
+
+    bottlenecks = ctm._identify_bottlenecks("wf")
+    assert [b["agent_id"] for b in bottlenecks if b["type"] == "resource_overload"] == ["Agent-1"]
+
+    # Booking hours through allocate_resources updates the matrix workload in place
+    ctm.allocate_resources("t1", {"agents": {"Agent-2": {"hours": 5.0}}})
+    scores = ctm.capability_matrix.scores([["testing"]])
+    assert abs(scores.score("Agent-2", 0) - (0.4 * 0.8 + 0.2 * 0.8 + 0.2 * 0.3 + 0.1)) < 1e-9
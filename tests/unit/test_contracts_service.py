@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+from overnight_runner.contracts_service import ContractsService, locate_contracts_file
+
+
+def _write(path: Path, items: list) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(items), encoding="utf-8")
+
+
+def test_index_render_memo_and_debounced_patch(tmp_path: Path) -> None:
+    path = tmp_path / "contracts.json"
+    _write(path, [
+        {"task_id": "T1", "assignee": "Agent-1", "title": "One", "state": "queued"},
+        {"task_id": "T2", "assignee": "Agent-2", "title": "Two"},
+    ])
+    calls = []
+
+    def renderer(agent, tag, contracts):
+        calls.append(agent)
+        return f"{agent}:{tag}:{contracts[0]['state'] if contracts and 'state' in contracts[0] else '-'}"
+
+    svc = ContractsService(path, flush_debounce_sec=60, renderer=renderer)
+    assert [c["task_id"] for c in svc.contracts_for("Agent-1")] == ["T1"]
+    assert svc.get("T2")["assignee"] == "Agent-2"
+
+    assert svc.render("Agent-1", "RESUME") == "Agent-1:RESUME:queued"
+    svc.render("Agent-1", "RESUME")
+    assert calls == ["Agent-1"] and svc.stats["render_hits"] == 1
+
+    svc.apply_update({"task_id": "T1", "state": "done", "evidence": "log.txt"})
+    assert svc.render("Agent-1", "RESUME") == "Agent-1:RESUME:done"
+    # Write-back is debounced until flush
+    assert json.loads(path.read_text(encoding="utf-8"))[0]["state"] == "queued"
+    assert svc.flush()
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    assert saved[0]["state"] == "done" and saved[0]["evidence"] == ["log.txt"]
+    assert not svc.maybe_reload(force=True)  # our own flush is not a foreign change
+
+
+def test_external_change_is_reloaded(tmp_path: Path) -> None:
+    path = tmp_path / "contracts.json"
+    _write(path, [{"task_id": "T1", "assignee": "Agent-1"}])
+    svc = ContractsService(path)
+    version = svc.version
+    _write(path, [{"task_id": "T1", "assignee": "Agent-1"}, {"task_id": "T3", "assignee": "Agent-1"}])
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert svc.maybe_reload(force=True)
+    assert svc.version > version and len(svc.contracts_for("Agent-1")) == 2
+
+
+def test_locate_contracts_file_prefers_latest_overnight(tmp_path: Path) -> None:
+    _write(tmp_path / "overnight_20250101_" / "Agent-5" / "contracts.json", [])
+    _write(tmp_path / "overnight_20250102_" / "Agent-5" / "FSM_CONTRACTS" / "contracts.json", [])
+    assert locate_contracts_file(tmp_path, "Agent-5") is None
+    found = locate_contracts_file(tmp_path, "Agent-5", include_fsm_subdir=True)
+    assert found is not None and found.parent.name == "FSM_CONTRACTS"
+
+
+def test_flush_keeps_external_edit_made_during_debounce(tmp_path: Path) -> None:
+    path = tmp_path / "contracts.json"
+    _write(path, [{"task_id": "T1", "assignee": "Agent-1", "state": "queued"}])
+    svc = ContractsService(path, flush_debounce_sec=60)
+    svc.apply_update({"task_id": "T1", "state": "done", "evidence": "a.txt"})
+    svc.apply_update({"task_id": "T9", "state": "new"})
+
+    # Another writer edits the file before the debounced flush runs
+    _write(path, [{"task_id": "T1", "assignee": "Agent-1", "state": "queued", "note": "external"},
+                  {"task_id": "T2", "assignee": "Agent-2"}])
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert svc.flush() and svc.stats["merges"] == 1
+
+    saved = {c["task_id"]: c for c in json.loads(path.read_text(encoding="utf-8"))}
+    assert set(saved) == {"T1", "T2", "T9"}
+    assert saved["T1"]["note"] == "external" and saved["T1"]["state"] == "done"
+    assert saved["T1"]["evidence"] == ["a.txt"]
+    assert svc.get("T2")["assignee"] == "Agent-2"
@@ -0,0 +1,99 @@
+import pathlib
+import sqlite3
+import sys
+
+import pytest
+
+# Import the collaborative modules without executing the package __init__
+repo_root = pathlib.Path(__file__).resolve().parents[2]
+sys.path.append(str(repo_root / "src" / "collaborative"))
+sys.path.append(str(repo_root / "src" / "collaborative" / "task_manager"))
+sys.path.append(str(repo_root / "src" / "collaborative" / "knowledge_base"))
+from entity_store import EntityStore  # type: ignore
+from collaborative_knowledge_manager import CollaborativeKnowledgeManager  # type: ignore
+from collaborative_task_manager import CollaborativeTaskManager, TaskPriority, TaskStatus  # type: ignore
+
+
+def _rows(path: pathlib.Path, collection: str) -> dict:
+    with sqlite3.connect(str(path)) as conn:
+        return dict(conn.execute("SELECT key, updated FROM entities WHERE collection = ?", (collection,)))
+
+
+def test_repository_writes_only_changes(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "store.sqlite"
+    store = EntityStore(path, batch_size=3, max_delay=60.0)
+    items = store.repository("items", key_encode="|".join, key_decode=lambda raw: tuple(raw.split("|")))
+    for i in range(5):
+        items[("a", str(i))] = {"n": i}
+    items[("b", "0")] = {"n": 9}
+    assert store.flush() == 6
+    assert store.flush() == 0
+
+    # In-place edits are written only when marked; deletes remove the row
+    items[("a", "1")]["n"] = 11
+    items.mark(("a", "1"), ("zz", "unknown"))
+    del items[("a", "4")]
+    before = _rows(path, "items")
+    assert store.flush() == 2
+    after = _rows(path, "items")
+    assert set(after) == set(before) - {"a|4"}
+    assert [k for k in after if after[k] != before[k]] == ["a|1"]
+
+    # Batching: nothing is written until batch_size changes are pending
+    items[("c", "0")] = {}
+    assert store.maybe_flush() == 0
+    items[("c", "1")] = {}
+    items[("c", "2")] = {}
+    assert store.maybe_flush() == 3
+
+    # A failed write keeps the changes pending
+    items[("a", "0")] = {"n": object.__new__(type("Unserializable", (), {"__str__": None}))}
+    with pytest.raises(TypeError):
+        store.flush()
+    assert items.pending == 1
+    items[("a", "0")] = {"n": 0}
+    store.close()
+
+    # A fresh store reads keys eagerly and rows lazily; scan is a range query
+    store = EntityStore(path)
+    items = store.repository("items", key_encode="|".join, key_decode=lambda raw: tuple(raw.split("|")))
+    assert len(items) == 8 and ("a", "4") not in items
+    assert items._cache == {}
+    assert items[("a", "1")] == {"n": 11}
+    assert [k for k, _ in items.scan("a|")] == [("a", "0"), ("a", "1"), ("a", "2"), ("a", "3")]
+
+    calls = []
+    assert store.import_legacy("v1", lambda: calls.append(1))
+    assert not store.import_legacy("v1", lambda: calls.append(2))
+    assert calls == [1]
+    store.close()
+
+
+def test_managers_persist_through_store(tmp_path: pathlib.Path) -> None:
+    # Legacy JSON is imported once, then the SQLite store is authoritative
+    kb_path = tmp_path / "kb"
+    kb_path.mkdir()
+    (kb_path / "collaborative_tasks.json").write_text('{"old": {"task_id": "old", "contributions": {}}}')
+    kb = CollaborativeKnowledgeManager(str(kb_path))
+    kb.create_collaborative_task("t1", "dev", "build", ["Agent-1", "Agent-2"])
+    kb.update_task_progress("t1", "Agent-1", 0.5, insights=["cache it"])
+    kb.add_shared_insight("i1", "Agent-1", "perf", "use sqlite", ["t1"])
+    kb._save_knowledge()
+    (kb_path / "collaborative_tasks.json").write_text("{}")
+
+    kb = CollaborativeKnowledgeManager(str(kb_path))
+    assert set(kb.collaborative_tasks) == {"old", "t1"}
+    assert kb.collaborative_tasks["t1"]["contributions"]["Agent-1"]["insights"] == ["cache it"]
+    assert kb.collaborative_tasks["t1"]["progress"] == 0.25
+    assert kb.shared_insights["i1"]["content"] == "use sqlite"
+
+    ctm = CollaborativeTaskManager(str(tmp_path / "tm"))
+    task_id = ctm.create_task("Store", "persist", "development", TaskPriority.HIGH, ["Agent-2"], 3.0)
+    ctm.update_task_progress(task_id, "Agent-2", 1.0, actual_hours=2.5)
+    ctm._save_data()
+    assert ctm._store.flush() == 0
+
+    ctm = CollaborativeTaskManager(str(tmp_path / "tm"))
+    task = ctm.tasks[task_id]
+    assert task.priority is TaskPriority.HIGH and task.status is TaskStatus.COMPLETED
+    assert task.actual_hours == 2.5
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import pytest
+
+from src.core.activity_timeline import ActivityTimeline, StallThresholds
+from src.core.fleet_analytics import FleetActivityMatrix
+
+
+class FakeClock:
+    def __init__(self, t: float = 3600.0 * 1000) -> None:
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
+
+def _fleet(clock: FakeClock) -> FleetActivityMatrix:
+    tl = ActivityTimeline(clock=clock)
+    fleet = FleetActivityMatrix(bucket_sec=60, horizon_sec=12 * 3600, clock=clock).attach(tl)
+    start = clock.t - 6 * 3600
+    for minute in range(6 * 60):
+        ts = start + minute * 60 + 1
+        tl.record("Agent-1", ts, "reply")  # steady all along
+        if minute < 5 * 60 and minute % 2 == 0:
+            tl.record("Agent-2", ts, "reply")  # busy, then silent for the last hour
+    tl.record("Agent-3", start + 30, "state")  # seen once, six hours ago
+    fleet.add_agent("Agent-4")  # never seen
+    clock.t -= 30  # analyse from inside the newest bucket
+    return fleet
+
+
+def test_fleet_metrics_and_anomalies() -> None:
+    clock = FakeClock()
+    fleet = _fleet(clock)
+    report = fleet.analyze(StallThresholds(60, 600, 1800), window_sec=6 * 3600, mad_k=2.0)
+
+    a1, a2, a3, a4 = (report.row(a) for a in ("Agent-1", "Agent-2", "Agent-3", "Agent-4"))
+    assert a1["status"] == "active" and a1["idle_streak"] == 0 and a1["rate_p50"] == 60.0
+    assert a2["status"] == "stalled" and a2["idle_streak"] == 61 and a2["rate_now"] == 0
+    assert a2["rate_p90"] == 30.0 and a2["stall_score"] == pytest.approx(a2["idle_sec"] / 1800)
+    assert a3["idle_streak"] == 359
+    assert a4["idle_sec"] == float("inf") and a4["status"] == "stalled"
+    # Agent-2 is far quieter than its own history; Agent-3 idles far beyond the fleet
+    assert report.flagged() == ["Agent-2", "Agent-3"]
+
+    # The ring recycles columns as time moves past the horizon
+    clock.t += 13 * 3600
+    later = fleet.analyze(window_sec=3600)
+    assert all(streak == 60 for streak in later.columns["idle_streak"])
+    assert sum(later.columns["rate_now"]) == 0
+
+
+def test_numpy_and_python_paths_agree() -> None:
+    pytest.importorskip("numpy")
+    clock = FakeClock()
+    fleet = _fleet(clock)
+    args = (clock.t, [b % fleet.n_buckets for b in range(int(clock.t // 60) - 359, int(clock.t // 60) + 1)],
+            60, StallThresholds(60, 600, 1800), 2.0, 2.0, 1.0)
+    assert fleet._analyze_numpy(*args) == fleet._analyze_python(*args)
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+
+from src.core.job_scheduler import JobScheduler
+
+
+class FakeClock:
+    def __init__(self, t: float = 1000.0) -> None:
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
+
+def test_jitter_priority_overrun_and_errors() -> None:
+    clock = FakeClock()
+    sched = JobScheduler(clock=clock, rng=random.Random(1), autostart=False)
+    order = []
+    a = sched.add_job("a", lambda: order.append("a"), interval=30, jitter=0.2)
+    sched.add_job("b", lambda: order.append("b"), interval=30, jitter=0.2, priority=5)
+    a2 = sched.add_job("a", lambda: order.append("a2"), interval=30, jitter=0.0, initial_delay=100)
+    assert a2.name == "a#2"
+
+    # Jitter delays each run by up to 20% of the interval; due jobs run by priority
+    assert all(1000.0 <= j.due <= 1006.0 for j in (a, sched._jobs["b"]))
+    assert a.due != sched._jobs["b"].due
+    clock.t = 1006.0
+    assert sched.run_pending() == 2 and order == ["b", "a"]
+    assert sched.run_pending() == 0
+    assert 1030.0 <= a.due <= 1036.0  # stays on the original phase
+
+    # A run that spans several ticks drops them instead of catching up
+    def slow() -> None:
+        clock.t += 95.0
+
+    slow_job = sched.add_job("slow", slow, interval=30, jitter=0.0)
+    sched.run_pending()
+    stats = sched.stats()["slow"]
+    assert stats["overruns"] == 1 and stats["skipped"] == 3
+    assert slow_job.due == 1006.0 + 120.0
+
+    # Failures are counted and retried after error_interval
+    def broken() -> None:
+        raise RuntimeError("boom")
+
+    bad = sched.add_job("bad", broken, interval=30, jitter=0.0, error_interval=90)
+    clock.t += 1
+    sched.run_pending()
+    stats = sched.stats()["bad"]
+    assert stats["failures"] == 1 and stats["last_error"] == "RuntimeError: boom"
+    assert bad.due == clock.t + 90
+
+    sched.remove_job(bad)
+    sched.remove_job("a#2")
+    assert sched.jobs() == ["a", "b", "slow"]
+    clock.t += 1000
+    order.clear()
+    sched.run_pending()
+    # One run after a long stall, not a burst of the missed ticks
+    assert order == ["b", "a"] and sched.stats()["a"]["runs"] == 3
+    assert sched.stats()["a"]["skipped"] >= 30
+
+
+def test_worker_pool_runs_jobs_without_self_overlap() -> None:
+    sched = JobScheduler(workers=2)
+    lock = threading.Lock()
+    running = {"slow": 0, "fast": 0}
+    peak = {"slow": 0, "fast": 0}
+
+    def make(name: str, duration: float):
+        def run() -> None:
+            with lock:
+                running[name] += 1
+                peak[name] = max(peak[name], running[name])
+            time.sleep(duration)
+            with lock:
+                running[name] -= 1
+        return run
+
+    sched.add_job("slow", make("slow", 0.15), interval=0.02, jitter=0.0)
+    sched.add_job("fast", make("fast", 0.0), interval=0.02, jitter=0.5)
+    time.sleep(0.5)
+    sched.stop()
+
+    stats = sched.stats()
+    assert peak == {"slow": 1, "fast": 1}
+    # The slow job keeps one worker busy while the other serves the fast job
+    assert stats["fast"]["runs"] >= 8
+    assert stats["slow"]["runs"] >= 2 and stats["slow"]["overruns"] == stats["slow"]["runs"]
+    assert stats["slow"]["skipped"] > 0 and stats["slow"]["max_time"] >= 0.15
@@ -0,0 +1,84 @@
+import pathlib
+import random
+import sys
+import time
+
+# Import the task manager modules without executing the package __init__
+repo_root = pathlib.Path(__file__).resolve().parents[2]
+sys.path.append(str(repo_root / "src" / "collaborative" / "task_manager"))
+from metric_stream import MetricStream  # type: ignore
+
+
+def _rescan(values: list) -> tuple:
+    """The full-rescan rules WorkflowOptimizer used before streaming"""
+    n = len(values)
+    xs = range(n)
+    sx, sy = sum(xs), sum(values)
+    sxy, sx2 = sum(x * y for x, y in zip(xs, values)), sum(x * x for x in xs)
+    trend = "stable"
+    if n >= 2 and n * sx2 - sx * sx != 0:
+        slope = (n * sxy - sx * sy) / (n * sx2 - sx * sx)
+        trend = "improving" if slope > 0.1 else "declining" if slope < -0.1 else "stable"
+    turns = sum(1 for i in range(1, n - 1) if (values[i] > values[i - 1] and values[i] > values[i + 1])
+                or (values[i] < values[i - 1] and values[i] < values[i + 1]))
+    oscillation = n >= 4 and turns / (n - 2) > 0.5
+    mean = sy / n
+    plateau = n >= 3 and sum((v - mean) ** 2 for v in values) / n < (mean * 0.1) ** 2
+    changes = [values[i] - values[i - 1] for i in range(1, n)]
+    acceleration = n >= 3 and sum(1 for i in range(1, len(changes)) if changes[i] > changes[i - 1]) / (n - 2) > 0.7
+    return trend, oscillation, plateau, acceleration
+
+
+def _slope(values: list) -> float:
+    n = len(values)
+    mx, my = (n - 1) / 2, sum(values) / n
+    return sum((i - mx) * (v - my) for i, v in enumerate(values)) / sum((i - mx) ** 2 for i in range(n))
+
+
+def test_stream_matches_rescan_of_window() -> None:
+    rng = random.Random(5)
+    generators = [
+        lambda i: rng.uniform(-5, 5),
+        lambda i: 50 + rng.uniform(-1, 1),
+        lambda i: (i % 2) * 10 + rng.random(),
+        lambda i: 0.3 * i * i + rng.random() * 0.01,
+        lambda i: float(rng.randint(0, 3)),
+    ]
+    for trial in range(200):
+        window = rng.randint(4, 12)
+        stream, values = MetricStream(window=window), []
+        generate = generators[trial % len(generators)]
+        for i in range(rng.randint(1, 60)):
+            values.append(generate(i))
+            stream.add(values[-1])
+            expected = _rescan(values[-window:])
+            assert (stream.trend(), stream.oscillating(), stream.plateau(), stream.accelerating()) == expected
+        mean = sum(values) / len(values)
+        assert abs(stream.mean - mean) < 1e-9
+        assert abs(stream.variance - sum((v - mean) ** 2 for v in values) / len(values)) < 1e-6
+        assert list(stream.values) == values
+
+
+def test_long_streams_and_pattern_onsets() -> None:
+    # Oscillation is reported once when it starts, again only after it stopped
+    stream = MetricStream(window=6)
+    onsets = []
+    for v in [1, 5, 1, 5, 1, 5, 2, 3, 4, 5, 6, 7, 8, 1, 9, 1, 9]:
+        stream.add(v)
+        onsets.extend(p for p in stream.new_patterns() if p == "oscillation")
+    assert onsets == ["oscillation", "oscillation"]
+
+    # A replayed history does not report its existing patterns as new
+    replayed = MetricStream.from_values([3.0] * 10, window=6)
+    assert replayed.patterns() == ["plateau"] and replayed.new_patterns() == []
+
+    # Constant time per value over a long history; sums stay exact after many evictions
+    stream = MetricStream(window=50)
+    t0 = time.perf_counter()
+    for i in range(200_000):
+        stream.add(1e6 + (i % 100))
+    assert time.perf_counter() - t0 < 5.0
+    assert stream.values.itemsize == 8 and len(stream.values) == 200_000
+    tail = list(stream.values[-50:])
+    assert _rescan(tail)[0] == stream.trend()
+    assert abs(stream.slope() - _slope(tail)) < 1e-6
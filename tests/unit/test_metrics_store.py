@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from src.core.metrics_store import FLEET, HOUR, MINUTE, RAW, MetricsStore
+
+
+class FakeClock:
+    def __init__(self, t: float = 7200.0) -> None:
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
+
+def test_rollups_queries_and_summary(tmp_path: Path) -> None:
+    clock = FakeClock()
+    store = MetricsStore(tmp_path / "m.sqlite", clock=clock)
+    for i in range(120):  # one sample every 30s for an hour
+        stalled = 1 if i >= 60 else 0
+        store.record([
+            ("age_sec", "Agent-1", float(i)),
+            ("stalled", "Agent-1", stalled),
+            ("idle_streak", "Agent-1", None),  # missing values are skipped
+            ("agents_stalled", FLEET, stalled),
+        ], ts=clock.t)
+        clock.t += 30
+
+    raw = store.query("age_sec", "Agent-1", since=7200, until=7200 + 90, resolution=RAW)
+    assert [p.value for p in raw] == [0.0, 1.0, 2.0, 3.0]
+
+    minutes = store.query("age_sec", "Agent-1", since=7200, until=clock.t, resolution=MINUTE)
+    assert len(minutes) == 60 and minutes[0].n == 2
+    assert (minutes[0].value, minutes[0].lo, minutes[0].hi) == (0.5, 0.0, 1.0)
+
+    hours = store.query("stalled", since=0, until=clock.t, resolution=HOUR)
+    assert len(hours) == 1 and hours[0].value == 0.5 and hours[0].n == 120
+
+    assert store.pick_resolution(3600) == RAW and store.pick_resolution(86400) == MINUTE
+    assert store.pick_resolution(30 * 86400) == HOUR
+    assert store.latest("age_sec") == {"Agent-1": (7200 + 119 * 30, 119.0)}
+    assert store.series() == ["age_sec", "agents_stalled", "stalled"]
+
+    summary = store.summary(since=7200 + 1800)
+    assert summary["Agent-1"]["stalled"]["mean"] == 1.0
+    assert summary["Agent-1"]["age_sec"]["max"] == 119.0 and summary["Agent-1"]["age_sec"]["last"] == 119.0
+    assert summary[FLEET]["agents_stalled"]["samples"] == 60
+
+    with pytest.raises(ValueError):
+        store.query("age_sec", resolution=300)
+    store.close()
+
+
+def test_retention_per_resolution(tmp_path: Path) -> None:
+    clock = FakeClock(0.0)
+    store = MetricsStore(tmp_path / "m.sqlite", retention_sec={RAW: 600, MINUTE: 3600, HOUR: 86400},
+                         prune_every=10_000, clock=clock)
+    for _ in range(48):  # every 30 minutes for a day
+        store.record([("age_sec", "Agent-2", 1.0)])
+        clock.t += 1800
+    store.prune()
+    assert store.query("age_sec", since=0, until=clock.t, resolution=RAW) == []
+    assert len(store.query("age_sec", since=0, until=clock.t, resolution=MINUTE)) == 2
+    assert len(store.query("age_sec", since=0, until=clock.t, resolution=HOUR)) == 24
+    store.close()
+
+    reopened = MetricsStore(tmp_path / "m.sqlite", clock=clock)
+    assert reopened.agents() == ["Agent-2"]
+    reopened.close()
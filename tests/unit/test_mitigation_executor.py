@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import List
+
+from src.core.mitigation_executor import MitigationExecutor, MitigationStep
+
+
+class FakeClock:
+    def __init__(self, t: float = 1000.0) -> None:
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
+
+def _steps(log: List[str], agent: str, delays=(0.0, 1.0, 2.0)) -> List[MitigationStep]:
+    return [MitigationStep(f"s{i}", (lambda i=i: log.append(f"{agent}:s{i}")), d) for i, d in enumerate(delays)]
+
+
+def test_timed_steps_dedupe_and_concurrency_cap(tmp_path: Path) -> None:
+    clock = FakeClock()
+    audit = tmp_path / "audit.ndjson"
+    ex = MitigationExecutor(max_concurrent=1, default_cooldown_sec=60, audit_path=audit, clock=clock, autostart=False)
+    log: List[str] = []
+
+    assert ex.request("Agent-1", "rescue", _steps(log, "A1"), source="monitor").status == "started"
+    assert log == ["A1:s0"]  # first step runs in the caller, later ones wait for their timers
+    assert ex.request("Agent-1", "rescue", _steps(log, "dup"), source="runner").status == "merged"
+    assert ex.request("Agent-2", "nudge", _steps(log, "A2", (0.0,)), source="captain").status == "queued"
+    assert ex.request("Agent-2", "rescue", _steps(log, "A2r", (0.0,)), source="runner").status == "upgraded"
+
+    assert ex.run_pending() == 0
+    clock.t += 1.0
+    assert ex.run_pending() == 1 and log[-1] == "A1:s1"
+    clock.t += 2.0
+    ex.run_pending()
+    # Agent-1 finished, so the upgraded Agent-2 rescue got the slot; the nudge never ran
+    assert log == ["A1:s0", "A1:s1", "A1:s2", "A2r:s0"]
+    assert ex.status()["active"] == {} and ex.stats["done"] == 2
+
+    events = [json.loads(line) for line in audit.read_text(encoding="utf-8").splitlines()]
+    assert [e["event"] for e in events if e["agent"] == "Agent-2"] == [
+        "queued", "superseded", "upgraded", "dequeued", "step", "done"
+    ]
+
+
+def test_cooldowns_by_priority_and_across_processes(tmp_path: Path) -> None:
+    clock = FakeClock()
+    shared = tmp_path / "mitigations"
+    monitor = MitigationExecutor(default_cooldown_sec=300, state_dir=shared, clock=clock, autostart=False)
+    runner = MitigationExecutor(default_cooldown_sec=300, state_dir=shared, clock=clock, autostart=False)
+    calls: List[str] = []
+
+    def send():
+        calls.append("send")
+        raise RuntimeError("ui busy")
+
+    assert monitor.request("Agent-1", "warning", [MitigationStep("send", send)]).accepted
+    assert monitor.stats["step_errors"] == 1 and monitor.history[-1]["event"] == "done"
+    # Same or lower priority is cooled down, including from another executor sharing the state dir
+    decision = runner.request("Agent-1", "nudge", [MitigationStep("send", send)])
+    assert decision.status == "cooldown" and decision.retry_after == 300
+    # A more severe mitigation is not blocked by a recent warning
+    assert runner.request("Agent-1", "rescue", [MitigationStep("send", send)]).status == "started"
+    assert monitor.request("Agent-1", "rescue", [MitigationStep("send", send)]).status == "cooldown"
+    clock.t += 301
+    assert monitor.request("Agent-1", "rescue", [MitigationStep("send", send)]).status == "started"
+    assert calls == ["send"] * 3
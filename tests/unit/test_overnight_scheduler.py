@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+
+from overnight_runner.scheduler import AgentScheduler, AgentStateCache, PacingConfig
+
+
+class Tag(Enum):
+    RESUME = "[RESUME]"
+    TASK = "[TASK]"
+
+
+@dataclass
+class Planned:
+    tag: Tag
+    template: str = "{agent}"
+
+
+class FakeClock:
+    def __init__(self, start: float = 1_000_000.0) -> None:
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def wait(self, timeout: float) -> bool:
+        self.now += timeout
+        return False
+
+
+def _write_state(root: Path, agent: str, updated_epoch: float) -> None:
+    p = root / agent / "state.json"
+    p.parent.mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(updated_epoch))
+    p.write_text(json.dumps({"state": "executing", "updated": stamp}), encoding="utf-8")
+
+
+def _pacing(**kw) -> PacingConfig:
+    base = dict(interval_sec=100, per_agent_cooldown_sec=0, resume_cooldown_sec=0,
+                active_grace_sec=50, stagger_sec=1, jitter_sec=0)
+    base.update(kw)
+    return PacingConfig(**base)
+
+
+def test_active_grace_defers_to_exact_clear_time(tmp_path: Path) -> None:
+    clock = FakeClock()
+    _write_state(tmp_path, "Agent-1", clock.now - 20)  # grace clears 30s from now
+    sent = []
+
+    def send(agent, planned, force, stalled):
+        sent.append((agent, planned.tag.name, clock()))
+        return True
+
+    sched = AgentScheduler(["Agent-1", "Agent-2"], [Planned(Tag.TASK)], _pacing(), send,
+                           state_cache=AgentStateCache(tmp_path), max_turns=1,
+                           clock=clock, wait=clock.wait)
+    start = clock.now
+    sched.run()
+    times = {agent: ts for agent, _, ts in sent}
+    assert times["Agent-2"] == start + 1
+    assert times["Agent-1"] == start + 30
+    m = sched.metrics()
+    assert m["sends"] == 2 and m["deferrals"].get("active_grace") == 1
+    assert m["active_agents"] == 0
+
+
+def test_state_cache_rereads_only_on_change(tmp_path: Path) -> None:
+    cache = AgentStateCache(tmp_path)
+    _write_state(tmp_path, "Agent-1", 0)
+    cache.get("Agent-1")
+    cache.get("Agent-1")
+    assert cache.reads == 1
+    cache.invalidate("Agent-1")
+    cache.get("Agent-1")
+    assert cache.reads == 2
+
+
+def test_resume_request_bypasses_resume_cooldown(tmp_path: Path) -> None:
+    clock = FakeClock()
+    sent = []
+
+    def send(agent, planned, force, stalled):
+        sent.append((planned.tag.name, force, clock()))
+        return True
+
+    sched = AgentScheduler(["Agent-1"], [Planned(Tag.RESUME)],
+                           _pacing(resume_cooldown_sec=1000), send,
+                           state_cache=AgentStateCache(tmp_path), max_turns=3,
+                           clock=clock, wait=clock.wait)
+    sched.add_periodic("signal", 150, lambda: sched.request_resume("Agent-1"),
+                       first_due=clock.now + 150)
+    sched.run(until=clock.now + 250)
+    assert sent[0][:2] == ("RESUME", False)
+    assert ("RESUME", True) in [(t, f) for t, f, _ in sent]
+    assert sched.metrics()["skips"].get("resume_cooldown", 0) >= 1
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+from src.core.process_supervisor import ProbeSpec, ProcessSupervisor, ServiceSpec
+
+
+class FakeClock:
+    def __init__(self, t: float = 1000.0) -> None:
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
+
+def _wait_exit(sup: ProcessSupervisor, name: str) -> None:
+    sup.services[name].proc.wait(timeout=10)
+
+
+def test_backoff_and_crash_loop(tmp_path: Path) -> None:
+    clock = FakeClock()
+    spec = ServiceSpec(
+        name="crasher", cmd=[sys.executable, "-c", "import sys; sys.exit(3)"], cwd=str(tmp_path),
+        backoff_initial_sec=1, backoff_factor=2, crash_loop_max=3, crash_loop_window_sec=60,
+        crash_loop_cooldown_sec=600,
+    )
+    sup = ProcessSupervisor([spec], status_path=tmp_path / "status.json", clock=clock)
+    sup.start_all()
+
+    delays = []
+    for _ in range(2):
+        _wait_exit(sup, "crasher")
+        sup.tick()
+        st = sup.status()["services"]["crasher"]
+        assert st["state"] == "backoff" and st["last_exit_code"] == 3
+        delays.append(st["next_start_in_sec"])
+        sup.tick()  # not due yet
+        assert sup.services["crasher"].proc is None
+        clock.t += st["next_start_in_sec"]
+        sup.tick()
+    assert delays == [1, 2]
+
+    _wait_exit(sup, "crasher")
+    sup.tick()
+    st = sup.status()["services"]["crasher"]
+    assert st["state"] == "crashloop" and st["next_start_in_sec"] == 600 and st["restarts"] == 2
+    assert (tmp_path / "logs" / "crasher.log").exists()
+    sup.shutdown()
+
+
+def test_liveness_restart_readiness_and_shutdown(tmp_path: Path) -> None:
+    clock = FakeClock()
+    beacon = tmp_path / "health.json"
+    beacon.write_text("{}", encoding="utf-8")
+    os.utime(beacon, (clock.t - 10, clock.t - 10))
+    queue = tmp_path / "inbox"
+    queue.mkdir()
+    (queue / "msg.json").write_text("{}", encoding="utf-8")
+    os.utime(queue / "msg.json", (clock.t - 5, clock.t - 5))
+
+    spec = ServiceSpec(
+        name="sleeper", cmd="python -c 'import time; time.sleep(60)'", cwd=str(tmp_path),
+        backoff_initial_sec=0, stop_timeout_sec=5,
+        probes=[
+            ProbeSpec("health", "file_age", path="health.json", max_age_sec=30, interval_sec=0,
+                      failure_threshold=2, initial_delay_sec=0),
+            ProbeSpec("drained", "queue_lag", kind="readiness", path="inbox", max_age_sec=30,
+                      interval_sec=0, initial_delay_sec=0),
+        ],
+    )
+    sup = ProcessSupervisor([spec], clock=clock)
+    sup.start_all()
+    first_pid = sup.services["sleeper"].proc.pid
+
+    sup.tick()
+    st = sup.status()["services"]["sleeper"]
+    assert st["state"] == "ready" and st["probes"]["health"]["age_sec"] == 10
+
+    clock.t += 30  # health file goes stale, queued message waits too long
+    sup.tick()
+    st = sup.status()["services"]["sleeper"]
+    assert st["state"] == "running" and not st["ready"] and st["probes"]["health"]["failures"] == 1
+    sup.tick()  # second liveness failure: terminate and schedule a restart
+    st = sup.status()["services"]["sleeper"]
+    assert st["last_reason"] == "unhealthy" and st["state"] == "backoff"
+    sup.tick()
+    assert sup.services["sleeper"].proc.pid != first_pid and sup.status()["services"]["sleeper"]["restarts"] == 1
+
+    proc = sup.services["sleeper"].proc
+    sup.shutdown()
+    assert proc.poll() is not None and sup.status()["services"]["sleeper"]["state"] == "stopped"
+
+
+def test_queue_lag_missing_directory_is_never_seen(tmp_path: Path) -> None:
+    clock = FakeClock()
+    sup = ProcessSupervisor([], clock=clock)
+    probe = ProbeSpec("drained", "queue_lag", path="inbox")
+    assert sup.probe_age(probe, clock.t, tmp_path) is None
+    (tmp_path / "inbox").mkdir()
+    assert sup.probe_age(probe, clock.t, tmp_path) == 0.0
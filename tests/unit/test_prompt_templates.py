@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from advanced_workflows.prompt_templates import CompiledTemplate, PromptCompiler, truncate
+from advanced_workflows.workflow_engine import WorkflowEngine, WorkflowStep
+
+
+def test_templates_tolerate_missing_fields_and_bound_context() -> None:
+    t = CompiledTemplate("Review {project_path} for {focus!r:>10} {{literal}}")
+    assert t.fields == ("project_path", "focus")
+    assert t.render({"project_path": "/src", "focus": "perf"}) == "Review /src for     'perf' {literal}"
+    assert t.render({}) == "Review {project_path} for {focus} {literal}"
+    assert CompiledTemplate("goal: ship {v2").render({}) == "goal: ship {v2"   # unbalanced braces
+
+    assert truncate("a" * 50 + "b" * 50, 40).startswith("a" * 22) and truncate("x" * 100, 40).endswith("x" * 11)
+    assert len(truncate("y" * 1000, 40)) == 40
+
+    summaries = []
+    compiler = PromptCompiler(context_chars=300, summarize=lambda text, limit: summaries.append(limit) or text[:limit])
+    block = compiler.assemble_context([("short", "ok"), ("long", "L" * 5000), ("mid", "M" * 100)])
+    assert "[short]\nok" in block and "M" * 100 in block       # short outputs stay whole
+    assert len(block) <= 300 and summaries == [173]          # the long one gets what is left
+
+    # Budgets too small for every header drop the later sources instead of overflowing
+    sources = [("analysis", "a" * 500), ("design", "d" * 500), ("review", "r" * 500)]
+    for budget in (0, 5, 12, 20, 25, 40, 60):
+        block = PromptCompiler(context_chars=budget).assemble_context(sources)
+        assert len(block) <= budget
+    assert PromptCompiler(context_chars=40).assemble_context(sources).startswith("[analysis]\na")
+    assert "[review]" not in PromptCompiler(context_chars=25).assemble_context(sources)
+
+
+def test_engine_prompts_use_only_declared_upstream_outputs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    engine = WorkflowEngine("prompts", agent_system_path=str(tmp_path), context_chars=500)
+    engine.workflow_data.update(task_description="build API")
+    for sid in ("design", "unrelated"):
+        engine.workflow_data[f"response_{sid}"] = {"text": f"{sid} output " * 200}
+
+    step = WorkflowStep(id="impl", name="impl", description="", agent_target="Agent-2",
+                        prompt_template="Implement {task_description}.", expected_response_type="task_execution",
+                        dependencies=["design"])
+    prompt = engine.render_prompt(step)
+    assert prompt.startswith("Implement build API.\n\nContext from earlier steps:\n[design]\n")
+    assert "unrelated" not in prompt and len(prompt) < 600
+    assert engine.render_prompt(step) is prompt and engine.prompts.hits == 1
+
+    engine.workflow_data["response_design"] = {"text": "revised design"}
+    assert engine.render_prompt(step).endswith("[design]\nrevised design")
+
+    placed = WorkflowStep(id="review", name="review", description="", agent_target="Agent-3",
+                          prompt_template="Given:\n{context}\nReview it.", expected_response_type="review",
+                          dependencies=["impl"], context_from=["design", "unrelated"], context_chars=100)
+    prompt = engine.render_prompt(placed)
+    assert prompt.startswith("Given:\n[design]\nrevised design\n\n[unrelated]\n") and prompt.endswith("\nReview it.")
+    assert len(prompt) == len("Given:\n\nReview it.") + 100
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from src.core.resource_profiler import ResourceSample, ResourceSeriesStore, classify_cmdline, open_store
+
+
+def _sample(ts: float, series: str, cpu: float, rss: int = 100 << 20, io: int = 0) -> ResourceSample:
+    return ResourceSample(ts, series, 2, cpu, rss, 10, 4, io, io // 2)
+
+
+def test_ring_store_query_latest_and_summary(tmp_path: Path) -> None:
+    path = tmp_path / "resources.bin"
+    assert open_store(path).query() == []  # readers never create the file
+
+    writer = ResourceSeriesStore(path, capacity=8, series_slots=4)
+    for i in range(6):
+        writer.append([_sample(1000.0 + i, "runner", float(i), io=1000 * i), _sample(1000.0 + i, "cursor:42", 50.0)])
+    size = path.stat().st_size
+
+    reader = open_store(path)
+    assert reader.series() == ["runner", "cursor:42"]
+    rows = reader.query()
+    assert len(rows) == 8 and rows[0].ts == 1002.0  # oldest samples were overwritten in place
+    assert path.stat().st_size == size
+    assert [s.cpu for s in reader.query(series=["runner"], since=1003.0)] == [3.0, 4.0, 5.0]
+    assert reader.latest()["runner"].cpu == 5.0
+
+    summary = reader.summary(window_sec=2.5, now=1005.0)
+    assert summary["runner"]["samples"] == 3 and summary["runner"]["cpu_avg"] == 4.0
+    assert summary["runner"]["read_bps"] == 1000.0 and summary["runner"]["write_bps"] == 500.0
+    assert summary["cursor:42"]["rss_max"] == 100 << 20
+    for store in (writer, reader):
+        store.close()
+
+
+def test_classify_cmdline_roles() -> None:
+    assert classify_cmdline(["python", "overnight_runner/runner.py", "--agents", "Agent-1"]) == "runner"
+    assert classify_cmdline(["C:\\Python311\\python.exe", "src\\agent_monitors\\agent5_monitor.py"]) == "monitor"
+    assert classify_cmdline(["python3", "scripts/start_inbox_listener.py"]) == "listener"
+    assert classify_cmdline(["node", "overnight_runner.js"]) is None
+
+
+def test_profiler_samples_own_process(tmp_path: Path) -> None:
+    pytest.importorskip("psutil")
+    from src.core.resource_profiler import ProcessTreeSampler
+
+    sampler = ProcessTreeSampler()
+    sample = sampler.sample("self", sampler.tree(os.getpid()))
+    assert sample.nprocs >= 1 and sample.rss > 0 and sample.threads >= 1
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+from advanced_workflows.response_router import ResponseRouter, get_router
+from advanced_workflows.workflow_engine import WorkflowEngine, WorkflowState, WorkflowStep
+
+
+def _reply(inbox: Path, name: str, agent: str, text: str) -> None:
+    envelope = {"type": "agent_response", "agent": agent, "ts": 0, "payload": {"type": "agent_freeform", "raw": text}}
+    (inbox / name).write_text(json.dumps(envelope), encoding="utf-8")
+
+
+def test_replies_are_ingested_once_and_routed_by_correlation_id(tmp_path: Path) -> None:
+    _reply(tmp_path, "old.json", "Agent-1", "stale reply from an earlier run")
+    router = ResponseRouter(tmp_path)
+
+    async def run() -> None:
+        a = router.expect("Agent-1", correlation_id="wf:a")
+        b = router.expect("Agent-1", correlation_id="wf:b")
+        other = router.expect("Agent-2")
+        _reply(tmp_path, "r1.json", "Agent-1", "done [ref: wf:b]")
+        _reply(tmp_path, "r2.json", "Agent-2", "no reference")
+        assert router.poll() == 2 and router.poll() == 0     # each file is read exactly once
+        await asyncio.sleep(0)
+        assert b.done() and not a.done() and (await b).correlation_id == "wf:b"
+        assert (await other).text == "no reference"
+
+        _reply(tmp_path, "r3.json", "Agent-1", "plain answer")
+        router.poll()
+        assert (await a).text == "plain answer"            # unreferenced replies go to the oldest waiter
+
+        _reply(tmp_path, "r4.json", "Agent-3", "early [ref: wf:c]")
+        router.poll()                                       # nobody waiting yet: buffered
+        assert router.expect("Agent-3", correlation_id="wf:d").done() is False
+        assert (await router.expect("Agent-3", correlation_id="wf:c")).text.startswith("early")
+
+    asyncio.run(run())
+    router.stop()
+
+
+def test_concurrent_workflows_share_one_router(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    inbox = tmp_path / "Agent-5" / "inbox"
+    inbox.mkdir(parents=True)
+    router = get_router(inbox)
+    router.poll_interval = 0.02
+    engines = [WorkflowEngine(f"wf{i}", agent_system_path=str(tmp_path)) for i in range(2)]
+    assert all(engine.router is router for engine in engines)
+
+    replies = iter(range(1000))
+
+    def agent_replies(engine: WorkflowEngine):
+        async def send(step: WorkflowStep) -> None:
+            # The agent answers a little later, echoing the reference, via the capture inbox
+            ref = engine.correlation_id(step)
+            timer = threading.Timer(0.05, _reply, (inbox, f"r{next(replies)}.json", step.agent_target, f"ok [ref: {ref}]"))
+            timer.start()
+        return send
+
+    for engine in engines:
+        engine._send_prompt_to_agent = agent_replies(engine)
+        for i, agent in enumerate(("Agent-1", "Agent-2")):
+            engine.add_step(WorkflowStep(id=f"s{i}", name=f"s{i}", description="", agent_target=agent,
+                                         prompt_template="go", expected_response_type="task_execution",
+                                         timeout_seconds=5))
+        engine.add_step(WorkflowStep(id="join", name="join", description="", agent_target="Agent-1",
+                                     prompt_template="go", expected_response_type="task_execution",
+                                     timeout_seconds=5, dependencies=["s0", "s1"]))
+
+    async def run_all() -> None:
+        for engine in engines:
+            engine.state = WorkflowState.RUNNING
+        await asyncio.gather(*(engine._execute_workflow() for engine in engines))
+
+    asyncio.run(run_all())
+    router.stop()
+    for engine in engines:
+        assert engine.state == WorkflowState.COMPLETED
+        refs = {r.correlation_id for r in engine.ai_responses}
+        assert refs == {f"{engine.workflow_name}:{sid}" for sid in ("s0", "s1", "join")}
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from overnight_runner.sharding import ShardCoordinator, ShardWorker
+
+
+class FakeClock:
+    def __init__(self, t: float = 1000.0) -> None:
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
+
+class FakeAcp:
+    def get_available_agents(self) -> list:
+        return ["Agent-1"]
+
+    def is_capture_enabled(self) -> bool:
+        return False
+
+
+def test_assignment_balances_and_dead_worker_agents_move() -> None:
+    clock = FakeClock()
+    coord = ShardCoordinator(["Agent-1", "Agent-2", "Agent-3", "Agent-4"], lease_sec=10, clock=clock)
+    coord.register("w1")
+    coord.register("w2", hostable=["Agent-2", "Agent-3", "Agent-4"])
+    owners = {a: coord.owner_of(a) for a in coord.agents}
+    assert owners["Agent-1"] == "w1"
+    assert sorted(owners.values()).count("w1") == 2 and sorted(owners.values()).count("w2") == 2
+
+    w2_agent = next(a for a, w in owners.items() if w == "w2")
+    w1_agent = next(a for a, w in owners.items() if w == "w1")
+    assert coord.dispatch(w2_agent, "TASK", "first")
+    handed = coord.heartbeat("w2")["commands"]
+    assert [c["agent"] for c in handed] == [w2_agent]
+    assert coord.dispatch(w2_agent, "SYNC", "queued, never handed out")
+
+    clock.t += 5
+    coord.heartbeat("w1", results=[])
+    clock.t += 6  # w2 is now 11s silent
+    reply = coord.heartbeat("w1")
+    assert sorted(reply["assignment"]) == sorted(coord.agents)
+    assert [c["content"] for c in reply["commands"]] == ["queued, never handed out"]
+    assert coord.stats["workers_dead"] == 1 and coord.stats["lost"] == 1 and coord.stats["released"] == 2
+
+    coord.heartbeat("w1", results=[{"id": reply["commands"][0]["command_id"], "ok": True}])
+    assert coord.stats["sent"] == 1
+    assert coord.dispatch(w1_agent, "TASK", "x")
+
+
+def test_unhosted_agent_is_undeliverable_and_states_feed_cache() -> None:
+    coord = ShardCoordinator(["Agent-1", "Agent-9"], clock=FakeClock())
+    coord.heartbeat("w1", hostable=["Agent-1"], states={"Agent-1": {"updated": "2025-01-01T00:00:10"}})
+    assert not coord.dispatch("Agent-9", "TASK", "nobody types this")
+    assert coord.stats["undeliverable"] == 1
+    coord.heartbeat("w1", states={"Agent-1": {"updated": "2025-01-01T00:00:10"}})
+    assert coord.state_cache.updated_at("Agent-1") == 1735689610.0
+
+
+def test_localhost_workers_with_test_cursor(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("ACP_HEARTBEAT_SEC", "0")
+    monkeypatch.setenv("ACP_SETTLE_DELAYS", "0")
+    from src.services.agent_cell_phone import AgentCellPhone
+
+    clock = FakeClock()
+    coord = ShardCoordinator(["Agent-1", "Agent-2"], lease_sec=5, envelope_dir=tmp_path / "coord_inbox", clock=clock)
+    host, port = coord.serve("127.0.0.1", 0)
+    try:
+        url = f"http://{host}:{port}"
+        envelopes = tmp_path / "w1_capture"
+        envelopes.mkdir()
+        (envelopes / "response_1_Agent-1.json").write_text(json.dumps({"agent": "Agent-1", "payload": {}}), encoding="utf-8")
+        w1 = ShardWorker(url, AgentCellPhone(layout_mode="5-agent", test=True), worker_id="w1",
+                         hostable=["Agent-1", "Agent-2"], envelope_dir=envelopes)
+        w2 = ShardWorker(url, AgentCellPhone(layout_mode="5-agent", test=True), worker_id="w2",
+                         hostable=["Agent-1", "Agent-2"])
+        assert w1.step() and w2.step() and w1.step()  # w1 learns about the handover
+        assert sorted(w1.assignment + w2.assignment) == ["Agent-1", "Agent-2"]
+        assert (tmp_path / "coord_inbox" / "response_1_Agent-1.json").exists()
+        assert not list(envelopes.iterdir())
+
+        w2_agent = w2.assignment[0]
+        assert coord.dispatch(w2_agent, "TASK", "hello from the captain")
+        assert w2.step()
+        assert "type([TASK] hello from the captain)" in w2.acp._cursor.record
+        assert w2.stats["sent"] == 1
+
+        clock.t += 6  # w2 stops heartbeating
+        w1.step()
+        assert sorted(w1.assignment) == ["Agent-1", "Agent-2"]
+        assert coord.dispatch(w2_agent, "SYNC", "moved")
+        w1.step()
+        assert "type([SYNC] moved)" in w1.acp._cursor.record
+        w1.step()  # acknowledges the send
+        status = coord.status()
+        assert list(status["workers"]) == ["w1"]
+        # w2 died before acknowledging its send; it is counted lost, not retyped
+        assert status["stats"]["sent"] == 1 and status["stats"]["lost"] == 1
+    finally:
+        coord.close()
+
+
+def test_worker_refuses_to_ship_from_the_coordinator_inbox(tmp_path: Path) -> None:
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    (inbox / "response_1_Agent-1.json").write_text(json.dumps({"agent": "Agent-1"}), encoding="utf-8")
+    coord = ShardCoordinator(["Agent-1"], envelope_dir=inbox, clock=FakeClock())
+    host, port = coord.serve("127.0.0.1", 0)
+    try:
+        worker = ShardWorker(f"http://{host}:{port}", FakeAcp(), worker_id="w1", envelope_dir=inbox)
+        with pytest.raises(RuntimeError, match="coordinator's inbox"):
+            worker.step()
+        assert (inbox / "response_1_Agent-1.json").exists()
+        assert worker.stats["envelopes"] == 0
+    finally:
+        coord.close()
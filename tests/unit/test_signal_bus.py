@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+
+from overnight_runner.signal_bus import RESUME_NOW, UI_REQUEST, Signal, SignalBus, publish_signal
+
+
+def _wait_for(predicate, timeout: float = 3.0) -> bool:
+    end = time.time() + timeout
+    while time.time() < end:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_publish_falls_back_to_file_and_bus_drains_it(tmp_path: Path) -> None:
+    assert publish_signal(tmp_path, RESUME_NOW, "Agent-1", {"task_id": "T1"}) == "file"
+    assert (tmp_path / "resume_now_Agent-1.signal").exists()
+
+    got = []
+    bus = SignalBus(tmp_path, got.append, kinds={RESUME_NOW}).start()
+    try:
+        assert _wait_for(lambda: got)
+        assert got[0].agent == "Agent-1" and got[0].payload["task_id"] == "T1"
+        assert got[0].transport == "file"
+        assert not (tmp_path / "resume_now_Agent-1.signal").exists()
+    finally:
+        bus.stop()
+
+
+def test_socket_delivery_and_foreign_kinds_stay_on_disk(tmp_path: Path) -> None:
+    got = []
+    bus = SignalBus(tmp_path, got.append, kinds={RESUME_NOW}).start()
+    try:
+        assert publish_signal(tmp_path, RESUME_NOW, "Agent-2") == "socket"
+        assert _wait_for(lambda: got)
+        assert got[0].agent == "Agent-2" and got[0].transport == "socket"
+
+        publish_signal(tmp_path, UI_REQUEST, "Agent-2", {"intent": "open"})
+        assert _wait_for(lambda: (tmp_path / "ui_request_Agent-2.json").exists())
+        assert len(got) == 1
+    finally:
+        bus.stop()
+
+
+def test_repeated_signals_are_coalesced_while_pending(tmp_path: Path) -> None:
+    release = threading.Event()
+    got = []
+
+    def slow_handler(sig: Signal) -> None:
+        release.wait(2.0)
+        got.append(sig)
+
+    bus = SignalBus(tmp_path, slow_handler, kinds={RESUME_NOW}).start()
+    try:
+        bus.submit(Signal(RESUME_NOW, "Agent-9"))
+        assert _wait_for(lambda: not bus._pending)  # first one is being handled
+        for _ in range(5):
+            bus.submit(Signal(RESUME_NOW, "Agent-1", created_at=100.0))
+        release.set()
+        assert _wait_for(lambda: len(got) == 2)
+        merged = got[1]
+        assert merged.agent == "Agent-1" and merged.count == 5 and merged.created_at == 100.0
+        assert bus.stats["coalesced"] == 4
+    finally:
+        bus.stop()
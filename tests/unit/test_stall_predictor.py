@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from src.core.metrics_store import FLEET, MetricsStore
+from src.core.stall_predictor import (
+    TAG_CODES, Dataset, Sample, StallFeatures, StallModel, build_dataset, evaluate, label_samples, load_model, tag_code,
+)
+
+
+def test_labels_features_and_tags() -> None:
+    samples = [Sample(ts=60.0 * i, age_sec=60.0 * i, stalled=i >= 3) for i in range(5)]
+    ds = Dataset()
+    label_samples("Agent-1", samples, horizon_sec=120, ds=ds)
+    assert ds.ts == [0.0, 60.0, 120.0]          # stalled samples are not prediction targets
+    assert ds.y == [0, 1, 1] and ds.onsets == [("Agent-1", 180.0)]
+
+    feats = StallFeatures()
+    for size in (1000, 1000, 1000):
+        x = feats.update("Agent-2", Sample(ts=0.0, age_sec=0.0, reply_bytes=size))
+    assert x[3] == 0.0                              # unchanged size is not a new reply
+    x = feats.update("Agent-2", Sample(ts=0.0, age_sec=0.0, reply_bytes=50))
+    assert x[3] < -2                                # replies got much shorter
+
+    assert tag_code("[RESCUE]") == TAG_CODES["rescue"] and tag_code(None) == TAG_CODES["none"]
+    assert tag_code("[VERIFY]") == TAG_CODES["other"]
+
+
+def test_train_evaluate_and_reload(tmp_path: Path) -> None:
+    store = MetricsStore(tmp_path / "m.sqlite")
+    t0 = 1_700_000_000.0
+    # Agent-1 replies every 5 minutes; Agent-2 goes quiet for 30 minutes, stalling after 20
+    for i in range(24 * 60 // 2):
+        ts = t0 + i * 120
+        for agent, period in (("Agent-1", 300), ("Agent-2", 1800)):
+            age = (ts - t0) % period
+            store.record([
+                ("age_sec", agent, age),
+                ("stalled", agent, age >= 1200),
+                ("events_last_hour", agent, 3600 / period),
+                ("last_tag", agent, TAG_CODES["task"]),
+            ], ts=ts)
+        store.record([("agents_stalled", FLEET, 0)], ts=ts)
+
+    ds = build_dataset(store, since=t0, until=t0 + 86400, horizon_sec=600)
+    assert set(ds.agents) == {"Agent-1", "Agent-2"} and len(ds.onsets) == 48
+    train, test = ds.split(t0 + 18 * 3600)
+    model = StallModel(horizon_sec=600).fit(train.X, train.y, epochs=200)
+    model.tune_threshold(train, min_precision=0.8)
+
+    report = evaluate(model, test)
+    assert report["precision"] >= 0.8 and report["recall"] >= 0.8
+    assert report["onsets_flagged"] == report["onsets"] and report["mean_lead_sec"] >= 300
+
+    model.save(tmp_path / "model.json")
+    again = load_model(tmp_path / "model.json")
+    assert again is not None and again.score(test.X[0]) == model.score(test.X[0])
+    assert load_model(tmp_path / "missing.json") is None
+    store.close()
@@ -0,0 +1,84 @@
+import pathlib
+import random
+import sys
+import time
+
+# Import the task manager modules without executing the package __init__
+repo_root = pathlib.Path(__file__).resolve().parents[2]
+sys.path.append(str(repo_root / "src" / "collaborative" / "task_manager"))
+from enhanced_task_breakdown import EnhancedTaskBreakdown, TaskComplexity, TaskComponent, TaskPriority, TaskType  # type: ignore
+from task_scheduler import Job, Worker, critical_path, list_schedule  # type: ignore
+
+
+def test_cpm_and_resource_constrained_schedule() -> None:
+    #   a(2) -> b(4) -> d(1)
+    #   a(2) -> c(1) -> d
+    jobs = [Job("a", 2), Job("b", 4, ["a"]), Job("c", 1, ["a"]), Job("d", 1, ["b", "c"])]
+    cpm = critical_path(jobs)
+    assert cpm.critical_path == ["a", "b", "d"] and cpm.makespan == 7
+    assert cpm.slack == {"a": 0, "b": 0, "c": 3, "d": 0}
+    assert cpm.earliest_start["d"] == 6 and cpm.latest_start["c"] == 5
+
+    # One agent: no parallelism, b and c serialize
+    solo = list_schedule(jobs, [Worker("A1")])
+    assert solo.makespan == 8 and solo.by_worker() == {"A1": ["a", "b", "c", "d"]}
+    # Two agents, but only A2 can do c: it runs beside b
+    duo = list_schedule(jobs, [Worker("A1"), Worker("A2", available_at=1)],
+                        eligible=lambda w, j: j != "c" or w == "A2")
+    assert duo.makespan == 7 and duo.jobs["c"].worker_id == "A2" and duo.jobs["c"].start == 2
+    # Nobody can do c: it is reported and still delays d
+    stuck = list_schedule(jobs, [Worker("A1", capacity=2)], eligible=lambda w, j: j != "c")
+    assert stuck.unassigned == ["c"] and stuck.jobs["d"].start == 6
+
+    try:
+        critical_path([Job("x", 1, ["y"]), Job("y", 1, ["x"])])
+    except ValueError as e:
+        assert "cycle" in str(e)
+    else:
+        raise AssertionError("cycle not detected")
+
+    # Hundreds of components over 8+ agents in well under a second
+    rng = random.Random(7)
+    big = [Job(f"j{i}", rng.uniform(0.5, 8), [f"j{d}" for d in rng.sample(range(i), min(i, rng.randint(0, 3)))])
+           for i in range(600)]
+    t0 = time.perf_counter()
+    plan = list_schedule(big, [Worker(f"Agent-{k}") for k in range(1, 11)], preference=lambda w, j: -len(w))
+    assert time.perf_counter() - t0 < 0.5
+    assert plan.makespan >= critical_path(big).makespan and not plan.unassigned
+    for job in big:
+        assert all(plan.jobs[d].finish <= plan.jobs[job.job_id].start for d in job.dependencies)
+
+
+def test_breakdown_uses_schedule_for_allocation(tmp_path: pathlib.Path) -> None:
+    etb = EnhancedTaskBreakdown(tmp_path)
+    etb.create_agent_capability_profile("Agent-1", ["python", "analysis"], ["testing"], 0.9)
+    etb.create_agent_capability_profile("Agent-2", ["python"], [], 0.6)
+    etb.create_agent_capability_profile("Agent-3", ["testing"], [], 0.7)
+
+    def comp(cid: str, hours: float, skills: list, deps: list) -> TaskComponent:
+        return TaskComponent(cid, "T", cid, "", TaskType.DEVELOPMENT, TaskComplexity.SIMPLE, TaskPriority.NORMAL,
+                             hours, skills, deps, None, "pending", "", "")
+
+    # The old greedy pick sent both python parts to Agent-1 (highest suitability)
+    parts = [comp("spec", 2, ["analysis"], []), comp("api", 6, ["python"], ["spec"]),
+             comp("ui", 6, ["python"], ["spec"]), comp("qa", 3, ["testing"], ["api", "ui"])]
+    schedule = etb.schedule_components(parts)
+    allocation = etb._apply_schedule(parts, schedule)
+    assert {schedule.jobs["api"].worker_id, schedule.jobs["ui"].worker_id} == {"Agent-1", "Agent-2"}
+    assert schedule.makespan == 11 and allocation["Agent-1"][0] == "spec"
+    assert schedule.jobs["qa"].worker_id in ("Agent-1", "Agent-3") and parts[3].status == "assigned"
+
+    # Generated components form a phase DAG: the middle phase runs in parallel
+    breakdown = etb.breakdown_complex_task("T-9", "Build", "desc", 12.0, ["python", "testing", "analysis"])
+    design, core, tests, integration = (c.component_id for c in breakdown.components)
+    assert breakdown.components[1].dependencies == [design] and breakdown.components[2].dependencies == [design]
+    assert breakdown.components[3].dependencies == [core, tests]
+    assert breakdown.critical_path in ([design, core, integration], [design, tests, integration])
+    serial = sum(c.estimated_hours for c in breakdown.components)
+    assert breakdown.makespan_hours == 9.0 < serial and len(breakdown.schedule) == 4
+
+    again = etb.optimize_existing_breakdown(breakdown.breakdown_id)
+    assert again is not None and again.makespan_hours == 9.0
+
+    large = etb.breakdown_complex_task("T-10", "Platform", "desc", 24.0, ["python", "testing", "analysis"])
+    assert len(large.critical_path) == 4 and large.makespan_hours < sum(c.estimated_hours for c in large.components)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+from src.core.term_stream import RotatingLog, TermChannel, TermSupervisor
+
+
+class FakeClock:
+    def __init__(self, t: float = 1000.0) -> None:
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
+
+def test_channel_counts_in_memory_and_debounces_state(tmp_path: Path) -> None:
+    clock = FakeClock()
+    ch = TermChannel("7", tmp_path, cmd="build", state_interval=2.0, log_max_bytes=0, clock=clock)
+    assert ch.snapshot()
+    for _ in range(500):
+        ch.feed("stdout", b"compiling module\nlinking ")
+        ch.feed("stdout", b"done\n")
+        assert not ch.snapshot()  # within the debounce window
+    ch.feed("stderr", b"warning: partial")
+    clock.t += 2.0
+    assert ch.snapshot() and ch.state_writes == 2
+
+    state = json.loads((tmp_path / "agent-7" / "term_state.json").read_text(encoding="utf-8"))
+    assert state["lines_out"] == 1000 and state["bytes_out"] == 500 * (25 + 5)
+    assert state["lines_err"] == 0 and state["last_output_at"].endswith("Z")
+    ch.close()
+    log = (tmp_path / "agent-7" / "term.log").read_text(encoding="utf-8").splitlines()
+    assert len(log) == 1001 and log[1].endswith("[stdout] linking done")
+    assert log[-1].endswith("[stderr] warning: partial")
+
+
+def test_rotating_log_keeps_backups(tmp_path: Path) -> None:
+    log = RotatingLog(tmp_path / "term.log", max_bytes=100, backups=2)
+    for i in range(10):
+        log.write(b"x" * 40 + b"\n")
+    log.close()
+    assert log.rotations == 4
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["term.log", "term.log.1", "term.log.2"]
+
+
+def test_supervisor_multiplexes_terminals(tmp_path: Path) -> None:
+    sup = TermSupervisor(tmp_path, state_interval=0.5, heartbeat_secs=0.2)
+    code = "import sys\nfor i in range({n}): print('line', i)\nsys.stderr.write('bye')\nsys.exit({rc})"
+    sup.add("1", [sys.executable, "-c", code.format(n=2000, rc=0)])
+    sup.add("2", [sys.executable, "-c", code.format(n=10, rc=3)])
+    assert sup.run() == {"1": 0, "2": 3}
+
+    s1 = json.loads((tmp_path / "agent-1" / "term_state.json").read_text(encoding="utf-8"))
+    s2 = json.loads((tmp_path / "agent-2" / "term_state.json").read_text(encoding="utf-8"))
+    assert s1["lines_out"] == 2000 and s1["lines_err"] == 1 and s1["status"] == "exited"
+    assert s2["exit_code"] == 3 and s2["lines_out"] == 10
+    events = [json.loads(l) for l in (tmp_path / "events.ndjson").read_text(encoding="utf-8").splitlines()]
+    assert sorted(e["agent_id"] for e in events) == ["1", "2"]
+    assert all(e["kind"] == "terminal_exit" for e in events)
+    # A few snapshots per terminal, not one per line
+    assert sup.channels["1"].state_writes < 20
+
+
+def test_late_grandchild_output_after_finish_is_dropped(tmp_path: Path) -> None:
+    sup = TermSupervisor(tmp_path, state_interval=0.5, heartbeat_secs=0.1)
+    # The child exits at once, but a grandchild keeps its stdout and writes after the grace period
+    late = "import time; time.sleep(0.6); print('late', flush=True)"
+    spawn = f"import subprocess, sys; subprocess.Popen([sys.executable, '-c', {late!r}]); print('early')"
+    sup.add("1", [sys.executable, "-c", spawn])
+    sup.add("2", [sys.executable, "-c", "import time; time.sleep(1.2)"])
+    assert sup.run() == {"1": 0, "2": 0}
+
+    assert sup.channels["1"].closed and sup._reader.count == 0
+    log = (tmp_path / "agent-1" / "term.log").read_text(encoding="utf-8")
+    assert "early" in log and "late" not in log
+    sup.channels["1"].feed("stdout", b"after close\n")  # no-op instead of writing to a closed log
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from overnight_runner.listener import create_message_handler
+from src.core import tracing
+from src.core.tracing import extract, inject, read_spans, render_timeline, spans_for_task
+
+
+def test_spans_follow_a_task_across_an_envelope(tmp_path: Path) -> None:
+    tracer = tracing.configure(enabled=True, sample_rate=1.0, directory=tmp_path / "spans", service="runner")
+    try:
+        with tracer.span("runner.send", task_id="task-7", agent="Agent-1") as send:
+            with tracer.span("acp.send", agent="Agent-1"):
+                pass
+            envelope = inject({"type": "fsm_update", "task_id": "task-7", "state": "done"})
+        assert extract(envelope) == send.context and tracing.current_span() is None
+
+        # "another process": the listener continues the trace from the envelope
+        handler = create_message_handler("Agent-1", tmp_path / "state.json", tmp_path / "signals", verbose=False)
+        handler(envelope)
+        handler({"type": "note", "task_id": "task-8"})  # unrelated task, its own trace
+        with tracer.span("capture.route", agent="Agent-2"):  # no task_id: not part of task-7
+            pass
+        tracer.flush()
+    finally:
+        tracing.configure(enabled=False)
+
+    spans = spans_for_task(read_spans(tmp_path / "spans"), "task-7")
+    names = [s["name"] for s in spans]
+    assert names == ["runner.send", "acp.send", "listener.handle"]
+    by_name = {s["name"]: s for s in spans}
+    assert len({s["trace_id"] for s in spans}) == 1
+    assert by_name["acp.send"]["parent_id"] == by_name["runner.send"]["span_id"]
+    assert by_name["listener.handle"]["parent_id"] == by_name["runner.send"]["span_id"]
+    assert by_name["acp.send"]["task_id"] == "task-7" and by_name["listener.handle"]["attrs"]["type"] == "fsm_update"
+
+    timeline = render_timeline(spans, width=20)
+    assert timeline.splitlines()[2].split()[3] == "acp.send" and "|" in timeline
+
+
+def test_sampling_is_per_task_and_disabled_is_free(tmp_path: Path) -> None:
+    a = tracing.Tracer(tracing.NdjsonSink(tmp_path, "a"), sample_rate=0.5)
+    b = tracing.Tracer(tracing.NdjsonSink(tmp_path, "b"), sample_rate=0.5)
+    decisions = [a._sampled(f"task-{i}") for i in range(200)]
+    assert decisions == [b._sampled(f"task-{i}") for i in range(200)]
+    assert 50 < sum(decisions) < 150
+
+    unsampled = next(f"task-{i}" for i, d in enumerate(decisions) if not d)
+    with a.span("runner.send", task_id=unsampled) as root:
+        with a.span("acp.send") as child:
+            assert child.context is root.context and not root.context.sampled
+        assert inject({}) == {}  # receivers re-derive the decision from the task_id
+    a.flush()
+    assert read_spans(tmp_path) == []
+
+    off = tracing.Tracer(None)
+    assert not off.enabled and off.span("x") is off.span("y")
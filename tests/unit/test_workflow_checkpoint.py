@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from advanced_workflows.checkpoint import WorkflowCheckpoint
+from advanced_workflows.workflow_engine import AIResponse, WorkflowEngine, WorkflowState, WorkflowStep
+
+
+def _engine(crash_on: str | None = None, **kwargs) -> tuple[WorkflowEngine, list]:
+    engine = WorkflowEngine("ckpt", **kwargs)
+    ran: list = []
+    for sid, deps in (("plan", []), ("build_a", ["plan"]), ("build_b", ["plan"]), ("ship", ["build_a", "build_b"])):
+        engine.add_step(WorkflowStep(id=sid, name=sid, description=sid, agent_target=f"Agent-{len(ran) + 1}",
+                                     prompt_template=sid, expected_response_type="task_execution", dependencies=deps))
+
+    async def reply(step: WorkflowStep):
+        if step.id == crash_on:
+            raise KeyboardInterrupt  # the process dies mid-graph
+        ran.append(step.id)
+        await asyncio.sleep(0)
+        return AIResponse(agent=step.agent_target, text=f"out {step.id}", timestamp=time.time(), message_id=step.id)
+
+    engine._wait_for_ai_response = reply
+    return engine, ran
+
+
+def test_resume_continues_mid_graph_after_a_crash(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    first, ran = _engine(crash_on="ship", max_concurrency=1)
+    with pytest.raises(KeyboardInterrupt):
+        first.start()
+    assert ran == ["plan", "build_a", "build_b"]
+
+    state_dir = tmp_path / "workflow_states" / "ckpt"
+    journal = (state_dir / "journal.ndjson").read_text().splitlines()
+    steps = [json.loads(line) for line in journal if '"kind": "step"' in line]
+    assert [r["step"] for r in steps] == ["plan", "build_a", "build_b"]
+    # each record holds only what its step wrote, not the whole workflow_data
+    assert set(steps[1]["data"]) == {"task_build_a", "response_build_a"}
+    with open(state_dir / "journal.ndjson", "a") as f:
+        f.write('{"seq": 99, "kind": "st')  # torn write at the moment of the crash
+
+    second, ran = _engine()
+    assert second.resume("ckpt")
+    assert ran == ["ship"] and second.state == WorkflowState.COMPLETED
+    assert second.workflow_data["task_build_b"]["result"] == "out build_b"
+    assert second.completed_steps == {"plan", "build_a", "build_b", "ship"}
+
+    again = WorkflowCheckpoint(state_dir).load()
+    assert again["state"] == "completed" and len(again["completed_steps"]) == 4
+
+
+def test_snapshots_compact_the_journal_and_are_retained(tmp_path: Path) -> None:
+    ckpt = WorkflowCheckpoint(tmp_path, snapshot_every=3, keep_snapshots=2, max_age_days=1)
+    (tmp_path / "1700000000.json").write_text(json.dumps({"completed_steps": ["legacy"], "workflow_data": {}}))
+    assert ckpt.load()["completed_steps"] == ["legacy"]   # old full snapshots still load
+
+    for i in range(7):
+        ckpt.record_step(f"s{i}", "completed", {f"k{i}": i})
+        if ckpt.due:
+            ckpt.snapshot(WorkflowCheckpoint(tmp_path).load())
+    ckpt.record_step("s3", "failed")
+    ckpt.close()
+
+    snapshots = sorted(p.name for p in tmp_path.glob("snapshot-*.json"))
+    assert len(snapshots) == 2 and not (tmp_path / "1700000000.json").exists()
+    assert len((tmp_path / "journal.ndjson").read_text().splitlines()) == 2
+    state = WorkflowCheckpoint(tmp_path).load()
+    assert state["completed_steps"] == ["legacy", "s0", "s1", "s2", "s4", "s5", "s6"]  # latest status wins
+    assert state["failed_steps"] == ["s3"] and state["workflow_data"]["k6"] == 6
+
+    old = time.time() - 3 * 86400
+    for p in tmp_path.glob("snapshot-*.json"):
+        os.utime(p, (old, old))
+    assert ckpt.prune() == 1 and len(list(tmp_path.glob("snapshot-*.json"))) == 1  # the newest always stays
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from advanced_workflows.workflow_engine import AIResponse, WorkflowEngine, WorkflowState, WorkflowStep
+
+
+def _engine(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, latency: dict, **kwargs) -> tuple[WorkflowEngine, list]:
+    """Engine whose agents answer after ``latency[step_id]`` seconds (default 0.01)."""
+    monkeypatch.chdir(tmp_path)
+    engine = WorkflowEngine("dag", agent_system_path=str(tmp_path), **kwargs)
+    log: list = []
+
+    async def reply(step: WorkflowStep):
+        log.append(("start", step.id, time.perf_counter()))
+        await asyncio.sleep(latency.get(step.id, 0.01))
+        log.append(("end", step.id, time.perf_counter()))
+        return AIResponse(agent=step.agent_target, text=f"done {step.id}", timestamp=time.time(), message_id=step.id)
+
+    engine._wait_for_ai_response = reply
+    return engine, log
+
+
+def _step(sid: str, agent: str, deps: list | None = None, timeout: int = 300) -> WorkflowStep:
+    return WorkflowStep(id=sid, name=sid, description=sid, agent_target=agent, prompt_template=sid,
+                        expected_response_type="task_execution", timeout_seconds=timeout, dependencies=deps or [])
+
+
+def test_independent_steps_overlap_but_agents_take_one_prompt_at_a_time(tmp_path, monkeypatch) -> None:
+    engine, log = _engine(tmp_path, monkeypatch, {"a1": 0.05, "b": 0.05, "a2": 0.05})
+    for step in (_step("a1", "Agent-1"), _step("b", "Agent-2"), _step("a2", "Agent-1"),
+                 _step("join", "Agent-3", ["a1", "b", "a2"])):
+        engine.add_step(step)
+    engine.start()
+
+    assert engine.state == WorkflowState.COMPLETED and engine.completed_steps == {"a1", "b", "a2", "join"}
+    at = {(kind, sid): t for kind, sid, t in log}
+    assert at[("start", "b")] < at[("end", "a1")]            # different agents run concurrently
+    assert at[("start", "a2")] >= at[("end", "a1")]          # same agent waits for its window
+    assert at[("start", "join")] >= max(at[("end", s)] for s in ("a1", "b", "a2"))
+    assert engine.workflow_data["task_join"]["result"] == "done join"
+
+
+def test_timeouts_cancellation_and_bad_graphs_fail_only_their_branch(tmp_path, monkeypatch) -> None:
+    engine, log = _engine(tmp_path, monkeypatch, {"slow": 5.0, "stuck": 5.0})
+    for step in (_step("slow", "Agent-1", timeout=1), _step("after_slow", "Agent-1", ["slow"]),
+                 _step("stuck", "Agent-2"), _step("after_stuck", "Agent-3", ["stuck"]),
+                 _step("ok", "Agent-4"), _step("orphan", "Agent-4", ["missing"]),
+                 _step("x", "Agent-5", ["y"]), _step("y", "Agent-5", ["x"]), _step("ok", "Agent-6")):
+        engine.add_step(step)
+
+    async def cancel_stuck() -> None:
+        while "stuck" not in engine._tasks:
+            await asyncio.sleep(0.01)
+        assert engine.cancel_step("stuck")
+
+    async def run() -> None:
+        asyncio.get_running_loop().create_task(cancel_stuck())
+        await engine._execute_workflow()
+
+    started = time.perf_counter()
+    engine.state = WorkflowState.RUNNING
+    asyncio.run(run())
+
+    assert time.perf_counter() - started < 3
+    assert engine.completed_steps == {"ok"}
+    assert engine.failed_steps == {"slow", "after_slow", "stuck", "after_stuck", "orphan", "x", "y"}
+    assert engine.state == WorkflowState.FAILED and not engine.cancel_step("stuck")
+    assert [sid for kind, sid, _ in log if kind == "start"].count("ok") == 1  # duplicate id runs once